@@ -0,0 +1,62 @@
+"""Payment resource indexes
+
+Revision ID: 3c7d9e21b5a8
+Revises: e52c67f37b76
+Create Date: 2026-10-17 10:12:41.318204
+
+"""
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision = "3c7d9e21b5a8"
+down_revision = "e52c67f37b76"
+branch_labels = None
+depends_on = None
+
+# Matches `app.models.openpayments.functions`
+CREATE_RESOURCE_IDS_FUNCTION = """
+CREATE OR REPLACE FUNCTION openpayments_resource_ids(resources jsonb[]) RETURNS text[]
+LANGUAGE sql IMMUTABLE PARALLEL SAFE
+AS $$ SELECT coalesce(array_agg(resource ->> 'id'), '{}') FROM unnest(resources) AS resource $$
+"""
+
+
+def upgrade():
+    op.execute(CREATE_RESOURCE_IDS_FUNCTION)
+    op.add_column(
+        "openreceipt",
+        sa.Column("outgoing_payments", postgresql.ARRAY(postgresql.JSONB(astext_type=sa.Text())), nullable=True),
+    )
+    op.create_index(
+        "ix_openorder_incoming_payment_ids",
+        "openorder",
+        [sa.text("openpayments_resource_ids(incoming_payments)")],
+        unique=False,
+        postgresql_using="gin",
+    )
+    op.create_index(
+        "ix_openorder_incoming_quote_ids",
+        "openorder",
+        [sa.text("openpayments_resource_ids(incoming_quotes)")],
+        unique=False,
+        postgresql_using="gin",
+    )
+    op.create_index(
+        "ix_openreceipt_outgoing_payment_ids",
+        "openreceipt",
+        [sa.text("openpayments_resource_ids(outgoing_payments)")],
+        unique=False,
+        postgresql_using="gin",
+    )
+
+
+def downgrade():
+    op.drop_index("ix_openreceipt_outgoing_payment_ids", table_name="openreceipt", postgresql_using="gin")
+    op.drop_index("ix_openorder_incoming_quote_ids", table_name="openorder", postgresql_using="gin")
+    op.drop_index("ix_openorder_incoming_payment_ids", table_name="openorder", postgresql_using="gin")
+    op.drop_column("openreceipt", "outgoing_payments")
+    op.execute("DROP FUNCTION IF EXISTS openpayments_resource_ids(jsonb[])")
@@ -0,0 +1,28 @@
+"""Keyset pagination indexes
+
+Revision ID: 5e81b0c4a7d3
+Revises: 9a4e6f0d2c17
+Create Date: 2026-10-17 16:05:12.604417
+
+"""
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = "5e81b0c4a7d3"
+down_revision = "9a4e6f0d2c17"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index("ix_actor_type_discoverable_id", "actor", ["type", "discoverable", "id"], unique=False)
+    op.create_index("ix_actor_creator_id_id", "actor", ["creator_id", "id"], unique=False)
+    op.create_index("ix_token_authenticates_id_token", "token", ["authenticates_id", "token"], unique=False)
+
+
+def downgrade():
+    op.drop_index("ix_token_authenticates_id_token", table_name="token")
+    op.drop_index("ix_actor_creator_id_id", table_name="actor")
+    op.drop_index("ix_actor_type_discoverable_id", table_name="actor")
@@ -0,0 +1,43 @@
+"""Receipt settlement
+
+Revision ID: 9a4e6f0d2c17
+Revises: 3c7d9e21b5a8
+Create Date: 2026-10-17 14:36:08.540912
+
+"""
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision = "9a4e6f0d2c17"
+down_revision = "3c7d9e21b5a8"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    settlement = postgresql.ENUM("Pending", "Completed", "Failed", "Unknown", name="paymentsettlementtype")
+    settlement.create(op.get_bind(), checkfirst=True)
+    op.add_column(
+        "openreceipt",
+        sa.Column(
+            "settlement",
+            postgresql.ENUM(
+                "Pending", "Completed", "Failed", "Unknown", name="paymentsettlementtype", create_type=False
+            ),
+            server_default="Pending",
+            nullable=False,
+        ),
+    )
+    op.add_column("openreceipt", sa.Column("sentAmount", sa.String(), nullable=True))
+    op.add_column("openreceipt", sa.Column("settled", sa.DateTime(timezone=True), nullable=True))
+
+
+def downgrade():
+    op.drop_column("openreceipt", "settled")
+    op.drop_column("openreceipt", "sentAmount")
+    op.drop_column("openreceipt", "settlement")
+    postgresql.ENUM(name="paymentsettlementtype").drop(op.get_bind(), checkfirst=True)
@@ -0,0 +1,37 @@
+"""Token id
+
+Revision ID: b7d2e5a19c64
+Revises: 5e81b0c4a7d3
+Create Date: 2026-10-17 18:42:37.215630
+
+"""
+
+from alembic import op
+import sqlalchemy as sa
+from ulid import ULID
+
+
+# revision identifiers, used by Alembic.
+revision = "b7d2e5a19c64"
+down_revision = "5e81b0c4a7d3"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column("token", sa.Column("id", sa.String(length=26), nullable=True))
+    connection = op.get_bind()
+    token = sa.table("token", sa.column("token", sa.String()), sa.column("id", sa.String()))
+    for (value,) in connection.execute(sa.select(token.c.token)).all():
+        connection.execute(token.update().where(token.c.token == value).values(id=str(ULID())))
+    op.alter_column("token", "id", nullable=False)
+    op.create_unique_constraint("token_id_key", "token", ["id"])
+    op.drop_index("ix_token_authenticates_id_token", table_name="token")
+    op.create_index("ix_token_authenticates_id_id", "token", ["authenticates_id", "id"], unique=False)
+
+
+def downgrade():
+    op.drop_index("ix_token_authenticates_id_id", table_name="token")
+    op.create_index("ix_token_authenticates_id_token", "token", ["authenticates_id", "token"], unique=False)
+    op.drop_constraint("token_id_key", "token", type_="unique")
+    op.drop_column("token", "id")
@@ -20,10 +20,11 @@ along with this program.  If not, see <http:#www.gnu.org/licenses/>.
 
 from typing import Annotated, Any
 
-from fastapi import APIRouter, Depends, HTTPException, status, File, UploadFile
+from fastapi import APIRouter, Depends, HTTPException, Response, status, File, UploadFile
 from sqlalchemy.orm import Session
 from pathlib import Path
 from ulid import ULID
+from bovine.types import Visibility
 
 from app import crud, models, schemas, schema_types
 from app.api import deps
@@ -277,17 +278,25 @@ async def get_actors_for_creator(
     *,
     db: Annotated[Session, Depends(deps.get_db)],
     creator: Annotated[models.Creator, Depends(deps.get_active_creator)],
+    response: Response,
     actor_type: schema_types.ActorType = None,
+    after: str | None = None,
+    limit: int = settings.MULTI_MAX,
     page: int = 0,
     page_break: bool = True,
     language: str | None = settings.SERVER_LANGUAGE,
 ) -> Any:
     """
     For the current creator, get a list of all the Actor identities they control. Default is to get everything.
+
+    Without `page_break`, pages of `limit` actors are returned, with the cursor for the next page, to be sent as
+    `after`, in the `X-Next-Cursor` header.
     """
     db_objs = crud.actor.get_actors_by_creator(
-        db_creator=creator, page=page, actor_type=actor_type, page_break=page_break
+        db_creator=creator, after=after, limit=limit, page=page, actor_type=actor_type, page_break=page_break
     )
+    if not page_break:
+        deps.set_next_cursor(response, crud.actor.get_next_cursor(db_objs, limit=limit))
     return [
         await crud.actor.get_profile_by_language(db=db, db_obj=db_obj, language=language, as_local=True)
         for db_obj in db_objs
@@ -347,12 +356,18 @@ async def get_actor_statuses(
 def read_all_working_creators(
     *,
     db: Annotated[Session, Depends(deps.get_db)],
+    response: Response,
+    after: str | None = None,
+    limit: int = settings.MULTI_MAX,
     page: int = 0,
 ) -> Any:
     """
-    Retrieve all discoverable working creators.
+    Retrieve all discoverable working creators, a page of `limit` at a time. The cursor for the next page, to be sent
+    as `after`, is in the `X-Next-Cursor` header.
     """
-    return crud.actor.get_multi_creators(db=db, page=page)
+    db_objs = crud.actor.get_multi_discoverable(db=db, after=after, limit=limit, page=page)
+    deps.set_next_cursor(response, crud.actor.get_next_cursor(db_objs, limit=limit))
+    return [crud.actor.get_wellknown_actor(db=db, db_obj=db_obj, visibility=Visibility.OWNER) for db_obj in db_objs]
 
 
 # @router.get("/all", response_model=List[schemas.Creator])
@@ -20,7 +20,7 @@ along with this program.  If not, see <http:#www.gnu.org/licenses/>.
 
 from typing import Annotated, Any, List
 
-from fastapi import APIRouter, Body, Depends, HTTPException
+from fastapi import APIRouter, Body, Depends, HTTPException, Response
 from fastapi.encoders import jsonable_encoder
 from pydantic.networks import EmailStr
 from sqlalchemy.orm import Session
@@ -107,13 +107,18 @@ async def read_creator_identities(
     *,
     db: Annotated[Session, Depends(deps.get_db)],
     creator: Annotated[models.Creator, Depends(deps.get_active_creator)],
+    response: Response,
+    after: str | None = None,
+    limit: int = settings.MULTI_MAX,
     page: int = 0,
     language: str | None = settings.SERVER_LANGUAGE,
 ) -> Any:
     """
-    For the current creator, get a list of all the Actor identities they control.
+    For the current creator, get a list of all the Actor identities they control, a page of `limit` at a time. The
+    cursor for the next page, to be sent as `after`, is in the `X-Next-Cursor` header.
     """
-    db_objs = crud.actor.get_actors_by_creator(db_creator=creator, page=page)
+    db_objs = crud.actor.get_actors_by_creator(db_creator=creator, after=after, limit=limit, page=page)
+    deps.set_next_cursor(response, crud.actor.get_next_cursor(db_objs, limit=limit))
     return [
         await crud.actor.get_profile_by_language(db=db, db_obj=db_obj, language=language, as_local=True)
         for db_obj in db_objs
@@ -124,13 +129,19 @@ async def read_creator_identities(
 def read_all_creators(
     *,
     db: Annotated[Session, Depends(deps.get_db)],
+    response: Response,
+    after: str | None = None,
+    limit: int = settings.MULTI_MAX,
     page: int = 0,
     creator: Annotated[models.Creator, Depends(deps.get_active_admin)],
 ) -> Any:
     """
-    Retrieve all current creators.
+    Retrieve all current creators, a page of `limit` at a time. The cursor for the next page, to be sent as `after`,
+    is in the `X-Next-Cursor` header.
     """
-    return crud.creator.get_multi(db=db, page=page)
+    db_objs = crud.creator.get_multi(db=db, after=after, limit=limit, page=page)
+    deps.set_next_cursor(response, crud.creator.get_next_cursor(db_objs, limit=limit))
+    return db_objs
 
 
 @router.post("/new-totp", response_model=schemas.NewTOTP)
@@ -19,20 +19,25 @@ along with this program.  If not, see <http:#www.gnu.org/licenses/>.
 """
 
 from typing import Annotated, Any
+from datetime import datetime
 
 from fastapi import APIRouter, Depends, status, HTTPException, Body
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
 
 from app.core.config import settings
 from app import crud, models, schemas
 from app.api import deps
+from app.schema_types import ExportFormatType
+from app.services.payment_executor import PaymentExecutorSaturated, get_payment_executor
+from app.utilities.export import EXPORT_MEDIA_TYPES, stream_export
 
 router = APIRouter(lifespan=deps.get_lifespan)
 
 
 @router.post("/order/{id}", response_model=schemas.Msg)
 @router.post("/order/{id}/{volume}", response_model=schemas.Msg)
-def place_product_order(
+async def place_product_order(
     *,
     db: Annotated[Session, Depends(deps.get_db)],
     id: str,
@@ -59,43 +64,52 @@ def place_product_order(
         "assetScale": 2,
     }
     print("-------------------------------place_product_order------------------------------------")
-    # 1. SET UP THE ORDER
-    seller_wallet = settings.TEST_SELLER_WALLET
-    seller_key = settings.TEST_SELLER_KEY
-    seller = schemas.SellerOpenPaymentAccount(
-        **{
-            "walletAddressUrl": seller_wallet,
-            "privateKey": seller_key,
-            "keyId": settings.TEST_SELLER_KEY_ID,
-        }
-    )
-    order = crud.OpenPaymentsProcessor(
-        seller=seller,
-        buyer=buyer_wallet,
-        redirect_uri=settings.DEFAULT_REDIRECT_AFTER_AUTH,
-    )
-    amount = str(int(product["value"]) * volume)
-    # 2. SELLER INCOMING PAYMENT PROCESS
-    incoming_payment_response = order.request_incoming_payment(amount=amount)
-    print("-------------------------------incoming_payment_response------------------------------------")
-    print(incoming_payment_response)
-    print("-------------------------------incoming_payment_response------------------------------------")
-    # 3. BUYER QUOTE REQUEST PROCESS
-    quote_request_response = order.request_quote(incoming_payment_id=incoming_payment_response.id)
-    print("-------------------------------quote_request_response------------------------------------")
-    print(quote_request_response)
-    print("-------------------------------quote_request_response------------------------------------")
-    # This could be returned to the buyer for review, but we'll skip this for now...
-    # 4. REQUEST BUYER INTERACTIVE GRANT FOR PURCHASE
-    purchase_endpoint = order.get_purchase_endpoint(amount=amount)
-    print("-------------------------------purchase_endpoint------------------------------------")
-    print(purchase_endpoint)
-    print("-------------------------------purchase_endpoint------------------------------------")
+
+    # The Open Payments calls block, so run them on the payment executor rather than the event loop
+    def place_order() -> str:
+        # 1. SET UP THE ORDER
+        seller_wallet = settings.TEST_SELLER_WALLET
+        seller_key = settings.TEST_SELLER_KEY
+        seller = schemas.SellerOpenPaymentAccount(
+            **{
+                "walletAddressUrl": seller_wallet,
+                "privateKey": seller_key,
+                "keyId": settings.TEST_SELLER_KEY_ID,
+            }
+        )
+        order = crud.OpenPaymentsProcessor(
+            seller=seller,
+            buyer=buyer_wallet,
+            redirect_uri=settings.DEFAULT_REDIRECT_AFTER_AUTH,
+        )
+        amount = str(int(product["value"]) * volume)
+        # 2. SELLER INCOMING PAYMENT PROCESS
+        incoming_payment_response = order.request_incoming_payment(amount=amount)
+        print("-------------------------------incoming_payment_response------------------------------------")
+        print(incoming_payment_response)
+        print("-------------------------------incoming_payment_response------------------------------------")
+        # 3. BUYER QUOTE REQUEST PROCESS
+        quote_request_response = order.request_quote(incoming_payment_id=incoming_payment_response.id)
+        print("-------------------------------quote_request_response------------------------------------")
+        print(quote_request_response)
+        print("-------------------------------quote_request_response------------------------------------")
+        # This could be returned to the buyer for review, but we'll skip this for now...
+        # 4. REQUEST BUYER INTERACTIVE GRANT FOR PURCHASE
+        purchase_endpoint = order.get_purchase_endpoint(amount=amount)
+        print("-------------------------------purchase_endpoint------------------------------------")
+        print(purchase_endpoint)
+        print("-------------------------------purchase_endpoint------------------------------------")
+        return purchase_endpoint
+
+    try:
+        purchase_endpoint = await get_payment_executor().arun(place_order)
+    except PaymentExecutorSaturated as e:
+        raise deps.PaymentServiceUnavailable(e)
     return {"msg": str(purchase_endpoint)}
 
 
 @router.post("/fulfil/{key}", status_code=status.HTTP_202_ACCEPTED)
-def fulfil_product_order(
+async def fulfil_product_order(
     *,
     db: Annotated[Session, Depends(deps.get_db)],
     key: str,
@@ -122,7 +136,10 @@ def fulfil_product_order(
             "keyId": settings.TEST_SELLER_KEY_ID,
         }
     )
-    payment = crud.OpenPaymentsProcessor(seller=seller, buyer=buyer_wallet)
+    try:
+        payment = await get_payment_executor().arun(crud.OpenPaymentsProcessor, seller=seller, buyer=buyer_wallet)
+    except PaymentExecutorSaturated as e:
+        raise deps.PaymentServiceUnavailable(e)
 
     # # 5. COMPLETE OUTGOING PAYMENT
     # # This depends on the app ... can divide up payments between collaborators, take platform fees, etc.
@@ -130,3 +147,89 @@ def fulfil_product_order(
     # print("-------------------------------incoming_payment_response------------------------------------")
     # print(incoming_payment_response)
     # print("-------------------------------incoming_payment_response------------------------------------")
+
+
+def get_export_response(
+    crud_obj: Any,
+    *,
+    name: str,
+    export_format: ExportFormatType,
+    start: datetime | None,
+    end: datetime | None,
+    product_id: str | None,
+    currency: str | None,
+    language: str,
+) -> StreamingResponse:
+    if start and end and start >= end:
+        raise HTTPException(
+            status_code=400,
+            detail="Export `start` must be before its `end`.",
+        )
+    extension = "csv" if export_format == ExportFormatType.Csv else "ndjson"
+    return StreamingResponse(
+        stream_export(
+            crud_obj,
+            export_format=export_format,
+            start=start,
+            end=end,
+            product_id=product_id,
+            currency=currency,
+            language=language,
+        ),
+        media_type=EXPORT_MEDIA_TYPES[export_format],
+        headers={"Content-Disposition": f'attachment; filename="{name}.{extension}"'},
+    )
+
+
+@router.get("/export/receipts")
+def export_receipts(
+    *,
+    admin: Annotated[models.Creator, Depends(deps.get_active_admin)],
+    format: ExportFormatType = ExportFormatType.Ndjson,
+    start: datetime | None = None,
+    end: datetime | None = None,
+    product_id: str | None = None,
+    currency: str | None = None,
+    language: str = settings.SERVER_LANGUAGE,
+) -> StreamingResponse:
+    """
+    Stream receipts created from `start` up to `end` as NDJSON or CSV, optionally for one product or currency, with
+    product names in `language`. Only available to admins.
+    """
+    return get_export_response(
+        crud.openreceipt,
+        name="receipts",
+        export_format=format,
+        start=start,
+        end=end,
+        product_id=product_id,
+        currency=currency,
+        language=language,
+    )
+
+
+@router.get("/export/orders")
+def export_orders(
+    *,
+    admin: Annotated[models.Creator, Depends(deps.get_active_admin)],
+    format: ExportFormatType = ExportFormatType.Ndjson,
+    start: datetime | None = None,
+    end: datetime | None = None,
+    product_id: str | None = None,
+    currency: str | None = None,
+    language: str = settings.SERVER_LANGUAGE,
+) -> StreamingResponse:
+    """
+    Stream orders created from `start` up to `end` as NDJSON or CSV, optionally for one product or price currency,
+    with product names in `language`. Only available to admins.
+    """
+    return get_export_response(
+        crud.openorder,
+        name="orders",
+        export_format=format,
+        start=start,
+        end=end,
+        product_id=product_id,
+        currency=currency,
+        language=language,
+    )
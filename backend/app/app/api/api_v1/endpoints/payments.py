@@ -3,10 +3,16 @@
 API endpoints for payment operations.
 """
 
-from fastapi import APIRouter, HTTPException, Query
+from typing import Annotated, Optional
+
+from fastapi import APIRouter, Depends, Header, HTTPException, Query
+from fastapi.responses import PlainTextResponse
 from ulid import ULID
 
+from app import models
+from app.api.deps import PaymentServiceUnavailable, get_active_admin
 from app.schemas.payments import (
+    IndicativeRate,
     RecurringPaymentStartRequest,
     RecurringPaymentStartResponse,
     RecurringPaymentCallbackResponse,
@@ -15,15 +21,39 @@ from app.schemas.payments import (
     OneTimePurchaseStartRequest,
     OneTimePurchaseStartResponse,
     OneTimePurchaseCallbackResponse,
+    ProductOrderRequest,
+    SplitPaymentStartRequest,
+    SplitPaymentStartResponse,
+    SplitPaymentCallbackResponse,
 )
+from app.schemas.openpayments.order import OpenOrderCreate
+from app.services.idempotency import get_idempotency_store
+from app.services.payment_executor import PaymentExecutorSaturated, get_payment_executor
+from app.services.quote_service import QuoteService
+from app.services.split_payment_service import acreate_split_payment_service
 from app.services.open_payments_service import (
-    create_recurring_payment_service,
-    create_migrante_payment_service,
-    create_purchase_service,
+    PaymentConflict,
+    acreate_recurring_payment_service,
+    acreate_migrante_payment_service,
+    acreate_purchase_service,
 )
+from app.utils.open_payments_client import get_metrics
 
 router = APIRouter()
 
+IDEMPOTENCY_KEY_HEADER = Header(
+    None,
+    alias="Idempotency-Key",
+    description="Unique key per payment attempt. Repeats get the first response instead of paying twice.",
+)
+
+
+def get_order(request: ProductOrderRequest) -> Optional[OpenOrderCreate]:
+    """The OpenOrder to record the flow as, if the request is for a Product."""
+    if request.product_id is None:
+        return None
+    return OpenOrderCreate(product_id=request.product_id, price_id=request.price_id, country=request.country)
+
 
 ###################################################################################################
 # FASE I: RECURRING PAYMENTS ENDPOINTS
@@ -54,9 +84,9 @@ async def start_recurring_payment(request: RecurringPaymentStartRequest):
         }
     """
     try:
-        service = create_recurring_payment_service()
+        service = await acreate_recurring_payment_service()
 
-        redirect_url, grant_id = service.start_recurring_grant_flow(
+        redirect_url, grant_id = await service.astart_recurring_grant_flow(
             debit_amount=request.debit_amount,
             total_cap=request.total_cap,
             interval=request.interval,
@@ -95,9 +125,9 @@ async def recurring_payment_callback(
         # The redirect URI is in format: {base_uri}/{grant_id}
         grant_ulid = ULID.from_str(grant_id)
 
-        service = create_recurring_payment_service()
+        service = await acreate_recurring_payment_service()
 
-        success = service.complete_recurring_grant_flow(
+        success = await service.acomplete_recurring_grant_flow(
             grant_id=grant_ulid, interact_ref=interact_ref, received_hash=hash
         )
 
@@ -107,6 +137,8 @@ async def recurring_payment_callback(
             grant_id=grant_ulid,
         )
 
+    except PaymentConflict as e:
+        raise HTTPException(status_code=409, detail=str(e))
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
@@ -114,7 +146,10 @@ async def recurring_payment_callback(
 
 
 @router.post("/recurring/trigger", response_model=RecurringPaymentTriggerResponse)
-async def trigger_recurring_payment(request: RecurringPaymentTriggerRequest):
+async def trigger_recurring_payment(
+    request: RecurringPaymentTriggerRequest,
+    idempotency_key: Optional[str] = IDEMPOTENCY_KEY_HEADER,
+):
     """
     Execute a single recurring payment using an established grant.
 
@@ -130,26 +165,37 @@ async def trigger_recurring_payment(request: RecurringPaymentTriggerRequest):
         {
             "grant_id": "01HQXYZ..."
         }
+
+    Send an `Idempotency-Key` header to retry safely: repeats get the first response.
     """
-    try:
-        service = create_recurring_payment_service()
-
-        result = service.execute_recurring_payment(grant_id=request.grant_id)
-
-        return RecurringPaymentTriggerResponse(
-            success=True,
-            message="Recurring payment executed successfully",
-            outgoing_payment_id=result["outgoing_payment_id"],
-            quote_debit_amount=result["quote_debit_amount"],
-            quote_receive_amount=result["quote_receive_amount"],
-            payments_made=result["payments_made"],
-            payments_remaining=result["payments_remaining"],
-        )
 
-    except ValueError as e:
-        raise HTTPException(status_code=400, detail=str(e))
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Failed to execute recurring payment: {str(e)}")
+    async def execute_recurring_payment():
+        try:
+            service = await acreate_recurring_payment_service()
+
+            result = await service.aexecute_recurring_payment(grant_id=request.grant_id)
+
+            return RecurringPaymentTriggerResponse(
+                success=True,
+                message="Recurring payment executed successfully",
+                outgoing_payment_id=result["outgoing_payment_id"],
+                quote_debit_amount=result["quote_debit_amount"],
+                quote_receive_amount=result["quote_receive_amount"],
+                payments_made=result["payments_made"],
+                payments_remaining=result["payments_remaining"],
+            )
+
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=f"Failed to execute recurring payment: {str(e)}")
+
+    return await get_idempotency_store().arun(
+        scope="recurring-trigger",
+        key=idempotency_key,
+        params={"grant_id": request.grant_id},
+        call=execute_recurring_payment,
+    )
 
 
 ###################################################################################################
@@ -166,11 +212,12 @@ async def start_migrante_payment(request: OneTimePurchaseStartRequest):
     from their USD wallet to their FINSUS MXN account.
 
     Flow:
-    1. Creates an incoming payment on the FINSUS wallet (MXN)
-    2. Creates a quote for the payment (USD -> MXN conversion)
-    3. Requests an interactive outgoing payment grant from MIGRANTE wallet
-    4. Returns redirect URL for user authorization
-    5. Payment completes automatically after authorization
+    1. Gets an indicative USD -> MXN rate, usually from the quote cache
+    2. Creates an incoming payment on the FINSUS wallet (MXN) and, at the same time, requests an interactive
+       outgoing payment grant from the MIGRANTE wallet, limited to the estimated debit plus `FX_QUOTE_SLIPPAGE`
+    3. Returns the redirect URL for user authorization, with the indicative rate
+    4. After authorization, the callback takes the binding quote and completes the payment. Should the rate have
+       moved past the limit, the callback answers `409 Conflict` and can be retried, or a new payment started.
 
     Example:
         POST /payments/migrante/start
@@ -181,24 +228,54 @@ async def start_migrante_payment(request: OneTimePurchaseStartRequest):
     The amount should be in the smallest unit of MXN (e.g., 1500 = $15.00 MXN)
     """
     try:
-        service = create_migrante_payment_service()
-
-        redirect_url, pending_transaction = service.get_migrante_payment_endpoint(amount=request.amount)
+        service = await acreate_migrante_payment_service()
+        quote_service = QuoteService(service)
+
+        indicative = await quote_service.aget_indicative_quote(amount=request.amount)
+        redirect_url, pending_transaction = await service.aget_migrante_payment_endpoint(
+            amount=request.amount,
+            debit_limit=indicative.get_debit_amount(request.amount, quote_service.slippage),
+            order=get_order(request),
+        )
 
         return OneTimePurchaseStartResponse(
             redirect_url=str(redirect_url),
             transaction_id=pending_transaction.id,
+            rate=indicative.get_rate(request.amount, quote_service.slippage),
         )
 
+    except PaymentExecutorSaturated as e:
+        raise PaymentServiceUnavailable(e)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to start migrante payment flow: {str(e)}")
 
 
+@router.get("/migrante/rate", response_model=IndicativeRate)
+async def get_migrante_rate(
+    amount: str = Query(..., pattern=r"^[1-9][0-9]*$", description="Amount to receive, in MXN cents."),
+):
+    """
+    Indicative USD -> MXN rate and estimated debit for a MIGRANTE -> FINSUS payment, without starting it.
+
+    Served from the quote cache while a recent quote for a nearby amount is valid. Not binding: the rate is fixed
+    when the payment is confirmed.
+
+    Example:
+        GET /payments/migrante/rate?amount=1500
+    """
+    try:
+        service = await acreate_migrante_payment_service()
+        return await QuoteService(service).aget_rate(amount=amount)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to get migrante rate: {str(e)}")
+
+
 @router.get("/migrante/callback", response_model=OneTimePurchaseCallbackResponse)
 async def migrante_payment_callback(
     interact_ref: str = Query(..., description="Interaction reference from auth server"),
     hash: str = Query(..., description="Hash for verification"),
     transaction_id: str = Query(..., description="Transaction ID from the path parameter"),
+    idempotency_key: Optional[str] = IDEMPOTENCY_KEY_HEADER,
 ):
     """
     Handle the callback after user authorizes MIGRANTE payment.
@@ -213,28 +290,41 @@ async def migrante_payment_callback(
 
     Returns:
         Success/failure response with payment details
+
+    Send an `Idempotency-Key` header to retry safely: repeats get the first response.
     """
-    try:
-        # Parse transaction_id from the last part of the redirect URI
-        transaction_ulid = ULID.from_str(transaction_id)
 
-        service = create_migrante_payment_service()
+    async def complete_migrante_payment():
+        try:
+            # Parse transaction_id from the last part of the redirect URI
+            transaction_ulid = ULID.from_str(transaction_id)
 
-        outgoing_payment = service.complete_migrante_payment(
-            transaction_id=transaction_ulid, interact_ref=interact_ref, received_hash=hash
-        )
+            service = await acreate_migrante_payment_service()
 
-        return OneTimePurchaseCallbackResponse(
-            success=True,
-            message="Purchase completed successfully",
-            transaction_id=transaction_ulid,
-            outgoing_payment_id=str(outgoing_payment.id),
-        )
+            outgoing_payment = await service.acomplete_migrante_payment(
+                transaction_id=transaction_ulid, interact_ref=interact_ref, received_hash=hash
+            )
 
-    except ValueError as e:
-        raise HTTPException(status_code=400, detail=str(e))
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Failed to complete migrante payment: {str(e)}")
+            return OneTimePurchaseCallbackResponse(
+                success=True,
+                message="Purchase completed successfully",
+                transaction_id=transaction_ulid,
+                outgoing_payment_id=str(outgoing_payment.id),
+            )
+
+        except PaymentConflict as e:
+            raise HTTPException(status_code=409, detail=str(e))
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=f"Failed to complete migrante payment: {str(e)}")
+
+    return await get_idempotency_store().arun(
+        scope="migrante-callback",
+        key=idempotency_key,
+        params={"interact_ref": interact_ref, "hash": hash, "transaction_id": transaction_id},
+        call=complete_migrante_payment,
+    )
 
 
 ###################################################################################################
@@ -265,15 +355,19 @@ async def start_one_time_purchase(request: OneTimePurchaseStartRequest):
     The amount should be in the smallest unit (e.g., 100000 = $1,000.00 MXN)
     """
     try:
-        service = create_purchase_service()
+        service = await acreate_purchase_service()
 
-        redirect_url, pending_transaction = service.get_purchase_endpoint(amount=request.amount)
+        redirect_url, pending_transaction = await service.aget_purchase_endpoint(
+            amount=request.amount, order=get_order(request)
+        )
 
         return OneTimePurchaseStartResponse(
             redirect_url=str(redirect_url),
             transaction_id=pending_transaction.id,
         )
 
+    except PaymentExecutorSaturated as e:
+        raise PaymentServiceUnavailable(e)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to start purchase flow: {str(e)}")
 
@@ -283,6 +377,7 @@ async def one_time_purchase_callback(
     interact_ref: str = Query(..., description="Interaction reference from auth server"),
     hash: str = Query(..., description="Hash for verification"),
     transaction_id: str = Query(..., description="Transaction ID from the path parameter"),
+    idempotency_key: Optional[str] = IDEMPOTENCY_KEY_HEADER,
 ):
     """
     Handle the callback after user authorizes one-time purchase.
@@ -297,28 +392,137 @@ async def one_time_purchase_callback(
 
     Returns:
         Success/failure response with payment details
+
+    Send an `Idempotency-Key` header to retry safely: repeats get the first response.
     """
-    try:
-        # Parse transaction_id from the last part of the redirect URI
-        transaction_ulid = ULID.from_str(transaction_id)
 
-        service = create_purchase_service()
+    async def complete_purchase():
+        try:
+            # Parse transaction_id from the last part of the redirect URI
+            transaction_ulid = ULID.from_str(transaction_id)
 
-        outgoing_payment = service.complete_payment(
-            transaction_id=transaction_ulid, interact_ref=interact_ref, received_hash=hash
-        )
+            service = await acreate_purchase_service()
+
+            outgoing_payment = await service.acomplete_payment(
+                transaction_id=transaction_ulid, interact_ref=interact_ref, received_hash=hash
+            )
+
+            return OneTimePurchaseCallbackResponse(
+                success=True,
+                message="Purchase completed successfully",
+                transaction_id=transaction_ulid,
+                outgoing_payment_id=str(outgoing_payment.id),
+            )
+
+        except PaymentConflict as e:
+            raise HTTPException(status_code=409, detail=str(e))
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=f"Failed to complete purchase: {str(e)}")
+
+    return await get_idempotency_store().arun(
+        scope="purchase-callback",
+        key=idempotency_key,
+        params={"interact_ref": interact_ref, "hash": hash, "transaction_id": transaction_id},
+        call=complete_purchase,
+    )
+
+
+###################################################################################################
+# SPLIT PAYMENT ENDPOINTS
+###################################################################################################
 
-        return OneTimePurchaseCallbackResponse(
-            success=True,
-            message="Purchase completed successfully",
-            transaction_id=transaction_ulid,
-            outgoing_payment_id=str(outgoing_payment.id),
+
+@router.post("/split/start", response_model=SplitPaymentStartResponse)
+async def start_split_payment(request: SplitPaymentStartRequest):
+    """
+    Start a split payment from FINSUS to several recipients, e.g. the contributors of a product.
+
+    Flow:
+    1. Creates an incoming payment on every recipient wallet and quotes each one, concurrently
+    2. Requests a single interactive outgoing payment grant from FINSUS, limited to the sum of the quotes
+    3. Returns redirect URL for user authorization
+
+    Example:
+        POST /payments/split/start
+        {
+            "recipients": [
+                {"wallet_address": "https://ilp.interledger-test.dev/author", "amount": "60000"},
+                {"wallet_address": "https://ilp.interledger-test.dev/illustrator", "amount": "40000"}
+            ]
+        }
+
+    Amounts are in the smallest unit of each recipient wallet's currency. For a Product, set `product_id`,
+    `price_id` and `country` instead of `recipients`: the Price is split between the Product's contributors by their
+    ratio.
+    """
+    try:
+        service = await acreate_split_payment_service()
+        order = get_order(request)
+        recipients = request.recipients
+        if order is not None:
+            recipients = await service.aget_product_recipients(order=order)
+        redirect_url, pending_split = await service.astart(recipients=recipients, order=order)
+        return SplitPaymentStartResponse(
+            redirect_url=str(redirect_url),
+            transaction_id=pending_split.id,
+            debit_amount=pending_split.debit_limit,
         )
 
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
+    except PaymentExecutorSaturated as e:
+        raise PaymentServiceUnavailable(e)
     except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Failed to complete purchase: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Failed to start split payment: {str(e)}")
+
+
+@router.get("/split/callback", response_model=SplitPaymentCallbackResponse)
+async def split_payment_callback(
+    interact_ref: str = Query(..., description="Interaction reference from auth server"),
+    hash: str = Query(..., description="Hash for verification"),
+    transaction_id: str = Query(..., description="Transaction ID from the path parameter"),
+    idempotency_key: Optional[str] = IDEMPOTENCY_KEY_HEADER,
+):
+    """
+    Handle the callback after the user authorizes a split payment, paying every recipient in parallel.
+
+    `success` is False if any recipient could not be paid. Each leg reports `paid`, `failed` (its incoming payment
+    was closed, nothing was debited for it) or `unknown` (the payment may have gone through, check it before paying
+    that recipient again).
+
+    Send an `Idempotency-Key` header to retry safely: repeats get the first response.
+    """
+
+    async def complete_split():
+        try:
+            transaction_ulid = ULID.from_str(transaction_id)
+            service = await acreate_split_payment_service()
+            split = await service.acomplete(
+                payment_id=transaction_ulid, interact_ref=interact_ref, received_hash=hash
+            )
+            paid = sum(1 for leg in split.legs if leg.status == "paid")
+            return SplitPaymentCallbackResponse(
+                success=paid == len(split.legs),
+                message=f"Paid {paid} of {len(split.legs)} recipients",
+                transaction_id=transaction_ulid,
+                legs=split.legs,
+            )
+
+        except PaymentConflict as e:
+            raise HTTPException(status_code=409, detail=str(e))
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=f"Failed to complete split payment: {str(e)}")
+
+    return await get_idempotency_store().arun(
+        scope="split-callback",
+        key=idempotency_key,
+        params={"interact_ref": interact_ref, "hash": hash, "transaction_id": transaction_id},
+        call=complete_split,
+    )
 
 
 ###################################################################################################
@@ -330,3 +534,20 @@ async def one_time_purchase_callback(
 async def health_check():
     """Simple health check endpoint."""
     return {"status": "ok", "service": "constructoken-payments"}
+
+
+@router.get("/metrics", response_class=PlainTextResponse)
+async def open_payments_metrics(admin: Annotated[models.Creator, Depends(get_active_admin)]):
+    """
+    Duration and payload size histograms of Open Payments calls, in the Prometheus text format. Admin only, since
+    they name upstream wallet hosts.
+
+    Calls are labelled by SDK operation (`quote.create`, `grant.continue`, ...), flow step (`incoming_payment`,
+    `quote`, `interactive_grant`, `continuation`, `outgoing_payment`), host and status. Metrics are kept per worker
+    process and are empty when `OPEN_PAYMENTS_METRICS` is off.
+
+    The saturation of the payment executor (busy, queued, completed and rejected calls, and queue wait) is always
+    included.
+    """
+    metrics = get_metrics()
+    return (metrics.render() if metrics else "") + get_payment_executor().render()
@@ -20,6 +20,7 @@ along with this program.  If not, see <http:#www.gnu.org/licenses/>.
 
 from typing import Annotated, Any
 from fastapi import APIRouter, Depends, HTTPException, Request, status
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from pydantic import BaseModel
 from bovine import activitystreams
@@ -91,7 +92,7 @@ async def hello_http() -> Any:
 @verify_request_signature
 async def post_to_actor_inbox(
     *,
-    db: Annotated[Session, Depends(deps.get_db)],
+    db: Annotated[AsyncSession, Depends(deps.get_async_db)],
     actortype: str = "person",
     actorname: str,
     request: Request,
@@ -99,7 +100,7 @@ async def post_to_actor_inbox(
     """
     Post an activity to a local actor.
     """
-    db_obj = crud.actor.get_by_name(db=db, name=actorname)
+    db_obj = await crud.actor.aget_by_name(db=db, name=actorname)
     if not db_obj:
         raise HTTPException(
             status_code=400,
@@ -150,7 +151,7 @@ async def post_to_actor_inbox(
 @verify_request_signature
 async def get_actor_outbox(
     *,
-    db: Annotated[Session, Depends(deps.get_db)],
+    db: Annotated[AsyncSession, Depends(deps.get_async_db)],
     actortype: schema_types.ActorType | None = None,
     actorname: str,
     request: Request,
@@ -158,7 +159,7 @@ async def get_actor_outbox(
     """
     Get the Outbox of a local Actor.
     """
-    db_obj = crud.actor.get_by_name(db=db, name=actorname)
+    db_obj = await crud.actor.aget_by_name(db=db, name=actorname)
     if not db_obj:
         raise HTTPException(
             status_code=400,
@@ -173,7 +174,7 @@ async def get_actor_outbox(
 @verify_request_signature
 async def get_actor_featured_collection(
     *,
-    db: Annotated[Session, Depends(deps.get_db)],
+    db: Annotated[AsyncSession, Depends(deps.get_async_db)],
     actortype: schema_types.ActorType | None = None,
     actorname: str,
     request: Request,
@@ -181,7 +182,7 @@ async def get_actor_featured_collection(
     """
     Get the Featured Collection of a local Actor.
     """
-    db_obj = crud.actor.get_by_name(db=db, name=actorname)
+    db_obj = await crud.actor.aget_by_name(db=db, name=actorname)
     if not db_obj:
         raise HTTPException(
             status_code=400,
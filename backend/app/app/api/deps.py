@@ -18,22 +18,25 @@ along with this program.  If not, see <http:#www.gnu.org/licenses/>.
 
 """
 
-from typing import Generator, Annotated
-from collections.abc import AsyncIterator
+from typing import Generator, Annotated, Optional
+from collections.abc import AsyncGenerator, AsyncIterator
 from contextlib import asynccontextmanager
 
-from fastapi import FastAPI, Depends, HTTPException, status
+from fastapi import FastAPI, Depends, HTTPException, Response, status
 from fastapi.security import OAuth2PasswordBearer
 from fastapi_cache import FastAPICache
 from fastapi_cache.backends.redis import RedisBackend
 from redis import asyncio as aioredis
 import jwt
 from pydantic import ValidationError
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
 from app import crud, models, schemas
 from app.core.config import settings
-from app.db.session import SessionLocal
+from app.db.session import AsyncSessionLocal, SessionLocal, async_engine
+from app.services.payment_executor import PaymentExecutorSaturated, close_payment_executor
+from app.utils.open_payments_client import close_async_http_client, close_http_client
 
 
 scope_scheme = {
@@ -48,6 +51,15 @@ optional_oauth2_scheme = OAuth2PasswordBearer(
 )
 
 
+# Cursor for the next page of a keyset-paged list, to be sent back as `after`
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+def set_next_cursor(response: Response, cursor: Optional[str]) -> None:
+    if cursor:
+        response.headers[NEXT_CURSOR_HEADER] = cursor
+
+
 def get_db() -> Generator:
     try:
         db = SessionLocal()
@@ -56,6 +68,12 @@ def get_db() -> Generator:
         db.close()
 
 
+async def get_async_db() -> AsyncGenerator[AsyncSession, None]:
+    # For async endpoints, so that queries are awaited rather than blocking the event loop
+    async with AsyncSessionLocal() as db:
+        yield db
+
+
 class CredentialsException(HTTPException):
     def __init__(self, detail: str, headers: list[str] = []) -> HTTPException:
         if headers and isinstance(headers, (str, list)):
@@ -71,6 +89,16 @@ class CredentialsException(HTTPException):
         )
 
 
+class PaymentServiceUnavailable(HTTPException):
+    def __init__(self, saturated: PaymentExecutorSaturated) -> HTTPException:
+        # Load shedding while the payment executor is saturated, so clients retry rather than queue
+        super().__init__(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Payment service is busy, please retry.",
+            headers={"Retry-After": str(saturated.retry_after)},
+        )
+
+
 @asynccontextmanager
 async def get_lifespan(_: FastAPI) -> AsyncIterator[None]:
     # https://github.com/long2ice/fastapi-cache?tab=readme-ov-file
@@ -79,6 +107,11 @@ async def get_lifespan(_: FastAPI) -> AsyncIterator[None]:
     )
     FastAPICache.init(RedisBackend(redis), prefix="fastapi-cache")
     yield
+    # Release pooled Open Payments connections
+    close_http_client()
+    await close_async_http_client()
+    close_payment_executor()
+    await async_engine.dispose()
 
 
 def get_token_payload(token: str) -> schemas.TokenPayload:
@@ -0,0 +1,610 @@
+"""Constructoken - Interledger Hackathon Prototype
+
+In-process stand-in for an Open Payments wallet, GNAP authorization server and resource server.
+
+The server answers through an `httpx.MockTransport`, so SDK clients built on `MockHttpClient` or
+`MockAsyncHttpClient` run every payment flow without any network. It serves wallet address documents and their
+JWKS, grants (non-interactive and interactive), grant continuation, token rotation, incoming and outgoing payments
+and quotes, and checks the HTTP message signature and `Content-Digest` of every signed request against the JWKS of
+the wallet that requested the grant. Interaction is approved with `approve`, which returns the `interact_ref` and
+`hash` the authorization server would send to the finish URI.
+
+Wallets are served at whatever URL they are registered with; their authorization server is `auth.<host>`.
+"""
+
+import asyncio
+import base64
+import hashlib
+import json
+import math
+import re
+import threading
+import time
+import uuid
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Optional
+from urllib.parse import urlsplit
+
+from cryptography.hazmat.primitives.asymmetric.ed25519 import Ed25519PublicKey
+from cryptography.hazmat.primitives.serialization import Encoding, PublicFormat
+from http_message_signatures import HTTPMessageVerifier, HTTPSignatureKeyResolver, algorithms
+from httpx import AsyncClient, Client, MockTransport, Request, Response
+from pydantic import AnyUrl
+
+from app.open_payments_sdk.gnap_utils.http_signatures import PatchedHTTPSignatureComponentResolver
+from app.open_payments_sdk.gnap_utils.keys import KeyManager
+from app.open_payments_sdk.http import AsyncHttpClient, HttpClient
+
+RESOURCE_PATTERN = re.compile(r"^/(incoming-payments|outgoing-payments|quotes)(?:/([^/]+))?(/complete)?$")
+
+
+class MockServerError(Exception):
+    def __init__(self, status_code: int, code: str, description: str):
+        super().__init__(description)
+        self.status_code = status_code
+        self.code = code
+        self.description = description
+
+
+def now_iso() -> str:
+    return datetime.now(timezone.utc).isoformat().replace("+00:00", "Z")
+
+
+@dataclass
+class MockWallet:
+    url: str
+    asset_code: str
+    asset_scale: int
+    auth_server: str
+    resource_server: str
+    keys: dict[str, Ed25519PublicKey] = field(default_factory=dict)
+
+    def document(self) -> dict:
+        return {
+            "id": self.url,
+            "publicName": self.url.rsplit("/", 1)[-1],
+            "assetCode": self.asset_code,
+            "assetScale": self.asset_scale,
+            "authServer": self.auth_server,
+            "resourceServer": self.resource_server,
+        }
+
+    def jwks(self) -> dict:
+        return {
+            "keys": [
+                {
+                    "kid": kid,
+                    "alg": "EdDSA",
+                    "kty": "OKP",
+                    "crv": "Ed25519",
+                    "x": base64.urlsafe_b64encode(key.public_bytes(Encoding.Raw, PublicFormat.Raw))
+                    .rstrip(b"=")
+                    .decode(),
+                }
+                for kid, key in self.keys.items()
+            ]
+        }
+
+
+@dataclass
+class MockGrant:
+    id: str
+    auth_server: str
+    client: str
+    keyid: str
+    access: list[dict]
+    continue_token: str
+    client_nonce: Optional[str] = None
+    finish_uri: Optional[str] = None
+    interact_nonce: Optional[str] = None
+    interact_ref: Optional[str] = None
+
+
+@dataclass
+class MockToken:
+    id: str
+    grant: MockGrant
+    value: str
+    expires_at: float
+    debited: int = 0
+
+    def allows(self, resource_type: str, action: str) -> bool:
+        return any(
+            access["type"] == resource_type and action in access.get("actions", []) for access in self.grant.access
+        )
+
+    def debit_limit(self) -> Optional[int]:
+        for access in self.grant.access:
+            debit_amount = (access.get("limits") or {}).get("debitAmount")
+            if access["type"] == "outgoing-payment" and debit_amount:
+                return int(debit_amount["value"])
+        return None
+
+
+@dataclass
+class Interaction:
+    """
+    What the authorization server sends to the client's finish URI after the user approves a grant
+    """
+
+    interact_ref: str
+    hash: str
+    finish_uri: Optional[str]
+
+
+class MockKeyResolver(HTTPSignatureKeyResolver):
+    def __init__(self, server: "MockOpenPaymentsServer"):
+        self.server = server
+
+    def resolve_public_key(self, key_id: str):
+        return self.server.keys[key_id]
+
+    def resolve_private_key(self, key_id: str):
+        raise NotImplementedError
+
+
+class MockOpenPaymentsServer:
+    """
+    Open Payments wallets, auth servers and resource servers in one process.
+
+    - `latency` seconds are added to every response, to model network and server time.
+    - `rates` converts quote amounts between asset codes, e.g. `{("USD", "MXN"): 20.0}` for 1 USD = 20 MXN.
+    - Outgoing payments report their full `sentAmount` `settle_after` seconds after they are created.
+    - Hosts in `unhealthy` answer every request with the given status, e.g. `{"auth.wallet.example": 503}`.
+    """
+
+    def __init__(
+        self,
+        *,
+        latency: float = 0.0,
+        rates: dict[tuple[str, str], float] = None,
+        token_expires_in: int = 600,
+        settle_after: float = 0.0,
+        verify_signatures: bool = True,
+    ):
+        self.latency = latency
+        self.rates = rates or {}
+        self.token_expires_in = token_expires_in
+        self.settle_after = settle_after
+        self.verify_signatures = verify_signatures
+        self.wallets: dict[str, MockWallet] = {}
+        self.keys: dict[str, Ed25519PublicKey] = {}
+        self.grants: dict[str, MockGrant] = {}
+        self.tokens: dict[str, MockToken] = {}
+        self.resources: dict[str, dict[str, dict]] = {
+            "incoming-payments": {},
+            "outgoing-payments": {},
+            "quotes": {},
+        }
+        self.requests: dict[str, int] = {}
+        self.unhealthy: dict[str, int] = {}
+        self.verifier = HTTPMessageVerifier(
+            signature_algorithm=algorithms.ED25519,
+            key_resolver=MockKeyResolver(self),
+            component_resolver_class=PatchedHTTPSignatureComponentResolver,
+        )
+        self._lock = threading.Lock()
+
+    ###################################################################################################
+    # SETUP
+    ###################################################################################################
+
+    def add_wallet(
+        self, *, url: str, asset_code: str, asset_scale: int = 2, keys: dict[str, str | Ed25519PublicKey] = None
+    ) -> MockWallet:
+        """
+        Serve a wallet address. `keys` maps key ids to public keys, or to PEM private keys whose public key is served.
+        """
+        url = url.rstrip("/")
+        parts = urlsplit(url)
+        wallet = MockWallet(
+            url=url,
+            asset_code=asset_code,
+            asset_scale=asset_scale,
+            auth_server=f"{parts.scheme}://auth.{parts.netloc}",
+            resource_server=f"{parts.scheme}://{parts.netloc}",
+        )
+        for kid, key in (keys or {}).items():
+            if isinstance(key, str):
+                key = KeyManager().load_ed25519_private_key_from_pem(key).public_key()
+            wallet.keys[kid] = key
+            self.keys[kid] = key
+        self.wallets[url] = wallet
+        return wallet
+
+    def http_client(self, http_timeout: float = 10.0, **kwargs) -> "MockHttpClient":
+        """Client answered by this server. Takes the same options as `HttpClient`, e.g. `metrics` or `retry`."""
+        return MockHttpClient(self, http_timeout=http_timeout, **kwargs)
+
+    def async_http_client(self, http_timeout: float = 10.0, **kwargs) -> "MockAsyncHttpClient":
+        """Async client answered by this server. Takes the same options as `AsyncHttpClient`."""
+        return MockAsyncHttpClient(self, http_timeout=http_timeout, **kwargs)
+
+    ###################################################################################################
+    # INTERACTION
+    ###################################################################################################
+
+    def approve(self, redirect: str | AnyUrl) -> Interaction:
+        """
+        Approve the interactive grant behind an interaction redirect, as the user would
+        """
+        grant_id = str(redirect).rstrip("/").rsplit("/", 1)[-1]
+        with self._lock:
+            grant = self.grants[grant_id]
+            grant.interact_ref = uuid.uuid4().hex
+        auth_server_url = str(AnyUrl(grant.auth_server))
+        data = f"{grant.client_nonce}\n{grant.interact_nonce}\n{grant.interact_ref}\n{auth_server_url}"
+        received_hash = base64.b64encode(hashlib.sha256(data.encode("utf-8")).digest()).decode()
+        return Interaction(interact_ref=grant.interact_ref, hash=received_hash, finish_uri=grant.finish_uri)
+
+    ###################################################################################################
+    # TRANSPORT
+    ###################################################################################################
+
+    def handle(self, request: Request) -> Response:
+        if self.latency:
+            time.sleep(self.latency)
+        return self._respond(request)
+
+    async def ahandle(self, request: Request) -> Response:
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        return self._respond(request)
+
+    def _respond(self, request: Request) -> Response:
+        status_code = self.unhealthy.get(request.url.host)
+        if status_code:
+            return Response(status_code, json={"error": {"code": "unavailable", "description": "Unhealthy host"}})
+        try:
+            return self._route(request)
+        except MockServerError as e:
+            return Response(e.status_code, json={"error": {"code": e.code, "description": e.description}})
+
+    def _route(self, request: Request) -> Response:
+        host = request.url.host
+        path = request.url.path.rstrip("/")
+        with self._lock:
+            route = f"{request.method} {'auth' if host.startswith('auth.') else 'rs'}"
+            self.requests[route] = self.requests.get(route, 0) + 1
+        base = f"{request.url.scheme}://{request.url.netloc.decode('ascii')}"
+        if host.startswith("auth."):
+            return self._route_auth(request, base, path)
+        if request.method == "GET" and path.endswith("/jwks.json"):
+            return Response(200, json=self._wallet(f"{base}{path[: -len('/jwks.json')]}").jwks())
+        if request.method == "GET" and f"{base}{path}" in self.wallets:
+            document = self.wallets[f"{base}{path}"].document()
+            etag = f'"{hashlib.sha256(json.dumps(document).encode()).hexdigest()[:16]}"'
+            if request.headers.get("if-none-match") == etag:
+                return Response(304, headers={"ETag": etag, "Cache-Control": "max-age=300"})
+            return Response(200, json=document, headers={"ETag": etag, "Cache-Control": "max-age=300"})
+        match = RESOURCE_PATTERN.match(path)
+        if not match:
+            raise MockServerError(404, "not_found", f"No route for {request.method} {request.url}")
+        return self._route_resource(request, base, *match.groups())
+
+    ###################################################################################################
+    # SIGNATURES AND TOKENS
+    ###################################################################################################
+
+    def _wallet(self, url: str) -> MockWallet:
+        wallet = self.wallets.get(str(url).rstrip("/"))
+        if not wallet:
+            raise MockServerError(404, "unknown_wallet", f"Unknown wallet address {url}")
+        return wallet
+
+    def _verify(self, request: Request) -> Optional[str]:
+        """
+        Verify the request signature and content digest. Returns the signing key id
+        """
+        if not self.verify_signatures:
+            return None
+        if request.content:
+            expected = base64.b64encode(hashlib.sha512(request.content).digest()).decode()
+            if request.headers.get("content-digest") != f"sha-512=:{expected}:":
+                raise MockServerError(401, "invalid_digest", "Content-Digest does not match the body")
+        try:
+            (result,) = self.verifier.verify(request)
+        except Exception as e:
+            raise MockServerError(401, "invalid_signature", f"Signature verification failed: {e}")
+        return result.parameters["keyid"]
+
+    def _check_keyid(self, keyid: Optional[str], grant: MockGrant) -> None:
+        if keyid is not None and keyid != grant.keyid:
+            raise MockServerError(401, "invalid_client", "Request not signed by the grant's client key")
+
+    def _bearer(self, request: Request) -> str:
+        authorization = request.headers.get("authorization", "")
+        if not authorization.startswith("GNAP "):
+            raise MockServerError(401, "invalid_token", "Missing GNAP access token")
+        return authorization[len("GNAP ") :]
+
+    def _token(self, request: Request, keyid: Optional[str], resource_type: str, action: str) -> MockToken:
+        value = self._bearer(request)
+        token = next((token for token in self.tokens.values() if token.value == value), None)
+        if not token or token.expires_at <= time.time():
+            raise MockServerError(401, "invalid_token", "Unknown or expired access token")
+        self._check_keyid(keyid, token.grant)
+        if not token.allows(resource_type, action):
+            raise MockServerError(403, "insufficient_grant", f"Token does not allow {action} on {resource_type}")
+        return token
+
+    def _issue_token(self, grant: MockGrant) -> dict:
+        token = MockToken(
+            id=uuid.uuid4().hex,
+            grant=grant,
+            value=uuid.uuid4().hex,
+            expires_at=time.time() + self.token_expires_in,
+        )
+        with self._lock:
+            self.tokens[token.id] = token
+        return self._token_body(token)
+
+    def _token_body(self, token: MockToken) -> dict:
+        return {
+            "value": token.value,
+            "manage": f"{token.grant.auth_server}/token/{token.id}",
+            "expires_in": self.token_expires_in,
+            "access": token.grant.access,
+        }
+
+    def _continue_body(self, grant: MockGrant) -> dict:
+        return {"access_token": {"value": grant.continue_token}, "uri": f"{grant.auth_server}/continue/{grant.id}"}
+
+    ###################################################################################################
+    # AUTHORIZATION SERVER
+    ###################################################################################################
+
+    def _route_auth(self, request: Request, base: str, path: str) -> Response:
+        keyid = self._verify(request)
+        if request.method == "POST" and path == "":
+            return self._create_grant(request, base, keyid)
+        kind, _, resource_id = path.strip("/").partition("/")
+        if kind == "continue" and resource_id in self.grants:
+            grant = self.grants[resource_id]
+            self._check_keyid(keyid, grant)
+            if self._bearer(request) != grant.continue_token:
+                raise MockServerError(401, "invalid_continuation", "Invalid continuation access token")
+            if request.method == "DELETE":
+                with self._lock:
+                    self.grants.pop(resource_id, None)
+                return Response(204)
+            return self._continue_grant(request, grant)
+        if kind == "token" and resource_id in self.tokens:
+            token = self.tokens[resource_id]
+            self._check_keyid(keyid, token.grant)
+            if self._bearer(request) != token.value:
+                raise MockServerError(401, "invalid_rotation", "Invalid access token")
+            with self._lock:
+                self.tokens.pop(resource_id, None)
+            if request.method == "DELETE":
+                return Response(204)
+            return Response(200, json={"access_token": self._issue_token(token.grant)})
+        raise MockServerError(404, "not_found", f"No grant route for {request.method} {request.url}")
+
+    def _create_grant(self, request: Request, base: str, keyid: Optional[str]) -> Response:
+        body = json.loads(request.content)
+        client = self._wallet(body["client"])
+        if keyid is not None and keyid not in client.keys:
+            raise MockServerError(401, "invalid_client", f"Key {keyid} is not in the JWKS of {client.url}")
+        grant = MockGrant(
+            id=uuid.uuid4().hex,
+            auth_server=base,
+            client=client.url,
+            keyid=keyid,
+            access=body["access_token"]["access"],
+            continue_token=uuid.uuid4().hex,
+        )
+        with self._lock:
+            self.grants[grant.id] = grant
+        interact = body.get("interact")
+        if not interact:
+            if any(access["type"] == "outgoing-payment" for access in grant.access):
+                raise MockServerError(400, "invalid_request", "Outgoing payment grants require interaction")
+            return Response(
+                200, json={"access_token": self._issue_token(grant), "continue": self._continue_body(grant)}
+            )
+        finish = interact.get("finish") or {}
+        grant.client_nonce = finish.get("nonce")
+        grant.finish_uri = finish.get("uri")
+        grant.interact_nonce = uuid.uuid4().hex
+        return Response(
+            200,
+            json={
+                "interact": {"redirect": f"{base}/interact/{grant.id}", "finish": grant.interact_nonce},
+                "continue": self._continue_body(grant),
+            },
+        )
+
+    def _continue_grant(self, request: Request, grant: MockGrant) -> Response:
+        body = json.loads(request.content) if request.content else {}
+        if not grant.interact_ref or body.get("interact_ref") != grant.interact_ref:
+            raise MockServerError(401, "request_denied", "Grant was not approved")
+        grant.interact_ref = None
+        return Response(200, json={"access_token": self._issue_token(grant), "continue": self._continue_body(grant)})
+
+    ###################################################################################################
+    # RESOURCE SERVER
+    ###################################################################################################
+
+    def _route_resource(
+        self, request: Request, base: str, kind: str, resource_id: Optional[str], complete: Optional[str]
+    ) -> Response:
+        keyid = self._verify(request)
+        resource_type = kind[:-1] if kind != "quotes" else "quote"
+        if request.method == "POST" and not resource_id:
+            self._token(request, keyid, resource_type, "create")
+            create = {
+                "incoming-payments": self._create_incoming_payment,
+                "outgoing-payments": self._create_outgoing_payment,
+                "quotes": self._create_quote,
+            }[kind]
+            return Response(201, json=create(request, base))
+        if request.method == "GET" and not resource_id:
+            self._token(request, keyid, resource_type, "list")
+            return Response(200, json=self._list(kind, request))
+        resource = self.resources[kind].get(f"{base}/{kind}/{resource_id}")
+        if not resource:
+            raise MockServerError(404, "not_found", f"Unknown {resource_type} {resource_id}")
+        if complete and request.method == "POST" and kind == "incoming-payments":
+            self._token(request, keyid, resource_type, "complete")
+            resource["completed"] = True
+            resource["updatedAt"] = now_iso()
+            return Response(200, json=resource)
+        if request.method == "GET":
+            self._token(request, keyid, resource_type, "read")
+            return Response(200, json=self._current(kind, resource))
+        raise MockServerError(405, "method_not_allowed", f"{request.method} not allowed on {request.url}")
+
+    def _store(self, kind: str, base: str, resource: dict) -> dict:
+        resource["id"] = f"{base}/{kind}/{uuid.uuid4()}"
+        resource["createdAt"] = now_iso()
+        with self._lock:
+            self.resources[kind][resource["id"]] = resource
+        return resource
+
+    def _current(self, kind: str, resource: dict) -> dict:
+        if kind != "outgoing-payments":
+            return resource
+        resource = dict(resource)
+        created = datetime.fromisoformat(resource["createdAt"].replace("Z", "+00:00")).timestamp()
+        if time.time() < created + self.settle_after:
+            resource["sentAmount"] = {**resource["sentAmount"], "value": "0"}
+        return resource
+
+    def _list(self, kind: str, request: Request) -> dict:
+        wallet = request.url.params.get("wallet-address") or request.url.params.get("walletAddress")
+        first = int(request.url.params.get("first") or 10)
+        cursor = request.url.params.get("cursor")
+        # Newest first, as Rafiki lists them
+        results = [
+            self._current(kind, resource)
+            for resource in reversed(self.resources[kind].values())
+            if not wallet or resource["walletAddress"] == wallet
+        ]
+        start = next((index + 1 for index, resource in enumerate(results) if resource["id"] == cursor), 0)
+        page = results[start : start + first]
+        pagination = {"hasNextPage": start + first < len(results), "hasPrevPage": start > 0}
+        if page:
+            pagination.update(startCursor=page[0]["id"], endCursor=page[-1]["id"])
+        return {"pagination": pagination, "result": page}
+
+    def _create_incoming_payment(self, request: Request, base: str) -> dict:
+        body = json.loads(request.content)
+        wallet = self._wallet(body["walletAddress"])
+        incoming_amount = body.get("incomingAmount")
+        return self._store(
+            "incoming-payments",
+            base,
+            {
+                "walletAddress": wallet.url,
+                "completed": False,
+                "incomingAmount": incoming_amount,
+                "receivedAmount": {"value": "0", "assetCode": wallet.asset_code, "assetScale": wallet.asset_scale},
+                "metadata": body.get("metadata"),
+                "methods": [
+                    {"type": "ilp", "ilpAddress": "test.mock.receiver", "sharedSecret": uuid.uuid4().hex}
+                ],
+            },
+        )
+
+    def _convert(self, amount: dict, asset_code: str, asset_scale: int) -> str:
+        if amount["assetCode"] == asset_code:
+            rate = 1.0
+        elif (asset_code, amount["assetCode"]) in self.rates:
+            rate = 1 / self.rates[(asset_code, amount["assetCode"])]
+        else:
+            rate = self.rates.get((amount["assetCode"], asset_code), 1.0)
+        value = int(amount["value"]) / 10 ** amount["assetScale"] * rate
+        return str(math.ceil(round(value * 10**asset_scale, 6)))
+
+    def _create_quote(self, request: Request, base: str) -> dict:
+        body = json.loads(request.content)
+        wallet = self._wallet(body["walletAddress"])
+        incoming_payment = self.resources["incoming-payments"].get(body["receiver"])
+        if not incoming_payment:
+            raise MockServerError(400, "invalid_receiver", f"Unknown receiver {body['receiver']}")
+        receive_amount = body.get("receiveAmount") or incoming_payment["incomingAmount"]
+        if body.get("debitAmount"):
+            debit_amount = body["debitAmount"]
+            receiver = self._wallet(incoming_payment["walletAddress"])
+            receive_amount = {
+                "value": self._convert(debit_amount, receiver.asset_code, receiver.asset_scale),
+                "assetCode": receiver.asset_code,
+                "assetScale": receiver.asset_scale,
+            }
+        else:
+            debit_amount = {
+                "value": self._convert(receive_amount, wallet.asset_code, wallet.asset_scale),
+                "assetCode": wallet.asset_code,
+                "assetScale": wallet.asset_scale,
+            }
+        return self._store(
+            "quotes",
+            base,
+            {
+                "walletAddress": wallet.url,
+                "receiver": incoming_payment["id"],
+                "receiveAmount": receive_amount,
+                "debitAmount": debit_amount,
+                "method": "ilp",
+                "expiresAt": datetime.fromtimestamp(time.time() + 300, timezone.utc).isoformat(),
+            },
+        )
+
+    def _create_outgoing_payment(self, request: Request, base: str) -> dict:
+        body = json.loads(request.content)
+        token = self._token(request, None, "outgoing-payment", "create")
+        quote = self.resources["quotes"].get(body.get("quoteId"))
+        if not quote:
+            raise MockServerError(400, "invalid_quote", f"Unknown quote {body.get('quoteId')}")
+        debit = int(quote["debitAmount"]["value"])
+        limit = token.debit_limit()
+        with self._lock:
+            if limit is not None and token.debited + debit > limit:
+                raise MockServerError(403, "insufficient_grant", "Debit amount exceeds the grant limit")
+            token.debited += debit
+        incoming_payment = self.resources["incoming-payments"].get(quote["receiver"])
+        if incoming_payment:
+            incoming_payment["receivedAmount"] = quote["receiveAmount"]
+        return self._store(
+            "outgoing-payments",
+            base,
+            {
+                "walletAddress": body["walletAddress"],
+                "quoteId": quote["id"],
+                "failed": False,
+                "receiver": quote["receiver"],
+                "receiveAmount": quote["receiveAmount"],
+                "debitAmount": quote["debitAmount"],
+                "sentAmount": quote["debitAmount"],
+                "metadata": body.get("metadata"),
+                "updatedAt": now_iso(),
+            },
+        )
+
+
+class MockHttpClient(HttpClient):
+    """
+    `HttpClient` answered by a `MockOpenPaymentsServer`
+    """
+
+    def __init__(self, server: MockOpenPaymentsServer, http_timeout: float = 10.0, **kwargs):
+        self.server = server
+        super().__init__(http_timeout=http_timeout, **kwargs)
+
+    def _create_client(self) -> Client:
+        return Client(timeout=self.timeout, transport=MockTransport(self.server.handle))
+
+
+class MockAsyncHttpClient(AsyncHttpClient):
+    """
+    `AsyncHttpClient` answered by a `MockOpenPaymentsServer`
+    """
+
+    def __init__(self, server: MockOpenPaymentsServer, http_timeout: float = 10.0, **kwargs):
+        self.server = server
+        super().__init__(http_timeout=http_timeout, **kwargs)
+
+    def _create_client(self) -> AsyncClient:
+        return AsyncClient(timeout=self.timeout, transport=MockTransport(self.server.ahandle))
@@ -0,0 +1,326 @@
+"""Constructoken - Interledger Hackathon Prototype
+
+Payment flow load benchmark against the in-process Open Payments stand-in.
+
+Runs the purchase, migrante, recurring and split flows of `OpenPaymentsService` and `SplitPaymentService` through the same factories the payment
+endpoints use, at a configurable concurrency, and reports p50/p95/p99 per flow step. Every Open Payments call is
+answered by `MockOpenPaymentsServer`, so no network, Redis or database is needed:
+
+    python -m app.benchmarks.payment_flows --flow purchase --concurrency 20 --iterations 200 --latency 0.02
+
+With `--max-p95`, the run exits non-zero if any flow's total p95 exceeds the given milliseconds, so CI can catch
+throughput regressions.
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import statistics
+import sys
+import time
+from collections import defaultdict
+from dataclasses import dataclass, field
+from typing import Awaitable, Callable
+
+from app.benchmarks.mock_open_payments import MockOpenPaymentsServer
+from app.core.config import settings
+from app.open_payments_sdk.utils.cache import WalletCache
+from app.services.open_payments_service import (
+    acreate_migrante_payment_service,
+    acreate_purchase_service,
+    acreate_recurring_payment_service,
+)
+from app.services.quote_service import QuoteService
+from app.schemas.payments import SplitRecipient
+from app.services.split_payment_service import acreate_split_payment_service
+from app.utilities.openpayments import paymentsparser
+from app.utils.open_payments_client import get_circuit_breaker, get_metrics, get_retry_policy, use_http_clients
+
+logger = logging.getLogger(__name__)
+
+FLOWS = ("purchase", "migrante", "recurring", "split")
+
+# Contributor wallets paid by the split flow, each on its own host
+SPLIT_RECIPIENTS = (
+    ("https://author.example/wallet", "MXN", "60000"),
+    ("https://illustrator.example/wallet", "MXN", "30000"),
+    ("https://translator.example/wallet", "USD", "500"),
+)
+
+
+@dataclass
+class StepStats:
+    durations: list[float] = field(default_factory=list)
+
+    def percentile(self, percent: int) -> float:
+        if len(self.durations) == 1:
+            return self.durations[0]
+        return statistics.quantiles(self.durations, n=100, method="inclusive")[percent - 1]
+
+    def summary(self) -> dict:
+        return {
+            "count": len(self.durations),
+            "p50_ms": round(self.percentile(50) * 1000, 2),
+            "p95_ms": round(self.percentile(95) * 1000, 2),
+            "p99_ms": round(self.percentile(99) * 1000, 2),
+            "max_ms": round(max(self.durations) * 1000, 2),
+        }
+
+
+@dataclass
+class FlowReport:
+    flow: str
+    concurrency: int
+    steps: dict[str, StepStats] = field(default_factory=lambda: defaultdict(StepStats))
+    errors: dict[str, int] = field(default_factory=lambda: defaultdict(int))
+    elapsed: float = 0.0
+
+    def record(self, timings: dict[str, float]) -> None:
+        for step, duration in timings.items():
+            self.steps[step].durations.append(duration)
+
+    def summary(self) -> dict:
+        completed = len(self.steps["total"].durations) if "total" in self.steps else 0
+        return {
+            "flow": self.flow,
+            "concurrency": self.concurrency,
+            "completed": completed,
+            "errors": dict(self.errors),
+            "throughput_per_s": round(completed / self.elapsed, 2) if self.elapsed else 0.0,
+            "steps": {step: stats.summary() for step, stats in self.steps.items()},
+        }
+
+
+def create_mock_server(*, latency: float = 0.0, verify_signatures: bool = True) -> MockOpenPaymentsServer:
+    """
+    Stand-in server hosting the configured MIGRANTE (USD), FINSUS (MXN) and merchant (MXN) wallets, with their keys,
+    and the split flow's contributor wallets
+    """
+    server = MockOpenPaymentsServer(
+        latency=latency, rates={("USD", "MXN"): 20.0}, verify_signatures=verify_signatures
+    )
+    for wallet_address, asset_code, key_id, private_key in (
+        (settings.MIGRANTE_WALLET_ADDRESS, "USD", settings.MIGRANTE_KEY_ID, settings.MIGRANTE_PRIVATE_KEY),
+        (settings.FINSUS_WALLET_ADDRESS, "MXN", settings.FINSUS_KEY_ID, settings.FINSUS_PRIVATE_KEY),
+        (settings.MERCHANT_WALLET_ADDRESS, "MXN", settings.MERCHANT_KEY_ID, settings.MERCHANT_PRIVATE_KEY),
+    ):
+        server.add_wallet(
+            url=paymentsparser.normalise_wallet_address(wallet_address=wallet_address),
+            asset_code=asset_code,
+            keys={key_id: paymentsparser.convert_private_key_to_PEM(private_key=private_key)},
+        )
+    for wallet_address, asset_code, _ in SPLIT_RECIPIENTS:
+        server.add_wallet(url=wallet_address, asset_code=asset_code)
+    return server
+
+
+def use_mock_server(server: MockOpenPaymentsServer) -> None:
+    """
+    Route every Open Payments call in this process to `server`, and keep payment state in memory
+    """
+    settings.OPEN_PAYMENTS_STATE_STORE = "memory"
+    client_options = dict(metrics=get_metrics(), retry=get_retry_policy(), circuit_breaker=get_circuit_breaker())
+    use_http_clients(
+        http_client=server.http_client(**client_options),
+        async_http_client=server.async_http_client(**client_options),
+        wallet_cache=WalletCache(
+            default_ttl=settings.OPEN_PAYMENTS_WALLET_CACHE_TTL,
+            stale_ttl=settings.OPEN_PAYMENTS_WALLET_CACHE_STALE_TTL,
+        ),
+    )
+
+
+class Timer:
+    def __init__(self):
+        self.timings: dict[str, float] = {}
+        self.started = time.perf_counter()
+
+    async def step(self, name: str, awaitable: Awaitable):
+        started = time.perf_counter()
+        try:
+            return await awaitable
+        finally:
+            self.timings[name] = time.perf_counter() - started
+
+    def finish(self) -> dict[str, float]:
+        self.timings["total"] = time.perf_counter() - self.started
+        return self.timings
+
+
+async def run_purchase(server: MockOpenPaymentsServer, amount: str = "100000") -> dict[str, float]:
+    timer = Timer()
+    service = await timer.step("service", acreate_purchase_service())
+    redirect, transaction = await timer.step("start", service.aget_purchase_endpoint(amount=amount))
+    timer.timings.update({f"start.{step}": duration for step, duration in service.flow_timings.items()})
+    timer.timings.pop("start.total", None)
+    interaction = server.approve(redirect)
+    await timer.step(
+        "complete",
+        service.acomplete_payment(
+            transaction_id=transaction.id, interact_ref=interaction.interact_ref, received_hash=interaction.hash
+        ),
+    )
+    return timer.finish()
+
+
+async def run_migrante(server: MockOpenPaymentsServer, amount: str = "1000") -> dict[str, float]:
+    timer = Timer()
+    service = await timer.step("service", acreate_migrante_payment_service())
+    quote_service = QuoteService(service)
+    indicative = await timer.step("rate", quote_service.aget_indicative_quote(amount=amount))
+    redirect, transaction = await timer.step(
+        "start",
+        service.aget_migrante_payment_endpoint(
+            amount=amount, debit_limit=indicative.get_debit_amount(amount, quote_service.slippage)
+        ),
+    )
+    timer.timings.update({f"start.{step}": duration for step, duration in service.flow_timings.items()})
+    timer.timings.pop("start.total", None)
+    interaction = server.approve(redirect)
+    await timer.step(
+        "complete",
+        service.acomplete_migrante_payment(
+            transaction_id=transaction.id, interact_ref=interaction.interact_ref, received_hash=interaction.hash
+        ),
+    )
+    return timer.finish()
+
+
+async def run_recurring(server: MockOpenPaymentsServer, amount: str = "1000") -> dict[str, float]:
+    timer = Timer()
+    service = await timer.step("service", acreate_recurring_payment_service())
+    redirect, grant_id = await timer.step(
+        "start",
+        service.astart_recurring_grant_flow(
+            debit_amount=amount,
+            total_cap=str(int(amount) * 10),
+            interval="R10/2025-01-01T00:00:00Z/P1W",
+            max_payments=10,
+            redirect_uri_base=service.redirect_uri,
+        ),
+    )
+    interaction = server.approve(redirect)
+    await timer.step(
+        "callback",
+        service.acomplete_recurring_grant_flow(
+            grant_id=grant_id, interact_ref=interaction.interact_ref, received_hash=interaction.hash
+        ),
+    )
+    await timer.step("execute", service.aexecute_recurring_payment(grant_id=grant_id))
+    return timer.finish()
+
+
+async def run_split(server: MockOpenPaymentsServer) -> dict[str, float]:
+    timer = Timer()
+    service = await timer.step("service", acreate_split_payment_service())
+    recipients = [
+        SplitRecipient(wallet_address=wallet_address, amount=amount) for wallet_address, _, amount in SPLIT_RECIPIENTS
+    ]
+    redirect, pending_split = await timer.step("start", service.astart(recipients=recipients))
+    timer.timings.update({f"start.{step}": duration for step, duration in service.flow_timings.items()})
+    timer.timings.pop("start.total", None)
+    interaction = server.approve(redirect)
+    split = await timer.step(
+        "complete",
+        service.acomplete(
+            payment_id=pending_split.id, interact_ref=interaction.interact_ref, received_hash=interaction.hash
+        ),
+    )
+    unpaid = [leg.wallet_address for leg in split.legs if leg.status != "paid"]
+    if unpaid:
+        raise ValueError(f"Split left recipients unpaid: {unpaid}")
+    return timer.finish()
+
+
+RUNNERS: dict[str, Callable[[MockOpenPaymentsServer], Awaitable[dict[str, float]]]] = {
+    "purchase": run_purchase,
+    "migrante": run_migrante,
+    "recurring": run_recurring,
+    "split": run_split,
+}
+
+
+async def benchmark_flow(
+    server: MockOpenPaymentsServer, *, flow: str, concurrency: int, iterations: int, warmup: int = 1
+) -> FlowReport:
+    """
+    Run `iterations` flows, `concurrency` at a time, after `warmup` unmeasured flows that fill the caches
+    """
+    runner = RUNNERS[flow]
+    report = FlowReport(flow=flow, concurrency=concurrency)
+    for _ in range(warmup):
+        await runner(server)
+    limit = asyncio.Semaphore(concurrency)
+
+    async def run_one() -> None:
+        async with limit:
+            try:
+                report.record(await runner(server))
+            except Exception as e:
+                report.errors[type(e).__name__] += 1
+                logger.debug(f"{flow} flow failed: {e}")
+
+    started = time.perf_counter()
+    await asyncio.gather(*(run_one() for _ in range(iterations)))
+    report.elapsed = time.perf_counter() - started
+    return report
+
+
+def format_report(summary: dict) -> str:
+    lines = [
+        f"{summary['flow']}: {summary['completed']} flows at concurrency {summary['concurrency']}, "
+        f"{summary['throughput_per_s']}/s, errors: {summary['errors'] or 'none'}",
+        f"  {'step':<28}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'max ms':>10}",
+    ]
+    for step, stats in summary["steps"].items():
+        lines.append(
+            f"  {step:<28}{stats['p50_ms']:>10}{stats['p95_ms']:>10}{stats['p99_ms']:>10}{stats['max_ms']:>10}"
+        )
+    return "\n".join(lines)
+
+
+async def main(args: argparse.Namespace) -> int:
+    server = create_mock_server(latency=args.latency, verify_signatures=not args.skip_signatures)
+    use_mock_server(server)
+    summaries = []
+    for flow in FLOWS if args.flow == "all" else (args.flow,):
+        report = await benchmark_flow(
+            server, flow=flow, concurrency=args.concurrency, iterations=args.iterations, warmup=args.warmup
+        )
+        summaries.append(report.summary())
+    if args.json:
+        print(json.dumps(summaries, indent=2))
+    else:
+        print("\n\n".join(format_report(summary) for summary in summaries))
+    if args.metrics and get_metrics():
+        print(get_metrics().render())
+    failed = [
+        summary["flow"]
+        for summary in summaries
+        if summary["errors"]
+        or (args.max_p95 and summary["steps"].get("total", {}).get("p95_ms", 0) > args.max_p95)
+    ]
+    if failed:
+        print(f"Benchmark failed for: {', '.join(failed)}", file=sys.stderr)
+        return 1
+    return 0
+
+
+def parse_args(argv: list[str] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[1])
+    parser.add_argument("--flow", choices=(*FLOWS, "all"), default="all")
+    parser.add_argument("--concurrency", type=int, default=10, help="flows in flight at once")
+    parser.add_argument("--iterations", type=int, default=100, help="measured flows per flow type")
+    parser.add_argument("--warmup", type=int, default=1, help="unmeasured flows run first, per flow type")
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds added to every mock response")
+    parser.add_argument("--skip-signatures", action="store_true", help="do not verify request signatures")
+    parser.add_argument("--max-p95", type=float, default=None, help="fail if a flow's total p95 exceeds this (ms)")
+    parser.add_argument("--json", action="store_true", help="print the report as JSON")
+    parser.add_argument("--metrics", action="store_true", help="also print the per-call Open Payments metrics")
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.WARNING)
+    sys.exit(asyncio.run(main(parse_args())))
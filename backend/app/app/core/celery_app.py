@@ -20,6 +20,29 @@ along with this program.  If not, see <http:#www.gnu.org/licenses/>.
 
 from celery import Celery
 
+from app.core.config import settings
+
 celery_app = Celery("worker", broker="amqp://guest@queue//")
 
 celery_app.conf.task_routes = {"app.worker.*": "main-queue"}
+
+celery_app.conf.beat_schedule = {
+    "run-recurring-payments": {
+        "task": "app.worker.recurring.run_recurring_payments",
+        "schedule": settings.RECURRING_PAYMENTS_SCHEDULE,
+        # A run that outlives the schedule is not queued again behind itself
+        "options": {"expires": settings.RECURRING_PAYMENTS_SCHEDULE},
+    },
+    "reconcile-outgoing-payments": {
+        "task": "app.worker.reconciliation.reconcile_outgoing_payments",
+        "schedule": settings.RECONCILIATION_SCHEDULE,
+        "options": {"expires": settings.RECONCILIATION_SCHEDULE},
+    },
+}
+
+if settings.FX_QUOTE_REFRESH_AMOUNTS:
+    celery_app.conf.beat_schedule["refresh-fx-quotes"] = {
+        "task": "app.worker.fx_quotes.refresh_fx_quotes",
+        "schedule": settings.FX_QUOTE_REFRESH_SCHEDULE,
+        "options": {"expires": settings.FX_QUOTE_REFRESH_SCHEDULE},
+    }
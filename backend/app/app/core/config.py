@@ -98,6 +98,57 @@ class Settings(BaseSettings):
     TEST_SELLER_KEY: str = ""
     TEST_SELLER_KEY_ID: str = ""
     TEST_BUYER_WALLET: str = ""
+    # Shared connection pool for all Open Payments SDK calls
+    OPEN_PAYMENTS_HTTP_TIMEOUT: float = 10.0  # seconds per read, write or pool wait
+    OPEN_PAYMENTS_CONNECT_TIMEOUT: float = 3.0
+    OPEN_PAYMENTS_RETRY_ATTEMPTS: int = 3  # attempts per idempotent call, including the first
+    OPEN_PAYMENTS_RETRY_BACKOFF: float = 0.2  # seconds, doubled per retry
+    OPEN_PAYMENTS_RETRY_MAX_BACKOFF: float = 2.0
+    OPEN_PAYMENTS_CIRCUIT_FAILURE_THRESHOLD: int = 5  # consecutive failures that open a host's circuit
+    OPEN_PAYMENTS_CIRCUIT_RESET_TIMEOUT: float = 30.0  # seconds a host's circuit stays open before a probe
+    OPEN_PAYMENTS_MAX_CONNECTIONS: int = 100
+    OPEN_PAYMENTS_MAX_KEEPALIVE_CONNECTIONS: int = 20
+    OPEN_PAYMENTS_KEEPALIVE_EXPIRY: float = 30.0  # seconds
+    OPEN_PAYMENTS_HTTP2: bool = False  # requires `httpx[http2]`
+    OPEN_PAYMENTS_WALLET_CACHE_TTL: int = 300  # seconds, when the wallet server sends no `max-age`
+    OPEN_PAYMENTS_WALLET_CACHE_STALE_TTL: int = 86400  # seconds a stale entry is kept for ETag revalidation
+    OPEN_PAYMENTS_TOKEN_ROTATION_MARGIN: int = 30  # seconds before expiry that a cached grant token is rotated
+    OPEN_PAYMENTS_METRICS: bool = True  # record per-call latency, served at /payments/metrics
+    OPEN_PAYMENTS_METRICS_LOG: bool = False  # also log every call as a JSON line
+    # Where flows keep state between start and callback: "redis" (shared by all workers) or "memory"
+    OPEN_PAYMENTS_STATE_STORE: Literal["redis", "memory"] = "redis"
+    OPEN_PAYMENTS_PENDING_TTL: int = 3600  # seconds a pending transaction or grant waits for its callback
+    OPEN_PAYMENTS_CLAIM_TTL: int = 120  # seconds a callback holds its pending state while completing it
+    # `Idempotency-Key` handling for payment callbacks and triggers
+    IDEMPOTENCY_TTL: int = 86400  # seconds a response is replayed to repeats of its key
+    IDEMPOTENCY_LOCK_TTL: int = 60  # seconds a key stays locked by a request that never finishes
+    IDEMPOTENCY_WAIT: float = 10.0  # seconds a duplicate waits for the in-flight response before a 409
+    # Scheduled execution of due recurring payments
+    RECURRING_PAYMENTS_SCHEDULE: float = 60.0  # seconds between scheduler runs
+    RECURRING_PAYMENTS_CONCURRENCY: int = 50  # payments in flight per run
+    RECURRING_PAYMENTS_PER_AUTH_SERVER: int = 10  # payments in flight against any one auth server
+    RECURRING_PAYMENTS_JITTER: float = 2.0  # max seconds of random delay before each payment
+    RECURRING_PAYMENTS_CLAIM_TTL: int = 900  # minimum seconds an interval stays claimed by the run executing it
+    # Settlement reconciliation of outgoing payments
+    RECONCILIATION_SCHEDULE: float = 5.0  # seconds between reconciliation runs
+    RECONCILIATION_BATCH_SIZE: int = 1000  # due payments checked per run
+    RECONCILIATION_PER_RESOURCE_SERVER: int = 10  # requests in flight against any one resource server
+    RECONCILIATION_LIST_THRESHOLD: int = 10  # due payments of one wallet from which its listing is read instead
+    RECONCILIATION_MIN_INTERVAL: float = 2.0  # seconds before a payment is first checked, or rechecked after progress
+    RECONCILIATION_MAX_INTERVAL: float = 300.0  # most seconds between checks of a payment that is not moving
+    RECONCILIATION_MAX_AGE: int = 86400  # seconds after which an unsettled payment is given up as `Unknown`
+    # Bounded thread pool for blocking payment work of async handlers
+    PAYMENT_EXECUTOR_WORKERS: int = 16  # threads for blocking Open Payments calls and payment database writes
+    PAYMENT_EXECUTOR_QUEUE: int = 64  # calls allowed to wait for a thread before requests are refused with a 503
+    PAYMENT_EXECUTOR_RETRY_AFTER: int = 1  # seconds in the `Retry-After` header of those 503s
+    # Streaming finance exports of orders and receipts
+    EXPORT_BATCH_SIZE: int = 1000  # rows fetched per server-side cursor round trip, and encoded per chunk
+    # Indicative FX quotes for the MIGRANTE (USD) -> FINSUS (MXN) corridor
+    FX_QUOTE_REFRESH_AMOUNTS: list[int] = []  # hot receive amounts (MXN cents) kept quoted; empty disables refresh
+    FX_QUOTE_REFRESH_SCHEDULE: float = 60.0  # seconds between background refreshes
+    FX_QUOTE_EXPIRY_MARGIN: int = 30  # seconds before `expiresAt` that a cached quote stops being served
+    FX_QUOTE_DEFAULT_TTL: int = 300  # seconds, for quotes without `expiresAt`, and the probe payment lifetime
+    FX_QUOTE_SLIPPAGE: float = 0.02  # fraction the binding quote's debit may exceed the indicative one
 
     # CONSTRUCTOKEN HACKATHON - WALLET CREDENTIALS
     # Migrante Wallet (Pancho - USD)
@@ -124,6 +175,7 @@ class Settings(BaseSettings):
 
     # GENERAL SETTINGS
     MULTI_MAX: int = 20
+    MULTI_LIMIT_MAX: int = 100  # largest page a cursor-paged list may ask for with `limit`
     DEFAULT_WORKING_DIRECTORY: str = "working"
     DEFAULT_MEDIA_MAX_SIZE: int = 12800000000
     API_MEDIA_STR: str = "media"
@@ -35,6 +35,8 @@ from .activitypub.crud_status import status  # noqa: F401
 from .activitypub.crud_instance import rules  # noqa: F401
 from .activitypub.crud_media import media  # noqa: F401
 
+from .product.crud_price import price  # noqa: F401
+
 ###################################################################################################
 # PRODUCT CRUD
 ###################################################################################################
@@ -44,6 +46,10 @@ from .activitypub.crud_media import media  # noqa: F401
 ###################################################################################################
 # from .openpayments.crud_payments import payments_parser  # noqa: F401
 from .openpayments.crud_open_payments import OpenPaymentsProcessor  # noqa: F401
+from .openpayments.crud_wallet import openwallet  # noqa: F401
+from .openpayments.crud_order import openorder  # noqa: F401
+from .openpayments.crud_receipt import openreceipt  # noqa: F401
+from .openpayments.crud_recipient import openrecipient  # noqa: F401
 
 
 ###################################################################################################
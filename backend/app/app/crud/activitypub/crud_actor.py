@@ -20,8 +20,10 @@ along with this program.  If not, see <http:#www.gnu.org/licenses/>.
 
 from typing import Optional, TypeVar
 from pydantic import HttpUrl
+from ulid import ULID
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from sqlalchemy import desc
+from sqlalchemy import desc, select
 from babel import Locale
 from bovine import activitystreams, BovineActor
 from bovine.types import Visibility
@@ -59,31 +61,47 @@ class CRUDActor(CRUDBase[Actor, ActorCreate, ActorUpdate]):
     # STANDARD CRUD
     ###################################################################################################
 
-    def get_multi_creators(self, db: Session, *, page: int = 0, page_break: bool = False) -> list[dict[str, any]]:
+    def get_multi_discoverable(
+        self,
+        db: Session,
+        *,
+        after: Optional[str | ULID] = None,
+        limit: Optional[int] = None,
+        page: int = 0,
+        page_break: bool = False,
+    ) -> list[Actor]:
         query_filter = self.model.type == ActorType.Person
         query_filter &= self.model.discoverable.is_(True)
-        db_objs = db.query(self.model).filter(query_filter)
-        if not page_break:
-            if page > 0:
-                db_objs = db_objs.offset(page * settings.MULTI_MAX)
-            db_objs = db_objs.limit(settings.MULTI_MAX)
-        db_objs = db_objs.all()
+        return self.paginate(
+            db.query(self.model).filter(query_filter), after=after, limit=limit, page=page, page_break=page_break
+        )
+
+    def get_multi_creators(
+        self,
+        db: Session,
+        *,
+        after: Optional[str | ULID] = None,
+        limit: Optional[int] = None,
+        page: int = 0,
+        page_break: bool = False,
+    ) -> list[dict[str, any]]:
+        db_objs = self.get_multi_discoverable(db=db, after=after, limit=limit, page=page, page_break=page_break)
         return [self.get_wellknown_actor(db=db, db_obj=db_obj, visibility=Visibility.OWNER) for db_obj in db_objs]
 
     def get_actors_by_creator(
-        self, *, db_creator: Creator, page: int = 0, page_break: bool = False, actor_type: ActorType = None
+        self,
+        *,
+        db_creator: Creator,
+        after: Optional[str | ULID] = None,
+        limit: Optional[int] = None,
+        page: int = 0,
+        page_break: bool = False,
+        actor_type: ActorType = None,
     ) -> list[Actor]:
-        query_filter = None
         db_objs = db_creator.actors
         if actor_type:
-            query_filter = self.model.type == actor_type
-        if query_filter:
-            db_objs = db_objs.filter(query_filter)
-        if not page_break:
-            if page > 0:
-                db_objs = db_objs.offset(page * settings.MULTI_MAX)
-            db_objs = db_objs.limit(settings.MULTI_MAX)
-        return db_objs.all()
+            db_objs = db_objs.filter(self.model.type == actor_type)
+        return self.paginate(db_objs, after=after, limit=limit, page=page, page_break=page_break)
 
     async def _get_profile_social_attributes(
         self,
@@ -163,6 +181,13 @@ class CRUDActor(CRUDBase[Actor, ActorCreate, ActorUpdate]):
         query_filter &= self.model.domain == domain
         return db.query(self.model).filter(query_filter).first()
 
+    async def aget_by_name(
+        self, db: AsyncSession, *, name: str, domain: str = settings.NGROK_DOMAIN
+    ) -> Optional[Actor]:
+        query_filter = self.model.preferredUsername == name
+        query_filter &= self.model.domain == domain
+        return await db.scalar(select(self.model).where(query_filter).limit(1))
+
     def check_persona_name(self, db: Session, *, name: str) -> bool:
         # 1. Check if persona is valid
         if len(name) < settings.MINIMUM_NAME_LENGTH or len(name) > settings.MAXIMUM_NAME_LENGTH:
@@ -194,6 +219,11 @@ class CRUDActor(CRUDBase[Actor, ActorCreate, ActorUpdate]):
             secret=db_obj.privateKey,
         )
 
+    async def aget_site_actor(self, *, db: AsyncSession) -> BovineActor:
+        preferredUsername = regex.url_root(settings.SERVER_HOST).replace("-", "_").replace(".", "_")
+        db_obj = await db.scalar(select(self.model).where(self.model.preferredUsername == preferredUsername).limit(1))
+        return self.get_requests_actor(db_obj=db_obj)
+
     def get_requests_actor(self, *, db_obj: Actor):
         return BovineActor(
             actor_id=db_obj.URL,
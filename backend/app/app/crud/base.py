@@ -20,9 +20,11 @@ along with this program.  If not, see <http:#www.gnu.org/licenses/>.
 
 from typing import Any, Dict, Generic, Optional, Type, TypeVar, Union
 
-from sqlalchemy.exc import IntegrityError
+from sqlalchemy import Select, delete, func, inspect, select, tuple_
+from sqlalchemy.dialects.postgresql import insert
 from sqlalchemy.orm.decl_api import DeclarativeAttributeIntercept
 from pydantic import BaseModel
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session, Query
 from ulid import ULID
 from pydantic import HttpUrl
@@ -36,7 +38,7 @@ from bovine.activitystreams.object_factory import ObjectFactory
 from bovine import BovineActor
 from bovine.activitystreams import Actor as BovineStreamsActor
 
-from app.db.base_class import Base
+from app.db.base_class import Base, generate_ULID
 from app.models.activitypub.tag import Tag
 from app.core.config import settings
 
@@ -79,13 +81,116 @@ class CRUDBase(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
             URI = str(URI)
         return db.query(self.model).filter(self.model.URI == URI).first()
 
-    def get_multi(self, db: Session, *, page: int = 0, page_break: bool = False) -> list[ModelType]:
-        db_objs = db.query(self.model)
-        if not page_break:
-            if page > 0:
-                db_objs = db_objs.offset(page * settings.MULTI_MAX)
-            db_objs = db_objs.limit(settings.MULTI_MAX)
-        return db_objs.all()
+    def get_multi(
+        self,
+        db: Session,
+        *,
+        after: Optional[str | ULID] = None,
+        limit: Optional[int] = None,
+        page: int = 0,
+        page_break: bool = False,
+    ) -> list[ModelType]:
+        return self.paginate(db.query(self.model), after=after, limit=limit, page=page, page_break=page_break)
+
+    ###################################################################################################
+    # ASYNC READ
+    ###################################################################################################
+
+    async def aget(self, db: AsyncSession, id: Any) -> Optional[ModelType]:
+        if isinstance(id, ULID):
+            id = str(id)
+        return await db.scalar(select(self.model).where(self.model.id == id).limit(1))
+
+    async def aget_by_uri(self, db: AsyncSession, URI: str | HttpUrl) -> Optional[ModelType]:
+        if isinstance(URI, HttpUrl):
+            URI = str(URI)
+        return await db.scalar(select(self.model).where(self.model.URI == URI).limit(1))
+
+    async def aget_multi(
+        self,
+        db: AsyncSession,
+        *,
+        after: Optional[str | ULID] = None,
+        limit: Optional[int] = None,
+        page: int = 0,
+        page_break: bool = False,
+    ) -> list[ModelType]:
+        return await self.apaginate(db, select(self.model), after=after, limit=limit, page=page, page_break=page_break)
+
+    ###################################################################################################
+    # KEYSET PAGINATION
+    ###################################################################################################
+
+    def _page_limit(self, limit: Optional[int]) -> int:
+        return min(max(limit or settings.MULTI_MAX, 1), settings.MULTI_LIMIT_MAX)
+
+    def paginate(
+        self,
+        query: Query,
+        *,
+        key: Any = None,
+        after: Optional[str | ULID] = None,
+        limit: Optional[int] = None,
+        page: int = 0,
+        page_break: bool = False,
+    ) -> list[ModelType]:
+        """
+        Page through `query` in `key` order, the ULID `id` by default, and so in order of creation.
+
+        **Parameters**
+
+        * `after`: the cursor, being the `key` of the last row of the previous page. Each page is an index range
+          scan, however deep.
+        * `limit`: the page size, `MULTI_MAX` by default, capped at `MULTI_LIMIT_MAX`.
+        * `page`: OFFSET paging, kept for existing callers, which gets slower with depth. Ignored with `after`.
+        * `page_break`: return every row, from `after` if given.
+        """
+        return self._page_query(query, key=key, after=after, limit=limit, page=page, page_break=page_break).all()
+
+    async def apaginate(
+        self,
+        db: AsyncSession,
+        statement: Select,
+        *,
+        key: Any = None,
+        after: Optional[str | ULID] = None,
+        limit: Optional[int] = None,
+        page: int = 0,
+        page_break: bool = False,
+    ) -> list[ModelType]:
+        """As `paginate`, for a `select()` run on an async session."""
+        statement = self._page_query(statement, key=key, after=after, limit=limit, page=page, page_break=page_break)
+        return list((await db.scalars(statement)).all())
+
+    def _page_query(
+        self,
+        query: Query | Select,
+        *,
+        key: Any = None,
+        after: Optional[str | ULID] = None,
+        limit: Optional[int] = None,
+        page: int = 0,
+        page_break: bool = False,
+    ) -> Query | Select:
+        key = key if key is not None else self.model.id
+        # Replace any relationship ordering, so that the index on `key` is used
+        query = query.order_by(None).order_by(key)
+        if after:
+            query = query.filter(key > str(after))
+        if page_break:
+            return query
+        limit = self._page_limit(limit)
+        if page > 0 and not after:
+            query = query.offset(page * limit)
+        return query.limit(limit)
+
+    def get_next_cursor(
+        self, db_objs: list[ModelType], *, limit: Optional[int] = None, key: str = "id"
+    ) -> Optional[str]:
+        """The cursor for the page after `db_objs`, or None if it was the last page."""
+        if not db_objs or len(db_objs) < self._page_limit(limit):
+            return None
+        return str(getattr(db_objs[-1], key))
 
     def create_tags(
         self,
@@ -97,79 +202,210 @@ class CRUDBase(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
         is_usable: bool = True,
     ) -> list[Tag]:
         # Automatically populate tags as a matter of course
-        # Prevents tag term duplication (hopefully)
-        db_objs = []
+        # Prevents tag term duplication: existing names are left as they are, in one round trip for all the tags
+        terms = {}
         for obj_in in objs_in:
-            if not obj_in.get("name"):
-                continue
-            name = obj_in["name"]
-            if "#" in name:
+            name = obj_in.get("name")
+            if name and "#" in name:
                 name = regex.hashtag_root(name)
-            lang = self._fix_language(obj_in.get("language", language))
-            if not name:
-                continue
-            try:
-                # https://stackoverflow.com/a/52075777/295606
-                db_obj = Tag(
-                    **{
-                        "language": lang,
-                        "name": name,
-                        "local": is_local,
-                        "usable": is_usable,
-                    }
-                )
-                db.add(db_obj)
-                db.commit()
-                db.refresh(db_obj)
-            except IntegrityError:
-                db.rollback()
-                db_obj = db.query(Tag).filter(Tag.name == name).first()
-            if db_obj:
-                db_objs.append(db_obj)
-        return db_objs
-
-    def create(self, db: Session, *, obj_in: CreateSchemaType) -> ModelType:
+            if name and name not in terms:
+                terms[name] = self._fix_language(obj_in.get("language", language))
+        if not terms:
+            return []
+        # https://docs.sqlalchemy.org/en/20/orm/queryguide/dml.html#orm-upsert-statements
+        query = (
+            insert(Tag)
+            .values(
+                [
+                    {"id": generate_ULID(), "language": lang, "name": name, "local": is_local, "usable": is_usable}
+                    for name, lang in terms.items()
+                ]
+            )
+            .on_conflict_do_nothing(index_elements=[Tag.name])
+            .returning(Tag)
+        )
+        db_objs = {db_obj.name: db_obj for db_obj in db.scalars(query)}
+        existing = [name for name in terms if name not in db_objs]
+        if existing:
+            db_objs |= {db_obj.name: db_obj for db_obj in db.query(Tag).filter(Tag.name.in_(existing))}
+        return [db_objs[name] for name in terms if name in db_objs]
+
+    def _get_obj_in_data(
+        self, obj_in: CreateSchemaType | dict[str, Any]
+    ) -> tuple[dict[str, Any], dict[str, dict[Locale, str]], Optional[list[dict[str, str]]], bool]:
+        """
+        Split a create schema into its column values, its i18n terms as `{field: {language: text}}`, its `tag` terms
+        (None if not given), and whether it is local.
+        """
         # obj_in_data = jsonable_encoder(obj_in)
         if not isinstance(obj_in, dict):
             obj_in = obj_in.model_dump(exclude_unset=True, mode="json")
         obj_in_data = deepcopy(obj_in)
-        if hasattr(self.model, "tag") and obj_in_data.get("tag", False):
-            tag_objs = obj_in_data.pop("tag", None)
-            is_local = False
-            if hasattr(self.model, "URI") and obj_in_data.get("URI", False):
-                is_local = regex.url_is_local(obj_in_data["URI"])
-            # 'tg' for the database, vs 'tag' for the list of terms
-            obj_in_data["tg"] = self.create_tags(db=db, objs_in=tag_objs, is_local=is_local)
-        if hasattr(self.model, "country") and obj_in_data.get("country", False):
-            obj_in_data["country"] = obj_in["country"]
+        tag_objs = None
+        if hasattr(self.model, "tag"):
+            tag_objs = obj_in_data.pop("tag", None) or None
+        is_local = False
+        if hasattr(self.model, "URI") and obj_in_data.get("URI", False):
+            is_local = regex.url_is_local(obj_in_data["URI"])
         if hasattr(self.model, "language") and obj_in_data.get("language", False):
-            obj_in["language"] = self._fix_language(obj_in["language"])
             # This will be the default language
-            obj_in_data["language"] = obj_in["language"]
+            obj_in_data["language"] = self._fix_language(obj_in_data["language"])
+        i18n_data = {}
         for field in self.i18n_terms.keys():
             if obj_in_data.get(field, False):
                 # Now, have two options ... value can be a string, or a dict of different languages
                 if isinstance(obj_in_data[field], str):
-                    obj_in_data[field] = {
-                        obj_in["language"]: self.i18n_terms[field](obj_in["language"], obj_in_data[field])
-                    }
+                    lang = self._fix_language(obj_in_data.get("language")) or settings.DEFAULT_LANGUAGE
+                    i18n_data[field] = {lang: obj_in_data[field]}
                 elif isinstance(obj_in_data[field], dict):
                     # ASSUME: has form {'language': 'text'}
-                    obj_in_field = {}
-                    for k, v in obj_in_data[field].items():
-                        k = self._fix_language(k)
-                        obj_in_field[k] = self.i18n_terms[field](k, v)
-                    if obj_in_field:
-                        obj_in_data[field] = obj_in_field
+                    i18n_data[field] = {self._fix_language(k): v for k, v in obj_in_data[field].items()}
+            obj_in_data.pop(field, None)
         if not hasattr(self.model, "language") and obj_in_data.get("language", False):
             # for 'reasons' no default language - usually derived from parent
             del obj_in_data["language"]
-        db_obj = self.model(**obj_in_data)  # type: ignore
+        return obj_in_data, i18n_data, tag_objs, is_local
+
+    def _get_db_obj(
+        self, obj_in_data: dict[str, Any], i18n_data: dict[str, dict[Locale, str]], tag_objs: Optional[list[Tag]]
+    ) -> ModelType:
+        if tag_objs is not None:
+            # 'tg' for the database, vs 'tag' for the list of terms
+            obj_in_data["tg"] = tag_objs
+        for field, terms in i18n_data.items():
+            obj_in_data[field] = {lang: self.i18n_terms[field](lang, text) for lang, text in terms.items()}
+        return self.model(**obj_in_data)  # type: ignore
+
+    def create(self, db: Session, *, obj_in: CreateSchemaType) -> ModelType:
+        obj_in_data, i18n_data, tag_objs, is_local = self._get_obj_in_data(obj_in)
+        if tag_objs:
+            tag_objs = self.create_tags(db=db, objs_in=tag_objs, is_local=is_local)
+        db_obj = self._get_db_obj(obj_in_data, i18n_data, tag_objs)
         db.add(db_obj)
         db.commit()
         db.refresh(db_obj)
         return db_obj
 
+    ###################################################################################################
+    # BULK CREATE AND UPSERT, FOR FEDERATION IMPORTS
+    ###################################################################################################
+
+    def _create_many_tags(
+        self, db: Session, *, objs_data: list[tuple[dict, dict, Optional[list[dict[str, str]]], bool]]
+    ) -> dict[str, Tag]:
+        # One tag upsert for local, and one for remote, objects
+        tags = {}
+        for local in (True, False):
+            tag_objs = [tag for _, _, tag_objs, is_local in objs_data if is_local is local for tag in tag_objs or []]
+            if tag_objs:
+                tags |= {tag.name: tag for tag in self.create_tags(db=db, objs_in=tag_objs, is_local=local)}
+        return tags
+
+    def _get_tag_objs(self, tags: dict[str, Tag], tag_objs: Optional[list[dict[str, str]]]) -> Optional[list[Tag]]:
+        if tag_objs is None:
+            return None
+        names = [tag.get("name") for tag in tag_objs]
+        names = [regex.hashtag_root(name) if name and "#" in name else name for name in names]
+        return list({name: tags[name] for name in names if name in tags}.values())
+
+    def create_many(self, db: Session, *, objs_in: list[CreateSchemaType]) -> list[str]:
+        """
+        Create objects, with their i18n terms and tags, in a single transaction: tags are upserted once for all the
+        objects, and the objects and their child rows are written in one flush of batched inserts.
+
+        Returns the ids of the new objects, in order.
+        """
+        objs_data = [self._get_obj_in_data(obj_in) for obj_in in objs_in]
+        if not objs_data:
+            return []
+        tags = self._create_many_tags(db, objs_data=objs_data)
+        db_objs = [
+            self._get_db_obj(obj_in_data, i18n_data, self._get_tag_objs(tags, tag_objs))
+            for obj_in_data, i18n_data, tag_objs, _ in objs_data
+        ]
+        db.add_all(db_objs)
+        db.flush()
+        ids = [db_obj.id for db_obj in db_objs]
+        db.commit()
+        return ids
+
+    def upsert_many_by_uri(self, db: Session, *, objs_in: list[CreateSchemaType]) -> list[str]:
+        """
+        Create objects, or update those whose `URI` already exists, with their i18n terms and tags, in a single
+        transaction of `INSERT ... ON CONFLICT (URI) DO UPDATE` and batched child row writes.
+
+        Only the fields given are updated. i18n terms given replace those in the same language, and tags given
+        replace the object's tags. Other relationships are not written. Where a `URI` is repeated, the last wins.
+
+        Returns the ids of the objects, in the order of their `URI`s.
+        """
+        if not hasattr(self.model, "URI"):
+            raise ValueError(f"Upsert error: {self.model.__name__} has no URI.")
+        objs_data = {}
+        for obj_in_data, i18n_data, tag_objs, is_local in map(self._get_obj_in_data, objs_in):
+            if not obj_in_data.get("URI"):
+                raise ValueError("Upsert error: every object needs a URI.")
+            obj_in_data["URI"] = str(obj_in_data["URI"])
+            objs_data[obj_in_data["URI"]] = (obj_in_data, i18n_data, tag_objs, is_local)
+        if not objs_data:
+            return []
+        tags = self._create_many_tags(db, objs_data=list(objs_data.values()))
+        mapper = inspect(self.model)
+        columns = {attr.key for attr in mapper.column_attrs}
+        # Rows are upserted in groups of the same fields, so that fields not given are not overwritten
+        groups = {}
+        for obj_in_data, _, _, _ in objs_data.values():
+            row = {key: value for key, value in obj_in_data.items() if key in columns}
+            row.setdefault("id", generate_ULID())
+            groups.setdefault(tuple(sorted(row)), []).append(row)
+        ids = {}
+        for fields, rows in groups.items():
+            query = insert(self.model).values(rows)
+            update_data = {field: query.excluded[field] for field in fields if field not in {"id", "created", "URI"}}
+            if "updated" in columns:
+                update_data["updated"] = func.now()
+            query = query.on_conflict_do_update(index_elements=[self.model.URI], set_=update_data)
+            ids |= dict(db.execute(query.returning(self.model.URI, self.model.id)).all())
+        # i18n terms, replaced by language
+        for field, i18n_model in self.i18n_terms.items():
+            parent_key, child_key = mapper.relationships[field].synchronize_pairs[0]
+            terms = [
+                (ids[URI], lang, text)
+                for URI, (_, i18n_data, _, _) in objs_data.items()
+                for lang, text in i18n_data.get(field, {}).items()
+            ]
+            if not terms:
+                continue
+            db.execute(
+                delete(i18n_model).where(
+                    tuple_(child_key, i18n_model.language).in_([(id, lang) for id, lang, _ in terms])
+                )
+            )
+            db.execute(
+                insert(i18n_model),
+                [
+                    {"id": generate_ULID(), child_key.key: id, "language": lang, field: text}
+                    for id, lang, text in terms
+                ],
+            )
+        # Tags, replaced where given
+        if hasattr(self.model, "tag"):
+            relationship = mapper.relationships["tg"]
+            _, parent_key = relationship.synchronize_pairs[0]
+            _, tag_key = relationship.secondary_synchronize_pairs[0]
+            links = {
+                ids[URI]: self._get_tag_objs(tags, tag_objs)
+                for URI, (_, _, tag_objs, _) in objs_data.items()
+                if tag_objs is not None
+            }
+            if links:
+                db.execute(delete(relationship.secondary).where(parent_key.in_(list(links))))
+                rows = [{parent_key.key: id, tag_key.key: tag.id} for id, tag_objs in links.items() for tag in tag_objs]
+                if rows:
+                    db.execute(insert(relationship.secondary), rows)
+        db.commit()
+        return [ids[URI] for URI in objs_data]
+
     def update(self, db: Session, *, db_obj: ModelType, obj_in: Union[UpdateSchemaType, Dict[str, Any]]) -> ModelType:
         if isinstance(obj_in, dict):
             update_data = obj_in
@@ -185,47 +421,48 @@ class CRUDBase(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
         if hasattr(db_obj, "language") and not db_obj.language and language:
             db_obj.language = language
         # UPDATE LOOP
+        # All changes are applied in one unit of work, and unchanged fields are skipped so that they are not written
         for field in update_data:
             if not hasattr(self.model, field):
                 continue
             if field == "tag":
-                tag_attrs = [attr for attr in getattr(db_obj, "tag")]
                 tag_objs = self.create_tags(db=db, objs_in=update_data.get(field, set()))
-                for tag_attr in tag_attrs:
-                    db_obj.tag.remove(tag_attr)
                 # 'tg' for the database, vs 'tag' for the list of terms
-                db_obj.tg = tag_objs
-                # for tag_obj in tag_objs:
-                #     # 'tg' is the actual table, but 'tag' is an association proxy
-                #     print("---------------------------------------------------------------------")
-                #     print(tag_obj)
-                #     db_obj.tag.add(tag_obj)
-            elif field in self.i18n_terms and language:
-                # Create of the form Model(language, term, db_obj)
-                i18n_obj = getattr(db_obj, field)
-                str_lang = str(language)
-                if i18n_obj and i18n_obj.get(str_lang):
-                    i18n_obj = i18n_obj[str_lang]
-                    setattr(i18n_obj, field, update_data[field][str_lang])
-                else:
-                    i18n_obj = self.i18n_terms[field](language, update_data[field], db_obj)
-                db.add(i18n_obj)
-                print("----------------------------------update-----------------------------------")
-                print(i18n_obj)
-                print(field, language, update_data[field])
-                print("----------------------------------update-----------------------------------")
-                db.commit()
+                if {tag_obj.id for tag_obj in tag_objs} != {tag_obj.id for tag_obj in db_obj.tg}:
+                    db_obj.tg = tag_objs
+            elif field in self.i18n_terms:
+                self._merge_i18n(db_obj=db_obj, field=field, value=update_data[field], language=language)
             else:
-                if isinstance(update_data[field], HttpUrl):
-                    update_data[field] = str(update_data[field])
-                setattr(db_obj, field, update_data[field])
-                db.add(db_obj)
-                db.commit()
+                value = update_data[field]
+                if isinstance(value, HttpUrl):
+                    value = str(value)
+                if getattr(db_obj, field) != value:
+                    setattr(db_obj, field, value)
         db.add(db_obj)
         db.commit()
         db.refresh(db_obj)
         return db_obj
 
+    def _merge_i18n(
+        self, *, db_obj: ModelType, field: str, value: str | dict[str, str], language: Optional[Locale]
+    ) -> None:
+        """
+        Merge a language-defined term, either a string in `language` or a dict of `{language: text}`, into the
+        i18n child rows of `db_obj`: changed rows are updated and new languages added, all in the caller's flush.
+        """
+        if isinstance(value, str):
+            value = {language or getattr(db_obj, "language", None) or settings.DEFAULT_LANGUAGE: value}
+        # Collection keys are Locales as loaded, so match them by their string form
+        i18n_objs = {str(key): i18n_obj for key, i18n_obj in (getattr(db_obj, field) or {}).items()}
+        for lang, text in value.items():
+            lang = self._fix_language(lang)
+            i18n_obj = i18n_objs.get(str(lang))
+            if i18n_obj is None:
+                # Create of the form Model(language, term, db_obj)
+                self.i18n_terms[field](lang, text, db_obj)
+            elif getattr(i18n_obj, field) != text:
+                setattr(i18n_obj, field, text)
+
     def remove(self, db: Session, *, id: Any) -> ModelType:
         if isinstance(id, ULID):
             id = str(id)
@@ -18,6 +18,7 @@ along with this program.  If not, see <http:#www.gnu.org/licenses/>.
 
 """
 
+from typing import Optional
 from sqlalchemy.orm import Session
 from fastapi.security import SecurityScopes
 
@@ -89,13 +90,16 @@ class CRUDToken(CRUDBase[Token, TokenCreate, TokenUpdate]):
     def get_by_creator(self, *, creator: Creator, token: str) -> Token:
         return creator.tokens.filter(self.model.token == token).first()
 
-    def get_multi(self, *, creator: Creator, page: int = 0, page_break: bool = False) -> list[Token]:
-        db_objs = creator.tokens
-        if not page_break:
-            if page > 0:
-                db_objs = db_objs.offset(page * settings.MULTI_MAX)
-            db_objs = db_objs.limit(settings.MULTI_MAX)
-        return db_objs.all()
+    def get_multi(
+        self,
+        *,
+        creator: Creator,
+        after: Optional[str] = None,
+        limit: Optional[int] = None,
+        page: int = 0,
+        page_break: bool = False,
+    ) -> list[Token]:
+        return self.paginate(creator.tokens, after=after, limit=limit, page=page, page_break=page_break)
 
     def remove(self, db: Session, *, db_obj: Token) -> None:
         db.delete(db_obj)
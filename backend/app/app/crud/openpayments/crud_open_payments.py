@@ -21,7 +21,6 @@ along with this program.  If not, see <http:#www.gnu.org/licenses/>.
 from ulid import ULID
 from pydantic import AnyUrl
 from app.open_payments_sdk.http import HttpClient
-from app.open_payments_sdk.client.client import OpenPaymentsClient
 from app.open_payments_sdk.api.auth import GrantRequest, Grant, InteractRef
 from app.open_payments_sdk.models.resource import (
     IncomingPaymentRequest,
@@ -34,6 +33,7 @@ from app.open_payments_sdk.models.resource import (
 from app.core.config import settings
 from app.utilities.openpayments import paymentsparser
 from app.schemas.openpayments.open_payments import SellerOpenPaymentAccount, PendingIncomingPaymentTransaction
+from app.utils.open_payments_client import create_op_client, get_op_client
 
 
 class OpenPaymentsProcessor:
@@ -64,17 +64,22 @@ class OpenPaymentsProcessor:
         http_client: HttpClient = None,
         redirect_uri: str = settings.DEFAULT_REDIRECT_AFTER_AUTH,
     ) -> None:
-        if not http_client:
-            http_client = HttpClient(http_timeout=10.0)
-        self.http_client = http_client
         self.seller = seller
         self.buyer = paymentsparser.normalise_wallet_address(wallet_address=buyer)
-        self.client = OpenPaymentsClient(
-            keyid=self.seller.keyId,
-            private_key=self.seller.privateKey,
-            client_wallet_address=self.seller.walletAddressUrl,
-            http_client=self.http_client,
-        )
+        if http_client:
+            self.client = create_op_client(
+                wallet_address=self.seller.walletAddressUrl,
+                key_id=self.seller.keyId,
+                private_key=self.seller.privateKey,
+                http_client=http_client,
+            )
+        else:
+            self.client = get_op_client(
+                wallet_address=self.seller.walletAddressUrl,
+                key_id=self.seller.keyId,
+                private_key=self.seller.privateKey,
+            )
+        self.http_client = self.client.http_client
         self.seller_wallet = self.client.wallet.get_wallet_address(self.seller.walletAddressUrl)
         self.buyer_wallet = self.client.wallet.get_wallet_address(self.buyer)
         self.pending_payment = PendingIncomingPaymentTransaction(
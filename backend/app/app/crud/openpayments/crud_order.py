@@ -18,9 +18,69 @@ along with this program.  If not, see <http:#www.gnu.org/licenses/>.
 
 """
 
+from datetime import datetime
+from typing import Any, Optional
+from babel import Locale
+from pydantic import AnyUrl, BaseModel
+from sqlalchemy import Select, and_, func, select
+from sqlalchemy.engine import MappingResult
+from sqlalchemy.orm import InstrumentedAttribute, Session, aliased
+from ulid import ULID
+
+from app.core.config import settings
 from app.crud.base import CRUDBase
+from app.models.openpayments.functions import resource_ids
 from app.models.openpayments.order import OpenOrder
+from app.models.openpayments.wallet import OpenWallet
+from app.models.product.price import Price
+from app.models.product.product import Product, ProductName
+from app.open_payments_sdk.models.wallet import WalletAddress
 from app.schemas.openpayments.order import OpenOrderCreate, OpenOrderUpdate, OpenOrder as OpenOrderOut
+from app.crud.openpayments.crud_wallet import openwallet
+
+
+def dump_resources(resources: list[BaseModel]) -> list[dict[str, Any]]:
+    """Open Payments resources as JSON-compatible dicts, for the ARRAY(JSONB) workflow columns."""
+    return [resource.model_dump(mode="json", by_alias=True, exclude_none=True) for resource in resources]
+
+
+def dump_interactive_grant(grant: BaseModel) -> dict[str, Any]:
+    """An interactive grant response, without its continuation token, which must not be stored with the order."""
+    data = grant.model_dump(mode="json", by_alias=True, exclude_none=True)
+    data.get("cont", {}).pop("access_token", None)
+    return data
+
+
+def join_product_name(query: Select, *, product_id: InstrumentedAttribute, language: Locale) -> Select:
+    """
+    Add the `product_name` in `language` to an export query, falling back to the name in the product's own language,
+    as outer joins so that rows are streamed rather than the names being looked up per row.
+    """
+    name, fallback = aliased(ProductName), aliased(ProductName)
+    return (
+        query.add_columns(func.coalesce(name.name, fallback.name).label("product_name"))
+        .join(Product, Product.id == product_id)
+        .outerjoin(name, and_(name.product_id == Product.id, name.language == language))
+        .outerjoin(fallback, and_(fallback.product_id == Product.id, fallback.language == Product.language))
+    )
+
+
+def filter_export(
+    query: Select,
+    model: Any,
+    *,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    product_id: Optional[str] = None,
+) -> Select:
+    """Filter an export query by its `created` range and product, in a stable order for resumable reads."""
+    if start:
+        query = query.where(model.created >= start)
+    if end:
+        query = query.where(model.created < end)
+    if product_id:
+        query = query.where(model.product_id == product_id)
+    return query.order_by(model.created, model.id)
 
 
 class CRUDOpenOrder(CRUDBase[OpenOrder, OpenOrderCreate, OpenOrderUpdate]):
@@ -28,7 +88,103 @@ class CRUDOpenOrder(CRUDBase[OpenOrder, OpenOrderCreate, OpenOrderUpdate]):
     All CRUD for OpenOrder management.
     """
 
-    pass
+    def get_by_incoming_payment(self, db: Session, *, incoming_payment_id: str | AnyUrl) -> Optional[OpenOrder]:
+        query_filter = resource_ids(self.model.incoming_payments).contains([str(incoming_payment_id)])
+        return db.query(self.model).filter(query_filter).first()
+
+    def get_by_quote(self, db: Session, *, quote_id: str | AnyUrl) -> Optional[OpenOrder]:
+        query_filter = resource_ids(self.model.incoming_quotes).contains([str(quote_id)])
+        return db.query(self.model).filter(query_filter).first()
+
+    def get_export(
+        self,
+        db: Session,
+        *,
+        start: Optional[datetime] = None,
+        end: Optional[datetime] = None,
+        product_id: Optional[str] = None,
+        currency: Optional[str] = None,
+        language: str | Locale = settings.DEFAULT_LANGUAGE,
+        batch_size: int = settings.EXPORT_BATCH_SIZE,
+    ) -> MappingResult:
+        """
+        Stream orders as flat rows for finance exports, `batch_size` at a time from a server-side cursor, so that
+        memory stays constant however many orders match. `currency` is that of the ordered price.
+        """
+        query = select(
+            self.model.id,
+            self.model.created,
+            self.model.product_id,
+            self.model.price_id,
+            Price.amount,
+            Price.currency,
+            Price.scale,
+            self.model.country,
+            self.model.renewal,
+            self.model.renewal_periods,
+            self.model.end,
+            self.model.fees,
+            self.model.completed,
+            self.model.cancelled,
+            OpenWallet.address.label("buyer"),
+            self.model.creator_id,
+        )
+        query = query.join(Price, Price.id == self.model.price_id)
+        query = query.join(OpenWallet, OpenWallet.id == self.model.buyer_id)
+        query = join_product_name(
+            query, product_id=self.model.product_id, language=self._fix_language_for_db(language)
+        )
+        if currency:
+            query = query.where(Price.currency == currency.upper())
+        query = filter_export(query, self.model, start=start, end=end, product_id=product_id)
+        return db.execute(query.execution_options(yield_per=batch_size)).mappings()
+
+    def create_for_flow(
+        self,
+        db: Session,
+        *,
+        id: str | ULID,
+        obj_in: OpenOrderCreate,
+        buyer: WalletAddress,
+        incoming_payments: list[BaseModel],
+        quotes: list[BaseModel],
+        interactive_grant: BaseModel,
+    ) -> OpenOrder:
+        """
+        Record the start of a payment flow, once the buyer has been asked to authorize it: the buyer's wallet and the
+        order with its incoming payments, quotes and interactive grant, in a single commit.
+
+        `id` is the flow's pending transaction id, so that its callback finds the order.
+        """
+        obj_in_data = obj_in.model_dump(
+            exclude_unset=True, exclude={"buyer_id", "incoming_payments", "incoming_quotes", "interactive_outgoings"}
+        )
+        obj_in_data = {key: str(value) if isinstance(value, ULID) else value for key, value in obj_in_data.items()}
+        buyer_address = str(buyer.id)
+        wallets = openwallet.get_or_add_many(
+            db,
+            wallets={
+                buyer_address: dict(
+                    publicName=buyer.publicName,
+                    assetCode=buyer.assetCode.root,
+                    assetScale=buyer.assetScale.root,
+                    authServer=str(buyer.authServer),
+                    resourceServer=str(buyer.resourceServer),
+                )
+            },
+        )
+        db_obj = self.model(
+            **obj_in_data,
+            id=str(id),
+            buyer_id=wallets[buyer_address].id,
+            incoming_payments=dump_resources(incoming_payments),
+            incoming_quotes=dump_resources(quotes),
+            interactive_outgoings=[dump_interactive_grant(interactive_grant)],
+        )
+        db.add(db_obj)
+        db.commit()
+        db.refresh(db_obj)
+        return db_obj
 
 
 openorder = CRUDOpenOrder(model=OpenOrder)
@@ -18,9 +18,27 @@ along with this program.  If not, see <http:#www.gnu.org/licenses/>.
 
 """
 
+from datetime import datetime, timezone
+from typing import Optional
+from babel import Locale
+from pydantic import AnyUrl
+from sqlalchemy import select
+from sqlalchemy.engine import MappingResult
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
 from app.crud.base import CRUDBase
+from app.db.base_class import generate_ULID
+from app.models.openpayments.functions import resource_ids
+from app.models.openpayments.order import OpenOrder
 from app.models.openpayments.receipt import OpenReceipt
+from app.models.openpayments.recipient import OpenRecipient
+from app.models.openpayments.wallet import OpenWallet
+from app.open_payments_sdk.models.resource import OutgoingPayment, Quote
+from app.schema_types import PaymentSettlementType
 from app.schemas.openpayments.receipt import OpenReceiptCreate, OpenReceiptUpdate, OpenReceipt as OpenReceiptOut
+from app.crud.openpayments.crud_order import dump_resources, filter_export, join_product_name
+from app.crud.openpayments.crud_wallet import openwallet
 
 
 class CRUDOpenReceipt(CRUDBase[OpenReceipt, OpenReceiptCreate, OpenReceiptUpdate]):
@@ -28,7 +46,178 @@ class CRUDOpenReceipt(CRUDBase[OpenReceipt, OpenReceiptCreate, OpenReceiptUpdate
     All CRUD for OpenReceipt management.
     """
 
-    pass
+    def get_by_outgoing_payment(self, db: Session, *, outgoing_payment_id: str | AnyUrl) -> Optional[OpenReceipt]:
+        query_filter = resource_ids(self.model.outgoing_payments).contains([str(outgoing_payment_id)])
+        return db.query(self.model).filter(query_filter).first()
+
+    def get_multi_by_outgoing_payments(self, db: Session, *, outgoing_payment_ids: list[str]) -> list[OpenReceipt]:
+        query_filter = resource_ids(self.model.outgoing_payments).overlap([str(id) for id in outgoing_payment_ids])
+        return db.query(self.model).filter(query_filter).all()
+
+    def get_export(
+        self,
+        db: Session,
+        *,
+        start: Optional[datetime] = None,
+        end: Optional[datetime] = None,
+        product_id: Optional[str] = None,
+        currency: Optional[str] = None,
+        language: str | Locale = settings.DEFAULT_LANGUAGE,
+        batch_size: int = settings.EXPORT_BATCH_SIZE,
+    ) -> MappingResult:
+        """
+        Stream receipts as flat rows for finance exports, `batch_size` at a time from a server-side cursor, so that
+        memory stays constant however many receipts match. `currency` is the receipt's `assetCode`.
+        """
+        query = select(
+            self.model.id,
+            self.model.created,
+            self.model.product_id,
+            self.model.price_id,
+            self.model.order_id,
+            self.model.type,
+            self.model.country,
+            self.model.end,
+            self.model.fees,
+            self.model.amount,
+            self.model.assetCode,
+            self.model.assetScale,
+            self.model.settlement,
+            self.model.sentAmount,
+            self.model.settled,
+            OpenWallet.address.label("buyer"),
+            self.model.creator_id,
+        )
+        query = query.join(OpenWallet, OpenWallet.id == self.model.buyer_id)
+        query = join_product_name(
+            query, product_id=self.model.product_id, language=self._fix_language_for_db(language)
+        )
+        if currency:
+            query = query.where(self.model.assetCode == currency.upper())
+        query = filter_export(query, self.model, start=start, end=end, product_id=product_id)
+        return db.execute(query.execution_options(yield_per=batch_size)).mappings()
+
+    def _get_settlement(self, outgoing_payments: list[dict]) -> PaymentSettlementType:
+        settlements = {payment.get("settlement", PaymentSettlementType.Pending) for payment in outgoing_payments}
+        if PaymentSettlementType.Pending in settlements:
+            return PaymentSettlementType.Pending
+        for settlement in (PaymentSettlementType.Unknown, PaymentSettlementType.Failed):
+            if settlement in settlements:
+                return settlement
+        return PaymentSettlementType.Completed
+
+    def settle_payments(
+        self,
+        db: Session,
+        *,
+        settlements: dict[str, PaymentSettlementType],
+        outgoing_payments: list[OutgoingPayment] = (),
+    ) -> list[OpenReceipt]:
+        """
+        Record reconciled outgoing payments on their receipts, in a single commit for the whole batch.
+
+        `settlements` is the final state of each payment, by id, and `outgoing_payments` their latest resources. Each
+        payment's resource on the receipt is replaced, with its `settlement` added, and the receipt's `sentAmount` is
+        the sum over its payments. Once every payment of a receipt is final, the receipt takes their settlement:
+        `Unknown` if any is unknown, then `Failed` if any failed, otherwise `Completed`.
+        """
+        if not settlements:
+            return []
+        latest = {str(payment.id): payment for payment in outgoing_payments}
+        db_objs = self.get_multi_by_outgoing_payments(db, outgoing_payment_ids=list(settlements.keys()))
+        for db_obj in db_objs:
+            resources = []
+            for resource in db_obj.outgoing_payments or []:
+                if resource["id"] in latest:
+                    resource = dump_resources([latest[resource["id"]]])[0]
+                if resource["id"] in settlements:
+                    resource = {**resource, "settlement": settlements[resource["id"]].value}
+                resources.append(resource)
+            # Reassigned, since in-place changes to an ARRAY column are not tracked
+            db_obj.outgoing_payments = resources
+            db_obj.sentAmount = str(
+                sum(int(resource.get("sentAmount", {}).get("value", 0)) for resource in resources)
+            )
+            db_obj.settlement = self._get_settlement(resources)
+            if db_obj.settlement != PaymentSettlementType.Pending:
+                db_obj.settled = datetime.now(timezone.utc)
+        db.commit()
+        return db_objs
+
+    def create_for_flow(
+        self,
+        db: Session,
+        *,
+        order: OpenOrder,
+        outgoing_payments: list[OutgoingPayment],
+        quotes: list[Quote] = (),
+        creators: Optional[dict[str, str]] = None,
+    ) -> OpenReceipt:
+        """
+        Record the completion of a payment flow, in a single commit: the order is completed, with any quotes taken
+        at confirmation, and a receipt is created for the outgoing payments, with a recipient for each of them.
+
+        Recipient wallets are matched to the order's incoming payments by the payments' `receiver`. For split
+        payments, `creators` maps an incoming payment id to the creator it pays.
+        """
+        if not outgoing_payments:
+            raise ValueError("A receipt requires at least one outgoing payment.")
+        creators = creators or {}
+        debit = outgoing_payments[0].debitAmount
+        if quotes:
+            # Reassigned, since in-place changes to an ARRAY column are not tracked
+            order.incoming_quotes = (order.incoming_quotes or []) + dump_resources(quotes)
+        order.completed = True
+        db_obj = self.model(
+            id=generate_ULID(),
+            order_id=order.id,
+            product_id=order.product_id,
+            price_id=order.price_id,
+            country=order.country,
+            end=order.end,
+            fees=order.fees,
+            buyer_id=order.buyer_id,
+            creator_id=order.creator_id,
+            amount=str(sum(int(payment.debitAmount.value) for payment in outgoing_payments)),
+            assetCode=debit.assetCode.root,
+            assetScale=debit.assetScale.root,
+            outgoing_payments=dump_resources(outgoing_payments),
+        )
+        db.add(db_obj)
+        incoming_payments = {payment["id"]: payment for payment in order.incoming_payments or []}
+        paid = [
+            (payment, incoming_payments[str(payment.receiver.root)])
+            for payment in outgoing_payments
+            if str(payment.receiver.root) in incoming_payments
+        ]
+        wallets = openwallet.get_or_add_many(
+            db,
+            wallets={
+                incoming_payment["walletAddress"]: dict(
+                    assetCode=payment.receiveAmount.assetCode.root, assetScale=payment.receiveAmount.assetScale.root
+                )
+                for payment, incoming_payment in paid
+            },
+        )
+        for payment, incoming_payment in paid:
+            wallet = wallets[incoming_payment["walletAddress"]]
+            db.add(
+                OpenRecipient(
+                    id=generate_ULID(),
+                    wallet_id=wallet.id,
+                    creator_id=creators.get(incoming_payment["id"], wallet.creator_id),
+                    product_id=order.product_id,
+                    price_id=order.price_id,
+                    receipt_id=db_obj.id,
+                    amount=int(payment.receiveAmount.value),
+                    assetCode=payment.receiveAmount.assetCode.root,
+                    assetScale=payment.receiveAmount.assetScale.root,
+                    payment_response=[incoming_payment],
+                )
+            )
+        db.commit()
+        db.refresh(db_obj)
+        return db_obj
 
 
 openreceipt = CRUDOpenReceipt(model=OpenReceipt)
@@ -18,7 +18,11 @@ along with this program.  If not, see <http:#www.gnu.org/licenses/>.
 
 """
 
+from typing import Optional
+from sqlalchemy.orm import Session
+
 from app.crud.base import CRUDBase
+from app.db.base_class import generate_ULID
 from app.models.openpayments.wallet import OpenWallet
 from app.schemas.openpayments.wallet import OpenWalletCreate, OpenWalletUpdate, OpenWallet as OpenWalletOut
 
@@ -28,7 +32,26 @@ class CRUDOpenWallet(CRUDBase[OpenWallet, OpenWalletCreate, OpenWalletUpdate]):
     All CRUD for OpenWallet management.
     """
 
-    pass
+    def get_by_address(self, db: Session, *, address: str) -> Optional[OpenWallet]:
+        return db.query(self.model).filter(self.model.address == address).first()
+
+    def get_or_add_many(self, db: Session, *, wallets: dict[str, dict]) -> dict[str, OpenWallet]:
+        """
+        Wallets by address, with one query. Addresses not found are added to the session from their `wallets` values
+        (`assetCode`, `assetScale` and any other OpenWallet fields), but not committed: the caller commits them with
+        the rest of its changes.
+        """
+        if not wallets:
+            return {}
+        db_objs = {
+            db_obj.address: db_obj
+            for db_obj in db.query(self.model).filter(self.model.address.in_(list(wallets.keys()))).all()
+        }
+        for address, obj_in in wallets.items():
+            if address not in db_objs:
+                db_objs[address] = self.model(id=generate_ULID(), address=address, **obj_in)
+                db.add(db_objs[address])
+        return db_objs
 
 
 openwallet = CRUDOpenWallet(model=OpenWallet)
@@ -0,0 +1,44 @@
+"""Hop Sauna
+
+SPDX-FileCopyrightText: Copyright (C) Whythawk and Hop Sauna Authors ask@whythawk.com
+SPDX-License-Identifier: AGPL-3.0-or-later
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU Affero General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU Affero General Public License for more details.
+
+You should have received a copy of the GNU Affero General Public License
+along with this program.  If not, see <http:#www.gnu.org/licenses/>.
+
+"""
+
+from redis import Redis
+from redis import asyncio as aioredis
+
+from app.core.config import settings
+
+# Shared Redis connection pools for caches and payment state. Connections are opened lazily on first command.
+REDIS_URL = f"redis://{settings.DOCKER_IMAGE_CACHE}:{settings.REDIS_PORT}"
+
+_redis: Redis | None = None
+_async_redis: aioredis.Redis | None = None
+
+
+def get_redis() -> Redis:
+    global _redis
+    if _redis is None:
+        _redis = Redis.from_url(REDIS_URL, password=settings.REDIS_PASSWORD, decode_responses=False)
+    return _redis
+
+
+def get_async_redis() -> aioredis.Redis:
+    global _async_redis
+    if _async_redis is None:
+        _async_redis = aioredis.from_url(REDIS_URL, password=settings.REDIS_PASSWORD, decode_responses=False)
+    return _async_redis
@@ -26,6 +26,7 @@ from pathlib import Path
 
 from app.api.api_v1.api import api_router, root_router
 from app.core.config import settings
+from app.api.deps import NEXT_CURSOR_HEADER
 
 if settings.SENTRY_DSN and settings.ENVIRONMENT != "local":
     sentry_sdk.init(dsn=str(settings.SENTRY_DSN), enable_tracing=True)
@@ -40,6 +41,7 @@ if settings.BACKEND_CORS_ORIGINS and settings.all_cors_origins:
         allow_credentials=True,
         allow_methods=["*"],
         allow_headers=["*"],
+        expose_headers=[NEXT_CURSOR_HEADER],
     )
 
 # TODO: Static media are served locally from a server directory. This could be moved to a CDN or S3 object store.
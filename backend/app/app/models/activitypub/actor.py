@@ -249,6 +249,9 @@ class Actor(Base):
         UniqueConstraint("preferredUsername", "domain"),
         # Indexing the TSVector column
         Index("ix_actor_name_vector", name_vector, postgresql_using="gin"),
+        # Keyset pagination in `id` order, for discoverable creators and the actors of a creator
+        Index("ix_actor_type_discoverable_id", "type", "discoverable", "id"),
+        Index("ix_actor_creator_id_id", "creator_id", "id"),
     )
 
     @property
@@ -0,0 +1,51 @@
+"""Hop Sauna
+
+SPDX-FileCopyrightText: Copyright (C) Whythawk and Hop Sauna Authors ask@whythawk.com
+SPDX-License-Identifier: AGPL-3.0-or-later
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU Affero General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU Affero General Public License for more details.
+
+You should have received a copy of the GNU Affero General Public License
+along with this program.  If not, see <http:#www.gnu.org/licenses/>.
+
+"""
+
+from sqlalchemy import DDL, Text, event
+from sqlalchemy.dialects.postgresql import ARRAY
+from sqlalchemy.sql import func
+from sqlalchemy.sql.functions import Function
+
+from app.db.base_class import Base
+
+# Open Payments resources (incoming payments, quotes, outgoing payments) are kept as ARRAY(JSONB) columns. Their
+# `id`s are extracted by this function, so that a GIN index over it answers lookups by resource id instead of
+# scanning every array. It must be IMMUTABLE to be used in an index.
+RESOURCE_IDS_FUNCTION = "openpayments_resource_ids"
+
+create_resource_ids_function = DDL(
+    f"""
+    CREATE OR REPLACE FUNCTION {RESOURCE_IDS_FUNCTION}(resources jsonb[]) RETURNS text[]
+    LANGUAGE sql IMMUTABLE PARALLEL SAFE
+    AS $$ SELECT coalesce(array_agg(resource ->> 'id'), '{{}}') FROM unnest(resources) AS resource $$
+    """
+)
+drop_resource_ids_function = DDL(f"DROP FUNCTION IF EXISTS {RESOURCE_IDS_FUNCTION}(jsonb[])")
+
+# Only used without migrations, e.g. `Base.metadata.create_all`
+event.listen(Base.metadata, "before_create", create_resource_ids_function)
+event.listen(Base.metadata, "after_drop", drop_resource_ids_function)
+
+
+def resource_ids(column) -> Function:
+    """
+    The ids of the resources in an ARRAY(JSONB) column, e.g. `resource_ids(OpenOrder.incoming_quotes).contains([id])`.
+    """
+    return getattr(func, RESOURCE_IDS_FUNCTION)(column, type_=ARRAY(Text))
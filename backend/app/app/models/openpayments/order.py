@@ -21,12 +21,13 @@ along with this program.  If not, see <http:#www.gnu.org/licenses/>.
 from typing import TYPE_CHECKING, Optional
 from datetime import datetime
 from sqlalchemy.orm import Mapped, mapped_column, relationship
-from sqlalchemy import ForeignKey, String, DateTime
+from sqlalchemy import ForeignKey, String, DateTime, Index
 from sqlalchemy_utils import Country, CountryType
 from sqlalchemy.sql import func
 from sqlalchemy.dialects.postgresql import JSONB, ARRAY, ENUM
 
 from app.db.base_class import Base, generate_ULID
+from .functions import resource_ids
 from app.schema_types import ProductFeeResponsibilityType, RenewalType
 
 if TYPE_CHECKING:
@@ -80,3 +81,8 @@ class OpenOrder(Base):
         lazy="dynamic",
         cascade="all, delete-orphan",
     )
+
+
+# Index-backed lookups of an order by the id of one of its incoming payments or quotes
+Index("ix_openorder_incoming_payment_ids", resource_ids(OpenOrder.incoming_payments), postgresql_using="gin")
+Index("ix_openorder_incoming_quote_ids", resource_ids(OpenOrder.incoming_quotes), postgresql_using="gin")
@@ -21,13 +21,14 @@ along with this program.  If not, see <http:#www.gnu.org/licenses/>.
 from typing import TYPE_CHECKING, Optional
 from datetime import datetime
 from sqlalchemy.orm import Mapped, mapped_column, relationship
-from sqlalchemy import ForeignKey, String, DateTime
+from sqlalchemy import ForeignKey, String, DateTime, Index
 from sqlalchemy_utils import Currency, CurrencyType, Country, CountryType
 from sqlalchemy.sql import func
-from sqlalchemy.dialects.postgresql import ENUM
+from sqlalchemy.dialects.postgresql import ENUM, JSONB, ARRAY
 
 from app.db.base_class import Base, generate_ULID
-from app.schema_types import ProductFeeResponsibilityType, ProductType
+from .functions import resource_ids
+from app.schema_types import PaymentSettlementType, ProductFeeResponsibilityType, ProductType
 
 if TYPE_CHECKING:
     from ..creator import Creator  # noqa: F401
@@ -80,3 +81,15 @@ class OpenReceipt(Base):
     amount: Mapped[str] = mapped_column(nullable=False)
     assetCode: Mapped[Currency] = mapped_column(CurrencyType, nullable=False)
     assetScale: Mapped[int] = mapped_column(nullable=False, default=2)
+    # Outgoing payments from the buyer, one per recipient, with their `settlement` once reconciled
+    outgoing_payments: Mapped[Optional[list[any]]] = mapped_column(ARRAY(JSONB), nullable=True)
+    # SETTLEMENT, from reconciling the outgoing payments
+    settlement: Mapped[ENUM[PaymentSettlementType]] = mapped_column(
+        ENUM(PaymentSettlementType), nullable=False, default=PaymentSettlementType.Pending
+    )
+    sentAmount: Mapped[Optional[str]] = mapped_column(nullable=True)
+    settled: Mapped[Optional[datetime]] = mapped_column(DateTime(timezone=True), nullable=True)
+
+
+# Index-backed lookups of a receipt by the id of one of its outgoing payments
+Index("ix_openreceipt_outgoing_payment_ids", resource_ids(OpenReceipt.outgoing_payments), postgresql_using="gin")
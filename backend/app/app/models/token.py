@@ -20,9 +20,9 @@ along with this program.  If not, see <http:#www.gnu.org/licenses/>.
 
 from typing import TYPE_CHECKING, Optional
 from sqlalchemy.orm import Mapped, mapped_column, relationship
-from sqlalchemy import ForeignKey
+from sqlalchemy import ForeignKey, Index, String
 
-from app.db.base_class import Base
+from app.db.base_class import Base, generate_ULID
 
 if TYPE_CHECKING:
     from .creator import Creator  # noqa: F401
@@ -30,6 +30,13 @@ if TYPE_CHECKING:
 
 class Token(Base):
     token: Mapped[str] = mapped_column(primary_key=True, index=True)
+    # Pagination key, so that the token itself is never sent as a cursor
+    id: Mapped[str] = mapped_column(String(26), unique=True, default=generate_ULID)
     scopes: Mapped[Optional[str]] = mapped_column(nullable=True)
     authenticates_id: Mapped[str] = mapped_column(ForeignKey("creator.id"))
     authenticates: Mapped["Creator"] = relationship(back_populates="tokens")
+
+    __table_args__ = (
+        # Keyset pagination of a creator's tokens
+        Index("ix_token_authenticates_id_id", "authenticates_id", "id"),
+    )
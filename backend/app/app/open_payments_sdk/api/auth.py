@@ -4,8 +4,10 @@ Grants Module
 
 from logging import Logger
 
+from httpx import Request
+
 from app.open_payments_sdk.gnap_utils.security import SecurityBase
-from app.open_payments_sdk.http import HttpClient
+from app.open_payments_sdk.http import AsyncHttpClient, HttpClient
 from app.open_payments_sdk.models.auth import AccessToken, Grant
 from app.open_payments_sdk.models.auth import GrantContinueResponse, GrantRequest, InteractRef
 from app.open_payments_sdk.utils.utils import get_default_covered_components, get_default_headers
@@ -21,6 +23,38 @@ class Grants(SecurityBase):
         self.logger = logger
         self.http_client = http_client
 
+    def _grant_request(self, grant_request: GrantRequest, auth_server_endpoint: str) -> Request:
+        data = grant_request.model_dump(exclude_unset=True, mode="json")
+        req_headers = {**get_default_headers()}
+        request = self.http_client.build_request(
+            method="POST", url=auth_server_endpoint, json=data, headers=req_headers, operation="grant.request"
+        )
+        request = self.set_content_digest(request=request)
+        return self.sign_request(
+            request, ("content-type", "content-digest", "content-length", *get_default_covered_components())
+        )
+
+    def _grant_continuation_request(self, interact_ref: InteractRef, continue_uri: str, access_token: str) -> Request:
+        data = interact_ref.model_dump(exclude_unset=True, mode="json")
+        req_headers = {**get_default_headers(), **self.get_auth_header(access_token=access_token)}
+        request = self.http_client.build_request(
+            method="POST", url=continue_uri, json=data, headers=req_headers, operation="grant.continue"
+        )
+        request = self.set_content_digest(request=request)
+        return self.sign_request(
+            request,
+            ("content-type", "content-digest", "content-length", "authorization", *get_default_covered_components()),
+        )
+
+    def _delete_grant_request(self, req_id: str, auth_server_endpoint: str, access_token: str) -> Request:
+        base_url = auth_server_endpoint.rstrip("/")
+        url = f"{base_url}/continue/{req_id}"
+        req_headers = {**self.get_auth_header(access_token=access_token)}
+        request = self.http_client.build_request(
+            method="DELETE", url=url, headers=req_headers, operation="grant.delete"
+        )
+        return self.sign_request(request, ("authorization", *get_default_covered_components()))
+
     def post_grant_request(
         self,
         grant_request: GrantRequest,
@@ -29,16 +63,7 @@ class Grants(SecurityBase):
         """
         Grant Request
         """
-        data = grant_request.model_dump(exclude_unset=True, mode="json")
-
-        req_headers = {**get_default_headers()}
-        request = self.http_client.build_request(
-            method="POST", url=auth_server_endpoint, json=data, headers=req_headers
-        )
-        request = self.set_content_digest(request=request)
-        request = self.sign_request(
-            request, ("content-type", "content-digest", "content-length", *get_default_covered_components())
-        )
+        request = self._grant_request(grant_request=grant_request, auth_server_endpoint=auth_server_endpoint)
         response = self.http_client.send(request=request)
         return Grant.model_validate(response.json())
 
@@ -48,13 +73,8 @@ class Grants(SecurityBase):
         """
         Continue Grant Request
         """
-        data = interact_ref.model_dump(exclude_unset=True, mode="json")
-        req_headers = {**get_default_headers(), **self.get_auth_header(access_token=access_token)}
-        request = self.http_client.build_request(method="POST", url=continue_uri, json=data, headers=req_headers)
-        request = self.set_content_digest(request=request)
-        request = self.sign_request(
-            request,
-            ("content-type", "content-digest", "content-length", "authorization", *get_default_covered_components()),
+        request = self._grant_continuation_request(
+            interact_ref=interact_ref, continue_uri=continue_uri, access_token=access_token
         )
         response = self.http_client.send(request=request)
         return GrantContinueResponse.model_validate(response.json())
@@ -63,14 +83,54 @@ class Grants(SecurityBase):
         """
         Delete Grant
         """
-        base_url = auth_server_endpoint.rstrip("/")
-        url = f"{base_url}/continue/{req_id}"
-        req_headers = {**self.get_auth_header(access_token=access_token)}
-        request = self.http_client.build_request(method="DELETE", url=url, headers=req_headers)
-        request = self.sign_request(request, ("authorization", *get_default_covered_components()))
+        request = self._delete_grant_request(
+            req_id=req_id, auth_server_endpoint=auth_server_endpoint, access_token=access_token
+        )
         self.http_client.send(request=request)
 
 
+class AsyncGrants(Grants):
+    """
+    Async variant of `Grants`, sharing request building and signing
+    """
+
+    def __init__(self, keyid: str, private_key: str, logger: Logger, http_client: AsyncHttpClient):
+        super().__init__(keyid=keyid, private_key=private_key, logger=logger, http_client=http_client)
+
+    async def post_grant_request(
+        self,
+        grant_request: GrantRequest,
+        auth_server_endpoint: str,
+    ) -> Grant:
+        """
+        Grant Request
+        """
+        request = self._grant_request(grant_request=grant_request, auth_server_endpoint=auth_server_endpoint)
+        response = await self.http_client.send(request=request)
+        return Grant.model_validate(response.json())
+
+    async def post_grant_continuation_request(
+        self, interact_ref: InteractRef, continue_uri: str, access_token: str
+    ) -> GrantContinueResponse:
+        """
+        Continue Grant Request
+        """
+        request = self._grant_continuation_request(
+            interact_ref=interact_ref, continue_uri=continue_uri, access_token=access_token
+        )
+        response = await self.http_client.send(request=request)
+        return GrantContinueResponse.model_validate(response.json())
+
+    async def delete_grant(self, req_id: str, auth_server_endpoint: str, access_token: str) -> None:
+        """
+        Delete Grant
+        """
+        request = self._delete_grant_request(
+            req_id=req_id, auth_server_endpoint=auth_server_endpoint, access_token=access_token
+        )
+        await self.http_client.send(request=request)
+
+
 class AccessTokens(SecurityBase):
     """
     Access Token Class
@@ -80,15 +140,21 @@ class AccessTokens(SecurityBase):
         super().__init__(keyid=keyid, private_key=private_key, logger=logger)
         self.http_client = http_client
 
+    def _token_request(self, method: str, token_id: str, auth_server_endpoint: str, access_token: str) -> Request:
+        base_url = auth_server_endpoint.rstrip("/")
+        url = f"{base_url}/token/{token_id}"
+        req_headers = {**self.get_auth_header(access_token=access_token)}
+        operation = "token.rotate" if method == "POST" else "token.delete"
+        request = self.http_client.build_request(method=method, url=url, headers=req_headers, operation=operation)
+        return self.sign_request(request, ("authorization", *get_default_covered_components()))
+
     def post_rotate_access_token(self, token_id: str, auth_server_endpoint: str, access_token: str) -> AccessToken:
         """
         Rotate Access Token
         """
-        base_url = auth_server_endpoint.rstrip("/")
-        url = f"{base_url}/token/{token_id}"
-        req_headers = {**self.get_auth_header(access_token=access_token)}
-        request = self.http_client.build_request(method="POST", url=url, headers=req_headers)
-        request = self.sign_request(request, ("authorization", *get_default_covered_components()))
+        request = self._token_request(
+            method="POST", token_id=token_id, auth_server_endpoint=auth_server_endpoint, access_token=access_token
+        )
         response = self.http_client.send(request=request)
         return AccessToken.model_validate(response.json())
 
@@ -96,10 +162,37 @@ class AccessTokens(SecurityBase):
         """
         Delete Access Token
         """
-        base_url = auth_server_endpoint.rstrip("/")
-        url = f"{base_url}/token/{token_id}"
-        req_headers = {**self.get_auth_header(access_token=access_token)}
-
-        request = self.http_client.build_request(method="DELETE", url=url, headers=req_headers)
-        request = self.sign_request(request, ("authorization", *get_default_covered_components()))
+        request = self._token_request(
+            method="DELETE", token_id=token_id, auth_server_endpoint=auth_server_endpoint, access_token=access_token
+        )
         self.http_client.send(request=request)
+
+
+class AsyncAccessTokens(AccessTokens):
+    """
+    Async variant of `AccessTokens`, sharing request building and signing
+    """
+
+    def __init__(self, keyid: str, private_key: str, logger: Logger, http_client: AsyncHttpClient):
+        super().__init__(keyid=keyid, private_key=private_key, logger=logger, http_client=http_client)
+
+    async def post_rotate_access_token(
+        self, token_id: str, auth_server_endpoint: str, access_token: str
+    ) -> AccessToken:
+        """
+        Rotate Access Token
+        """
+        request = self._token_request(
+            method="POST", token_id=token_id, auth_server_endpoint=auth_server_endpoint, access_token=access_token
+        )
+        response = await self.http_client.send(request=request)
+        return AccessToken.model_validate(response.json())
+
+    async def delete_access_token(self, token_id: str, auth_server_endpoint: str, access_token: str) -> None:
+        """
+        Delete Access Token
+        """
+        request = self._token_request(
+            method="DELETE", token_id=token_id, auth_server_endpoint=auth_server_endpoint, access_token=access_token
+        )
+        await self.http_client.send(request=request)
@@ -2,9 +2,14 @@
 Resource Server Module
 """
 
+from datetime import datetime
 from logging import Logger
+from typing import AsyncIterator, Callable, Optional
+
+from httpx import Request
+
 from app.open_payments_sdk.gnap_utils.security import SecurityBase
-from app.open_payments_sdk.http import HttpClient
+from app.open_payments_sdk.http import AsyncHttpClient, HttpClient
 from app.open_payments_sdk.models.resource import (
     IncomingPayment,
     IncomingPaymentRequest,
@@ -17,33 +22,79 @@ from app.open_payments_sdk.models.resource import (
     Quote,
     QuoteRequest,
 )
+from app.open_payments_sdk.utils.pagination import iterate_pages, iterate_payments
 from app.open_payments_sdk.utils.utils import get_default_covered_components, get_default_headers
 
 
-class IncomingPayments(SecurityBase):
+class ResourceBase(SecurityBase):
     """
-    Class for handling incoming payments resources
+    Shared request building for resource server calls
     """
 
     def __init__(self, keyid: str, private_key: str, logger: Logger, http_client: HttpClient):
         super().__init__(keyid=keyid, private_key=private_key, logger=logger)
         self.http_client = http_client
 
+    def _post_request(self, url: str, data: dict, access_token: str, operation: str = None) -> Request:
+        req_headers = {**get_default_headers(), **self.get_auth_header(access_token=access_token)}
+        request = self.http_client.build_request(
+            method="POST", url=url, json=data, headers=req_headers, operation=operation
+        )
+        request = self.set_content_digest(request=request)
+        return self.sign_request(
+            request,
+            ("content-type", "content-digest", "content-length", "authorization", *get_default_covered_components()),
+        )
+
+    def _bodyless_request(
+        self, method: str, url: str, access_token: str, params: dict = None, operation: str = None
+    ) -> Request:
+        req_headers = {**self.get_auth_header(access_token=access_token)}
+        request = self.http_client.build_request(
+            method=method, url=url, headers=req_headers, params=params, operation=operation
+        )
+        return self.sign_request(request, ("authorization", *get_default_covered_components()))
+
+
+class IncomingPayments(ResourceBase):
+    """
+    Class for handling incoming payments resources
+    """
+
+    def _create_payment_request(
+        self, payment: IncomingPaymentRequest, resource_server_endpoint: str, access_token: str
+    ) -> Request:
+        base_url = resource_server_endpoint.rstrip("/")
+        url = f"{base_url}/incoming-payments"
+        data = payment.model_dump(exclude_unset=True, mode="json")
+        return self._post_request(
+            url=url, data=data, access_token=access_token, operation="incoming_payment.create"
+        )
+
+    def _list_payments_request(
+        self, query: PaymentListQuery, resource_server_endpoint: str, access_token: str
+    ) -> Request:
+        base_url = resource_server_endpoint.rstrip("/")
+        url = f"{base_url}/incoming-payments"
+        query_params = query.model_dump(exclude_unset=True, exclude_none=True, mode="json")
+        return self._bodyless_request(
+            method="GET", url=url, access_token=access_token, params=query_params, operation="incoming_payment.list"
+        )
+
+    def _payment_request(self, method: str, path: str, resource_server_endpoint: str, access_token: str) -> Request:
+        base_url = resource_server_endpoint.rstrip("/")
+        url = f"{base_url}/incoming-payments/{path}"
+        operation = "incoming_payment.complete" if method == "POST" else "incoming_payment.get"
+        return self._bodyless_request(method=method, url=url, access_token=access_token, operation=operation)
+
     def post_create_payment(
         self, payment: IncomingPaymentRequest, resource_server_endpoint: str, access_token: str
     ) -> IncomingPayment:
         """
         Create Incoming Payment
         """
-        base_url = resource_server_endpoint.rstrip("/")
-        url = f"{base_url}/incoming-payments"
-        data = payment.model_dump(exclude_unset=True, mode="json")
-        req_headers = {**get_default_headers(), **self.get_auth_header(access_token=access_token)}
-        request = self.http_client.build_request(method="POST", url=url, json=data, headers=req_headers)
-        request = self.set_content_digest(request=request)
-        request = self.sign_request(
-            request,
-            ("content-type", "content-digest", "content-length", "authorization", *get_default_covered_components()),
+        request = self._create_payment_request(
+            payment=payment, resource_server_endpoint=resource_server_endpoint, access_token=access_token
         )
         response = self.http_client.send(request=request)
         return IncomingPayment.model_validate(response.json())
@@ -54,12 +105,9 @@ class IncomingPayments(SecurityBase):
         """
         Get Incoming Payment
         """
-        base_url = resource_server_endpoint.rstrip("/")
-        url = f"{base_url}/incoming-payments"
-        query_params = query.model_dump(exclude_unset=True, mode="json")
-        req_headers = {**self.get_auth_header(access_token=access_token)}
-        request = self.http_client.build_request(method="GET", url=url, headers=req_headers, params=query_params)
-        request = self.sign_request(request, ("authorization", *get_default_covered_components()))
+        request = self._list_payments_request(
+            query=query, resource_server_endpoint=resource_server_endpoint, access_token=access_token
+        )
         response = self.http_client.send(request=request)
         return PaginatedIncomingPayments.model_validate(response.json())
 
@@ -69,11 +117,9 @@ class IncomingPayments(SecurityBase):
         """
         Get Incoming Payment
         """
-        base_url = resource_server_endpoint.rstrip("/")
-        url = f"{base_url}/incoming-payments/{payment_id}"
-        req_headers = {**self.get_auth_header(access_token=access_token)}
-        request = self.http_client.build_request(method="GET", url=url, headers=req_headers)
-        request = self.sign_request(request, ("authorization", *get_default_covered_components()))
+        request = self._payment_request(
+            method="GET", path=payment_id, resource_server_endpoint=resource_server_endpoint, access_token=access_token
+        )
         response = self.http_client.send(request=request)
         return IncomingPaymentResponse.model_validate(response.json())
 
@@ -83,23 +129,135 @@ class IncomingPayments(SecurityBase):
         """
         Complete Incoming Payment
         """
-        base_url = resource_server_endpoint.rstrip("/")
-        url = f"{base_url}/incoming-payments/{payment_id}/complete"
-        req_headers = {**self.get_auth_header(access_token=access_token)}
-        request = self.http_client.build_request(method="POST", url=url, headers=req_headers)
-        request = self.sign_request(request, ("authorization", *get_default_covered_components()))
+        request = self._payment_request(
+            method="POST",
+            path=f"{payment_id}/complete",
+            resource_server_endpoint=resource_server_endpoint,
+            access_token=access_token,
+        )
         response = self.http_client.send(request=request)
         return IncomingPayment.model_validate(response.json())
 
 
-class OutgoingPayments(SecurityBase):
+class AsyncIncomingPayments(IncomingPayments):
+    """
+    Async variant of `IncomingPayments`, sharing request building and signing
+    """
+
+    def __init__(self, keyid: str, private_key: str, logger: Logger, http_client: AsyncHttpClient):
+        super().__init__(keyid=keyid, private_key=private_key, logger=logger, http_client=http_client)
+
+    async def post_create_payment(
+        self, payment: IncomingPaymentRequest, resource_server_endpoint: str, access_token: str
+    ) -> IncomingPayment:
+        """
+        Create Incoming Payment
+        """
+        request = self._create_payment_request(
+            payment=payment, resource_server_endpoint=resource_server_endpoint, access_token=access_token
+        )
+        response = await self.http_client.send(request=request)
+        return IncomingPayment.model_validate(response.json())
+
+    async def get_incoming_payments(
+        self, query: PaymentListQuery, resource_server_endpoint: str, access_token: str
+    ) -> PaginatedIncomingPayments:
+        """
+        Get Incoming Payment
+        """
+        request = self._list_payments_request(
+            query=query, resource_server_endpoint=resource_server_endpoint, access_token=access_token
+        )
+        response = await self.http_client.send(request=request)
+        return PaginatedIncomingPayments.model_validate(response.json())
+
+    def iter_incoming_payments(
+        self,
+        wallet_address: str,
+        resource_server_endpoint: str,
+        access_token: str,
+        *,
+        page_size: int = 100,
+        since: Optional[datetime] = None,
+        stop_at: Optional[Callable[[IncomingPayment], bool]] = None,
+        prefetch: bool = True,
+    ) -> AsyncIterator[IncomingPayment]:
+        """
+        Iterate over every incoming payment of a wallet address, newest first, one page in memory at a time.
+
+        The next page is fetched while the current one is consumed. Iteration stops at the first payment created
+        before `since`, or for which `stop_at` returns True. Wrap in `contextlib.aclosing` when breaking out early, so
+        the prefetch in flight is cancelled right away.
+        """
+        pages = iterate_pages(
+            lambda query: self.get_incoming_payments(
+                query=query, resource_server_endpoint=resource_server_endpoint, access_token=access_token
+            ),
+            wallet_address=wallet_address,
+            page_size=page_size,
+            prefetch=prefetch,
+        )
+        return iterate_payments(pages, since=since, stop_at=stop_at)
+
+    async def get_incoming_payment(
+        self, payment_id: str, resource_server_endpoint: str, access_token: str
+    ) -> IncomingPayment:
+        """
+        Get Incoming Payment
+        """
+        request = self._payment_request(
+            method="GET", path=payment_id, resource_server_endpoint=resource_server_endpoint, access_token=access_token
+        )
+        response = await self.http_client.send(request=request)
+        return IncomingPaymentResponse.model_validate(response.json())
+
+    async def post_complete_incoming_payment(
+        self, payment_id: str, resource_server_endpoint: str, access_token: str
+    ) -> IncomingPayment:
+        """
+        Complete Incoming Payment
+        """
+        request = self._payment_request(
+            method="POST",
+            path=f"{payment_id}/complete",
+            resource_server_endpoint=resource_server_endpoint,
+            access_token=access_token,
+        )
+        response = await self.http_client.send(request=request)
+        return IncomingPayment.model_validate(response.json())
+
+
+class OutgoingPayments(ResourceBase):
     """
     Class for handling outgoing payments resources
     """
 
-    def __init__(self, keyid: str, private_key: str, logger: Logger, http_client: HttpClient):
-        super().__init__(keyid=keyid, private_key=private_key, logger=logger)
-        self.http_client = http_client
+    def _create_payment_request(
+        self, payment: OutgoingPaymentRequest, resource_server_endpoint: str, access_token: str
+    ) -> Request:
+        base_url = resource_server_endpoint.rstrip("/")
+        url = f"{base_url}/outgoing-payments"
+        data = payment.model_dump(exclude_unset=True, mode="json")
+        return self._post_request(
+            url=url, data=data, access_token=access_token, operation="outgoing_payment.create"
+        )
+
+    def _list_payments_request(
+        self, query: PaymentListQuery, resource_server_endpoint: str, access_token: str
+    ) -> Request:
+        base_url = resource_server_endpoint.rstrip("/")
+        url = f"{base_url}/outgoing-payments"
+        query_params = query.model_dump(exclude_unset=True, exclude_none=True, mode="json")
+        return self._bodyless_request(
+            method="GET", url=url, access_token=access_token, params=query_params, operation="outgoing_payment.list"
+        )
+
+    def _payment_request(self, payment_id: str, resource_server_endpoint: str, access_token: str) -> Request:
+        base_url = resource_server_endpoint.rstrip("/")
+        url = f"{base_url}/outgoing-payments/{payment_id}"
+        return self._bodyless_request(
+            method="GET", url=url, access_token=access_token, operation="outgoing_payment.get"
+        )
 
     def post_create_payment(
         self, payment: OutgoingPaymentRequest, resource_server_endpoint: str, access_token: str
@@ -107,15 +265,8 @@ class OutgoingPayments(SecurityBase):
         """
         Create an Outgoing Payment Resource
         """
-        base_url = resource_server_endpoint.rstrip("/")
-        url = f"{base_url}/outgoing-payments"
-        data = payment.model_dump(exclude_unset=True, mode="json")
-        req_headers = {**get_default_headers(), **self.get_auth_header(access_token=access_token)}
-        request = self.http_client.build_request(method="POST", url=url, json=data, headers=req_headers)
-        request = self.set_content_digest(request=request)
-        request = self.sign_request(
-            request,
-            ("content-type", "content-digest", "content-length", "authorization", *get_default_covered_components()),
+        request = self._create_payment_request(
+            payment=payment, resource_server_endpoint=resource_server_endpoint, access_token=access_token
         )
         response = self.http_client.send(request=request)
         return OutgoingPayment.model_validate(response.json())
@@ -126,13 +277,10 @@ class OutgoingPayments(SecurityBase):
         """
         Get Outgoing Payments
         """
-        base_url = resource_server_endpoint.rstrip("/")
-        url = f"{base_url}/outgoing-payments"
-        query_params = query.model_dump(exclude_unset=True, mode="json")
-        req_headers = {**self.get_auth_header(access_token=access_token)}
-        request = self.http_client.build_request(method="GET", url=url, headers=req_headers, params=query_params)
-        response = request = self.sign_request(request, ("authorization", *get_default_covered_components()))
-        self.http_client.send(request=request)
+        request = self._list_payments_request(
+            query=query, resource_server_endpoint=resource_server_endpoint, access_token=access_token
+        )
+        response = self.http_client.send(request=request)
         return PaginatedOutgoingPayments.model_validate(response.json())
 
     def get_outgoing_payment(
@@ -141,37 +289,108 @@ class OutgoingPayments(SecurityBase):
         """
         Get Outgoing Payment
         """
-        base_url = resource_server_endpoint
-        url = f"{base_url}/outgoing-payments/{payment_id}"
-        req_headers = {**self.get_auth_header(access_token=access_token)}
-        request = self.http_client.build_request(method="GET", url=url, headers=req_headers)
-        request = self.sign_request(request, ("authorization", *get_default_covered_components()))
+        request = self._payment_request(
+            payment_id=payment_id, resource_server_endpoint=resource_server_endpoint, access_token=access_token
+        )
         response = self.http_client.send(request=request)
         return OutgoingPayment.model_validate(response.json())
 
 
-class Quotes(SecurityBase):
+class AsyncOutgoingPayments(OutgoingPayments):
     """
-    Class for handling Quote resources
+    Async variant of `OutgoingPayments`, sharing request building and signing
     """
 
-    def __init__(self, keyid: str, private_key: str, logger: Logger, http_client: HttpClient):
-        super().__init__(keyid=keyid, private_key=private_key, logger=logger)
-        self.http_client = http_client
+    def __init__(self, keyid: str, private_key: str, logger: Logger, http_client: AsyncHttpClient):
+        super().__init__(keyid=keyid, private_key=private_key, logger=logger, http_client=http_client)
 
-    def post_create_quote(self, quote: QuoteRequest, resource_server_endpoint: str, access_token: str) -> Quote:
+    async def post_create_payment(
+        self, payment: OutgoingPaymentRequest, resource_server_endpoint: str, access_token: str
+    ) -> OutgoingPayment:
         """
-        Create a Quote
+        Create an Outgoing Payment Resource
+        """
+        request = self._create_payment_request(
+            payment=payment, resource_server_endpoint=resource_server_endpoint, access_token=access_token
+        )
+        response = await self.http_client.send(request=request)
+        return OutgoingPayment.model_validate(response.json())
+
+    async def get_outgoing_payments(
+        self, query: PaymentListQuery, resource_server_endpoint: str, access_token: str
+    ) -> PaginatedOutgoingPayments:
+        """
+        Get Outgoing Payments
+        """
+        request = self._list_payments_request(
+            query=query, resource_server_endpoint=resource_server_endpoint, access_token=access_token
+        )
+        response = await self.http_client.send(request=request)
+        return PaginatedOutgoingPayments.model_validate(response.json())
+
+    def iter_outgoing_payments(
+        self,
+        wallet_address: str,
+        resource_server_endpoint: str,
+        access_token: str,
+        *,
+        page_size: int = 100,
+        since: Optional[datetime] = None,
+        stop_at: Optional[Callable[[OutgoingPayment], bool]] = None,
+        prefetch: bool = True,
+    ) -> AsyncIterator[OutgoingPayment]:
+        """
+        Iterate over every outgoing payment of a wallet address, newest first, one page in memory at a time.
+
+        The next page is fetched while the current one is consumed. Iteration stops at the first payment created
+        before `since`, or for which `stop_at` returns True. Wrap in `contextlib.aclosing` when breaking out early, so
+        the prefetch in flight is cancelled right away.
+        """
+        pages = iterate_pages(
+            lambda query: self.get_outgoing_payments(
+                query=query, resource_server_endpoint=resource_server_endpoint, access_token=access_token
+            ),
+            wallet_address=wallet_address,
+            page_size=page_size,
+            prefetch=prefetch,
+        )
+        return iterate_payments(pages, since=since, stop_at=stop_at)
+
+    async def get_outgoing_payment(
+        self, payment_id: str, resource_server_endpoint: str, access_token: str
+    ) -> OutgoingPayment:
         """
+        Get Outgoing Payment
+        """
+        request = self._payment_request(
+            payment_id=payment_id, resource_server_endpoint=resource_server_endpoint, access_token=access_token
+        )
+        response = await self.http_client.send(request=request)
+        return OutgoingPayment.model_validate(response.json())
+
+
+class Quotes(ResourceBase):
+    """
+    Class for handling Quote resources
+    """
+
+    def _create_quote_request(self, quote: QuoteRequest, resource_server_endpoint: str, access_token: str) -> Request:
         base_url = resource_server_endpoint.rstrip("/")
         url = f"{base_url}/quotes"
         data = quote.model_dump(exclude_unset=True, mode="json")
-        req_headers = {**get_default_headers(), **self.get_auth_header(access_token=access_token)}
-        request = self.http_client.build_request(method="POST", url=url, headers=req_headers, json=data)
-        request = self.set_content_digest(request=request)
-        request = self.sign_request(
-            request,
-            ("content-type", "content-digest", "content-length", "authorization", *get_default_covered_components()),
+        return self._post_request(url=url, data=data, access_token=access_token, operation="quote.create")
+
+    def _quote_request(self, quote_id: str, resource_server_endpoint: str, access_token: str) -> Request:
+        base_url = resource_server_endpoint.rstrip("/")
+        url = f"{base_url}/quotes/{quote_id}"
+        return self._bodyless_request(method="GET", url=url, access_token=access_token, operation="quote.get")
+
+    def post_create_quote(self, quote: QuoteRequest, resource_server_endpoint: str, access_token: str) -> Quote:
+        """
+        Create a Quote
+        """
+        request = self._create_quote_request(
+            quote=quote, resource_server_endpoint=resource_server_endpoint, access_token=access_token
         )
         response = self.http_client.send(request=request)
         return Quote.model_validate(response.json())
@@ -180,10 +399,39 @@ class Quotes(SecurityBase):
         """
         Get a Quote
         """
-        base_url = resource_server_endpoint.strip("/")
-        url = f"{base_url}/quotes/{quote_id}"
-        req_headers = {**self.get_auth_header(access_token=access_token)}
-        request = self.http_client.build_request(method="GET", url=url, headers=req_headers)
-        request = self.sign_request(request, ("authorization", *get_default_covered_components()))
+        request = self._quote_request(
+            quote_id=quote_id, resource_server_endpoint=resource_server_endpoint, access_token=access_token
+        )
         response = self.http_client.send(request=request)
         return Quote.model_validate(response.json())
+
+
+class AsyncQuotes(Quotes):
+    """
+    Async variant of `Quotes`, sharing request building and signing
+    """
+
+    def __init__(self, keyid: str, private_key: str, logger: Logger, http_client: AsyncHttpClient):
+        super().__init__(keyid=keyid, private_key=private_key, logger=logger, http_client=http_client)
+
+    async def post_create_quote(
+        self, quote: QuoteRequest, resource_server_endpoint: str, access_token: str
+    ) -> Quote:
+        """
+        Create a Quote
+        """
+        request = self._create_quote_request(
+            quote=quote, resource_server_endpoint=resource_server_endpoint, access_token=access_token
+        )
+        response = await self.http_client.send(request=request)
+        return Quote.model_validate(response.json())
+
+    async def get_quote(self, quote_id: str, resource_server_endpoint: str, access_token: str) -> Quote:
+        """
+        Get a Quote
+        """
+        request = self._quote_request(
+            quote_id=quote_id, resource_server_endpoint=resource_server_endpoint, access_token=access_token
+        )
+        response = await self.http_client.send(request=request)
+        return Quote.model_validate(response.json())
@@ -1,5 +1,8 @@
-from app.open_payments_sdk.http import HttpClient
+from httpx import HTTPStatusError, Request, Response
+
+from app.open_payments_sdk.http import AsyncHttpClient, HttpClient
 from app.open_payments_sdk.models.wallet import JsonWebKeySet, WalletAddress
+from app.open_payments_sdk.utils.cache import CacheEntry, WalletCache
 
 
 class Wallet:
@@ -7,19 +10,116 @@ class Wallet:
     Class for handling Wallet resource
     """
 
-    def __init__(self, http_client: HttpClient):
+    def __init__(self, http_client: HttpClient, cache: WalletCache = None):
         self.http_client = http_client
+        self.cache = cache
+
+    def _wallet_address_request(self, wallet_address_server_endpoint: str) -> Request:
+        return self.http_client.build_request(
+            method="GET", url=wallet_address_server_endpoint, operation="wallet.get"
+        )
+
+    def _keys_request(self, wallet_address_server_endpoint: str) -> Request:
+        base_url = wallet_address_server_endpoint.rstrip("/")
+        url = f"{base_url}/jwks.json"
+        return self.http_client.build_request(method="GET", url=url, operation="wallet.keys")
+
+    def _revalidate(self, request: Request, cached: CacheEntry = None) -> Request:
+        if cached and cached.etag:
+            request.headers["If-None-Match"] = cached.etag
+        return request
+
+    def _send_cached(self, request: Request, cached: CacheEntry = None) -> Response:
+        # `raise_for_status` treats a 304 as an error, but it means the cached body is still valid
+        try:
+            return self.http_client.send(request=self._revalidate(request, cached))
+        except HTTPStatusError as exc:
+            if exc.response.status_code == 304 and cached:
+                return exc.response
+            raise
+
+    def _get_cached(self, kind: str, wallet_address_server_endpoint: str, build_request) -> dict:
+        key = self.cache.get_key(kind, wallet_address_server_endpoint)
+        cached = self.cache.get(key)
+        if cached and cached.is_fresh:
+            return cached.body
+        with self.cache.lock(key):
+            cached = self.cache.get(key)
+            if cached and cached.is_fresh:
+                return cached.body
+            response = self._send_cached(build_request(wallet_address_server_endpoint), cached)
+            entry = self.cache.build_entry(response, cached)
+            if not entry:
+                # Not cacheable (`no-store`), but a 304 still confirms the cached body
+                return cached.body if response.status_code == 304 else response.json()
+            self.cache.set(key, entry)
+            return entry.body
 
     def get_wallet_address(self, wallet_address_server_endpoint: str) -> WalletAddress:
         """Get wallet address from address server"""
-        request = self.http_client.build_request(method="GET", url=wallet_address_server_endpoint)
+        if self.cache:
+            data = self._get_cached("wallet", wallet_address_server_endpoint, self._wallet_address_request)
+            return WalletAddress.model_validate(data)
+        request = self._wallet_address_request(wallet_address_server_endpoint)
         response = self.http_client.send(request=request)
         return WalletAddress.model_validate(response.json())
 
     def get_keys(self, wallet_address_server_endpoint: str) -> JsonWebKeySet:
         """Get keys from address server"""
-        base_url = wallet_address_server_endpoint.rstrip("/")
-        url = f"{base_url}/jwks.json"
-        request = self.http_client.build_request(method="GET", url=url)
+        if self.cache:
+            data = self._get_cached("jwks", wallet_address_server_endpoint, self._keys_request)
+            return JsonWebKeySet.model_validate(data)
+        request = self._keys_request(wallet_address_server_endpoint)
         response = self.http_client.send(request=request)
         return JsonWebKeySet.model_validate(response.json())
+
+
+class AsyncWallet(Wallet):
+    """
+    Async variant of `Wallet`
+    """
+
+    def __init__(self, http_client: AsyncHttpClient, cache: WalletCache = None):
+        super().__init__(http_client, cache=cache)
+
+    async def _send_cached(self, request: Request, cached: CacheEntry = None) -> Response:
+        try:
+            return await self.http_client.send(request=self._revalidate(request, cached))
+        except HTTPStatusError as exc:
+            if exc.response.status_code == 304 and cached:
+                return exc.response
+            raise
+
+    async def _get_cached(self, kind: str, wallet_address_server_endpoint: str, build_request) -> dict:
+        key = self.cache.get_key(kind, wallet_address_server_endpoint)
+        cached = await self.cache.aget(key)
+        if cached and cached.is_fresh:
+            return cached.body
+        async with self.cache.alock(key):
+            cached = await self.cache.aget(key)
+            if cached and cached.is_fresh:
+                return cached.body
+            response = await self._send_cached(build_request(wallet_address_server_endpoint), cached)
+            entry = self.cache.build_entry(response, cached)
+            if not entry:
+                return cached.body if response.status_code == 304 else response.json()
+            await self.cache.aset(key, entry)
+            return entry.body
+
+    async def get_wallet_address(self, wallet_address_server_endpoint: str) -> WalletAddress:
+        """Get wallet address from address server"""
+        if self.cache:
+            data = await self._get_cached("wallet", wallet_address_server_endpoint, self._wallet_address_request)
+            return WalletAddress.model_validate(data)
+        request = self._wallet_address_request(wallet_address_server_endpoint)
+        response = await self.http_client.send(request=request)
+        return WalletAddress.model_validate(response.json())
+
+    async def get_keys(self, wallet_address_server_endpoint: str) -> JsonWebKeySet:
+        """Get keys from address server"""
+        if self.cache:
+            data = await self._get_cached("jwks", wallet_address_server_endpoint, self._keys_request)
+            return JsonWebKeySet.model_validate(data)
+        request = self._keys_request(wallet_address_server_endpoint)
+        response = await self.http_client.send(request=request)
+        return JsonWebKeySet.model_validate(response.json())
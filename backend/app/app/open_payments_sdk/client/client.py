@@ -4,10 +4,18 @@ Open Payments API Client Module
 
 import logging
 from app.open_payments_sdk import configuration
-from app.open_payments_sdk.api.auth import AccessTokens, Grants
-from app.open_payments_sdk.api.resource import IncomingPayments, OutgoingPayments, Quotes
-from app.open_payments_sdk.api.wallet import Wallet
-from app.open_payments_sdk.http import HttpClient
+from app.open_payments_sdk.api.auth import AccessTokens, AsyncAccessTokens, AsyncGrants, Grants
+from app.open_payments_sdk.api.resource import (
+    AsyncIncomingPayments,
+    AsyncOutgoingPayments,
+    AsyncQuotes,
+    IncomingPayments,
+    OutgoingPayments,
+    Quotes,
+)
+from app.open_payments_sdk.api.wallet import AsyncWallet, Wallet
+from app.open_payments_sdk.http import AsyncHttpClient, HttpClient
+from app.open_payments_sdk.utils.cache import WalletCache
 
 
 class OpenPaymentsClient:
@@ -22,11 +30,12 @@ class OpenPaymentsClient:
         client_wallet_address: str,
         cfg: configuration.Configuration = None,
         http_client: HttpClient = None,
+        wallet_cache: WalletCache = None,
     ):
         if not cfg:
             cfg = configuration.Configuration()
         if not http_client:
-            http_client = HttpClient(http_timeout=10.0)  # TODO: get from cfg
+            http_client = cfg.get_http_client()
         self.http_client = http_client
         self.logger = logging.getLogger(__name__)
         self.logger.addHandler(cfg.get_log_handler())
@@ -41,7 +50,7 @@ class OpenPaymentsClient:
             logger=self.logger,
             http_client=self.http_client,
         )
-        self.wallet = Wallet(self.http_client)
+        self.wallet = Wallet(self.http_client, cache=wallet_cache)
         self.incoming_payments = IncomingPayments(
             keyid=keyid, private_key=private_key, logger=self.logger, http_client=self.http_client
         )
@@ -49,3 +58,51 @@ class OpenPaymentsClient:
             keyid=keyid, private_key=private_key, logger=self.logger, http_client=self.http_client
         )
         self.quotes = Quotes(keyid=keyid, private_key=private_key, logger=self.logger, http_client=self.http_client)
+
+
+class AsyncOpenPaymentsClient:
+    """
+    Async Open Payments API Client
+
+    Mirrors `OpenPaymentsClient`, with every API call awaitable. Request signing is shared with the sync client.
+    """
+
+    def __init__(
+        self,
+        keyid: str,
+        private_key: str,
+        client_wallet_address: str,
+        cfg: configuration.Configuration = None,
+        http_client: AsyncHttpClient = None,
+        wallet_cache: WalletCache = None,
+    ):
+        if not cfg:
+            cfg = configuration.Configuration()
+        if not http_client:
+            http_client = cfg.get_async_http_client()
+        self.http_client = http_client
+        self.logger = logging.getLogger(__name__)
+        self.logger.addHandler(cfg.get_log_handler())
+        self.user_agent = cfg.user_agent
+        self.client_wallet_address = client_wallet_address
+        self.keyid = keyid
+        self.private_key = private_key
+        self.grants = AsyncGrants(
+            keyid=keyid, private_key=private_key, logger=self.logger, http_client=self.http_client
+        )
+        self.access_tokens = AsyncAccessTokens(
+            keyid=keyid,
+            private_key=private_key,
+            logger=self.logger,
+            http_client=self.http_client,
+        )
+        self.wallet = AsyncWallet(self.http_client, cache=wallet_cache)
+        self.incoming_payments = AsyncIncomingPayments(
+            keyid=keyid, private_key=private_key, logger=self.logger, http_client=self.http_client
+        )
+        self.outgoing_payments = AsyncOutgoingPayments(
+            keyid=keyid, private_key=private_key, logger=self.logger, http_client=self.http_client
+        )
+        self.quotes = AsyncQuotes(
+            keyid=keyid, private_key=private_key, logger=self.logger, http_client=self.http_client
+        )
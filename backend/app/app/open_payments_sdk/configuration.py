@@ -1,10 +1,17 @@
 import logging
 
+from app.open_payments_sdk.http import AsyncHttpClient, HttpClient
+
 
 class Configuration:
     def __init__(self):
         self.logging_formatter = "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
         self.user_agent = "open-payments-sdk/python"
+        self.http_timeout = 10.0
+        self.max_connections = 100
+        self.max_keepalive_connections = 20
+        self.keepalive_expiry = 30.0
+        self.http2 = False
 
     def get_log_handler(self) -> logging.Handler:
         """
@@ -14,3 +21,28 @@ class Configuration:
         handler = logging.StreamHandler()
         handler.setFormatter(formatter)
         return handler
+
+    def get_http_client(self) -> HttpClient:
+        """
+        Return a pooled HTTP client built from this configuration.
+        """
+        return HttpClient(
+            http_timeout=self.http_timeout,
+            max_connections=self.max_connections,
+            max_keepalive_connections=self.max_keepalive_connections,
+            keepalive_expiry=self.keepalive_expiry,
+            http2=self.http2,
+        )
+
+
+    def get_async_http_client(self) -> AsyncHttpClient:
+        """
+        Return a pooled async HTTP client built from this configuration.
+        """
+        return AsyncHttpClient(
+            http_timeout=self.http_timeout,
+            max_connections=self.max_connections,
+            max_keepalive_connections=self.max_keepalive_connections,
+            keepalive_expiry=self.keepalive_expiry,
+            http2=self.http2,
+        )
@@ -2,7 +2,10 @@
 HTTP Signatures Helper functions
 """
 
-from http_message_signatures import HTTPSignatureKeyResolver
+from functools import lru_cache
+from typing import Sequence
+
+from http_message_signatures import HTTPMessageSigner, HTTPSignatureKeyResolver, http_sfv
 from http_message_signatures.resolvers import HTTPSignatureComponentResolver
 from http_message_signatures.structures import CaseInsensitiveDict
 
@@ -12,19 +15,22 @@ from app.open_payments_sdk.gnap_utils.keys import KeyManager
 class OPKeyResolver(HTTPSignatureKeyResolver):
     """
     Key Resolver Class
+
+    The PEM is parsed once here. Resolved keys are key objects, which the signing algorithm uses as is instead of
+    reparsing the PEM on every request.
     """
 
     def __init__(self, keyid: str, private_key: str):
         super().__init__()
-        self.keys = {keyid: private_key.encode("utf-8")}
+        loaded_key = KeyManager().load_ed25519_private_key_from_pem(private_key)
+        self.keys = {keyid: loaded_key}
+        self.public_keys = {keyid: loaded_key.public_key()}
 
     def resolve_public_key(self, key_id: str):
         """
         Get Public Key
         """
-        key_manager = KeyManager()
-        private_key = key_manager.load_ed25519_private_key_from_pem(self.keys[key_id])
-        return private_key.public_key()
+        return self.public_keys[key_id]
 
     def resolve_private_key(self, key_id: str):
         """
@@ -33,6 +39,31 @@ class OPKeyResolver(HTTPSignatureKeyResolver):
         return self.keys[key_id]
 
 
+@lru_cache(maxsize=64)
+def parse_covered_component_ids(covered_component_ids: tuple) -> tuple:
+    """
+    Parse covered component ids into structured field items. The same few tuples are signed on every request
+    """
+    covered_component_nodes = []
+    for component_id in covered_component_ids:
+        component_name_node = http_sfv.Item()
+        if component_id.startswith('"'):
+            component_name_node.parse(component_id.encode())
+        else:
+            component_name_node.value = component_id
+        covered_component_nodes.append(component_name_node)
+    return tuple(covered_component_nodes)
+
+
+class OPMessageSigner(HTTPMessageSigner):
+    """
+    Message signer reusing parsed covered component ids across requests
+    """
+
+    def _parse_covered_component_ids(self, covered_component_ids: Sequence[str]) -> list:
+        return list(parse_covered_component_ids(tuple(covered_component_ids)))
+
+
 class PatchedHTTPSignatureComponentResolver(HTTPSignatureComponentResolver):
     """
     Component Resolver to be used by http signing logic. The upstream resolver class has a bug which I fixed via a PR
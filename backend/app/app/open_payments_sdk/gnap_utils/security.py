@@ -3,16 +3,43 @@ Shared class for making secure requests
 """
 
 import hashlib
+from functools import lru_cache
 from logging import Logger
 from typing import Sequence
 from http_message_signatures import HTTPMessageSigner, algorithms
 from http_sf import ser
 from httpx import Request
 from app.open_payments_sdk.gnap_utils.hash import HashManager
-from app.open_payments_sdk.gnap_utils.http_signatures import OPKeyResolver, PatchedHTTPSignatureComponentResolver
+from app.open_payments_sdk.gnap_utils.http_signatures import (
+    OPKeyResolver,
+    OPMessageSigner,
+    PatchedHTTPSignatureComponentResolver,
+)
 from app.open_payments_sdk.gnap_utils.keys import KeyManager
 
 
+@lru_cache(maxsize=128)
+def get_signer(keyid: str, private_key: str) -> HTTPMessageSigner:
+    """
+    Get the shared signer for a key, parsing the Ed25519 private key on first use only.
+
+    Grants, AccessTokens, IncomingPayments, OutgoingPayments and Quotes built with the same key share one signer.
+    Signing holds no per-request state, so the signer is safe to share between threads and tasks.
+    """
+    return OPMessageSigner(
+        signature_algorithm=algorithms.ED25519,
+        key_resolver=OPKeyResolver(keyid=keyid, private_key=private_key),
+        component_resolver_class=PatchedHTTPSignatureComponentResolver,
+    )
+
+
+def clear_signers() -> None:
+    """
+    Drop all shared signers, e.g. after a key rotation
+    """
+    get_signer.cache_clear()
+
+
 class SecurityBase:
     """
     Base class to provide shared functionality for making authenticated requests
@@ -21,11 +48,7 @@ class SecurityBase:
     def __init__(self, keyid: str, private_key: str, logger: Logger):
         self.key_manager = KeyManager()
         self.hash_manager = HashManager()
-        self.http_signatures = HTTPMessageSigner(
-            signature_algorithm=algorithms.ED25519,
-            key_resolver=OPKeyResolver(keyid=keyid, private_key=private_key),
-            component_resolver_class=PatchedHTTPSignatureComponentResolver,
-        )
+        self.http_signatures = get_signer(keyid=keyid, private_key=private_key)
         self.keyid = keyid
         self.private_key = private_key
         self.logger = logger
@@ -1,16 +1,57 @@
 """
-HTTP Client 
+HTTP Client
 """
-from httpx import Request, Response, Client
+import asyncio
+import time
+from typing import Optional
+
+from httpx import AsyncClient, Request, Response, Client, Limits, Timeout, TransportError
+
+from app.open_payments_sdk.utils.metrics import OpenPaymentsMetrics, tag_operation
+from app.open_payments_sdk.utils.resilience import CircuitBreaker, CircuitOpenError, RetryPolicy
 
 class HttpClient:
     """
     HTTP Client
+
+    Owns a single long-lived `httpx.Client` so that every API class sharing this instance reuses pooled,
+    keep-alive connections instead of paying a TCP and TLS handshake per request. With `metrics`, the duration,
+    status and payload size of every call are recorded.
+
+    `http_timeout` bounds each read, write and pool wait; `connect_timeout`, if given, bounds connecting alone, so
+    an unreachable host fails fast. With `retry`, transient failures of idempotent calls are retried with backoff.
+    With `circuit_breaker`, calls to a host that keeps failing raise `CircuitOpenError` without being sent.
     """
     http_timeout: float
 
-    def __init__(self, http_timeout: float):
+    def __init__(
+            self,
+            http_timeout: float,
+            max_connections: int = 100,
+            max_keepalive_connections: int = 20,
+            keepalive_expiry: float = 30.0,
+            http2: bool = False,
+            metrics: OpenPaymentsMetrics = None,
+            connect_timeout: float = None,
+            retry: RetryPolicy = None,
+            circuit_breaker: CircuitBreaker = None,
+    ):
         self.http_timeout = http_timeout
+        self.timeout = Timeout(http_timeout, connect=connect_timeout) if connect_timeout else Timeout(http_timeout)
+        self.limits = Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive_connections,
+            keepalive_expiry=keepalive_expiry,
+        )
+        # HTTP/2 requires the optional `h2` package, i.e. `httpx[http2]`
+        self.http2 = http2
+        self.metrics = metrics
+        self.retry = retry
+        self.circuit_breaker = circuit_breaker
+        self.client = self._create_client()
+
+    def _create_client(self) -> Client:
+        return Client(timeout=self.timeout, limits=self.limits, http2=self.http2)
 
     def build_request(
             self,
@@ -19,12 +60,13 @@ class HttpClient:
             headers = None,
             data = None,
             json: dict = None,
-            params: dict = None
+            params: dict = None,
+            operation: str = None
     ) -> Request:
         """
-        Build request
+        Build request, named `operation` in metrics
         """
-        return Request(
+        request = Request(
             method=method,
             url=url,
             headers=headers,
@@ -32,12 +74,137 @@ class HttpClient:
             data=data,
             params=params
         )
+        return tag_operation(request, operation) if operation else request
+
+    def _check_circuit(self, request: Request) -> None:
+        if self.circuit_breaker is None or self.circuit_breaker.allow(request.url.host):
+            return
+        error = CircuitOpenError(f"Circuit open for {request.url.host}", request=request)
+        if self.metrics is not None:
+            self.metrics.record(request, None, 0.0, error=error)
+        raise error
+
+    def _retry_delay(self, request: Request, attempt: int, response: Response = None) -> Optional[float]:
+        """
+        Record the outcome of an attempt with the circuit breaker, and get the delay before retrying it, if any
+        """
+        if self.circuit_breaker is not None:
+            if response is None or response.status_code >= 500:
+                self.circuit_breaker.record_failure(request.url.host)
+            else:
+                self.circuit_breaker.record_success(request.url.host)
+            if self.circuit_breaker.is_open(request.url.host):
+                # Give up with this attempt's outcome rather than a `CircuitOpenError`
+                return None
+        if self.retry is None or not self.retry.is_retryable(request):
+            return None
+        return self.retry.get_delay(attempt, response)
+
+    def _send(self, request: Request) -> Response:
+        if self.metrics is None:
+            return self.client.send(request=request)
+        started = time.perf_counter()
+        try:
+            res = self.client.send(request=request)
+        except Exception as e:
+            self.metrics.record(request, None, time.perf_counter() - started, error=e)
+            raise
+        self.metrics.record(request, res, time.perf_counter() - started)
+        return res
 
     def send(self, request: Request) -> Response:
         """
         Make an http request
-        """ 
-        with Client(timeout=self.http_timeout) as client:
-            res = client.send(request=request)
-        res.raise_for_status()
+        """
+        attempt = 0
+        while True:
+            attempt += 1
+            self._check_circuit(request)
+            try:
+                res = self._send(request)
+            except TransportError:
+                delay = self._retry_delay(request, attempt)
+                if delay is None:
+                    raise
+            else:
+                delay = self._retry_delay(request, attempt, res)
+                if delay is None:
+                    res.raise_for_status()
+                    return res
+            time.sleep(delay)
+
+    @property
+    def is_closed(self) -> bool:
+        """
+        Whether the connection pool has been shut down
+        """
+        return self.client.is_closed
+
+    def close(self) -> None:
+        """
+        Close all pooled connections
+        """
+        self.client.close()
+
+    def __enter__(self) -> "HttpClient":
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+
+class AsyncHttpClient(HttpClient):
+    """
+    Async HTTP Client
+
+    Same pooling and request building as `HttpClient`, but sends on an `httpx.AsyncClient` so Open Payments
+    calls never block the event loop.
+    """
+
+    def _create_client(self) -> AsyncClient:
+        return AsyncClient(timeout=self.timeout, limits=self.limits, http2=self.http2)
+
+    async def _send(self, request: Request) -> Response:
+        if self.metrics is None:
+            return await self.client.send(request=request)
+        started = time.perf_counter()
+        try:
+            res = await self.client.send(request=request)
+        except Exception as e:
+            self.metrics.record(request, None, time.perf_counter() - started, error=e)
+            raise
+        self.metrics.record(request, res, time.perf_counter() - started)
         return res
+
+    async def send(self, request: Request) -> Response:
+        """
+        Make an http request
+        """
+        attempt = 0
+        while True:
+            attempt += 1
+            self._check_circuit(request)
+            try:
+                res = await self._send(request)
+            except TransportError:
+                delay = self._retry_delay(request, attempt)
+                if delay is None:
+                    raise
+            else:
+                delay = self._retry_delay(request, attempt, res)
+                if delay is None:
+                    res.raise_for_status()
+                    return res
+            await asyncio.sleep(delay)
+
+    async def aclose(self) -> None:
+        """
+        Close all pooled connections
+        """
+        await self.client.aclose()
+
+    async def __aenter__(self) -> "AsyncHttpClient":
+        return self
+
+    async def __aexit__(self, *args) -> None:
+        await self.aclose()
@@ -268,8 +268,9 @@ class PaymentListQuery(BaseModel):
 
 
 class Pagination(BaseModel):
-    startCursor: str = Field(min_length=1)
-    endCursor: str = Field(min_length=1)
+    # An empty page carries no cursors
+    startCursor: Optional[str] = Field(None, min_length=1)
+    endCursor: Optional[str] = Field(None, min_length=1)
     hasNextPage: Optional[bool]
     hasPrevPage: Optional[bool]
 
@@ -0,0 +1,307 @@
+"""
+Wallet Address, JWKS and access token caches
+"""
+
+import asyncio
+import json
+import logging
+import re
+import threading
+import time
+from contextlib import asynccontextmanager, contextmanager
+from dataclasses import asdict, dataclass
+from typing import AsyncIterator, Iterator, Optional
+
+from httpx import URL, Response
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class CacheEntry:
+    """
+    A cached wallet document, with the validator needed to revalidate it once stale
+    """
+
+    body: dict
+    etag: Optional[str]
+    expires_at: float
+
+    @property
+    def is_fresh(self) -> bool:
+        return time.time() < self.expires_at
+
+
+class MemoryCacheBackend:
+    """
+    Process-local cache backend
+    """
+
+    def __init__(self):
+        self.entries: dict[str, tuple[float, str]] = {}
+
+    def get(self, key: str) -> Optional[str]:
+        value = self.entries.get(key)
+        if not value:
+            return None
+        evict_at, data = value
+        if time.time() >= evict_at:
+            self.entries.pop(key, None)
+            return None
+        return data
+
+    def set(self, key: str, data: str, ttl: int) -> None:
+        self.entries[key] = (time.time() + ttl, data)
+
+    async def aget(self, key: str) -> Optional[str]:
+        return self.get(key)
+
+    async def aset(self, key: str, data: str, ttl: int) -> None:
+        self.set(key, data, ttl)
+
+
+class RedisCacheBackend:
+    """
+    Redis cache backend, so that every worker shares the same hits. Takes a sync `redis.Redis` and/or an
+    async `redis.asyncio.Redis` client, depending on which SDK client will use it.
+    """
+
+    def __init__(self, redis=None, async_redis=None, prefix: str = "open-payments"):
+        self.redis = redis
+        self.async_redis = async_redis
+        self.prefix = prefix
+
+    def _key(self, key: str) -> str:
+        return f"{self.prefix}:{key}"
+
+    def get(self, key: str) -> Optional[str]:
+        data = self.redis.get(self._key(key))
+        return data.decode("utf-8") if isinstance(data, bytes) else data
+
+    def set(self, key: str, data: str, ttl: int) -> None:
+        self.redis.set(self._key(key), data, ex=ttl)
+
+    async def aget(self, key: str) -> Optional[str]:
+        data = await self.async_redis.get(self._key(key))
+        return data.decode("utf-8") if isinstance(data, bytes) else data
+
+    async def aset(self, key: str, data: str, ttl: int) -> None:
+        await self.async_redis.set(self._key(key), data, ex=ttl)
+
+
+class KeyedLocks:
+    """
+    Per-key locks, so that concurrent lookups of the same key within a process wait on a single request.
+
+    A key's lock is dropped once no caller holds or waits on it, so that the locks do not grow with every key seen.
+    """
+
+    def __init__(self):
+        # Lock per key, with the number of callers holding or waiting on it
+        self._locks: dict[str, tuple[threading.Lock, int]] = {}
+        self._async_locks: dict[str, tuple[asyncio.Lock, int]] = {}
+        self._guard = threading.Lock()
+
+    def _use(self, locks: dict, key, factory):
+        with self._guard:
+            lock, users = locks.get(key) or (factory(), 0)
+            locks[key] = (lock, users + 1)
+            return lock
+
+    def _leave(self, locks: dict, key) -> None:
+        with self._guard:
+            lock, users = locks[key]
+            if users > 1:
+                locks[key] = (lock, users - 1)
+            else:
+                del locks[key]
+
+    @contextmanager
+    def lock(self, key) -> Iterator[None]:
+        lock = self._use(self._locks, key, threading.Lock)
+        try:
+            with lock:
+                yield
+        finally:
+            self._leave(self._locks, key)
+
+    @asynccontextmanager
+    async def alock(self, key) -> AsyncIterator[None]:
+        lock = self._use(self._async_locks, key, asyncio.Lock)
+        try:
+            async with lock:
+                yield
+        finally:
+            self._leave(self._async_locks, key)
+
+
+class WalletCache(KeyedLocks):
+    """
+    TTL cache for wallet address documents and their JWKS.
+
+    - Entries are keyed by normalised URL, so `https://ILP.example/alice/` and `https://ilp.example/alice` share.
+    - Freshness follows the response `Cache-Control: max-age`, falling back to `default_ttl`. `no-store` is
+      never cached.
+    - Stale entries are kept for `stale_ttl` seconds and revalidated with `If-None-Match` when an `ETag` was sent.
+    - Concurrent lookups of the same key within a process wait on a single request.
+    - Each process keeps a local copy in front of the optional shared `backend` (e.g. `RedisCacheBackend`). If the
+      backend is unreachable, lookups degrade to the local copy rather than failing the payment flow.
+    """
+
+    def __init__(self, backend=None, default_ttl: int = 300, stale_ttl: int = 86400):
+        super().__init__()
+        self.local = MemoryCacheBackend()
+        self.backend = backend
+        self.default_ttl = default_ttl
+        self.stale_ttl = stale_ttl
+
+    def get_key(self, kind: str, url: str) -> str:
+        """
+        Normalise the URL: lowercase scheme and host, no trailing slash
+        """
+        parsed = URL(str(url).strip())
+        path = parsed.raw_path.decode("ascii").rstrip("/")
+        return f"{kind}:{parsed.scheme.lower()}://{parsed.netloc.decode('ascii').lower()}{path}"
+
+    def _decode(self, data: Optional[str]) -> Optional[CacheEntry]:
+        if not data:
+            return None
+        return CacheEntry(**json.loads(data))
+
+    def _encode(self, entry: CacheEntry) -> str:
+        return json.dumps(asdict(entry))
+
+    def get(self, key: str) -> Optional[CacheEntry]:
+        entry = self._decode(self.local.get(key))
+        if entry and entry.is_fresh:
+            return entry
+        if self.backend:
+            try:
+                shared = self._decode(self.backend.get(key))
+            except Exception as exc:
+                logger.warning("Wallet cache backend unavailable: %s", exc)
+                shared = None
+            if shared:
+                self.local.set(key, self._encode(shared), self.stale_ttl)
+                return shared
+        return entry
+
+    async def aget(self, key: str) -> Optional[CacheEntry]:
+        entry = self._decode(self.local.get(key))
+        if entry and entry.is_fresh:
+            return entry
+        if self.backend:
+            try:
+                shared = self._decode(await self.backend.aget(key))
+            except Exception as exc:
+                logger.warning("Wallet cache backend unavailable: %s", exc)
+                shared = None
+            if shared:
+                self.local.set(key, self._encode(shared), self.stale_ttl)
+                return shared
+        return entry
+
+    def get_max_age(self, response: Response) -> Optional[int]:
+        """
+        Seconds the response may be cached for, or None if it must not be stored
+        """
+        cache_control = response.headers.get("cache-control", "").lower()
+        if "no-store" in cache_control:
+            return None
+        if "no-cache" in cache_control:
+            return 0
+        match = re.search(r"(?:^|[,\s])max-age=(\d+)", cache_control)
+        if match:
+            return int(match.group(1))
+        return self.default_ttl
+
+    def build_entry(self, response: Response, cached: CacheEntry = None) -> Optional[CacheEntry]:
+        """
+        Build an entry from a `200` response, or refresh `cached` from a `304` response
+        """
+        max_age = self.get_max_age(response)
+        if max_age is None:
+            return None
+        body = cached.body if response.status_code == 304 and cached else response.json()
+        etag = response.headers.get("etag") or (cached.etag if cached else None)
+        return CacheEntry(body=body, etag=etag, expires_at=time.time() + max_age)
+
+    def _ttl(self, entry: CacheEntry) -> int:
+        return max(int(entry.expires_at - time.time()), 0) + self.stale_ttl
+
+    def set(self, key: str, entry: CacheEntry) -> None:
+        data = self._encode(entry)
+        self.local.set(key, data, self._ttl(entry))
+        if self.backend:
+            try:
+                self.backend.set(key, data, self._ttl(entry))
+            except Exception as exc:
+                logger.warning("Wallet cache backend unavailable: %s", exc)
+
+    async def aset(self, key: str, entry: CacheEntry) -> None:
+        data = self._encode(entry)
+        self.local.set(key, data, self._ttl(entry))
+        if self.backend:
+            try:
+                await self.backend.aset(key, data, self._ttl(entry))
+            except Exception as exc:
+                logger.warning("Wallet cache backend unavailable: %s", exc)
+
+
+@dataclass
+class CachedAccessToken:
+    """
+    A non-interactive grant access token, with the management URI used to rotate it
+    """
+
+    value: str
+    manage: str
+    expires_at: Optional[float]
+
+    @property
+    def is_expired(self) -> bool:
+        return self.expires_at is not None and time.time() >= self.expires_at
+
+    def needs_rotation(self, margin: int) -> bool:
+        return self.expires_at is not None and time.time() >= self.expires_at - margin
+
+
+class AccessTokenCache(KeyedLocks):
+    """
+    Process-local cache of non-interactive grant access tokens.
+
+    - Tokens are keyed by (client wallet, auth server, grant type, actions), so every flow asking for the same
+      access reuses one token.
+    - `rotation_margin` seconds before `expires_in` runs out, the token is due for rotation.
+    - Tokens without `expires_in` are reused until the resource server rejects them.
+
+    Tokens are bearer credentials, so they are deliberately not written to a shared backend.
+    """
+
+    def __init__(self, rotation_margin: int = 30):
+        super().__init__()
+        self.rotation_margin = rotation_margin
+        self.tokens: dict[tuple, CachedAccessToken] = {}
+
+    def get_key(self, client: str, auth_server: str, grant: str, actions: list[str]) -> tuple:
+        return (str(client), str(auth_server).rstrip("/"), grant, tuple(sorted(actions)))
+
+    def get(self, key: tuple) -> Optional[CachedAccessToken]:
+        return self.tokens.get(key)
+
+    def set(self, key: tuple, access_token) -> CachedAccessToken:
+        """
+        Cache an `AccessToken` from a grant or rotation response
+        """
+        expires_at = time.time() + access_token.expires_in if access_token.expires_in is not None else None
+        token = CachedAccessToken(value=access_token.value, manage=str(access_token.manage), expires_at=expires_at)
+        self.tokens[key] = token
+        return token
+
+    def invalidate(self, key: tuple, value: str = None) -> None:
+        """
+        Drop a token. With `value`, only drop it if it was not replaced in the meantime
+        """
+        token = self.tokens.get(key)
+        if token and (value is None or token.value == value):
+            self.tokens.pop(key, None)
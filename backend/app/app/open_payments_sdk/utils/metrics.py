@@ -0,0 +1,142 @@
+"""
+Latency, status and payload size metrics for Open Payments calls
+"""
+
+import bisect
+import contextvars
+import json
+import logging
+import threading
+from contextlib import contextmanager
+from typing import Iterator, Optional
+
+from httpx import Request, Response
+
+logger = logging.getLogger(__name__)
+
+OPERATION_EXTENSION = "open_payments_operation"
+
+_flow_step: contextvars.ContextVar[Optional[str]] = contextvars.ContextVar("open_payments_flow_step", default=None)
+
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SIZE_BUCKETS = (128, 256, 512, 1024, 2048, 4096, 8192, 16384, 65536)
+
+
+@contextmanager
+def flow_step(name: str) -> Iterator[None]:
+    """
+    Tag every Open Payments call made inside the block, in this thread or task, with a flow step
+    """
+    token = _flow_step.set(name)
+    try:
+        yield
+    finally:
+        _flow_step.reset(token)
+
+
+def get_flow_step() -> Optional[str]:
+    return _flow_step.get()
+
+
+def tag_operation(request: Request, operation: str) -> Request:
+    """
+    Name the SDK operation a request belongs to, e.g. `quote.create`
+    """
+    request.extensions[OPERATION_EXTENSION] = operation
+    return request
+
+
+def get_operation(request: Request) -> str:
+    return request.extensions.get(OPERATION_EXTENSION, request.method.lower())
+
+
+class Histogram:
+    """
+    Thread-safe labelled histogram, rendered in the Prometheus text format
+    """
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple[str, ...], buckets: tuple[float, ...]):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+        self.buckets = buckets
+        # label values -> [count per bucket (last is +Inf), sum]
+        self.series: dict[tuple[str, ...], tuple[list[int], list[float]]] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, labels: tuple[str, ...]) -> None:
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            counts, total = self.series.setdefault(labels, ([0] * (len(self.buckets) + 1), [0.0]))
+            counts[index] += 1
+            total[0] += value
+
+    def _labels(self, values: tuple[str, ...], **extra) -> str:
+        pairs = [*zip(self.labelnames, values), *extra.items()]
+        escaped = (str(value).replace("\\", "\\\\").replace('"', '\\"') for _, value in pairs)
+        return ",".join(f'{name}="{value}"' for (name, _), value in zip(pairs, escaped))
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            series = [(labels, list(counts), total[0]) for labels, (counts, total) in self.series.items()]
+        for labels, counts, total in sorted(series):
+            cumulative = 0
+            for bound, count in zip((*self.buckets, "+Inf"), counts):
+                cumulative += count
+                lines.append(f"{self.name}_bucket{{{self._labels(labels, le=bound)}}} {cumulative}")
+            lines.append(f"{self.name}_sum{{{self._labels(labels)}}} {total}")
+            lines.append(f"{self.name}_count{{{self._labels(labels)}}} {cumulative}")
+        return lines
+
+
+class OpenPaymentsMetrics:
+    """
+    Records every call sent through an `HttpClient` created with `metrics=`.
+
+    - Calls are labelled by SDK operation, flow step (see `flow_step`), host and status. Transport failures are
+      recorded with the exception name as status.
+    - `render` returns duration and payload size histograms in the Prometheus text format. Metrics are kept per
+      process.
+    - With `log_requests`, each call is also logged as a JSON line on this module's logger.
+    """
+
+    LABELS = ("operation", "step", "host", "status")
+
+    def __init__(self, log_requests: bool = False, prefix: str = "open_payments"):
+        self.log_requests = log_requests
+        self.duration = Histogram(
+            f"{prefix}_request_duration_seconds", "Open Payments call duration.", self.LABELS, DURATION_BUCKETS
+        )
+        self.request_size = Histogram(
+            f"{prefix}_request_size_bytes", "Open Payments request body size.", self.LABELS, SIZE_BUCKETS
+        )
+        self.response_size = Histogram(
+            f"{prefix}_response_size_bytes", "Open Payments response body size.", self.LABELS, SIZE_BUCKETS
+        )
+
+    def record(
+        self, request: Request, response: Optional[Response], duration: float, error: Exception = None
+    ) -> None:
+        status = str(response.status_code) if response is not None else type(error).__name__
+        labels = (get_operation(request), get_flow_step() or "", request.url.host, status)
+        request_size = len(request.content)
+        response_size = len(response.content) if response is not None else 0
+        self.duration.observe(duration, labels)
+        self.request_size.observe(request_size, labels)
+        self.response_size.observe(response_size, labels)
+        if self.log_requests:
+            logger.info(
+                json.dumps(
+                    {
+                        **dict(zip(self.LABELS, labels)),
+                        "method": request.method,
+                        "duration_ms": round(duration * 1000, 2),
+                        "request_bytes": request_size,
+                        "response_bytes": response_size,
+                    }
+                )
+            )
+
+    def render(self) -> str:
+        return "\n".join([*self.duration.render(), *self.request_size.render(), *self.response_size.render()]) + "\n"
@@ -0,0 +1,83 @@
+"""
+Cursor pagination over Open Payments list endpoints
+"""
+
+import asyncio
+from datetime import datetime
+from typing import AsyncIterator, Awaitable, Callable, Optional, Protocol, TypeVar
+
+from app.open_payments_sdk.models.resource import Pagination, PaymentListQuery
+
+
+class PaymentItem(Protocol):
+    createdAt: datetime
+
+
+class PaymentPage(Protocol):
+    pagination: Pagination
+    result: list
+
+
+T = TypeVar("T", bound=PaymentItem)
+P = TypeVar("P", bound=PaymentPage)
+
+
+async def iterate_pages(
+    fetch_page: Callable[[PaymentListQuery], Awaitable[P]],
+    *,
+    wallet_address: str,
+    page_size: int = 100,
+    prefetch: bool = True,
+) -> AsyncIterator[P]:
+    """
+    Walk the pages of a payment listing, following `endCursor`.
+
+    With `prefetch`, the next page is requested as soon as a page arrives, so it loads while the caller works on
+    the current one. At most two pages are held at a time. Closing the iterator early cancels the pending request.
+    """
+
+    def next_page(cursor: Optional[str]) -> Awaitable[P]:
+        return fetch_page(PaymentListQuery(walletAddress=wallet_address, cursor=cursor, first=page_size, last=None))
+
+    pending: Optional[asyncio.Task] = None
+    try:
+        page = await next_page(None)
+        while True:
+            cursor = page.pagination.endCursor
+            has_next = bool(page.pagination.hasNextPage and cursor and page.result)
+            if has_next and prefetch:
+                pending = asyncio.ensure_future(next_page(cursor))
+            yield page
+            if not has_next:
+                return
+            if pending is None:
+                page = await next_page(cursor)
+            else:
+                page, pending = await pending, None
+    finally:
+        if pending is not None:
+            pending.cancel()
+
+
+async def iterate_payments(
+    pages: AsyncIterator[P],
+    *,
+    since: Optional[datetime] = None,
+    stop_at: Optional[Callable[[T], bool]] = None,
+) -> AsyncIterator[T]:
+    """
+    Yield the payments of `pages`, newest first, as Open Payments lists them.
+
+    The walk stops, without fetching further pages, at the first payment created before `since` or for which
+    `stop_at` returns True. That payment is not yielded.
+    """
+    try:
+        async for page in pages:
+            for payment in page.result:
+                if since is not None and payment.createdAt < since:
+                    return
+                if stop_at is not None and stop_at(payment):
+                    return
+                yield payment
+    finally:
+        await pages.aclose()
@@ -0,0 +1,120 @@
+"""
+Retries and per-host circuit breaking for Open Payments calls
+"""
+
+import random
+import threading
+import time
+from dataclasses import dataclass, field
+from email.utils import parsedate_to_datetime
+from typing import Optional
+
+from httpx import Request, Response, TransportError
+
+IDEMPOTENT_METHODS = frozenset({"GET", "HEAD", "OPTIONS", "PUT", "DELETE"})
+IDEMPOTENCY_KEY_HEADER = "Idempotency-Key"
+
+
+class CircuitOpenError(TransportError):
+    """
+    Raised without sending when the request's host has failed too often recently
+    """
+
+
+@dataclass
+class RetryPolicy:
+    """
+    Retries transport errors and transient statuses with exponential backoff and full jitter.
+
+    Only idempotent requests, or requests carrying an `Idempotency-Key` header, are retried, so a payment is never
+    created twice. A `Retry-After` header on the response is honoured, up to `max_backoff`.
+    """
+
+    attempts: int = 3
+    backoff: float = 0.2
+    max_backoff: float = 2.0
+    statuses: frozenset[int] = frozenset({429, 502, 503, 504})
+
+    def is_retryable(self, request: Request) -> bool:
+        return request.method in IDEMPOTENT_METHODS or IDEMPOTENCY_KEY_HEADER in request.headers
+
+    def get_delay(self, attempt: int, response: Optional[Response] = None) -> Optional[float]:
+        """
+        Seconds to wait before retrying after `attempt` (counting from 1), or None if the call should not be retried
+        """
+        if attempt >= self.attempts:
+            return None
+        if response is not None:
+            if response.status_code not in self.statuses:
+                return None
+            retry_after = self._retry_after(response)
+            if retry_after is not None:
+                return min(retry_after, self.max_backoff)
+        return random.uniform(0, min(self.backoff * 2 ** (attempt - 1), self.max_backoff))
+
+    def _retry_after(self, response: Response) -> Optional[float]:
+        value = response.headers.get("Retry-After")
+        if not value:
+            return None
+        try:
+            return max(float(value), 0.0)
+        except ValueError:
+            pass
+        try:
+            return max(parsedate_to_datetime(value).timestamp() - time.time(), 0.0)
+        except (TypeError, ValueError):
+            return None
+
+
+@dataclass
+class HostCircuit:
+    failures: int = 0
+    opened_at: Optional[float] = None
+    probe_started: Optional[float] = None
+
+
+@dataclass
+class CircuitBreaker:
+    """
+    Per-host circuit breaker, shared by every client in the process.
+
+    After `failure_threshold` consecutive failures (transport errors or 5xx responses) a host's circuit opens, and
+    calls to it fail fast with `CircuitOpenError` for `reset_timeout` seconds. Then a single probe call is let
+    through: success closes the circuit, failure opens it again. A probe that never reports back is replaced after
+    another `reset_timeout`. Other hosts are unaffected.
+    """
+
+    failure_threshold: int = 5
+    reset_timeout: float = 30.0
+    hosts: dict[str, HostCircuit] = field(default_factory=dict)
+    _lock: threading.Lock = field(default_factory=threading.Lock, repr=False)
+
+    def allow(self, host: str) -> bool:
+        with self._lock:
+            circuit = self.hosts.get(host)
+            if circuit is None or circuit.opened_at is None:
+                return True
+            now = time.monotonic()
+            if now - circuit.opened_at < self.reset_timeout:
+                return False
+            if circuit.probe_started is not None and now - circuit.probe_started < self.reset_timeout:
+                return False
+            circuit.probe_started = now
+            return True
+
+    def record_success(self, host: str) -> None:
+        with self._lock:
+            self.hosts.pop(host, None)
+
+    def record_failure(self, host: str) -> None:
+        with self._lock:
+            circuit = self.hosts.setdefault(host, HostCircuit())
+            circuit.failures += 1
+            circuit.probe_started = None
+            if circuit.opened_at is not None or circuit.failures >= self.failure_threshold:
+                circuit.opened_at = time.monotonic()
+
+    def is_open(self, host: str) -> bool:
+        with self._lock:
+            circuit = self.hosts.get(host)
+            return circuit is not None and circuit.opened_at is not None
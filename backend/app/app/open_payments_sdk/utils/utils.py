@@ -11,8 +11,11 @@ def get_default_headers() -> dict:
             "Content-Type": "application/json"
         }
 
+DEFAULT_COVERED_COMPONENTS = ("@method", "@target-uri")
+
+
 def get_default_covered_components() -> tuple:
     """
     Return default covered components
     """
-    return ("@method","@target-uri")
\ No newline at end of file
+    return DEFAULT_COVERED_COMPONENTS
\ No newline at end of file
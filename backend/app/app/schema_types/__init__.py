@@ -32,4 +32,6 @@ from .product import (  # noqa: F401
     ProductAssetType,
     ProductContributorRoleType,
     ProductFeeResponsibilityType,
+    PaymentSettlementType,
+    ExportFormatType,
 )
@@ -59,3 +59,15 @@ class ProductFeeResponsibilityType(BaseEnum):
     Buyer = auto()
     Seller = auto()
     Choice = auto()
+
+
+class PaymentSettlementType(BaseEnum):
+    Pending = auto()
+    Completed = auto()
+    Failed = auto()
+    Unknown = auto()
+
+
+class ExportFormatType(BaseEnum):
+    Ndjson = auto()
+    Csv = auto()
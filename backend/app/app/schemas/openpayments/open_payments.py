@@ -60,6 +60,7 @@ class PendingIncomingPaymentTransaction(BaseModel):
     continue_url: Optional[AnyUrl] = Field(
         None, description="URL to request a new access key to complete the incoming payment, `response.continue.uri`."
     )
+    order_id: Optional[ULID] = Field(None, description="OpenOrder recording this transaction, if for a Product.")
 
 
 class SellerOpenPaymentAccount(BaseModel):
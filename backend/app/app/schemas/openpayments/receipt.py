@@ -18,18 +18,16 @@ along with this program.  If not, see <http:#www.gnu.org/licenses/>.
 
 """
 
-from typing import Optional
-from typing_extensions import Self
+from typing import Optional, Any
 from ulid import ULID
 from pydantic import (
     ConfigDict,
     Field,
-    model_validator,
 )
 from datetime import datetime
 
 from app.schemas.base_schema import BaseSchema, CountryType, CurrencyType
-from app.schema_types import ProductFeeResponsibilityType, ProductType
+from app.schema_types import PaymentSettlementType, ProductFeeResponsibilityType, ProductType
 
 
 class OpenReceiptBase(BaseSchema):
@@ -60,14 +58,19 @@ class OpenReceiptBase(BaseSchema):
     assetScale: int = Field(
         ..., description="Number of decimal places defining the scale of the smallest divisible currency unit."
     )
+    outgoing_payments: Optional[list[dict[str, Any]]] = Field(
+        [], description="Outgoing payment resource list of key-value pairs. One per recipient of the payment."
+    )
+    # SETTLEMENT
+    settlement: PaymentSettlementType = Field(
+        default=PaymentSettlementType.Pending, description="Settlement of the outgoing payments, once reconciled."
+    )
+    sentAmount: Optional[str] = Field(
+        None, description="Amount sent by the outgoing payments, in `assetCode`, as last reconciled."
+    )
+    settled: Optional[datetime] = Field(None, description="Date the outgoing payments reached their final state.")
     model_config = ConfigDict(from_attributes=True)
 
-    @model_validator(mode="after")
-    def validate_conditions(self) -> Self:
-        if self.renewal_periods is not None and self.renewal is None:
-            raise ValueError("Set `renewal` when setting `renewal_periods`.")
-        return self
-
 
 class OpenReceiptCreate(OpenReceiptBase):
     pass
@@ -3,9 +3,12 @@
 Pydantic schemas for payment operations.
 """
 
-from typing import Optional
-from pydantic import BaseModel, Field, AnyUrl
+from datetime import datetime
+from typing import Literal, Optional
+from pydantic import BaseModel, Field, AnyUrl, model_validator
+from typing_extensions import Self
 from ulid import ULID
+from app.open_payments_sdk.models.resource import Amount, IncomingPayment, OutgoingPayment, Quote
 from app.open_payments_sdk.models.wallet import WalletAddress
 
 
@@ -13,6 +16,24 @@ from app.open_payments_sdk.models.wallet import WalletAddress
 from app.schemas.openpayments.open_payments import PendingIncomingPaymentTransaction
 
 
+class PendingRecurringPaymentGrant(BaseModel):
+    """Stores a recurring payment grant awaiting the sender's authorization."""
+
+    grant_id: ULID = Field(..., description="Tracking key, sent as the interaction nonce.")
+    sender_wallet: str = Field(..., description="Wallet address of the sender (Migrante).")
+    receiver_wallet: str = Field(..., description="Wallet address of the receiver (FINSUS).")
+    debit_amount_value: str = Field(..., description="Debit amount per payment (e.g., '1000' for $10.00).")
+    debit_amount_asset_code: str = Field(..., description="Asset code (e.g., 'USD').")
+    debit_amount_asset_scale: int = Field(..., description="Asset scale (e.g., 2 for cents).")
+    total_amount_cap: str = Field(..., description="Total cap amount (e.g., '10000' for $100.00).")
+    interval: str = Field(..., description="Interval for recurring payments (ISO 8601 repeating interval).")
+    max_payments: int = Field(..., description="Maximum number of payments allowed.")
+    finish_id: str = Field(..., description="Random string from the interactive grant, `response.interact.finish`.")
+    continue_id: str = Field(..., description="Continuation token, `response.continue.access_token.value`.")
+    continue_uri: AnyUrl = Field(..., description="URI to continue the grant, `response.continue.uri`.")
+    auth_server_url: str = Field(..., description="Sender's authorization server, used to verify the callback hash.")
+
+
 class RecurringPaymentGrant(BaseModel):
     """Stores the grant information for recurring payments."""
 
@@ -28,6 +49,7 @@ class RecurringPaymentGrant(BaseModel):
     interval: str = Field(..., description="Interval for recurring payments (ISO 8601 repeating interval).")
     payments_made: int = Field(default=0, description="Number of payments already executed.")
     max_payments: int = Field(..., description="Maximum number of payments allowed.")
+    last_payment_at: Optional[datetime] = Field(None, description="When the last payment was executed.")
 
 
 class RecurringPaymentStartRequest(BaseModel):
@@ -82,17 +104,47 @@ class RecurringPaymentTriggerResponse(BaseModel):
     payments_remaining: Optional[int] = Field(None, description="Payments remaining.")
 
 
-class OneTimePurchaseStartRequest(BaseModel):
+class ProductOrderRequest(BaseModel):
+    """Optional Product details, to record a payment flow as an OpenOrder."""
+
+    product_id: Optional[ULID] = Field(None, description="Product being paid for. Requires `price_id` and `country`.")
+    price_id: Optional[ULID] = Field(None, description="Price of the Product being paid.")
+    country: Optional[str] = Field(None, description="Buyer country. This must be an ISO country code.")
+
+    @model_validator(mode="after")
+    def validate_order(self) -> Self:
+        fields = (self.product_id, self.price_id, self.country)
+        if any(field is not None for field in fields) and not all(field is not None for field in fields):
+            raise ValueError("Set `product_id`, `price_id` and `country` together.")
+        return self
+
+
+class OneTimePurchaseStartRequest(ProductOrderRequest):
     """Request to start a one-time purchase flow."""
 
     amount: str = Field(..., description="Amount in receiver's currency (e.g., '100000' for $1,000.00 MXN).")
 
 
+class IndicativeRate(BaseModel):
+    """Exchange rate from a recent quote, shown before the payment is confirmed. Not binding."""
+
+    rate: str = Field(..., description="Units of the receiver's currency per unit of the sender's currency.")
+    receive_amount: str = Field(..., description="Amount to receive, in the receiver's currency.")
+    receive_asset_code: str = Field(..., description="Receiver's asset code (e.g., 'MXN').")
+    debit_amount: str = Field(..., description="Estimated amount to debit, in the sender's currency.")
+    max_debit_amount: str = Field(
+        ..., description="Most that may be debited. The payment fails if the rate moves beyond it before confirming."
+    )
+    debit_asset_code: str = Field(..., description="Sender's asset code (e.g., 'USD').")
+    expires_at: datetime = Field(..., description="When the quote behind this rate expires.")
+
+
 class OneTimePurchaseStartResponse(BaseModel):
     """Response from starting one-time purchase flow."""
 
     redirect_url: str = Field(..., description="URL to redirect the user for authorization.")
     transaction_id: ULID = Field(..., description="ID to track this transaction.")
+    rate: Optional[IndicativeRate] = Field(None, description="Indicative exchange rate, for cross-currency payments.")
 
 
 class OneTimePurchaseCallbackRequest(BaseModel):
@@ -111,6 +163,93 @@ class OneTimePurchaseCallbackResponse(BaseModel):
     outgoing_payment_id: Optional[str] = Field(None, description="ID of the created outgoing payment.")
 
 
+class SplitRecipient(BaseModel):
+    """A recipient's share of a split payment."""
+
+    wallet_address: str = Field(..., description="Recipient's wallet address.")
+    amount: str = Field(..., description="Amount to receive, in the recipient wallet's currency (e.g., '5000').")
+    creator_id: Optional[str] = Field(None, description="Recipient Creator account, if known.")
+
+
+class SplitPaymentLeg(SplitRecipient):
+    """Progress of one recipient's payment in a split payment."""
+
+    status: Literal["pending", "paid", "failed", "unknown"] = Field(
+        default="pending", description="`unknown` if the outgoing payment may or may not have been created."
+    )
+    incoming_payment_id: Optional[AnyUrl] = Field(None, description="Incoming payment on the recipient's wallet.")
+    quote_id: Optional[AnyUrl] = Field(None, description="Quote for the incoming payment, on the buyer's wallet.")
+    debit_amount: Optional[Amount] = Field(None, description="Amount quoted to debit from the buyer.")
+    outgoing_payment_id: Optional[AnyUrl] = Field(None, description="Outgoing payment that paid this leg.")
+    error: Optional[str] = Field(None, description="Why this leg could not be paid.")
+    # Resources created for the leg in the current request, kept to record the order and receipt but never stored
+    incoming_payment: Optional[IncomingPayment] = Field(None, exclude=True)
+    quote: Optional[Quote] = Field(None, exclude=True)
+    outgoing_payment: Optional[OutgoingPayment] = Field(None, exclude=True)
+
+
+class PendingSplitPayment(BaseModel):
+    """Stores a split payment awaiting the buyer's authorization."""
+
+    id: ULID = Field(..., description="Tracking key, sent as the interaction nonce.")
+    buyer: WalletAddress = Field(..., description="Buyer's wallet address, debited for every leg.")
+    legs: list[SplitPaymentLeg] = Field(..., description="One leg per recipient.")
+    debit_limit: Amount = Field(..., description="Total debit authorized by the buyer, the sum of the leg quotes.")
+    finish_id: Optional[str] = Field(None, description="Random string from the interactive grant.")
+    continue_id: Optional[str] = Field(None, description="Continuation token, `response.continue.access_token.value`.")
+    continue_url: Optional[AnyUrl] = Field(None, description="URI to continue the grant, `response.continue.uri`.")
+    order_id: Optional[ULID] = Field(None, description="OpenOrder recording this split payment, if for a Product.")
+
+
+class SplitPaymentStartRequest(ProductOrderRequest):
+    """Request to start a split payment flow."""
+
+    recipients: list[SplitRecipient] = Field(
+        default_factory=list,
+        description="Recipients and their shares. Not set for a Product, whose contributors are paid by their ratio.",
+    )
+
+    @model_validator(mode="after")
+    def validate_recipients(self) -> Self:
+        if self.product_id is None and not self.recipients:
+            raise ValueError("Set `recipients`, or a Product to pay its contributors.")
+        if self.product_id is not None and self.recipients:
+            raise ValueError("A Product's recipients are its contributors, and cannot be set.")
+        return self
+
+
+class SplitPaymentStartResponse(BaseModel):
+    """Response from starting a split payment flow."""
+
+    redirect_url: str = Field(..., description="URL to redirect the user for authorization.")
+    transaction_id: ULID = Field(..., description="ID to track this split payment.")
+    debit_amount: Amount = Field(..., description="Total quoted debit the buyer is asked to authorize.")
+
+
+class SplitPaymentCallbackResponse(BaseModel):
+    """Response after processing the split payment callback."""
+
+    success: bool = Field(..., description="Whether every recipient was paid.")
+    message: str = Field(..., description="Status message.")
+    transaction_id: Optional[ULID] = Field(None, description="ID of the split payment.")
+    legs: list[SplitPaymentLeg] = Field(default_factory=list, description="Outcome per recipient.")
+
+
+class UnsettledPayment(BaseModel):
+    """An outgoing payment queued for settlement reconciliation."""
+
+    id: AnyUrl = Field(..., description="The outgoing payment.")
+    wallet_address: AnyUrl = Field(..., description="Wallet address the payment is sent from.")
+    client: str = Field(..., description="Wallet address of the client the payment's grant was issued to.")
+    access_token: str = Field(..., description="Access token of the outgoing payment grant, with `read` access.")
+    manage_url: Optional[AnyUrl] = Field(None, description="Management URI of the access token, to rotate it.")
+    debit_amount: Amount = Field(..., description="Amount the payment debits, settled once it has all been sent.")
+    sent_amount: str = Field(default="0", description="`sentAmount` value when last checked.")
+    checks: int = Field(default=0, description="Checks since `sent_amount` last changed.")
+    created_at: datetime = Field(..., description="When the payment was queued.")
+    next_check_at: datetime = Field(..., description="When the payment is next due to be checked.")
+
+
 class PaymentStatusResponse(BaseModel):
     """Response for payment status queries."""
 
@@ -0,0 +1,120 @@
+"""Constructoken - Interledger Hackathon Prototype
+
+Run a payment flow as a small dependency graph of steps.
+
+Steps that do not depend on each other run concurrently: as tasks on the event loop for `arun`, and on a shared
+thread pool for the blocking `run`. Each step's duration is recorded in `timings`, and every Open Payments call a
+step makes is tagged with the step name in the SDK metrics.
+"""
+
+import asyncio
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any, Callable
+
+from app.open_payments_sdk.utils.metrics import flow_step
+
+logger = logging.getLogger(__name__)
+
+# Shared by every blocking flow in this process. Only independent steps are submitted, so it stays small.
+_executor: ThreadPoolExecutor | None = None
+
+
+def get_flow_executor() -> ThreadPoolExecutor:
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(max_workers=8, thread_name_prefix="payment-flow")
+    return _executor
+
+
+@dataclass
+class FlowStep:
+    """
+    A step in a payment flow. `run` is called with the result of each step in `requires`, by step name.
+    """
+
+    name: str
+    run: Callable[..., Any]
+    requires: tuple[str, ...] = ()
+
+
+@dataclass
+class FlowGraph:
+    """
+    A payment flow. Steps must be listed after the steps they require.
+    """
+
+    name: str
+    steps: list[FlowStep]
+    timings: dict[str, float] = field(default_factory=dict)
+
+    def __post_init__(self):
+        seen = set()
+        for step in self.steps:
+            missing = set(step.requires) - seen
+            if missing:
+                raise ValueError(f"Step `{step.name}` requires unknown or later steps: {sorted(missing)}")
+            seen.add(step.name)
+
+    def _log_timings(self, started: float) -> None:
+        self.timings["total"] = time.perf_counter() - started
+        logger.info(
+            f"{self.name} flow timings: "
+            + ", ".join(f"{name}={duration * 1000:.0f}ms" for name, duration in self.timings.items())
+        )
+
+    def _run_step(self, step: FlowStep, results: dict) -> Any:
+        started = time.perf_counter()
+        try:
+            with flow_step(step.name):
+                return step.run(**{name: results[name] for name in step.requires})
+        finally:
+            self.timings[step.name] = time.perf_counter() - started
+
+    def run(self) -> dict[str, Any]:
+        """
+        Run the flow, blocking. Returns the result of every step, by step name.
+        """
+        started = time.perf_counter()
+        results: dict[str, Any] = {}
+        pending = list(self.steps)
+        while pending:
+            ready = [step for step in pending if all(name in results for name in step.requires)]
+            if len(ready) == 1:
+                results[ready[0].name] = self._run_step(ready[0], results)
+            else:
+                futures = {step.name: get_flow_executor().submit(self._run_step, step, results) for step in ready}
+                for name, future in futures.items():
+                    results[name] = future.result()
+            pending = [step for step in pending if step.name not in results]
+        self._log_timings(started)
+        return results
+
+    async def arun(self) -> dict[str, Any]:
+        """
+        Run the flow. `run` callables must return awaitables. Returns the result of every step, by step name.
+        """
+        started = time.perf_counter()
+        tasks: dict[str, asyncio.Task] = {}
+
+        async def run_step(step: FlowStep) -> Any:
+            requires = {name: await tasks[name] for name in step.requires}
+            step_started = time.perf_counter()
+            try:
+                with flow_step(step.name):
+                    return await step.run(**requires)
+            finally:
+                self.timings[step.name] = time.perf_counter() - step_started
+
+        # A failing step cancels the rest of the flow. Its exception is raised as is, as from `run`, rather than in
+        # the group's ExceptionGroup, so that callers can handle it by type
+        try:
+            async with asyncio.TaskGroup() as group:
+                for step in self.steps:
+                    tasks[step.name] = group.create_task(run_step(step))
+        except ExceptionGroup as e:
+            raise e.exceptions[0] from None
+        self._log_timings(started)
+        return {name: task.result() for name, task in tasks.items()}
@@ -0,0 +1,211 @@
+"""Constructoken - Interledger Hackathon Prototype
+
+`Idempotency-Key` support for payment endpoints that move money.
+
+The first response for a key is stored for `IDEMPOTENCY_TTL` seconds and replayed to every repeat of the request,
+so a client retrying on timeout never creates a second outgoing payment. While the first request is in flight the
+key is locked: duplicates wait up to `IDEMPOTENCY_WAIT` seconds for its response, then get `409 Conflict`.
+
+Successful responses and client errors (4xx) are stored. Server errors and `409 Conflict` (the payment is being
+completed by another request, or cannot be completed yet) are not, so the request can be retried.
+Reusing a key with different request parameters is rejected with `422 Unprocessable Entity`.
+"""
+
+import asyncio
+import hashlib
+import json
+import threading
+import time
+from abc import ABC, abstractmethod
+from typing import Awaitable, Callable, Optional
+
+from fastapi import HTTPException, status
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+
+from app.core.config import settings
+from app.db.cache import get_async_redis
+
+REPLAYED_HEADER = "Idempotent-Replayed"
+
+
+class IdempotencyStore(ABC):
+    """
+    Stored responses and in-flight locks, by idempotency key.
+    """
+
+    def __init__(self, *, ttl: int = None, lock_ttl: int = None, wait: float = None):
+        self.ttl = ttl or settings.IDEMPOTENCY_TTL
+        self.lock_ttl = lock_ttl or settings.IDEMPOTENCY_LOCK_TTL
+        self.wait = settings.IDEMPOTENCY_WAIT if wait is None else wait
+
+    @abstractmethod
+    async def aget(self, key: str) -> Optional[dict]: ...
+
+    @abstractmethod
+    async def aacquire(self, key: str) -> bool:
+        """Lock the key for `lock_ttl` seconds. Only one caller gets True until the lock is released or expires."""
+
+    @abstractmethod
+    async def asave(self, key: str, record: dict) -> None:
+        """Store the response for `ttl` seconds and release the lock."""
+
+    @abstractmethod
+    async def arelease(self, key: str) -> None: ...
+
+    def get_fingerprint(self, **params) -> str:
+        return hashlib.sha256(json.dumps(jsonable_encoder(params), sort_keys=True).encode("utf-8")).hexdigest()
+
+    def _replay(self, record: dict, fingerprint: str) -> JSONResponse:
+        if record["fingerprint"] != fingerprint:
+            raise HTTPException(
+                status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                detail="Idempotency-Key was already used with different request parameters.",
+            )
+        return JSONResponse(
+            status_code=record["status_code"], content=record["body"], headers={REPLAYED_HEADER: "true"}
+        )
+
+    async def _await_record(self, key: str) -> Optional[dict]:
+        deadline = time.monotonic() + self.wait
+        delay = 0.05
+        while time.monotonic() < deadline:
+            await asyncio.sleep(delay)
+            record = await self.aget(key)
+            if record:
+                return record
+            delay = min(delay * 2, 0.5)
+        return None
+
+    async def arun(
+        self,
+        *,
+        scope: str,
+        key: Optional[str],
+        params: dict,
+        call: Callable[[], Awaitable[BaseModel]],
+    ) -> BaseModel | JSONResponse:
+        """
+        Run `call` once per `key` within `scope`, replaying its response to repeats. Without a key, just run it.
+        """
+        if not key:
+            return await call()
+        key = f"{scope}:{key}"
+        fingerprint = self.get_fingerprint(**params)
+        record = await self.aget(key)
+        if record:
+            return self._replay(record, fingerprint)
+        if not await self.aacquire(key):
+            # Another request with this key is in flight
+            record = await self._await_record(key)
+            if record:
+                return self._replay(record, fingerprint)
+            if not await self.aacquire(key):
+                raise HTTPException(
+                    status_code=status.HTTP_409_CONFLICT,
+                    detail="A request with this Idempotency-Key is still in progress.",
+                )
+        try:
+            # The response may have been stored between the first lookup and acquiring the lock
+            record = await self.aget(key)
+            if record:
+                await self.arelease(key)
+                return self._replay(record, fingerprint)
+            response = await call()
+        except HTTPException as e:
+            if e.status_code < 500 and e.status_code != status.HTTP_409_CONFLICT:
+                await self.asave(
+                    key, {"fingerprint": fingerprint, "status_code": e.status_code, "body": {"detail": e.detail}}
+                )
+            else:
+                await self.arelease(key)
+            raise
+        except BaseException:
+            await self.arelease(key)
+            raise
+        await self.asave(
+            key, {"fingerprint": fingerprint, "status_code": status.HTTP_200_OK, "body": jsonable_encoder(response)}
+        )
+        return response
+
+
+class RedisIdempotencyStore(IdempotencyStore):
+    """
+    Redis idempotency store, shared by every worker. Locks are `SET NX` keys with a TTL, so a crashed request
+    releases its key after `lock_ttl` seconds.
+    """
+
+    def __init__(self, *, async_redis=None, prefix: str = "idempotency", **kwargs):
+        super().__init__(**kwargs)
+        self.async_redis = async_redis or get_async_redis()
+        self.prefix = prefix
+
+    def _record_key(self, key: str) -> str:
+        return f"{self.prefix}:{key}"
+
+    def _lock_key(self, key: str) -> str:
+        return f"{self.prefix}-lock:{key}"
+
+    async def aget(self, key: str) -> Optional[dict]:
+        data = await self.async_redis.get(self._record_key(key))
+        return json.loads(data) if data else None
+
+    async def aacquire(self, key: str) -> bool:
+        return bool(await self.async_redis.set(self._lock_key(key), 1, nx=True, ex=self.lock_ttl))
+
+    async def asave(self, key: str, record: dict) -> None:
+        pipeline = self.async_redis.pipeline()
+        pipeline.set(self._record_key(key), json.dumps(record), ex=self.ttl)
+        pipeline.delete(self._lock_key(key))
+        await pipeline.execute()
+
+    async def arelease(self, key: str) -> None:
+        await self.async_redis.delete(self._lock_key(key))
+
+
+class MemoryIdempotencyStore(IdempotencyStore):
+    """
+    Process-local idempotency store, for development.
+    """
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.records: dict[str, tuple[float, dict]] = {}
+        self.locks: dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    async def aget(self, key: str) -> Optional[dict]:
+        with self._lock:
+            expires_at, record = self.records.get(key, (0, None))
+            return record if expires_at > time.time() else None
+
+    async def aacquire(self, key: str) -> bool:
+        with self._lock:
+            if self.locks.get(key, 0) > time.time():
+                return False
+            self.locks[key] = time.time() + self.lock_ttl
+            return True
+
+    async def asave(self, key: str, record: dict) -> None:
+        with self._lock:
+            self.records[key] = (time.time() + self.ttl, record)
+            self.locks.pop(key, None)
+
+    async def arelease(self, key: str) -> None:
+        with self._lock:
+            self.locks.pop(key, None)
+
+
+_idempotency_store: IdempotencyStore | None = None
+
+
+def get_idempotency_store() -> IdempotencyStore:
+    """Get the process-wide idempotency store, kept alongside the payment state (`OPEN_PAYMENTS_STATE_STORE`)."""
+    global _idempotency_store
+    if _idempotency_store is None:
+        if settings.OPEN_PAYMENTS_STATE_STORE == "memory":
+            _idempotency_store = MemoryIdempotencyStore()
+        else:
+            _idempotency_store = RedisIdempotencyStore()
+    return _idempotency_store
@@ -2,16 +2,27 @@
 
 Open Payments service implementing recurring and one-time payment flows.
 Based on hop-sauna's OpenPaymentsProcessor logic.
+
+Every flow is available both as a blocking method and as an awaitable `a`-prefixed method (e.g.
+`get_purchase_endpoint` / `aget_purchase_endpoint`). Both share the same request building and signing.
 """
 
-from typing import Dict, Optional
+import asyncio
+import logging
+from contextlib import contextmanager
+from datetime import datetime, timedelta, timezone
+from typing import Awaitable, Callable, Dict, Optional, TypeVar
+from httpx import HTTPStatusError
 from ulid import ULID
 from pydantic import AnyUrl
 
-from app.open_payments_sdk.http import HttpClient
-from app.open_payments_sdk.client.client import OpenPaymentsClient
-from app.open_payments_sdk.api.auth import GrantRequest, Grant, InteractRef
+from app.open_payments_sdk.http import AsyncHttpClient, HttpClient
+from app.open_payments_sdk.client.client import AsyncOpenPaymentsClient, OpenPaymentsClient
+from app.open_payments_sdk.api.auth import GrantRequest, Grant, GrantContinueResponse, InteractRef
+from app.open_payments_sdk.models.auth import AccessToken, GrantResponse
 from app.open_payments_sdk.models.resource import (
+    Amount,
+    IncomingPayment,
     IncomingPaymentRequest,
     OutgoingPaymentRequest,
     OutgoingPayment,
@@ -19,18 +30,76 @@ from app.open_payments_sdk.models.resource import (
     QuoteRequest,
 )
 from app.open_payments_sdk.models.wallet import WalletAddress
+from app.open_payments_sdk.utils.cache import CachedAccessToken
+from app.open_payments_sdk.utils.metrics import flow_step
 
+from app import crud
 from app.core.config import settings
+from app.db.session import SessionLocal
+from app.models.openpayments.order import OpenOrder
+from app.models.openpayments.receipt import OpenReceipt
 from app.utilities.openpayments import paymentsparser
 from app.schemas.openpayments.open_payments import SellerOpenPaymentAccount, PendingIncomingPaymentTransaction
-from app.schemas.payments import RecurringPaymentGrant
-from app.utils.open_payments_client import create_http_client, get_migrante_wallet, get_finsus_wallet, get_merchant_wallet
+from app.schemas.openpayments.order import OpenOrderCreate
+from app.schemas.payments import (
+    PendingRecurringPaymentGrant,
+    PendingSplitPayment,
+    RecurringPaymentGrant,
+    UnsettledPayment,
+)
+from app.services.flow import FlowGraph, FlowStep
+from app.services.payment_executor import get_payment_executor
+from app.services.payment_store import PaymentStore, get_payment_store
+from app.utils.open_payments_client import (
+    create_async_op_client,
+    create_op_client,
+    get_access_token_cache,
+    get_async_op_client,
+    get_op_client,
+    get_seller_account,
+    get_migrante_wallet,
+    get_finsus_wallet,
+    get_merchant_wallet,
+)
+
+logger = logging.getLogger(__name__)
+T = TypeVar("T")
+
+
+class PaymentConflict(Exception):
+    """
+    The callback cannot complete the payment now, but a retry of it may: another request is completing it, or the
+    rate moved past the authorized debit limit. Its pending state is kept.
+    """
+
+
+class PaymentOutcomeUnknown(Exception):
+    """
+    An outgoing payment was sent, but whether it was created is unknown: no response came back, the resource server
+    failed (5xx), or it was created but could not be recorded. It must not be sent again.
+    """
+
+
+@contextmanager
+def sending_payment(description: str):
+    """
+    Raise failures of sending and recording an outgoing payment as `PaymentOutcomeUnknown`. Only a 4xx rejection
+    proves that the payment was not created, and is raised as it is.
+    """
+    try:
+        yield
+    except HTTPStatusError as e:
+        if e.response.status_code < 500:
+            raise
+        raise PaymentOutcomeUnknown(f"{description}: {e}") from e
+    except Exception as e:
+        raise PaymentOutcomeUnknown(f"{description}: {e}") from e
 
 
-# In-memory storage for the hackathon prototype (replace with database in production)
-pending_recurring_grants: Dict[str, Dict] = {}
-active_recurring_grants: Dict[str, RecurringPaymentGrant] = {}
-pending_purchase_transactions: Dict[str, PendingIncomingPaymentTransaction] = {}
+def get_access_token(grant: Grant) -> Optional[str]:
+    """Extract the access token value from a non-interactive grant response."""
+    grant_dict = grant.model_dump(exclude_unset=True, mode="json")
+    return grant_dict.get("access_token", {}).get("value")
 
 
 class OpenPaymentsService:
@@ -39,6 +108,9 @@ class OpenPaymentsService:
 
     Implements both recurring payments (Fase I) and one-time purchases (Fase II).
     Based on hop-sauna's OpenPaymentsProcessor architecture.
+
+    From async code, build the service with `OpenPaymentsService.acreate`, which resolves both wallet addresses
+    without blocking the event loop. The constructor resolves any wallet not passed in with blocking calls.
     """
 
     def __init__(
@@ -47,33 +119,74 @@ class OpenPaymentsService:
         seller: SellerOpenPaymentAccount,
         buyer: str,
         http_client: HttpClient = None,
+        async_http_client: AsyncHttpClient = None,
         redirect_uri: str = settings.DEFAULT_REDIRECT_AFTER_AUTH,
+        seller_wallet: WalletAddress = None,
+        buyer_wallet: WalletAddress = None,
+        store: PaymentStore = None,
     ) -> None:
-        if not http_client:
-            http_client = create_http_client()
-
+        # Clients come from the process-wide registry unless a dedicated HTTP client is passed in
         self.http_client = http_client
+        self.async_http_client = async_http_client
+        self.token_cache = get_access_token_cache()
+        self.store = store or get_payment_store()
         self.seller = seller
         self.buyer = paymentsparser.normalise_wallet_address(wallet_address=buyer)
 
-        self.client = OpenPaymentsClient(
-            keyid=self.seller.keyId,
-            private_key=self.seller.privateKey,
-            client_wallet_address=self.seller.walletAddressUrl,
-            http_client=self.http_client,
-        )
+        self.client = self._op_client(account=self.seller)
+        self.async_client = self._async_op_client(account=self.seller)
 
-        self.seller_wallet = self.client.wallet.get_wallet_address(self.seller.walletAddressUrl)
-        self.buyer_wallet = self.client.wallet.get_wallet_address(self.buyer)
+        self.seller_wallet = seller_wallet or self.client.wallet.get_wallet_address(self.seller.walletAddressUrl)
+        self.buyer_wallet = buyer_wallet or self.client.wallet.get_wallet_address(self.buyer)
         self.redirect_uri = redirect_uri
+        # Per-step durations of the last flow run by this service, in seconds
+        self.flow_timings: dict[str, float] = {}
+
+    @classmethod
+    async def acreate(
+        cls,
+        *,
+        seller: SellerOpenPaymentAccount,
+        buyer: str,
+        http_client: HttpClient = None,
+        async_http_client: AsyncHttpClient = None,
+        redirect_uri: str = settings.DEFAULT_REDIRECT_AFTER_AUTH,
+        store: PaymentStore = None,
+    ) -> "OpenPaymentsService":
+        """Create the service, resolving the seller and buyer wallet addresses concurrently."""
+        buyer = paymentsparser.normalise_wallet_address(wallet_address=buyer)
+        if async_http_client:
+            client = create_async_op_client(
+                wallet_address=seller.walletAddressUrl,
+                key_id=seller.keyId,
+                private_key=seller.privateKey,
+                http_client=async_http_client,
+            )
+        else:
+            client = get_async_op_client(
+                wallet_address=seller.walletAddressUrl, key_id=seller.keyId, private_key=seller.privateKey
+            )
+        seller_wallet, buyer_wallet = await asyncio.gather(
+            client.wallet.get_wallet_address(seller.walletAddressUrl),
+            client.wallet.get_wallet_address(buyer),
+        )
+        return cls(
+            seller=seller,
+            buyer=buyer,
+            http_client=http_client,
+            async_http_client=async_http_client,
+            redirect_uri=redirect_uri,
+            seller_wallet=seller_wallet,
+            buyer_wallet=buyer_wallet,
+            store=store,
+        )
 
     ###################################################################################################
-    # GENERAL GRANT UTILITY
+    # REQUEST BUILDERS - shared by the blocking and awaitable flows
     ###################################################################################################
 
-    def request_grant(self, *, grant: str, actions: list[str], endpoint: AnyUrl) -> Grant:
-        """Request a grant from the authorization server."""
-        request = GrantRequest(
+    def _access_grant_request(self, *, grant: str, actions: list[str], client: str) -> GrantRequest:
+        return GrantRequest(
             **{
                 "access_token": {
                     "access": [
@@ -83,95 +196,127 @@ class OpenPaymentsService:
                         }
                     ]
                 },
-                "client": str(self.seller_wallet.id),
+                "client": client,
             }
         )
-        return self.client.grants.post_grant_request(grant_request=request, auth_server_endpoint=str(endpoint))
-
-    ###################################################################################################
-    # SELLER INCOMING PAYMENT PROCESS
-    ###################################################################################################
-
-    def request_incoming_payment(self, *, amount: int | str):
-        """Request an incoming payment to the seller."""
-        if isinstance(amount, int):
-            amount = str(amount)
-
-        # Request a grant
-        grant = self.request_grant(
-            grant="incoming-payment",
-            actions=["create", "read", "read-all", "complete", "list"],
-            endpoint=self.seller_wallet.authServer,
-        )
-        grant_dict = grant.model_dump(exclude_unset=True, mode="json")
-        access_token = grant_dict.get("access_token", {}).get("value")
 
-        # Request an incoming payment
-        payment = IncomingPaymentRequest(
+    def _incoming_payment_request(
+        self, *, amount: str, wallet: WalletAddress, expires_at: datetime = None
+    ) -> IncomingPaymentRequest:
+        return IncomingPaymentRequest(
             **dict(
-                walletAddress=str(self.seller_wallet.id),
+                walletAddress=str(wallet.id),
                 incomingAmount=dict(
                     value=amount,
-                    assetCode=self.seller_wallet.assetCode.root,
-                    assetScale=self.seller_wallet.assetScale.root,
+                    assetCode=wallet.assetCode.root,
+                    assetScale=wallet.assetScale.root,
                 ),
+                **({"expiresAt": expires_at} if expires_at else {}),
             )
         )
-        return self.client.incoming_payments.post_create_payment(
-            payment=payment, resource_server_endpoint=str(self.seller_wallet.resourceServer), access_token=access_token
+
+    def _quote_request(self, *, incoming_payment_id: str | AnyUrl, wallet: WalletAddress) -> QuoteRequest:
+        return QuoteRequest(
+            **dict(
+                walletAddress=str(wallet.id),
+                receiver=str(incoming_payment_id),
+                method="ilp",
+            )
         )
 
-    ###################################################################################################
-    # BUYER QUOTE REQUEST PROCESS
-    ###################################################################################################
+    def _outgoing_payment_request(self, *, wallet_id: str | AnyUrl, quote_id: str | AnyUrl) -> OutgoingPaymentRequest:
+        return OutgoingPaymentRequest(**dict(walletAddress=str(wallet_id), quoteId=quote_id, metadata={}))
 
-    def request_quote(self, *, incoming_payment_id: str | AnyUrl) -> Quote:
-        """Request a quote from the buyer's wallet."""
-        # Request a grant
-        grant = self.request_grant(
-            grant="quote", actions=["create", "read", "read-all"], endpoint=self.buyer_wallet.authServer
+    def _new_pending_transaction(self) -> tuple[PendingIncomingPaymentTransaction, str]:
+        pending_payment = PendingIncomingPaymentTransaction(
+            **{"id": ULID(), "seller": self.seller_wallet, "buyer": self.buyer_wallet}
         )
-        grant_dict = grant.model_dump(exclude_unset=True, mode="json")
-        access_token = grant_dict.get("access_token", {}).get("value")
+        return pending_payment, f"{self.redirect_uri}{pending_payment.id}"
 
-        # Request a quote for the payment
-        quote = QuoteRequest(
+    def _interactive_grant_request(
+        self,
+        *,
+        debit_amount: Amount,
+        pending_payment: PendingIncomingPaymentTransaction | PendingSplitPayment,
+        redirect_uri: str,
+    ) -> GrantRequest:
+        return GrantRequest(
             **dict(
-                walletAddress=str(self.buyer_wallet.id),
-                receiver=str(incoming_payment_id),
-                method="ilp",
+                access_token=dict(
+                    access=[
+                        dict(
+                            identifier=str(self.buyer_wallet.id),
+                            type="outgoing-payment",
+                            actions=["create", "read", "read-all", "list", "list-all"],
+                            limits=dict(
+                                debitAmount=dict(
+                                    assetCode=debit_amount.assetCode.root,
+                                    assetScale=debit_amount.assetScale.root,
+                                    value=debit_amount.value,
+                                ),
+                            ),
+                        ),
+                    ],
+                ),
+                client=str(self.seller_wallet.id),
+                interact=dict(
+                    start=["redirect"],
+                    finish=dict(
+                        method="redirect",
+                        uri=redirect_uri,
+                        nonce=str(pending_payment.id),
+                    ),
+                ),
             )
         )
-        return self.client.quotes.post_create_quote(
-            quote=quote, resource_server_endpoint=str(self.buyer_wallet.resourceServer), access_token=access_token
-        )
 
-    ###################################################################################################
-    # FASE I: RECURRING PAYMENTS
-    ###################################################################################################
+    def _set_interaction(
+        self, *, pending_payment: PendingIncomingPaymentTransaction, interactive_response: Grant
+    ) -> PendingIncomingPaymentTransaction:
+        pending_payment.interactive_redirect = interactive_response.root.interact.redirect
+        pending_payment.finish_id = interactive_response.root.interact.finish
+        pending_payment.continue_id = interactive_response.root.cont.access_token.value
+        pending_payment.continue_url = interactive_response.root.cont.uri
+        return pending_payment
 
-    def start_recurring_grant_flow(
-        self, *, debit_amount: str, total_cap: str, interval: str, max_payments: int, redirect_uri_base: str
-    ) -> tuple[str, ULID]:
-        """
-        Start the recurring payment grant flow (Fase I).
+    def _verify_transaction(
+        self,
+        *,
+        pending_payment: Optional[PendingIncomingPaymentTransaction],
+        transaction_id: ULID,
+        interact_ref: str,
+        received_hash: str,
+    ) -> PendingIncomingPaymentTransaction:
+        if not pending_payment:
+            raise ValueError(f"Transaction {transaction_id} not found in pending transactions")
 
-        Returns:
-            Tuple of (redirect_url, grant_id)
-        """
-        grant_id = ULID()
-        redirect_uri = f"{redirect_uri_base}{grant_id}"
+        # Validate the interactive response hash
+        if not paymentsparser.verify_response_hash(
+            incoming_payment_id=str(pending_payment.id),
+            finish_id=pending_payment.finish_id,
+            interact_ref=interact_ref,
+            auth_server_url=str(pending_payment.buyer.authServer),
+            received_hash=received_hash,
+        ):
+            raise ValueError(f"Hash invalid for pending payment `{pending_payment.incoming_payment_id}`")
+        return pending_payment
 
-        # Create client with buyer credentials to request grant on their wallet
-        buyer_client = OpenPaymentsClient(
-            keyid=settings.MIGRANTE_KEY_ID,
-            private_key=settings.MIGRANTE_PRIVATE_KEY,
-            client_wallet_address=self.buyer,
-            http_client=self.http_client,
-        )
+    def _check_debit_limit(self, *, quote: Quote, pending_payment: PendingIncomingPaymentTransaction) -> Quote:
+        """
+        A quote taken on confirmation must fit the debit limit the user granted.
+        """
+        limit = pending_payment.quoted_amount
+        if limit and int(quote.debitAmount.value) > int(limit.value):
+            raise PaymentConflict(
+                f"The rate moved: {quote.debitAmount.value} {quote.debitAmount.assetCode.root} exceeds the "
+                f"authorized {limit.value} {limit.assetCode.root}. Retry to quote again, or start a new payment"
+            )
+        return quote
 
-        # Request an interactive grant with limits for recurring payments
-        grant_request = GrantRequest(
+    def _recurring_grant_request(
+        self, *, grant_id: ULID, debit_amount: str, total_cap: str, interval: str, redirect_uri: str
+    ) -> GrantRequest:
+        return GrantRequest(
             **dict(
                 access_token=dict(
                     access=[
@@ -206,147 +351,88 @@ class OpenPaymentsService:
             )
         )
 
-        # Request the interactive endpoint using buyer's client
-        interactive_response = buyer_client.grants.post_grant_request(
-            grant_request=grant_request, auth_server_endpoint=str(self.buyer_wallet.authServer)
+    def _pending_recurring_grant(
+        self,
+        *,
+        grant_id: ULID,
+        debit_amount: str,
+        total_cap: str,
+        interval: str,
+        max_payments: int,
+        interactive_response: Grant,
+    ) -> PendingRecurringPaymentGrant:
+        return PendingRecurringPaymentGrant(
+            grant_id=grant_id,
+            sender_wallet=self.buyer,
+            receiver_wallet=self.seller.walletAddressUrl,
+            debit_amount_value=debit_amount,
+            debit_amount_asset_code=self.buyer_wallet.assetCode.root,
+            debit_amount_asset_scale=self.buyer_wallet.assetScale.root,
+            total_amount_cap=total_cap,
+            interval=interval,
+            max_payments=max_payments,
+            finish_id=interactive_response.root.interact.finish,
+            continue_id=interactive_response.root.cont.access_token.value,
+            continue_uri=interactive_response.root.cont.uri,
+            auth_server_url=str(self.buyer_wallet.authServer),
         )
 
-        # Store pending grant data for callback
-        pending_recurring_grants[str(grant_id)] = {
-            "grant_id": grant_id,
-            "sender_wallet": self.buyer,
-            "receiver_wallet": self.seller.walletAddressUrl,
-            "debit_amount_value": debit_amount,
-            "debit_amount_asset_code": self.buyer_wallet.assetCode.root,
-            "debit_amount_asset_scale": self.buyer_wallet.assetScale.root,
-            "total_amount_cap": total_cap,
-            "interval": interval,
-            "max_payments": max_payments,
-            "finish_id": interactive_response.root.interact.finish,
-            "continue_id": interactive_response.root.cont.access_token.value,
-            "continue_uri": interactive_response.root.cont.uri,
-            "auth_server_url": str(self.buyer_wallet.authServer),
-        }
-
-        return interactive_response.root.interact.redirect, grant_id
-
-    def complete_recurring_grant_flow(self, *, grant_id: ULID, interact_ref: str, received_hash: str) -> bool:
-        """
-        Complete the recurring payment grant flow after user authorization.
-
-        Returns:
-            True if successful, raises exception otherwise
-        """
-        grant_id_str = str(grant_id)
-
-        if grant_id_str not in pending_recurring_grants:
+    def _verify_recurring_grant(
+        self,
+        *,
+        pending_grant: Optional[PendingRecurringPaymentGrant],
+        grant_id: ULID,
+        interact_ref: str,
+        received_hash: str,
+    ) -> PendingRecurringPaymentGrant:
+        if not pending_grant:
             raise ValueError(f"Grant {grant_id} not found in pending grants")
 
-        pending_data = pending_recurring_grants[grant_id_str]
-
         # Validate the hash
         if not paymentsparser.verify_response_hash(
-            incoming_payment_id=grant_id_str,
-            finish_id=pending_data["finish_id"],
+            incoming_payment_id=str(grant_id),
+            finish_id=pending_grant.finish_id,
             interact_ref=interact_ref,
-            auth_server_url=pending_data["auth_server_url"],
+            auth_server_url=pending_grant.auth_server_url,
             received_hash=received_hash,
         ):
             raise ValueError(f"Hash validation failed for grant {grant_id}")
+        return pending_grant
 
-        # Create buyer client for grant continuation
-        buyer_client = OpenPaymentsClient(
-            keyid=settings.MIGRANTE_KEY_ID,
-            private_key=settings.MIGRANTE_PRIVATE_KEY,
-            client_wallet_address=pending_data["sender_wallet"],
-            http_client=self.http_client,
-        )
-
-        # Request grant continuation
-        grant_continuation = buyer_client.grants.post_grant_continuation_request(
-            interact_ref=InteractRef(**dict(interact_ref=interact_ref)),
-            continue_uri=str(pending_data["continue_uri"]),
-            access_token=pending_data["continue_id"],
-        )
-
-        # Store the active grant
-        active_grant = RecurringPaymentGrant(
-            id=grant_id,
-            sender_wallet=pending_data["sender_wallet"],
-            receiver_wallet=pending_data["receiver_wallet"],
+    def _active_recurring_grant(
+        self, *, pending_grant: PendingRecurringPaymentGrant, grant_continuation: GrantContinueResponse
+    ) -> RecurringPaymentGrant:
+        return RecurringPaymentGrant(
+            id=pending_grant.grant_id,
             access_token=grant_continuation.access_token.value,
-            continue_uri=pending_data["continue_uri"],
-            debit_amount_value=pending_data["debit_amount_value"],
-            debit_amount_asset_code=pending_data["debit_amount_asset_code"],
-            debit_amount_asset_scale=pending_data["debit_amount_asset_scale"],
-            total_amount_cap=pending_data["total_amount_cap"],
-            interval=pending_data["interval"],
             payments_made=0,
-            max_payments=pending_data["max_payments"],
+            **pending_grant.model_dump(
+                include={
+                    "sender_wallet",
+                    "receiver_wallet",
+                    "continue_uri",
+                    "debit_amount_value",
+                    "debit_amount_asset_code",
+                    "debit_amount_asset_scale",
+                    "total_amount_cap",
+                    "interval",
+                    "max_payments",
+                }
+            ),
         )
 
-        active_recurring_grants[grant_id_str] = active_grant
-
-        # Clean up pending grant
-        del pending_recurring_grants[grant_id_str]
-
-        return True
-
-    def execute_recurring_payment(self, *, grant_id: ULID) -> Dict:
-        """
-        Execute a single recurring payment using an established grant.
-
-        Returns:
-            Dictionary with payment details
-        """
-        grant_id_str = str(grant_id)
-
-        if grant_id_str not in active_recurring_grants:
+    def _check_active_recurring_grant(
+        self, *, grant: Optional[RecurringPaymentGrant], grant_id: ULID
+    ) -> RecurringPaymentGrant:
+        if not grant:
             raise ValueError(f"Active grant {grant_id} not found")
 
-        grant = active_recurring_grants[grant_id_str]
-
         # Check if we've reached the max payments
         if grant.payments_made >= grant.max_payments:
             raise ValueError(f"Grant {grant_id} has reached maximum payments ({grant.max_payments})")
+        return grant
 
-        # Create an incoming payment on the receiver's wallet (FINSUS)
-        receiver_account = SellerOpenPaymentAccount(
-            walletAddressUrl=grant.receiver_wallet,
-            keyId=settings.FINSUS_KEY_ID,
-            privateKey=settings.FINSUS_PRIVATE_KEY,
-        )
-
-        receiver_client = OpenPaymentsClient(
-            keyid=receiver_account.keyId,
-            private_key=receiver_account.privateKey,
-            client_wallet_address=receiver_account.walletAddressUrl,
-            http_client=self.http_client,
-        )
-
-        receiver_wallet = receiver_client.wallet.get_wallet_address(receiver_account.walletAddressUrl)
-
-        # Request incoming payment grant
-        incoming_grant = receiver_client.grants.post_grant_request(
-            grant_request=GrantRequest(
-                **{
-                    "access_token": {
-                        "access": [
-                            {
-                                "type": "incoming-payment",
-                                "actions": ["create", "read"],
-                            }
-                        ]
-                    },
-                    "client": str(receiver_wallet.id),
-                }
-            ),
-            auth_server_endpoint=str(receiver_wallet.authServer),
-        )
-        incoming_grant_dict = incoming_grant.model_dump(exclude_unset=True, mode="json")
-        incoming_access_token = incoming_grant_dict.get("access_token", {}).get("value")
-
-        # Create incoming payment with fixed receiving amount
+    def _estimate_receive_amount(self, *, grant: RecurringPaymentGrant) -> str:
         # According to Open Payments recurring subscription pattern:
         # 1. Create incoming payment with the amount the receiver expects (in their currency)
         # 2. Create quote to determine how much sender will be debited
@@ -355,227 +441,698 @@ class OpenPaymentsService:
         # For cross-currency: USD -> MXN
         # Estimate exchange rate: ~20 MXN/USD
         # $10 USD (1000 cents) -> ~$200 MXN (20000 centavos)
-        estimated_receive_amount_mxn = str(int(grant.debit_amount_value) * 20)
-
-        incoming_payment = IncomingPaymentRequest(
-            walletAddress=str(receiver_wallet.id),
-            incomingAmount=dict(
-                value=estimated_receive_amount_mxn,
-                assetCode=receiver_wallet.assetCode.root,
-                assetScale=receiver_wallet.assetScale.root,
-            ),
-        )
-        incoming_payment_response = receiver_client.incoming_payments.post_create_payment(
-            payment=incoming_payment,
-            resource_server_endpoint=str(receiver_wallet.resourceServer),
-            access_token=incoming_access_token,
-        )
+        return str(int(grant.debit_amount_value) * 20)
 
-        # Request a quote from the sender's wallet
-        import logging
-        logger = logging.getLogger(__name__)
-        logger.error(f"[DEBUG] grant.sender_wallet: {grant.sender_wallet}")
-        logger.error(f"[DEBUG] grant.receiver_wallet: {grant.receiver_wallet}")
+    def _recurring_payment_result(
+        self,
+        *,
+        grant: RecurringPaymentGrant,
+        payments_made: int,
+        quote_response: Quote,
+        outgoing_payment: OutgoingPayment,
+    ) -> Dict:
+        grant.payments_made = payments_made
+        return {
+            "outgoing_payment_id": str(outgoing_payment.id),
+            "quote_debit_amount": f"{quote_response.debitAmount.value} {quote_response.debitAmount.assetCode}",
+            "quote_receive_amount": f"{quote_response.receiveAmount.value} {quote_response.receiveAmount.assetCode}",
+            "payments_made": grant.payments_made,
+            "payments_remaining": grant.max_payments - grant.payments_made,
+        }
 
-        sender_client = OpenPaymentsClient(
-            keyid=settings.MIGRANTE_KEY_ID,
-            private_key=settings.MIGRANTE_PRIVATE_KEY,
-            client_wallet_address=grant.sender_wallet,
-            http_client=self.http_client,
+    def _op_client(self, *, account: SellerOpenPaymentAccount) -> OpenPaymentsClient:
+        if self.http_client:
+            return create_op_client(
+                wallet_address=account.walletAddressUrl,
+                key_id=account.keyId,
+                private_key=account.privateKey,
+                http_client=self.http_client,
+            )
+        return get_op_client(
+            wallet_address=account.walletAddressUrl, key_id=account.keyId, private_key=account.privateKey
         )
 
-        sender_wallet = sender_client.wallet.get_wallet_address(grant.sender_wallet)
-        logger.error(f"[DEBUG] sender_wallet.id: {sender_wallet.id}")
-        logger.error(f"[DEBUG] sender_wallet.resourceServer: {sender_wallet.resourceServer}")
-
-        quote_grant = sender_client.grants.post_grant_request(
-            grant_request=GrantRequest(
-                **{
-                    "access_token": {
-                        "access": [
-                            {
-                                "type": "quote",
-                                "actions": ["create", "read"],
-                            }
-                        ]
-                    },
-                    "client": str(sender_wallet.id),
-                }
-            ),
-            auth_server_endpoint=str(sender_wallet.authServer),
+    def _async_op_client(self, *, account: SellerOpenPaymentAccount) -> AsyncOpenPaymentsClient:
+        if self.async_http_client:
+            return create_async_op_client(
+                wallet_address=account.walletAddressUrl,
+                key_id=account.keyId,
+                private_key=account.privateKey,
+                http_client=self.async_http_client,
+            )
+        return get_async_op_client(
+            wallet_address=account.walletAddressUrl, key_id=account.keyId, private_key=account.privateKey
         )
-        quote_grant_dict = quote_grant.model_dump(exclude_unset=True, mode="json")
-        quote_access_token = quote_grant_dict.get("access_token", {}).get("value")
 
-        quote_request = QuoteRequest(
-            **dict(
-                walletAddress=str(sender_wallet.id),
-                receiver=str(incoming_payment_response.id),
-                method="ilp",
-            )
+    def _sender_account(self, *, wallet_address: str) -> SellerOpenPaymentAccount:
+        return get_seller_account(
+            wallet_address=wallet_address,
+            key_id=settings.MIGRANTE_KEY_ID,
+            private_key=settings.MIGRANTE_PRIVATE_KEY,
         )
-        quote_response = sender_client.quotes.post_create_quote(
-            quote=quote_request, resource_server_endpoint=str(sender_wallet.resourceServer), access_token=quote_access_token
+
+    def _sender_client(self, *, wallet_address: str) -> OpenPaymentsClient:
+        return self._op_client(account=self._sender_account(wallet_address=wallet_address))
+
+    def _async_sender_client(self, *, wallet_address: str) -> AsyncOpenPaymentsClient:
+        return self._async_op_client(account=self._sender_account(wallet_address=wallet_address))
+
+    def _receiver_account(self, *, wallet_address: str) -> SellerOpenPaymentAccount:
+        return get_seller_account(
+            wallet_address=wallet_address,
+            key_id=settings.FINSUS_KEY_ID,
+            private_key=settings.FINSUS_PRIVATE_KEY,
         )
 
-        # Create outgoing payment using the recurring grant token
-        outgoing_payment_request = OutgoingPaymentRequest(
-            **dict(walletAddress=str(sender_wallet.id), quoteId=quote_response.id, metadata={})
+    ###################################################################################################
+    # GENERAL GRANT UTILITY
+    ###################################################################################################
+
+    def request_grant(self, *, grant: str, actions: list[str], endpoint: AnyUrl) -> Grant:
+        """Request a grant from the authorization server."""
+        request = self._access_grant_request(grant=grant, actions=actions, client=str(self.seller_wallet.id))
+        return self.client.grants.post_grant_request(grant_request=request, auth_server_endpoint=str(endpoint))
+
+    async def arequest_grant(self, *, grant: str, actions: list[str], endpoint: AnyUrl) -> Grant:
+        """Request a grant from the authorization server."""
+        request = self._access_grant_request(grant=grant, actions=actions, client=str(self.seller_wallet.id))
+        return await self.async_client.grants.post_grant_request(
+            grant_request=request, auth_server_endpoint=str(endpoint)
         )
-        outgoing_payment = sender_client.outgoing_payments.post_create_payment(
-            payment=outgoing_payment_request,
-            resource_server_endpoint=str(sender_wallet.resourceServer),
-            access_token=grant.access_token,
+
+    # Non-interactive grant tokens are cached per (client wallet, auth server, grant type, actions). A cached token
+    # is rotated shortly before it expires, and replaced by a new grant if rotation fails or the resource server
+    # rejects it with a 401.
+
+    def _rotation_params(self, *, token: CachedAccessToken) -> dict:
+        auth_server_endpoint, _, token_id = token.manage.rpartition("/token/")
+        return dict(token_id=token_id, auth_server_endpoint=auth_server_endpoint, access_token=token.value)
+
+    def _granted_access_token(self, *, grant: Grant, grant_type: str):
+        if not isinstance(grant.root, GrantResponse):
+            raise ValueError(f"Grant for `{grant_type}` requires interaction and cannot be cached")
+        return grant.root.access_token
+
+    def _get_grant_token(
+        self, *, client: OpenPaymentsClient, client_id: str, grant: str, actions: list[str], endpoint: AnyUrl
+    ) -> str:
+        key = self.token_cache.get_key(client_id, endpoint, grant, actions)
+        token = self.token_cache.get(key)
+        if token and not token.needs_rotation(self.token_cache.rotation_margin):
+            return token.value
+        with self.token_cache.lock(key):
+            token = self.token_cache.get(key)
+            if token and not token.needs_rotation(self.token_cache.rotation_margin):
+                return token.value
+            if token:
+                try:
+                    rotated = client.access_tokens.post_rotate_access_token(**self._rotation_params(token=token))
+                    return self.token_cache.set(key, rotated).value
+                except HTTPStatusError as exc:
+                    logger.info(f"Rotating `{grant}` token failed ({exc.response.status_code}), requesting a new grant")
+            response = client.grants.post_grant_request(
+                grant_request=self._access_grant_request(grant=grant, actions=actions, client=client_id),
+                auth_server_endpoint=str(endpoint),
+            )
+            return self.token_cache.set(key, self._granted_access_token(grant=response, grant_type=grant)).value
+
+    async def _aget_grant_token(
+        self, *, client: AsyncOpenPaymentsClient, client_id: str, grant: str, actions: list[str], endpoint: AnyUrl
+    ) -> str:
+        key = self.token_cache.get_key(client_id, endpoint, grant, actions)
+        token = self.token_cache.get(key)
+        if token and not token.needs_rotation(self.token_cache.rotation_margin):
+            return token.value
+        async with self.token_cache.alock(key):
+            token = self.token_cache.get(key)
+            if token and not token.needs_rotation(self.token_cache.rotation_margin):
+                return token.value
+            if token:
+                try:
+                    rotated = await client.access_tokens.post_rotate_access_token(
+                        **self._rotation_params(token=token)
+                    )
+                    return self.token_cache.set(key, rotated).value
+                except HTTPStatusError as exc:
+                    logger.info(f"Rotating `{grant}` token failed ({exc.response.status_code}), requesting a new grant")
+            response = await client.grants.post_grant_request(
+                grant_request=self._access_grant_request(grant=grant, actions=actions, client=client_id),
+                auth_server_endpoint=str(endpoint),
+            )
+            return self.token_cache.set(key, self._granted_access_token(grant=response, grant_type=grant)).value
+
+    def _incoming_payment_grant(self) -> dict:
+        return dict(
+            client_id=str(self.seller_wallet.id),
+            grant="incoming-payment",
+            actions=["create", "read", "read-all", "complete", "list"],
+            endpoint=self.seller_wallet.authServer,
         )
 
-        # Update payments made counter
-        grant.payments_made += 1
-        active_recurring_grants[grant_id_str] = grant
+    def _quote_grant(self) -> dict:
+        return dict(
+            client_id=str(self.seller_wallet.id),
+            grant="quote",
+            actions=["create", "read", "read-all"],
+            endpoint=self.buyer_wallet.authServer,
+        )
 
-        return {
-            "outgoing_payment_id": str(outgoing_payment.id),
-            "quote_debit_amount": f"{quote_response.debitAmount.value} {quote_response.debitAmount.assetCode}",
-            "quote_receive_amount": f"{quote_response.receiveAmount.value} {quote_response.receiveAmount.assetCode}",
-            "payments_made": grant.payments_made,
-            "payments_remaining": grant.max_payments - grant.payments_made,
-        }
+    def _call_with_grant_token(
+        self,
+        *,
+        client: OpenPaymentsClient,
+        client_id: str,
+        grant: str,
+        actions: list[str],
+        endpoint: AnyUrl,
+        call: Callable[[str], T],
+    ) -> T:
+        """Call `call(access_token)` with a cached grant token, retrying once with a new grant on a 401."""
+        params = dict(client=client, client_id=client_id, grant=grant, actions=actions, endpoint=endpoint)
+        access_token = self._get_grant_token(**params)
+        try:
+            return call(access_token)
+        except HTTPStatusError as exc:
+            if exc.response.status_code != 401:
+                raise
+            self.token_cache.invalidate(self.token_cache.get_key(client_id, endpoint, grant, actions), access_token)
+            return call(self._get_grant_token(**params))
+
+    async def _acall_with_grant_token(
+        self,
+        *,
+        client: AsyncOpenPaymentsClient,
+        client_id: str,
+        grant: str,
+        actions: list[str],
+        endpoint: AnyUrl,
+        call: Callable[[str], Awaitable[T]],
+    ) -> T:
+        """Awaitable `_call_with_grant_token`."""
+        params = dict(client=client, client_id=client_id, grant=grant, actions=actions, endpoint=endpoint)
+        access_token = await self._aget_grant_token(**params)
+        try:
+            return await call(access_token)
+        except HTTPStatusError as exc:
+            if exc.response.status_code != 401:
+                raise
+            self.token_cache.invalidate(self.token_cache.get_key(client_id, endpoint, grant, actions), access_token)
+            return await call(await self._aget_grant_token(**params))
 
     ###################################################################################################
-    # FASE II: ONE-TIME PURCHASE
+    # SELLER INCOMING PAYMENT PROCESS
     ###################################################################################################
 
-    def get_purchase_endpoint(self, *, amount: int | str) -> tuple[str, PendingIncomingPaymentTransaction]:
-        """
-        Start the one-time purchase flow (Fase II).
+    def request_incoming_payment(self, *, amount: int | str):
+        """Request an incoming payment to the seller."""
+        if isinstance(amount, int):
+            amount = str(amount)
 
-        Implements the flow from hop-sauna's get_purchase_endpoint method.
+        # Request an incoming payment, with a cached or new grant
+        payment = self._incoming_payment_request(amount=amount, wallet=self.seller_wallet)
+        return self._call_with_grant_token(
+            client=self.client,
+            **self._incoming_payment_grant(),
+            call=lambda access_token: self.client.incoming_payments.post_create_payment(
+                payment=payment,
+                resource_server_endpoint=str(self.seller_wallet.resourceServer),
+                access_token=access_token,
+            ),
+        )
 
-        Returns:
-            Tuple of (redirect_url, pending_transaction)
-        """
+    async def arequest_incoming_payment(self, *, amount: int | str, expires_at: datetime = None):
+        """Request an incoming payment to the seller."""
         if isinstance(amount, int):
             amount = str(amount)
 
-        # Create pending transaction
-        pending_payment = PendingIncomingPaymentTransaction(
-            **{"id": ULID(), "seller": self.seller_wallet, "buyer": self.buyer_wallet}
+        payment = self._incoming_payment_request(amount=amount, wallet=self.seller_wallet, expires_at=expires_at)
+        return await self._acall_with_grant_token(
+            client=self.async_client,
+            **self._incoming_payment_grant(),
+            call=lambda access_token: self.async_client.incoming_payments.post_create_payment(
+                payment=payment,
+                resource_server_endpoint=str(self.seller_wallet.resourceServer),
+                access_token=access_token,
+            ),
         )
-        redirect_uri = f"{self.redirect_uri}{pending_payment.id}"
 
-        # 1. Request incoming payment grant for the seller (merchant)
-        incoming_payment_response = self.request_incoming_payment(amount=amount)
-        pending_payment.incoming_payment_id = incoming_payment_response.id
+    ###################################################################################################
+    # BUYER QUOTE REQUEST PROCESS
+    ###################################################################################################
 
-        # 2. Request quote grant for the buyer (FINSUS)
-        quote_response = self.request_quote(incoming_payment_id=incoming_payment_response.id)
-        pending_payment.quote_id = quote_response.id
+    def request_quote(self, *, incoming_payment_id: str | AnyUrl) -> Quote:
+        """Request a quote from the buyer's wallet."""
+        # Request a quote for the payment, with a cached or new grant
+        quote = self._quote_request(incoming_payment_id=incoming_payment_id, wallet=self.buyer_wallet)
+        return self._call_with_grant_token(
+            client=self.client,
+            **self._quote_grant(),
+            call=lambda access_token: self.client.quotes.post_create_quote(
+                quote=quote, resource_server_endpoint=str(self.buyer_wallet.resourceServer), access_token=access_token
+            ),
+        )
 
-        # 3. Request an interactive payment endpoint for the buyer
-        grant_request = GrantRequest(
-            **dict(
-                access_token=dict(
-                    access=[
-                        dict(
-                            identifier=str(self.buyer_wallet.id),
-                            type="outgoing-payment",
-                            actions=["create", "read", "read-all", "list", "list-all"],
-                            limits=dict(
-                                debitAmount=dict(
-                                    assetCode=quote_response.debitAmount.assetCode.root,
-                                    assetScale=quote_response.debitAmount.assetScale.root,
-                                    value=quote_response.debitAmount.value,
-                                ),
-                            ),
-                        ),
-                    ],
-                ),
-                client=str(self.seller_wallet.id),
-                interact=dict(
-                    start=["redirect"],
-                    finish=dict(
-                        method="redirect",
-                        uri=redirect_uri,
-                        nonce=str(pending_payment.id),
-                    ),
-                ),
+    async def arequest_quote(self, *, incoming_payment_id: str | AnyUrl) -> Quote:
+        """Request a quote from the buyer's wallet."""
+        quote = self._quote_request(incoming_payment_id=incoming_payment_id, wallet=self.buyer_wallet)
+        return await self._acall_with_grant_token(
+            client=self.async_client,
+            **self._quote_grant(),
+            call=lambda access_token: self.async_client.quotes.post_create_quote(
+                quote=quote, resource_server_endpoint=str(self.buyer_wallet.resourceServer), access_token=access_token
+            ),
+        )
+
+    ###################################################################################################
+    # FASE I: RECURRING PAYMENTS
+    ###################################################################################################
+
+    def start_recurring_grant_flow(
+        self, *, debit_amount: str, total_cap: str, interval: str, max_payments: int, redirect_uri_base: str
+    ) -> tuple[str, ULID]:
+        """
+        Start the recurring payment grant flow (Fase I).
+
+        Returns:
+            Tuple of (redirect_url, grant_id)
+        """
+        grant_id = ULID()
+        redirect_uri = f"{redirect_uri_base}{grant_id}"
+
+        # Create client with buyer credentials to request grant on their wallet
+        buyer_client = self._sender_client(wallet_address=self.buyer)
+
+        # Request an interactive grant with limits for recurring payments
+        grant_request = self._recurring_grant_request(
+            grant_id=grant_id,
+            debit_amount=debit_amount,
+            total_cap=total_cap,
+            interval=interval,
+            redirect_uri=redirect_uri,
+        )
+
+        # Request the interactive endpoint using buyer's client
+        with flow_step("interactive_grant"):
+            interactive_response = buyer_client.grants.post_grant_request(
+                grant_request=grant_request, auth_server_endpoint=str(self.buyer_wallet.authServer)
+            )
+
+        # Store pending grant data for callback
+        self.store.save_pending_recurring_grant(
+            grant=self._pending_recurring_grant(
+                grant_id=grant_id,
+                debit_amount=debit_amount,
+                total_cap=total_cap,
+                interval=interval,
+                max_payments=max_payments,
+                interactive_response=interactive_response,
             )
         )
 
-        # Request the interactive endpoint
-        interactive_response = self.client.grants.post_grant_request(
-            grant_request=grant_request, auth_server_endpoint=str(self.buyer_wallet.authServer)
+        return interactive_response.root.interact.redirect, grant_id
+
+    async def astart_recurring_grant_flow(
+        self, *, debit_amount: str, total_cap: str, interval: str, max_payments: int, redirect_uri_base: str
+    ) -> tuple[str, ULID]:
+        """
+        Start the recurring payment grant flow (Fase I).
+
+        Returns:
+            Tuple of (redirect_url, grant_id)
+        """
+        grant_id = ULID()
+        redirect_uri = f"{redirect_uri_base}{grant_id}"
+        buyer_client = self._async_sender_client(wallet_address=self.buyer)
+        grant_request = self._recurring_grant_request(
+            grant_id=grant_id,
+            debit_amount=debit_amount,
+            total_cap=total_cap,
+            interval=interval,
+            redirect_uri=redirect_uri,
+        )
+        with flow_step("interactive_grant"):
+            interactive_response = await buyer_client.grants.post_grant_request(
+                grant_request=grant_request, auth_server_endpoint=str(self.buyer_wallet.authServer)
+            )
+        await self.store.asave_pending_recurring_grant(
+            grant=self._pending_recurring_grant(
+                grant_id=grant_id,
+                debit_amount=debit_amount,
+                total_cap=total_cap,
+                interval=interval,
+                max_payments=max_payments,
+                interactive_response=interactive_response,
+            )
         )
+        return interactive_response.root.interact.redirect, grant_id
 
-        pending_payment.interactive_redirect = interactive_response.root.interact.redirect
-        pending_payment.finish_id = interactive_response.root.interact.finish
-        pending_payment.continue_id = interactive_response.root.cont.access_token.value
-        pending_payment.continue_url = interactive_response.root.cont.uri
+    def complete_recurring_grant_flow(self, *, grant_id: ULID, interact_ref: str, received_hash: str) -> bool:
+        """
+        Complete the recurring payment grant flow after user authorization.
 
-        # Store pending transaction
-        pending_purchase_transactions[str(pending_payment.id)] = pending_payment
+        Returns:
+            True if successful, raises exception otherwise
+        """
+        # Claim the pending grant before reading it, so that a repeated callback cannot continue it twice. Once the
+        # grant is active its pending state is gone, and its claim is left to expire.
+        if not self.store.claim_pending_recurring_grant(grant_id=str(grant_id)):
+            raise PaymentConflict(f"Grant {grant_id} is already being completed")
+        pending_grant = self.store.get_pending_recurring_grant(grant_id=str(grant_id))
+
+        try:
+            self._verify_recurring_grant(
+                pending_grant=pending_grant, grant_id=grant_id, interact_ref=interact_ref, received_hash=received_hash
+            )
 
-        return interactive_response.root.interact.redirect, pending_payment
+            # Create buyer client for grant continuation
+            buyer_client = self._sender_client(wallet_address=pending_grant.sender_wallet)
+
+            # Request grant continuation
+            with flow_step("continuation"):
+                grant_continuation = buyer_client.grants.post_grant_continuation_request(
+                    interact_ref=InteractRef(**dict(interact_ref=interact_ref)),
+                    continue_uri=str(pending_grant.continue_uri),
+                    access_token=pending_grant.continue_id,
+                )
+        except BaseException:
+            # Unlock the pending grant, so that the callback can be retried
+            if pending_grant is not None:
+                self.store.release_pending_recurring_grant(grant=pending_grant)
+            raise
 
-    def complete_payment(self, *, transaction_id: ULID, interact_ref: str, received_hash: str) -> OutgoingPayment:
+        # Store the active grant
+        self.store.save_active_recurring_grant(
+            grant=self._active_recurring_grant(pending_grant=pending_grant, grant_continuation=grant_continuation)
+        )
+        self.store.delete_pending_recurring_grant(grant_id=str(grant_id))
+
+        return True
+
+    async def acomplete_recurring_grant_flow(self, *, grant_id: ULID, interact_ref: str, received_hash: str) -> bool:
         """
-        Complete the one-time purchase after user authorization.
+        Complete the recurring payment grant flow after user authorization.
 
-        Implements the flow from hop-sauna's complete_payment method.
+        Returns:
+            True if successful, raises exception otherwise
+        """
+        if not await self.store.aclaim_pending_recurring_grant(grant_id=str(grant_id)):
+            raise PaymentConflict(f"Grant {grant_id} is already being completed")
+        pending_grant = await self.store.aget_pending_recurring_grant(grant_id=str(grant_id))
+        try:
+            self._verify_recurring_grant(
+                pending_grant=pending_grant, grant_id=grant_id, interact_ref=interact_ref, received_hash=received_hash
+            )
+            buyer_client = self._async_sender_client(wallet_address=pending_grant.sender_wallet)
+            with flow_step("continuation"):
+                grant_continuation = await buyer_client.grants.post_grant_continuation_request(
+                    interact_ref=InteractRef(**dict(interact_ref=interact_ref)),
+                    continue_uri=str(pending_grant.continue_uri),
+                    access_token=pending_grant.continue_id,
+                )
+        except BaseException:
+            if pending_grant is not None:
+                await self.store.arelease_pending_recurring_grant(grant=pending_grant)
+            raise
+        await self.store.asave_active_recurring_grant(
+            grant=self._active_recurring_grant(pending_grant=pending_grant, grant_continuation=grant_continuation)
+        )
+        await self.store.adelete_pending_recurring_grant(grant_id=str(grant_id))
+        return True
+
+    async def aget_sender_auth_server(self, *, wallet_address: str) -> str:
+        """
+        Auth server of a recurring payment's sender wallet, from the wallet cache.
+        """
+        sender_client = self._async_sender_client(wallet_address=wallet_address)
+        sender_wallet = await sender_client.wallet.get_wallet_address(wallet_address)
+        return str(sender_wallet.authServer)
+
+    def execute_recurring_payment(self, *, grant_id: ULID) -> Dict:
+        """
+        Execute a single recurring payment using an established grant.
 
         Returns:
-            OutgoingPayment object
+            Dictionary with payment details
         """
-        transaction_id_str = str(transaction_id)
+        grant = self._check_active_recurring_grant(
+            grant=self.store.get_active_recurring_grant(grant_id=str(grant_id)), grant_id=grant_id
+        )
 
-        if transaction_id_str not in pending_purchase_transactions:
-            raise ValueError(f"Transaction {transaction_id} not found in pending transactions")
+        # Create an incoming payment on the receiver's wallet (FINSUS)
+        receiver_account = self._receiver_account(wallet_address=grant.receiver_wallet)
 
-        pending_payment = pending_purchase_transactions[transaction_id_str]
+        receiver_client = self._op_client(account=receiver_account)
 
-        # Validate the interactive response hash
-        if not paymentsparser.verify_response_hash(
-            incoming_payment_id=str(pending_payment.id),
-            finish_id=pending_payment.finish_id,
-            interact_ref=interact_ref,
-            auth_server_url=str(pending_payment.buyer.authServer),
-            received_hash=received_hash,
-        ):
-            raise ValueError(f"Hash invalid for pending payment `{pending_payment.incoming_payment_id}`")
+        receiver_wallet = receiver_client.wallet.get_wallet_address(receiver_account.walletAddressUrl)
 
-        # Request a grant continuation
-        grant_request = self.client.grants.post_grant_continuation_request(
-            interact_ref=InteractRef(**dict(interact_ref=interact_ref)),
-            continue_uri=str(pending_payment.continue_url),
-            access_token=pending_payment.continue_id,
+        # Create incoming payment with fixed receiving amount
+        incoming_payment = self._incoming_payment_request(
+            amount=self._estimate_receive_amount(grant=grant), wallet=receiver_wallet
         )
-        access_token = grant_request.access_token.value
+        with flow_step("incoming_payment"):
+            incoming_payment_response = self._call_with_grant_token(
+                client=receiver_client,
+                client_id=str(receiver_wallet.id),
+                grant="incoming-payment",
+                actions=["create", "read"],
+                endpoint=receiver_wallet.authServer,
+                call=lambda access_token: receiver_client.incoming_payments.post_create_payment(
+                    payment=incoming_payment,
+                    resource_server_endpoint=str(receiver_wallet.resourceServer),
+                    access_token=access_token,
+                ),
+            )
+
+        # Request a quote from the sender's wallet
+        logger.debug(f"grant.sender_wallet: {grant.sender_wallet}")
+        logger.debug(f"grant.receiver_wallet: {grant.receiver_wallet}")
+
+        sender_client = self._sender_client(wallet_address=grant.sender_wallet)
+
+        sender_wallet = sender_client.wallet.get_wallet_address(grant.sender_wallet)
+        logger.debug(f"sender_wallet.id: {sender_wallet.id}")
+        logger.debug(f"sender_wallet.resourceServer: {sender_wallet.resourceServer}")
+
+        quote_request = self._quote_request(incoming_payment_id=incoming_payment_response.id, wallet=sender_wallet)
+        with flow_step("quote"):
+            quote_response = self._call_with_grant_token(
+                client=sender_client,
+                client_id=str(sender_wallet.id),
+                grant="quote",
+                actions=["create", "read"],
+                endpoint=sender_wallet.authServer,
+                call=lambda access_token: sender_client.quotes.post_create_quote(
+                    quote=quote_request,
+                    resource_server_endpoint=str(sender_wallet.resourceServer),
+                    access_token=access_token,
+                ),
+            )
 
-        # Create an outgoing payment from the buyer
-        outgoing_payment_request = OutgoingPaymentRequest(
-            **dict(walletAddress=str(pending_payment.buyer.id), quoteId=pending_payment.quote_id, metadata={})
+        # Create outgoing payment using the recurring grant token
+        outgoing_payment_request = self._outgoing_payment_request(
+            wallet_id=sender_wallet.id, quote_id=quote_response.id
         )
-        outgoing_payment = self.client.outgoing_payments.post_create_payment(
-            payment=outgoing_payment_request,
-            resource_server_endpoint=str(pending_payment.buyer.resourceServer),
-            access_token=access_token,
+        with sending_payment(f"Recurring payment for grant {grant.id} may have been made"):
+            with flow_step("outgoing_payment"):
+                outgoing_payment = sender_client.outgoing_payments.post_create_payment(
+                    payment=outgoing_payment_request,
+                    resource_server_endpoint=str(sender_wallet.resourceServer),
+                    access_token=grant.access_token,
+                )
+            payments_made = self.store.record_recurring_payment(grant_id=str(grant.id))
+
+        return self._recurring_payment_result(
+            grant=grant,
+            payments_made=payments_made,
+            quote_response=quote_response,
+            outgoing_payment=outgoing_payment,
         )
 
-        # Clean up pending transaction
-        del pending_purchase_transactions[transaction_id_str]
+    async def aexecute_recurring_payment(self, *, grant_id: ULID) -> Dict:
+        """
+        Execute a single recurring payment using an established grant.
 
-        return outgoing_payment
+        Returns:
+            Dictionary with payment details
+        """
+        grant = self._check_active_recurring_grant(
+            grant=await self.store.aget_active_recurring_grant(grant_id=str(grant_id)), grant_id=grant_id
+        )
+        receiver_account = self._receiver_account(wallet_address=grant.receiver_wallet)
+        receiver_client = self._async_op_client(account=receiver_account)
+        sender_client = self._async_sender_client(wallet_address=grant.sender_wallet)
 
+        receiver_wallet, sender_wallet = await asyncio.gather(
+            receiver_client.wallet.get_wallet_address(receiver_account.walletAddressUrl),
+            sender_client.wallet.get_wallet_address(grant.sender_wallet),
+        )
+
+        incoming_payment = self._incoming_payment_request(
+            amount=self._estimate_receive_amount(grant=grant), wallet=receiver_wallet
+        )
+        with flow_step("incoming_payment"):
+            incoming_payment_response = await self._acall_with_grant_token(
+                client=receiver_client,
+                client_id=str(receiver_wallet.id),
+                grant="incoming-payment",
+                actions=["create", "read"],
+                endpoint=receiver_wallet.authServer,
+                call=lambda access_token: receiver_client.incoming_payments.post_create_payment(
+                    payment=incoming_payment,
+                    resource_server_endpoint=str(receiver_wallet.resourceServer),
+                    access_token=access_token,
+                ),
+            )
+
+        quote_request = self._quote_request(incoming_payment_id=incoming_payment_response.id, wallet=sender_wallet)
+        with flow_step("quote"):
+            quote_response = await self._acall_with_grant_token(
+                client=sender_client,
+                client_id=str(sender_wallet.id),
+                grant="quote",
+                actions=["create", "read"],
+                endpoint=sender_wallet.authServer,
+                call=lambda access_token: sender_client.quotes.post_create_quote(
+                    quote=quote_request,
+                    resource_server_endpoint=str(sender_wallet.resourceServer),
+                    access_token=access_token,
+                ),
+            )
+
+        outgoing_payment_request = self._outgoing_payment_request(
+            wallet_id=sender_wallet.id, quote_id=quote_response.id
+        )
+        with sending_payment(f"Recurring payment for grant {grant.id} may have been made"):
+            with flow_step("outgoing_payment"):
+                outgoing_payment = await sender_client.outgoing_payments.post_create_payment(
+                    payment=outgoing_payment_request,
+                    resource_server_endpoint=str(sender_wallet.resourceServer),
+                    access_token=grant.access_token,
+                )
+            payments_made = await self.store.arecord_recurring_payment(grant_id=str(grant.id))
+
+        return self._recurring_payment_result(
+            grant=grant,
+            payments_made=payments_made,
+            quote_response=quote_response,
+            outgoing_payment=outgoing_payment,
+        )
 
     ###################################################################################################
-    # FASE I: ONE-TIME MIGRANTE PAYMENT (MIGRANTE USD -> FINSUS MXN)
+    # ORDER AND RECEIPT RECORDS, SETTLEMENT QUEUE
     ###################################################################################################
 
-    def get_migrante_payment_endpoint(self, *, amount: int | str) -> tuple[str, PendingIncomingPaymentTransaction]:
+    def record_order(
+        self,
+        *,
+        transaction_id: ULID | str,
+        order: OpenOrderCreate,
+        incoming_payments: list[IncomingPayment],
+        quotes: list[Quote],
+        interactive_grant: Grant,
+    ) -> OpenOrder:
         """
-        Start the one-time payment flow for MIGRANTE -> FINSUS (Fase I).
-        
-        Same pattern as get_purchase_endpoint but for MIGRANTE (USD) -> FINSUS (MXN).
-        
+        Record a started flow for a Product as an OpenOrder, with the flow's transaction id. One commit per flow
+        stage: this is the first, `record_receipt` the second.
+        """
+        with SessionLocal() as db:
+            return crud.openorder.create_for_flow(
+                db,
+                id=transaction_id,
+                obj_in=order,
+                buyer=self.buyer_wallet,
+                incoming_payments=incoming_payments,
+                quotes=quotes,
+                interactive_grant=interactive_grant,
+            )
+
+    def record_receipt(
+        self,
+        *,
+        order_id: ULID | str,
+        outgoing_payments: list[OutgoingPayment],
+        quotes: list[Quote] = (),
+        creators: Optional[dict[str, str]] = None,
+    ) -> Optional[OpenReceipt]:
+        """
+        Record the outgoing payments of a completed flow as an OpenReceipt of its order.
+
+        The payments have already been made, so a failure is logged rather than raised.
+        """
+        try:
+            with SessionLocal() as db:
+                order = crud.openorder.get(db, id=order_id)
+                if not order:
+                    raise ValueError(f"Order {order_id} not found")
+                return crud.openreceipt.create_for_flow(
+                    db, order=order, outgoing_payments=outgoing_payments, quotes=quotes, creators=creators
+                )
+        except Exception:
+            logger.exception(f"Recording the receipt of order {order_id} failed")
+            return None
+
+    def _unsettled_payments(
+        self, *, outgoing_payments: list[OutgoingPayment], access_token: AccessToken
+    ) -> list[UnsettledPayment]:
+        now = datetime.now(timezone.utc)
+        return [
+            UnsettledPayment(
+                id=payment.id,
+                wallet_address=payment.walletAddress,
+                client=self.seller.walletAddressUrl,
+                access_token=access_token.value,
+                manage_url=access_token.manage,
+                debit_amount=payment.debitAmount,
+                sent_amount=payment.sentAmount.value,
+                created_at=now,
+                next_check_at=now + timedelta(seconds=settings.RECONCILIATION_MIN_INTERVAL),
+            )
+            for payment in outgoing_payments
+        ]
+
+    def queue_unsettled_payments(self, *, outgoing_payments: list[OutgoingPayment], access_token: AccessToken) -> None:
+        """
+        Queue the outgoing payments for settlement reconciliation (see `app.services.reconciliation_service`), with
+        the access token that created them. The payments have already been made, so a failure is logged rather
+        than raised.
+        """
+        try:
+            self.store.queue_unsettled_payments(
+                payments=self._unsettled_payments(outgoing_payments=outgoing_payments, access_token=access_token)
+            )
+        except Exception:
+            logger.exception(f"Queueing {len(outgoing_payments)} outgoing payments for reconciliation failed")
+
+    async def aqueue_unsettled_payments(
+        self, *, outgoing_payments: list[OutgoingPayment], access_token: AccessToken
+    ) -> None:
+        try:
+            await self.store.aqueue_unsettled_payments(
+                payments=self._unsettled_payments(outgoing_payments=outgoing_payments, access_token=access_token)
+            )
+        except Exception:
+            logger.exception(f"Queueing {len(outgoing_payments)} outgoing payments for reconciliation failed")
+
+    async def arecord_order(self, **kwargs) -> OpenOrder:
+        return await get_payment_executor().arun(self.record_order, **kwargs)
+
+    async def arecord_receipt(self, **kwargs) -> Optional[OpenReceipt]:
+        # The payment has been made by now, so its receipt is queued even when the executor is saturated
+        return await get_payment_executor().arun(self.record_receipt, shed=False, **kwargs)
+
+    ###################################################################################################
+    # FASE II: ONE-TIME PURCHASE
+    ###################################################################################################
+
+    def get_purchase_endpoint(
+        self, *, amount: int | str, order: OpenOrderCreate = None
+    ) -> tuple[str, PendingIncomingPaymentTransaction]:
+        """
+        Start the one-time purchase flow (Fase II).
+
+        Implements the flow from hop-sauna's get_purchase_endpoint method. With an `order`, the flow is recorded as
+        an OpenOrder.
+
         Returns:
             Tuple of (redirect_url, pending_transaction)
         """
@@ -583,115 +1140,354 @@ class OpenPaymentsService:
             amount = str(amount)
 
         # Create pending transaction
-        pending_payment = PendingIncomingPaymentTransaction(
-            **{"id": ULID(), "seller": self.seller_wallet, "buyer": self.buyer_wallet}
+        pending_payment, redirect_uri = self._new_pending_transaction()
+
+        flow = FlowGraph(
+            name="purchase",
+            steps=[
+                # 1. Request an incoming payment for the seller (merchant) and, at the same time, the buyer's
+                # quote grant, which does not depend on it
+                FlowStep("incoming_payment", lambda: self.request_incoming_payment(amount=amount)),
+                FlowStep("quote_grant", lambda: self._get_grant_token(client=self.client, **self._quote_grant())),
+                # 2. Request a quote from the buyer (FINSUS)
+                FlowStep(
+                    "quote",
+                    lambda incoming_payment, quote_grant: self.request_quote(incoming_payment_id=incoming_payment.id),
+                    requires=("incoming_payment", "quote_grant"),
+                ),
+                # 3. Request an interactive payment endpoint for the buyer
+                FlowStep(
+                    "interactive_grant",
+                    lambda quote: self.client.grants.post_grant_request(
+                        grant_request=self._interactive_grant_request(
+                            debit_amount=quote.debitAmount, pending_payment=pending_payment, redirect_uri=redirect_uri
+                        ),
+                        auth_server_endpoint=str(self.buyer_wallet.authServer),
+                    ),
+                    requires=("quote",),
+                ),
+            ],
         )
-        redirect_uri = f"{self.redirect_uri}{pending_payment.id}"
+        results = flow.run()
+        self.flow_timings = flow.timings
 
-        # 1. Request incoming payment grant for FINSUS (seller/receiver)
-        incoming_payment_response = self.request_incoming_payment(amount=amount)
-        pending_payment.incoming_payment_id = incoming_payment_response.id
+        # Store pending transaction
+        pending_payment.incoming_payment_id = results["incoming_payment"].id
+        pending_payment.quote_id = results["quote"].id
+        interactive_response = results["interactive_grant"]
+        pending_payment = self._set_interaction(
+            pending_payment=pending_payment, interactive_response=interactive_response
+        )
+        if order is not None:
+            with flow_step("record_order"):
+                self.record_order(
+                    transaction_id=pending_payment.id,
+                    order=order,
+                    incoming_payments=[results["incoming_payment"]],
+                    quotes=[results["quote"]],
+                    interactive_grant=interactive_response,
+                )
+            pending_payment.order_id = pending_payment.id
+        self.store.save_pending_transaction(transaction=pending_payment)
 
-        # 2. Request quote grant for MIGRANTE (buyer/sender)
-        quote_response = self.request_quote(incoming_payment_id=incoming_payment_response.id)
-        pending_payment.quote_id = quote_response.id
+        return interactive_response.root.interact.redirect, pending_payment
 
-        # 3. Request an interactive payment endpoint for MIGRANTE
-        grant_request = GrantRequest(
-            **dict(
-                access_token=dict(
-                    access=[
-                        dict(
-                            identifier=str(self.buyer_wallet.id),
-                            type="outgoing-payment",
-                            actions=["create", "read", "read-all", "list", "list-all"],
-                            limits=dict(
-                                debitAmount=dict(
-                                    assetCode=quote_response.debitAmount.assetCode.root,
-                                    assetScale=quote_response.debitAmount.assetScale.root,
-                                    value=quote_response.debitAmount.value,
-                                ),
-                            ),
+    async def aget_purchase_endpoint(
+        self, *, amount: int | str, order: OpenOrderCreate = None
+    ) -> tuple[str, PendingIncomingPaymentTransaction]:
+        """
+        Start the one-time purchase flow (Fase II). With an `order`, the flow is recorded as an OpenOrder.
+
+        Returns:
+            Tuple of (redirect_url, pending_transaction)
+        """
+        if isinstance(amount, int):
+            amount = str(amount)
+
+        pending_payment, redirect_uri = self._new_pending_transaction()
+
+        flow = FlowGraph(
+            name="purchase",
+            steps=[
+                FlowStep("incoming_payment", lambda: self.arequest_incoming_payment(amount=amount)),
+                FlowStep(
+                    "quote_grant", lambda: self._aget_grant_token(client=self.async_client, **self._quote_grant())
+                ),
+                FlowStep(
+                    "quote",
+                    lambda incoming_payment, quote_grant: self.arequest_quote(incoming_payment_id=incoming_payment.id),
+                    requires=("incoming_payment", "quote_grant"),
+                ),
+                FlowStep(
+                    "interactive_grant",
+                    lambda quote: self.async_client.grants.post_grant_request(
+                        grant_request=self._interactive_grant_request(
+                            debit_amount=quote.debitAmount, pending_payment=pending_payment, redirect_uri=redirect_uri
                         ),
-                    ],
+                        auth_server_endpoint=str(self.buyer_wallet.authServer),
+                    ),
+                    requires=("quote",),
                 ),
-                client=str(self.seller_wallet.id),
-                interact=dict(
-                    start=["redirect"],
-                    finish=dict(
-                        method="redirect",
-                        uri=redirect_uri,
-                        nonce=str(pending_payment.id),
+            ],
+        )
+        results = await flow.arun()
+        self.flow_timings = flow.timings
+
+        pending_payment.incoming_payment_id = results["incoming_payment"].id
+        pending_payment.quote_id = results["quote"].id
+        interactive_response = results["interactive_grant"]
+        pending_payment = self._set_interaction(
+            pending_payment=pending_payment, interactive_response=interactive_response
+        )
+        if order is not None:
+            with flow_step("record_order"):
+                await self.arecord_order(
+                    transaction_id=pending_payment.id,
+                    order=order,
+                    incoming_payments=[results["incoming_payment"]],
+                    quotes=[results["quote"]],
+                    interactive_grant=interactive_response,
+                )
+            pending_payment.order_id = pending_payment.id
+        await self.store.asave_pending_transaction(transaction=pending_payment)
+        return interactive_response.root.interact.redirect, pending_payment
+
+    async def aget_limited_payment_endpoint(
+        self, *, amount: int | str, debit_limit: Amount, order: OpenOrderCreate = None
+    ) -> tuple[str, PendingIncomingPaymentTransaction]:
+        """
+        Start a one-time payment from an indicative rate, without a binding quote.
+
+        The buyer authorizes at most `debit_limit`. The binding quote is taken in `acomplete_payment`, once the buyer
+        has confirmed, and the payment fails there if it exceeds the limit.
+
+        Returns:
+            Tuple of (redirect_url, pending_transaction)
+        """
+        if isinstance(amount, int):
+            amount = str(amount)
+
+        pending_payment, redirect_uri = self._new_pending_transaction()
+        pending_payment.quoted_amount = debit_limit
+
+        # Without a quote to wait for, the incoming payment and the interactive grant are independent
+        flow = FlowGraph(
+            name="limited_payment",
+            steps=[
+                FlowStep("incoming_payment", lambda: self.arequest_incoming_payment(amount=amount)),
+                FlowStep(
+                    "interactive_grant",
+                    lambda: self.async_client.grants.post_grant_request(
+                        grant_request=self._interactive_grant_request(
+                            debit_amount=debit_limit, pending_payment=pending_payment, redirect_uri=redirect_uri
+                        ),
+                        auth_server_endpoint=str(self.buyer_wallet.authServer),
                     ),
                 ),
-            )
+            ],
         )
+        results = await flow.arun()
+        self.flow_timings = flow.timings
 
-        # Request the interactive endpoint
-        interactive_response = self.client.grants.post_grant_request(
-            grant_request=grant_request, auth_server_endpoint=str(self.buyer_wallet.authServer)
+        pending_payment.incoming_payment_id = results["incoming_payment"].id
+        interactive_response = results["interactive_grant"]
+        pending_payment = self._set_interaction(
+            pending_payment=pending_payment, interactive_response=interactive_response
         )
+        if order is not None:
+            with flow_step("record_order"):
+                await self.arecord_order(
+                    transaction_id=pending_payment.id,
+                    order=order,
+                    incoming_payments=[results["incoming_payment"]],
+                    quotes=[],
+                    interactive_grant=interactive_response,
+                )
+            pending_payment.order_id = pending_payment.id
+        await self.store.asave_pending_transaction(transaction=pending_payment)
+        return interactive_response.root.interact.redirect, pending_payment
 
-        pending_payment.interactive_redirect = interactive_response.root.interact.redirect
-        pending_payment.finish_id = interactive_response.root.interact.finish
-        pending_payment.continue_id = interactive_response.root.cont.access_token.value
-        pending_payment.continue_url = interactive_response.root.cont.uri
+    def complete_payment(self, *, transaction_id: ULID, interact_ref: str, received_hash: str) -> OutgoingPayment:
+        """
+        Complete the one-time purchase after user authorization.
 
-        # Store pending transaction
-        pending_purchase_transactions[str(pending_payment.id)] = pending_payment
+        Implements the flow from hop-sauna's complete_payment method.
 
-        return interactive_response.root.interact.redirect, pending_payment
+        Returns:
+            OutgoingPayment object
+        """
+        # Claim the pending transaction before reading it, so that a repeated callback cannot pay twice. Once paid,
+        # the transaction is gone and its claim is left to expire.
+        if not self.store.claim_pending_transaction(transaction_id=str(transaction_id)):
+            raise PaymentConflict(f"Transaction {transaction_id} is already being completed")
+        pending_payment = self.store.get_pending_transaction(transaction_id=str(transaction_id))
+
+        try:
+            self._verify_transaction(
+                pending_payment=pending_payment,
+                transaction_id=transaction_id,
+                interact_ref=interact_ref,
+                received_hash=received_hash,
+            )
 
-    def complete_migrante_payment(
+            # Take the binding quote now if the flow started from an indicative rate. This comes before the grant
+            # continuation, which can only be made once, so that a rate past the debit limit can be quoted again
+            quote_id, quotes = pending_payment.quote_id, []
+            if quote_id is None:
+                with flow_step("quote"):
+                    quote = self.request_quote(incoming_payment_id=pending_payment.incoming_payment_id)
+                quote_id = self._check_debit_limit(quote=quote, pending_payment=pending_payment).id
+                quotes = [quote]
+
+            # Request a grant continuation
+            with flow_step("continuation"):
+                grant_request = self.client.grants.post_grant_continuation_request(
+                    interact_ref=InteractRef(**dict(interact_ref=interact_ref)),
+                    continue_uri=str(pending_payment.continue_url),
+                    access_token=pending_payment.continue_id,
+                )
+        except BaseException:
+            # Nothing was paid: unlock the transaction, so that the callback can be retried
+            if pending_payment is not None:
+                self.store.release_pending_transaction(transaction=pending_payment)
+            raise
+        access_token = grant_request.access_token.value
+
+        # Create an outgoing payment from the buyer. Should this fail, whether it was created is unknown, so the
+        # claim is left to expire rather than released.
+        outgoing_payment_request = self._outgoing_payment_request(
+            wallet_id=pending_payment.buyer.id, quote_id=quote_id
+        )
+        with flow_step("outgoing_payment"):
+            outgoing_payment = self.client.outgoing_payments.post_create_payment(
+                payment=outgoing_payment_request,
+                resource_server_endpoint=str(pending_payment.buyer.resourceServer),
+                access_token=access_token,
+            )
+        self.store.delete_pending_transaction(transaction_id=str(transaction_id))
+        self.queue_unsettled_payments(outgoing_payments=[outgoing_payment], access_token=grant_request.access_token)
+        if pending_payment.order_id is not None:
+            with flow_step("record_receipt"):
+                self.record_receipt(
+                    order_id=pending_payment.order_id, outgoing_payments=[outgoing_payment], quotes=quotes
+                )
+
+        return outgoing_payment
+
+    async def acomplete_payment(
         self, *, transaction_id: ULID, interact_ref: str, received_hash: str
     ) -> OutgoingPayment:
         """
-        Complete the MIGRANTE -> FINSUS payment after user authorization (Fase I).
-        
-        Same pattern as complete_payment.
-        
+        Complete the one-time purchase after user authorization.
+
         Returns:
             OutgoingPayment object
         """
-        transaction_id_str = str(transaction_id)
+        if not await self.store.aclaim_pending_transaction(transaction_id=str(transaction_id)):
+            raise PaymentConflict(f"Transaction {transaction_id} is already being completed")
+        pending_payment = await self.store.aget_pending_transaction(transaction_id=str(transaction_id))
+        try:
+            self._verify_transaction(
+                pending_payment=pending_payment,
+                transaction_id=transaction_id,
+                interact_ref=interact_ref,
+                received_hash=received_hash,
+            )
+            quote_id, quotes = pending_payment.quote_id, []
+            if quote_id is None:
+                # Started from an indicative rate: take the binding quote before the one-shot grant continuation
+                with flow_step("quote"):
+                    quote = await self.arequest_quote(incoming_payment_id=pending_payment.incoming_payment_id)
+                quote_id = self._check_debit_limit(quote=quote, pending_payment=pending_payment).id
+                quotes = [quote]
+            with flow_step("continuation"):
+                grant_request = await self.async_client.grants.post_grant_continuation_request(
+                    interact_ref=InteractRef(**dict(interact_ref=interact_ref)),
+                    continue_uri=str(pending_payment.continue_url),
+                    access_token=pending_payment.continue_id,
+                )
+        except BaseException:
+            if pending_payment is not None:
+                await self.store.arelease_pending_transaction(transaction=pending_payment)
+            raise
+        outgoing_payment_request = self._outgoing_payment_request(
+            wallet_id=pending_payment.buyer.id, quote_id=quote_id
+        )
+        with flow_step("outgoing_payment"):
+            outgoing_payment = await self.async_client.outgoing_payments.post_create_payment(
+                payment=outgoing_payment_request,
+                resource_server_endpoint=str(pending_payment.buyer.resourceServer),
+                access_token=grant_request.access_token.value,
+            )
+        await self.store.adelete_pending_transaction(transaction_id=str(transaction_id))
+        await self.aqueue_unsettled_payments(
+            outgoing_payments=[outgoing_payment], access_token=grant_request.access_token
+        )
+        if pending_payment.order_id is not None:
+            with flow_step("record_receipt"):
+                await self.arecord_receipt(
+                    order_id=pending_payment.order_id, outgoing_payments=[outgoing_payment], quotes=quotes
+                )
+        return outgoing_payment
 
-        if transaction_id_str not in pending_purchase_transactions:
-            raise ValueError(f"Transaction {transaction_id} not found in pending transactions")
+    ###################################################################################################
+    # FASE I: ONE-TIME MIGRANTE PAYMENT (MIGRANTE USD -> FINSUS MXN)
+    ###################################################################################################
+
+    def get_migrante_payment_endpoint(self, *, amount: int | str) -> tuple[str, PendingIncomingPaymentTransaction]:
+        """
+        Start the one-time payment flow for MIGRANTE -> FINSUS (Fase I).
 
-        pending_payment = pending_purchase_transactions[transaction_id_str]
+        Same pattern as get_purchase_endpoint but for MIGRANTE (USD) -> FINSUS (MXN).
 
-        # Validate the interactive response hash
-        if not paymentsparser.verify_response_hash(
-            incoming_payment_id=str(pending_payment.id),
-            finish_id=pending_payment.finish_id,
-            interact_ref=interact_ref,
-            auth_server_url=str(pending_payment.buyer.authServer),
-            received_hash=received_hash,
-        ):
-            raise ValueError(f"Hash invalid for pending payment `{pending_payment.incoming_payment_id}`")
+        Returns:
+            Tuple of (redirect_url, pending_transaction)
+        """
+        return self.get_purchase_endpoint(amount=amount)
 
-        # Request a grant continuation
-        grant_request = self.client.grants.post_grant_continuation_request(
-            interact_ref=InteractRef(**dict(interact_ref=interact_ref)),
-            continue_uri=str(pending_payment.continue_url),
-            access_token=pending_payment.continue_id,
-        )
-        access_token = grant_request.access_token.value
+    async def aget_migrante_payment_endpoint(
+        self, *, amount: int | str, debit_limit: Amount = None, order: OpenOrderCreate = None
+    ) -> tuple[str, PendingIncomingPaymentTransaction]:
+        """
+        Start the one-time payment flow for MIGRANTE -> FINSUS (Fase I).
 
-        # Create an outgoing payment from MIGRANTE
-        outgoing_payment_request = OutgoingPaymentRequest(
-            **dict(walletAddress=str(pending_payment.buyer.id), quoteId=pending_payment.quote_id, metadata={})
-        )
-        outgoing_payment = self.client.outgoing_payments.post_create_payment(
-            payment=outgoing_payment_request,
-            resource_server_endpoint=str(pending_payment.buyer.resourceServer),
-            access_token=access_token,
+        With a `debit_limit` from an indicative rate (see `app.services.quote_service`), the binding quote is only
+        taken once the Migrante confirms. Otherwise it is taken now.
+
+        Returns:
+            Tuple of (redirect_url, pending_transaction)
+        """
+        if debit_limit is not None:
+            return await self.aget_limited_payment_endpoint(amount=amount, debit_limit=debit_limit, order=order)
+        return await self.aget_purchase_endpoint(amount=amount, order=order)
+
+    def complete_migrante_payment(
+        self, *, transaction_id: ULID, interact_ref: str, received_hash: str
+    ) -> OutgoingPayment:
+        """
+        Complete the MIGRANTE -> FINSUS payment after user authorization (Fase I).
+
+        Same pattern as complete_payment.
+
+        Returns:
+            OutgoingPayment object
+        """
+        return self.complete_payment(
+            transaction_id=transaction_id, interact_ref=interact_ref, received_hash=received_hash
         )
 
-        # Clean up pending transaction
-        del pending_purchase_transactions[transaction_id_str]
+    async def acomplete_migrante_payment(
+        self, *, transaction_id: ULID, interact_ref: str, received_hash: str
+    ) -> OutgoingPayment:
+        """
+        Complete the MIGRANTE -> FINSUS payment after user authorization (Fase I).
 
-        return outgoing_payment
+        Returns:
+            OutgoingPayment object
+        """
+        return await self.acomplete_payment(
+            transaction_id=transaction_id, interact_ref=interact_ref, received_hash=received_hash
+        )
 
 
 ###################################################################################################
@@ -737,3 +1533,30 @@ def create_purchase_service() -> OpenPaymentsService:
         buyer=settings.FINSUS_WALLET_ADDRESS,
         redirect_uri=f"{settings.DEFAULT_REDIRECT_AFTER_AUTH}purchase/",
     )
+
+
+async def acreate_migrante_payment_service() -> OpenPaymentsService:
+    """Awaitable `create_migrante_payment_service`, resolving wallets without blocking."""
+    return await OpenPaymentsService.acreate(
+        seller=get_finsus_wallet(),
+        buyer=settings.MIGRANTE_WALLET_ADDRESS,
+        redirect_uri=f"{settings.DEFAULT_REDIRECT_AFTER_AUTH}migrante/",
+    )
+
+
+async def acreate_recurring_payment_service() -> OpenPaymentsService:
+    """Awaitable `create_recurring_payment_service`, resolving wallets without blocking."""
+    return await OpenPaymentsService.acreate(
+        seller=get_finsus_wallet(),
+        buyer=settings.MIGRANTE_WALLET_ADDRESS,
+        redirect_uri=f"{settings.DEFAULT_REDIRECT_AFTER_AUTH}recurring/",
+    )
+
+
+async def acreate_purchase_service() -> OpenPaymentsService:
+    """Awaitable `create_purchase_service`, resolving wallets without blocking."""
+    return await OpenPaymentsService.acreate(
+        seller=get_merchant_wallet(),
+        buyer=settings.FINSUS_WALLET_ADDRESS,
+        redirect_uri=f"{settings.DEFAULT_REDIRECT_AFTER_AUTH}purchase/",
+    )
@@ -0,0 +1,141 @@
+"""Constructoken - Interledger Hackathon Prototype
+
+Bounded thread pool for the blocking payment work of async handlers.
+
+Blocking Open Payments calls and database writes are run here instead of on the event loop, or on the default
+executor shared with the rest of the app. Work waiting for a thread is capped: once `max_queue` calls are waiting,
+further calls are refused with `PaymentExecutorSaturated`, which handlers turn into a 503, so that a payment spike
+sheds load instead of queueing without bound behind health checks and websocket traffic.
+"""
+
+import asyncio
+import contextvars
+import functools
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, TypeVar
+
+from app.core.config import settings
+from app.open_payments_sdk.utils.metrics import DURATION_BUCKETS, Histogram
+
+T = TypeVar("T")
+
+
+class PaymentExecutorSaturated(Exception):
+    """Every worker is busy and the queue is full."""
+
+    def __init__(self, *, queued: int, retry_after: int):
+        super().__init__(f"Payment executor saturated with {queued} calls queued")
+        self.retry_after = retry_after
+
+
+class PaymentExecutor:
+    """
+    A thread pool of `max_workers` threads, with at most `max_queue` calls waiting for one.
+
+    - `arun` awaits a blocking call on the pool, with the caller's context (so SDK metrics keep their flow step).
+    - `render` returns the pool's saturation in the Prometheus text format: busy and queued calls, completed and
+      rejected totals, and how long calls waited for a thread.
+    """
+
+    def __init__(
+        self,
+        *,
+        max_workers: int = settings.PAYMENT_EXECUTOR_WORKERS,
+        max_queue: int = settings.PAYMENT_EXECUTOR_QUEUE,
+        retry_after: int = settings.PAYMENT_EXECUTOR_RETRY_AFTER,
+        prefix: str = "payment_executor",
+    ):
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self.retry_after = retry_after
+        self.prefix = prefix
+        self.busy = 0
+        self.queued = 0
+        self.completed = 0
+        self.rejected = 0
+        self.wait = Histogram(f"{prefix}_wait_seconds", "Time payment calls waited for a thread.", (), DURATION_BUCKETS)
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="payment-io")
+        self._lock = threading.Lock()
+
+    def _reserve(self, shed: bool) -> None:
+        with self._lock:
+            if shed and self.busy + self.queued >= self.max_workers + self.max_queue:
+                self.rejected += 1
+                raise PaymentExecutorSaturated(queued=self.queued, retry_after=self.retry_after)
+            self.queued += 1
+
+    def _run(self, call: Callable[[], T], submitted: float) -> T:
+        self.wait.observe(time.perf_counter() - submitted, ())
+        with self._lock:
+            self.queued -= 1
+            self.busy += 1
+        try:
+            return call()
+        finally:
+            with self._lock:
+                self.busy -= 1
+                self.completed += 1
+
+    async def arun(self, call: Callable[..., T], /, *args: Any, shed: bool = True, **kwargs: Any) -> T:
+        """
+        Run a blocking `call` on the pool. Raises `PaymentExecutorSaturated`, without running it, if the queue is full.
+
+        With `shed=False` the call is queued regardless, for work that must not be dropped once money has moved.
+        """
+        self._reserve(shed)
+        context = contextvars.copy_context()
+        bound = functools.partial(context.run, call, *args, **kwargs)
+        future = self._executor.submit(self._run, bound, time.perf_counter())
+        future.add_done_callback(self._release_cancelled)
+        return await asyncio.wrap_future(future)
+
+    def _release_cancelled(self, future: Future) -> None:
+        # A call cancelled by its caller before it got a thread never runs, so never leaves the queue itself
+        if future.cancelled():
+            with self._lock:
+                self.queued -= 1
+
+    def render(self) -> str:
+        with self._lock:
+            gauges = {
+                "workers": (self.max_workers, "Threads in the payment executor."),
+                "queue_limit": (self.max_queue, "Calls allowed to wait for a payment executor thread."),
+                "busy": (self.busy, "Payment calls running."),
+                "queued": (self.queued, "Payment calls waiting for a thread."),
+            }
+            counters = {
+                "completed_total": (self.completed, "Payment calls run."),
+                "rejected_total": (self.rejected, "Payment calls refused because the queue was full."),
+            }
+        lines = []
+        for kind, metrics in (("gauge", gauges), ("counter", counters)):
+            for name, (value, documentation) in metrics.items():
+                lines += [
+                    f"# HELP {self.prefix}_{name} {documentation}",
+                    f"# TYPE {self.prefix}_{name} {kind}",
+                    f"{self.prefix}_{name} {value}",
+                ]
+        return "\n".join([*lines, *self.wait.render()]) + "\n"
+
+    def shutdown(self) -> None:
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+
+_payment_executor: PaymentExecutor | None = None
+
+
+def get_payment_executor() -> PaymentExecutor:
+    """Get the process-wide payment executor."""
+    global _payment_executor
+    if _payment_executor is None:
+        _payment_executor = PaymentExecutor()
+    return _payment_executor
+
+
+def close_payment_executor() -> None:
+    global _payment_executor
+    if _payment_executor is not None:
+        _payment_executor.shutdown()
+        _payment_executor = None
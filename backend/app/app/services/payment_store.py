@@ -0,0 +1,727 @@
+"""Constructoken - Interledger Hackathon Prototype
+
+Payment state shared between the request that starts a flow and the callback that completes it.
+
+Callbacks may land on any worker, so the default store is Redis. Pending transactions and grants expire after
+`OPEN_PAYMENTS_PENDING_TTL` seconds. A callback claims its pending state with a lock held for
+`OPEN_PAYMENTS_CLAIM_TTL` seconds before reading it, so that a repeated callback cannot complete the same payment
+twice while it is in flight. The state itself is only deleted once the payment has been made, and its claim is then
+left to expire, so that a repeated callback cannot claim it again in the meantime. A callback that fails before paying
+releases the claim, and can be retried. `MemoryPaymentStore` keeps the same semantics in a single process, for
+development.
+
+Outgoing payments awaiting settlement are kept in a queue ordered by when each is next due to be checked, without a
+TTL: they leave it when the reconciliation worker finds them settled or gives up on them.
+
+Every method has an awaitable `a`-prefixed counterpart.
+"""
+
+import threading
+import time
+from abc import ABC, abstractmethod
+from datetime import datetime, timezone
+from typing import Optional
+
+from app.core.config import settings
+from app.db.cache import get_async_redis, get_redis
+from app.schemas.openpayments.open_payments import PendingIncomingPaymentTransaction
+from app.schemas.payments import (
+    PendingRecurringPaymentGrant,
+    PendingSplitPayment,
+    RecurringPaymentGrant,
+    UnsettledPayment,
+)
+
+
+class PaymentStore(ABC):
+    """
+    Storage for pending purchase transactions, pending split payments, pending recurring grants, active recurring
+    grants and unsettled outgoing payments.
+    """
+
+    @abstractmethod
+    def save_pending_transaction(self, *, transaction: PendingIncomingPaymentTransaction) -> None: ...
+
+    @abstractmethod
+    def get_pending_transaction(self, *, transaction_id: str) -> Optional[PendingIncomingPaymentTransaction]: ...
+
+    @abstractmethod
+    def claim_pending_transaction(self, *, transaction_id: str) -> bool:
+        """
+        Lock the transaction while a callback completes it, before it is read. Only one caller gets True until it is
+        released or expires.
+        """
+
+    @abstractmethod
+    def release_pending_transaction(self, *, transaction: PendingIncomingPaymentTransaction) -> None:
+        """Unlock the transaction, for a callback that failed before paying."""
+
+    @abstractmethod
+    def delete_pending_transaction(self, *, transaction_id: str) -> None:
+        """Delete the transaction once it has been paid, its lock left to expire."""
+
+    @abstractmethod
+    def save_pending_split_payment(self, *, payment: PendingSplitPayment) -> None: ...
+
+    @abstractmethod
+    def get_pending_split_payment(self, *, payment_id: str) -> Optional[PendingSplitPayment]: ...
+
+    @abstractmethod
+    def claim_pending_split_payment(self, *, payment_id: str) -> bool:
+        """
+        Lock the split payment while a callback completes it, before it is read. Only one caller gets True until it is
+        released or expires.
+        """
+
+    @abstractmethod
+    def release_pending_split_payment(self, *, payment: PendingSplitPayment) -> None:
+        """Unlock the split payment, for a callback that failed before paying."""
+
+    @abstractmethod
+    def delete_pending_split_payment(self, *, payment_id: str) -> None:
+        """Delete the split payment once it has been paid, its lock left to expire."""
+
+    @abstractmethod
+    def save_pending_recurring_grant(self, *, grant: PendingRecurringPaymentGrant) -> None: ...
+
+    @abstractmethod
+    def get_pending_recurring_grant(self, *, grant_id: str) -> Optional[PendingRecurringPaymentGrant]: ...
+
+    @abstractmethod
+    def claim_pending_recurring_grant(self, *, grant_id: str) -> bool:
+        """
+        Lock the pending grant while a callback completes it, before it is read. Only one caller gets True until it is
+        released or expires.
+        """
+
+    @abstractmethod
+    def release_pending_recurring_grant(self, *, grant: PendingRecurringPaymentGrant) -> None:
+        """Unlock the pending grant, for a callback that failed before continuing it."""
+
+    @abstractmethod
+    def delete_pending_recurring_grant(self, *, grant_id: str) -> None:
+        """Delete the pending grant once it is active, its lock left to expire."""
+
+    @abstractmethod
+    def save_active_recurring_grant(self, *, grant: RecurringPaymentGrant) -> None: ...
+
+    @abstractmethod
+    def get_active_recurring_grant(self, *, grant_id: str) -> Optional[RecurringPaymentGrant]: ...
+
+    @abstractmethod
+    def get_active_recurring_grants(self) -> list[RecurringPaymentGrant]: ...
+
+    @abstractmethod
+    def record_recurring_payment(self, *, grant_id: str, paid_at: datetime = None) -> int:
+        """Atomically increment `payments_made` for the grant, set `last_payment_at` and return the new count."""
+
+    @abstractmethod
+    def claim_recurring_interval(self, *, grant_id: str, interval: int, ttl: int) -> bool:
+        """Claim the grant's payment for one interval. Only one caller gets True until the claim is released."""
+
+    @abstractmethod
+    def release_recurring_interval(self, *, grant_id: str, interval: int) -> None: ...
+
+    @abstractmethod
+    def queue_unsettled_payments(self, *, payments: list[UnsettledPayment]) -> None:
+        """Add the payments to the queue, or update those already in it, due at their `next_check_at`."""
+
+    @abstractmethod
+    def get_due_unsettled_payments(self, *, now: datetime, limit: int) -> list[UnsettledPayment]:
+        """The payments due by `now`, earliest first. They stay queued until removed or queued again."""
+
+    @abstractmethod
+    def remove_unsettled_payments(self, *, payment_ids: list[str]) -> None: ...
+
+    @abstractmethod
+    async def asave_pending_transaction(self, *, transaction: PendingIncomingPaymentTransaction) -> None: ...
+
+    @abstractmethod
+    async def aget_pending_transaction(self, *, transaction_id: str) -> Optional[PendingIncomingPaymentTransaction]:
+        ...
+
+    @abstractmethod
+    async def aclaim_pending_transaction(self, *, transaction_id: str) -> bool: ...
+
+    @abstractmethod
+    async def arelease_pending_transaction(self, *, transaction: PendingIncomingPaymentTransaction) -> None: ...
+
+    @abstractmethod
+    async def adelete_pending_transaction(self, *, transaction_id: str) -> None: ...
+
+    @abstractmethod
+    async def asave_pending_split_payment(self, *, payment: PendingSplitPayment) -> None: ...
+
+    @abstractmethod
+    async def aget_pending_split_payment(self, *, payment_id: str) -> Optional[PendingSplitPayment]: ...
+
+    @abstractmethod
+    async def aclaim_pending_split_payment(self, *, payment_id: str) -> bool: ...
+
+    @abstractmethod
+    async def arelease_pending_split_payment(self, *, payment: PendingSplitPayment) -> None: ...
+
+    @abstractmethod
+    async def adelete_pending_split_payment(self, *, payment_id: str) -> None: ...
+
+    @abstractmethod
+    async def asave_pending_recurring_grant(self, *, grant: PendingRecurringPaymentGrant) -> None: ...
+
+    @abstractmethod
+    async def aget_pending_recurring_grant(self, *, grant_id: str) -> Optional[PendingRecurringPaymentGrant]: ...
+
+    @abstractmethod
+    async def aclaim_pending_recurring_grant(self, *, grant_id: str) -> bool: ...
+
+    @abstractmethod
+    async def arelease_pending_recurring_grant(self, *, grant: PendingRecurringPaymentGrant) -> None: ...
+
+    @abstractmethod
+    async def adelete_pending_recurring_grant(self, *, grant_id: str) -> None: ...
+
+    @abstractmethod
+    async def asave_active_recurring_grant(self, *, grant: RecurringPaymentGrant) -> None: ...
+
+    @abstractmethod
+    async def aget_active_recurring_grant(self, *, grant_id: str) -> Optional[RecurringPaymentGrant]: ...
+
+    @abstractmethod
+    async def aget_active_recurring_grants(self) -> list[RecurringPaymentGrant]: ...
+
+    @abstractmethod
+    async def arecord_recurring_payment(self, *, grant_id: str, paid_at: datetime = None) -> int: ...
+
+    @abstractmethod
+    async def aclaim_recurring_interval(self, *, grant_id: str, interval: int, ttl: int) -> bool: ...
+
+    @abstractmethod
+    async def arelease_recurring_interval(self, *, grant_id: str, interval: int) -> None: ...
+
+    @abstractmethod
+    async def aqueue_unsettled_payments(self, *, payments: list[UnsettledPayment]) -> None: ...
+
+    @abstractmethod
+    async def aget_due_unsettled_payments(self, *, now: datetime, limit: int) -> list[UnsettledPayment]: ...
+
+    @abstractmethod
+    async def aremove_unsettled_payments(self, *, payment_ids: list[str]) -> None: ...
+
+
+class RedisPaymentStore(PaymentStore):
+    """
+    Redis payment store.
+
+    Pending state is stored as compact JSON (unset fields dropped) with a TTL, and claimed with a `SET NX` lock key
+    beside it. Active grants are hashes holding the grant JSON and a separate `payments_made` counter, so that
+    concurrent payments increment it with `HINCRBY` instead of overwriting each other. Their ids are indexed in a set
+    for the scheduler.
+
+    Unsettled payments are a sorted set of payment ids, scored by when each is next due, beside a hash of the
+    payments' JSON.
+    """
+
+    def __init__(
+        self, *, redis=None, async_redis=None, pending_ttl: int = None, claim_ttl: int = None, prefix: str = "payments"
+    ):
+        self.redis = redis or get_redis()
+        self.async_redis = async_redis or get_async_redis()
+        self.pending_ttl = pending_ttl or settings.OPEN_PAYMENTS_PENDING_TTL
+        self.claim_ttl = claim_ttl or settings.OPEN_PAYMENTS_CLAIM_TTL
+        self.prefix = prefix
+
+    def _transaction_key(self, transaction_id: str) -> str:
+        return f"{self.prefix}:pending:{transaction_id}"
+
+    def _split_payment_key(self, payment_id: str) -> str:
+        return f"{self.prefix}:pending-split:{payment_id}"
+
+    def _pending_grant_key(self, grant_id: str) -> str:
+        return f"{self.prefix}:pending-recurring:{grant_id}"
+
+    def _claim_key(self, key: str) -> str:
+        return f"{key}:claim"
+
+    def _claim_pending(self, redis, key: str):
+        return redis.set(self._claim_key(key), 1, nx=True, ex=self.claim_ttl)
+
+    def _release_pending(self, redis, key: str):
+        return redis.delete(self._claim_key(key))
+
+    def _active_grant_key(self, grant_id: str) -> str:
+        return f"{self.prefix}:active-recurring:{grant_id}"
+
+    @property
+    def _active_grants_index_key(self) -> str:
+        return f"{self.prefix}:active-recurring"
+
+    def _interval_claim_key(self, grant_id: str, interval: int) -> str:
+        return f"{self.prefix}:recurring-claim:{grant_id}:{interval}"
+
+    @property
+    def _unsettled_queue_key(self) -> str:
+        return f"{self.prefix}:unsettled"
+
+    @property
+    def _unsettled_payments_key(self) -> str:
+        return f"{self.prefix}:unsettled-payments"
+
+    def _queue_payments(self, pipeline, payments: list[UnsettledPayment]):
+        pipeline.hset(
+            self._unsettled_payments_key,
+            mapping={str(payment.id): payment.model_dump_json(exclude_none=True) for payment in payments},
+        )
+        pipeline.zadd(
+            self._unsettled_queue_key,
+            {str(payment.id): payment.next_check_at.timestamp() for payment in payments},
+        )
+        return pipeline
+
+    def _remove_payments(self, pipeline, payment_ids: list[str]):
+        pipeline.zrem(self._unsettled_queue_key, *payment_ids)
+        pipeline.hdel(self._unsettled_payments_key, *payment_ids)
+        return pipeline
+
+    def _dump_active_grant(self, grant: RecurringPaymentGrant) -> dict:
+        data = {
+            "data": grant.model_dump_json(exclude={"payments_made", "last_payment_at"}, exclude_none=True),
+            "payments_made": grant.payments_made,
+        }
+        if grant.last_payment_at:
+            data["last_payment_at"] = grant.last_payment_at.isoformat()
+        return data
+
+    def _load_active_grant(self, data: dict) -> Optional[RecurringPaymentGrant]:
+        if not data:
+            return None
+        grant = RecurringPaymentGrant.model_validate_json(data[b"data"])
+        grant.payments_made = int(data[b"payments_made"])
+        if data.get(b"last_payment_at"):
+            grant.last_payment_at = datetime.fromisoformat(data[b"last_payment_at"].decode("utf-8"))
+        return grant
+
+    def _record_payment(self, pipeline, grant_id: str, paid_at: datetime = None):
+        key = self._active_grant_key(grant_id)
+        pipeline.hincrby(key, "payments_made", 1)
+        pipeline.hset(key, "last_payment_at", (paid_at or datetime.now(timezone.utc)).isoformat())
+        return pipeline
+
+    def _load(self, model, data: Optional[bytes]):
+        return model.model_validate_json(data) if data else None
+
+    def save_pending_transaction(self, *, transaction: PendingIncomingPaymentTransaction) -> None:
+        self.redis.set(
+            self._transaction_key(str(transaction.id)),
+            transaction.model_dump_json(exclude_none=True),
+            ex=self.pending_ttl,
+        )
+
+    def get_pending_transaction(self, *, transaction_id: str) -> Optional[PendingIncomingPaymentTransaction]:
+        return self._load(PendingIncomingPaymentTransaction, self.redis.get(self._transaction_key(transaction_id)))
+
+    def claim_pending_transaction(self, *, transaction_id: str) -> bool:
+        return bool(self._claim_pending(self.redis, self._transaction_key(transaction_id)))
+
+    def release_pending_transaction(self, *, transaction: PendingIncomingPaymentTransaction) -> None:
+        self._release_pending(self.redis, self._transaction_key(str(transaction.id)))
+
+    def delete_pending_transaction(self, *, transaction_id: str) -> None:
+        self.redis.delete(self._transaction_key(transaction_id))
+
+    def save_pending_split_payment(self, *, payment: PendingSplitPayment) -> None:
+        self.redis.set(
+            self._split_payment_key(str(payment.id)), payment.model_dump_json(exclude_none=True), ex=self.pending_ttl
+        )
+
+    def get_pending_split_payment(self, *, payment_id: str) -> Optional[PendingSplitPayment]:
+        return self._load(PendingSplitPayment, self.redis.get(self._split_payment_key(payment_id)))
+
+    def claim_pending_split_payment(self, *, payment_id: str) -> bool:
+        return bool(self._claim_pending(self.redis, self._split_payment_key(payment_id)))
+
+    def release_pending_split_payment(self, *, payment: PendingSplitPayment) -> None:
+        self._release_pending(self.redis, self._split_payment_key(str(payment.id)))
+
+    def delete_pending_split_payment(self, *, payment_id: str) -> None:
+        self.redis.delete(self._split_payment_key(payment_id))
+
+    def save_pending_recurring_grant(self, *, grant: PendingRecurringPaymentGrant) -> None:
+        self.redis.set(
+            self._pending_grant_key(str(grant.grant_id)), grant.model_dump_json(exclude_none=True), ex=self.pending_ttl
+        )
+
+    def get_pending_recurring_grant(self, *, grant_id: str) -> Optional[PendingRecurringPaymentGrant]:
+        return self._load(PendingRecurringPaymentGrant, self.redis.get(self._pending_grant_key(grant_id)))
+
+    def claim_pending_recurring_grant(self, *, grant_id: str) -> bool:
+        return bool(self._claim_pending(self.redis, self._pending_grant_key(grant_id)))
+
+    def release_pending_recurring_grant(self, *, grant: PendingRecurringPaymentGrant) -> None:
+        self._release_pending(self.redis, self._pending_grant_key(str(grant.grant_id)))
+
+    def delete_pending_recurring_grant(self, *, grant_id: str) -> None:
+        self.redis.delete(self._pending_grant_key(grant_id))
+
+    def save_active_recurring_grant(self, *, grant: RecurringPaymentGrant) -> None:
+        pipeline = self.redis.pipeline()
+        pipeline.hset(self._active_grant_key(str(grant.id)), mapping=self._dump_active_grant(grant))
+        pipeline.sadd(self._active_grants_index_key, str(grant.id))
+        pipeline.execute()
+
+    def get_active_recurring_grant(self, *, grant_id: str) -> Optional[RecurringPaymentGrant]:
+        return self._load_active_grant(self.redis.hgetall(self._active_grant_key(grant_id)))
+
+    def get_active_recurring_grants(self) -> list[RecurringPaymentGrant]:
+        pipeline = self.redis.pipeline(transaction=False)
+        for grant_id in self.redis.smembers(self._active_grants_index_key):
+            pipeline.hgetall(self._active_grant_key(grant_id.decode("utf-8")))
+        return [grant for grant in map(self._load_active_grant, pipeline.execute()) if grant]
+
+    def record_recurring_payment(self, *, grant_id: str, paid_at: datetime = None) -> int:
+        payments_made, _ = self._record_payment(self.redis.pipeline(), grant_id, paid_at).execute()
+        return payments_made
+
+    def claim_recurring_interval(self, *, grant_id: str, interval: int, ttl: int) -> bool:
+        return bool(self.redis.set(self._interval_claim_key(grant_id, interval), 1, nx=True, ex=ttl))
+
+    def release_recurring_interval(self, *, grant_id: str, interval: int) -> None:
+        self.redis.delete(self._interval_claim_key(grant_id, interval))
+
+    def queue_unsettled_payments(self, *, payments: list[UnsettledPayment]) -> None:
+        if payments:
+            self._queue_payments(self.redis.pipeline(), payments).execute()
+
+    def get_due_unsettled_payments(self, *, now: datetime, limit: int) -> list[UnsettledPayment]:
+        payment_ids = self.redis.zrangebyscore(self._unsettled_queue_key, "-inf", now.timestamp(), start=0, num=limit)
+        if not payment_ids:
+            return []
+        data = self.redis.hmget(self._unsettled_payments_key, payment_ids)
+        return [UnsettledPayment.model_validate_json(payment) for payment in data if payment]
+
+    def remove_unsettled_payments(self, *, payment_ids: list[str]) -> None:
+        if payment_ids:
+            self._remove_payments(self.redis.pipeline(), payment_ids).execute()
+
+    async def asave_pending_transaction(self, *, transaction: PendingIncomingPaymentTransaction) -> None:
+        await self.async_redis.set(
+            self._transaction_key(str(transaction.id)),
+            transaction.model_dump_json(exclude_none=True),
+            ex=self.pending_ttl,
+        )
+
+    async def aget_pending_transaction(self, *, transaction_id: str) -> Optional[PendingIncomingPaymentTransaction]:
+        data = await self.async_redis.get(self._transaction_key(transaction_id))
+        return self._load(PendingIncomingPaymentTransaction, data)
+
+    async def aclaim_pending_transaction(self, *, transaction_id: str) -> bool:
+        return bool(await self._claim_pending(self.async_redis, self._transaction_key(transaction_id)))
+
+    async def arelease_pending_transaction(self, *, transaction: PendingIncomingPaymentTransaction) -> None:
+        await self._release_pending(self.async_redis, self._transaction_key(str(transaction.id)))
+
+    async def adelete_pending_transaction(self, *, transaction_id: str) -> None:
+        await self.async_redis.delete(self._transaction_key(transaction_id))
+
+    async def asave_pending_split_payment(self, *, payment: PendingSplitPayment) -> None:
+        await self.async_redis.set(
+            self._split_payment_key(str(payment.id)), payment.model_dump_json(exclude_none=True), ex=self.pending_ttl
+        )
+
+    async def aget_pending_split_payment(self, *, payment_id: str) -> Optional[PendingSplitPayment]:
+        return self._load(PendingSplitPayment, await self.async_redis.get(self._split_payment_key(payment_id)))
+
+    async def aclaim_pending_split_payment(self, *, payment_id: str) -> bool:
+        return bool(await self._claim_pending(self.async_redis, self._split_payment_key(payment_id)))
+
+    async def arelease_pending_split_payment(self, *, payment: PendingSplitPayment) -> None:
+        await self._release_pending(self.async_redis, self._split_payment_key(str(payment.id)))
+
+    async def adelete_pending_split_payment(self, *, payment_id: str) -> None:
+        await self.async_redis.delete(self._split_payment_key(payment_id))
+
+    async def asave_pending_recurring_grant(self, *, grant: PendingRecurringPaymentGrant) -> None:
+        await self.async_redis.set(
+            self._pending_grant_key(str(grant.grant_id)), grant.model_dump_json(exclude_none=True), ex=self.pending_ttl
+        )
+
+    async def aget_pending_recurring_grant(self, *, grant_id: str) -> Optional[PendingRecurringPaymentGrant]:
+        data = await self.async_redis.get(self._pending_grant_key(grant_id))
+        return self._load(PendingRecurringPaymentGrant, data)
+
+    async def aclaim_pending_recurring_grant(self, *, grant_id: str) -> bool:
+        return bool(await self._claim_pending(self.async_redis, self._pending_grant_key(grant_id)))
+
+    async def arelease_pending_recurring_grant(self, *, grant: PendingRecurringPaymentGrant) -> None:
+        await self._release_pending(self.async_redis, self._pending_grant_key(str(grant.grant_id)))
+
+    async def adelete_pending_recurring_grant(self, *, grant_id: str) -> None:
+        await self.async_redis.delete(self._pending_grant_key(grant_id))
+
+    async def asave_active_recurring_grant(self, *, grant: RecurringPaymentGrant) -> None:
+        pipeline = self.async_redis.pipeline()
+        pipeline.hset(self._active_grant_key(str(grant.id)), mapping=self._dump_active_grant(grant))
+        pipeline.sadd(self._active_grants_index_key, str(grant.id))
+        await pipeline.execute()
+
+    async def aget_active_recurring_grant(self, *, grant_id: str) -> Optional[RecurringPaymentGrant]:
+        return self._load_active_grant(await self.async_redis.hgetall(self._active_grant_key(grant_id)))
+
+    async def aget_active_recurring_grants(self) -> list[RecurringPaymentGrant]:
+        pipeline = self.async_redis.pipeline(transaction=False)
+        for grant_id in await self.async_redis.smembers(self._active_grants_index_key):
+            pipeline.hgetall(self._active_grant_key(grant_id.decode("utf-8")))
+        return [grant for grant in map(self._load_active_grant, await pipeline.execute()) if grant]
+
+    async def arecord_recurring_payment(self, *, grant_id: str, paid_at: datetime = None) -> int:
+        payments_made, _ = await self._record_payment(self.async_redis.pipeline(), grant_id, paid_at).execute()
+        return payments_made
+
+    async def aclaim_recurring_interval(self, *, grant_id: str, interval: int, ttl: int) -> bool:
+        return bool(await self.async_redis.set(self._interval_claim_key(grant_id, interval), 1, nx=True, ex=ttl))
+
+    async def arelease_recurring_interval(self, *, grant_id: str, interval: int) -> None:
+        await self.async_redis.delete(self._interval_claim_key(grant_id, interval))
+
+    async def aqueue_unsettled_payments(self, *, payments: list[UnsettledPayment]) -> None:
+        if payments:
+            await self._queue_payments(self.async_redis.pipeline(), payments).execute()
+
+    async def aget_due_unsettled_payments(self, *, now: datetime, limit: int) -> list[UnsettledPayment]:
+        payment_ids = await self.async_redis.zrangebyscore(
+            self._unsettled_queue_key, "-inf", now.timestamp(), start=0, num=limit
+        )
+        if not payment_ids:
+            return []
+        data = await self.async_redis.hmget(self._unsettled_payments_key, payment_ids)
+        return [UnsettledPayment.model_validate_json(payment) for payment in data if payment]
+
+    async def aremove_unsettled_payments(self, *, payment_ids: list[str]) -> None:
+        if payment_ids:
+            await self._remove_payments(self.async_redis.pipeline(), payment_ids).execute()
+
+
+class MemoryPaymentStore(PaymentStore):
+    """
+    Single-process payment store, for development. Expired pending state is dropped when next read.
+    """
+
+    def __init__(self, *, pending_ttl: int = None, claim_ttl: int = None):
+        self.pending_ttl = pending_ttl or settings.OPEN_PAYMENTS_PENDING_TTL
+        self.claim_ttl = claim_ttl or settings.OPEN_PAYMENTS_CLAIM_TTL
+        self.pending: dict[
+            str, tuple[float, PendingIncomingPaymentTransaction | PendingSplitPayment | PendingRecurringPaymentGrant]
+        ] = {}
+        self.claims: dict[str, float] = {}
+        self.active: dict[str, RecurringPaymentGrant] = {}
+        self.interval_claims: dict[tuple[str, int], float] = {}
+        self.unsettled: dict[str, UnsettledPayment] = {}
+        self._lock = threading.Lock()
+
+    def _save_pending(self, key: str, value) -> None:
+        with self._lock:
+            self.pending[key] = (time.time() + self.pending_ttl, value.model_copy(deep=True))
+
+    def _claim_pending(self, key: str) -> bool:
+        with self._lock:
+            if self.claims.get(key, 0) > time.time():
+                return False
+            self.claims[key] = time.time() + self.claim_ttl
+            return True
+
+    def _release_pending(self, key: str) -> None:
+        with self._lock:
+            self.claims.pop(key, None)
+
+    def _delete_pending(self, key: str) -> None:
+        with self._lock:
+            self.pending.pop(key, None)
+
+    def _get_pending(self, key: str):
+        with self._lock:
+            entry = self.pending.get(key)
+            if not entry:
+                return None
+            expires_at, value = entry
+            if time.time() >= expires_at:
+                self.pending.pop(key, None)
+                return None
+            return value.model_copy(deep=True)
+
+    def save_pending_transaction(self, *, transaction: PendingIncomingPaymentTransaction) -> None:
+        self._save_pending(f"transaction:{transaction.id}", transaction)
+
+    def get_pending_transaction(self, *, transaction_id: str) -> Optional[PendingIncomingPaymentTransaction]:
+        return self._get_pending(f"transaction:{transaction_id}")
+
+    def claim_pending_transaction(self, *, transaction_id: str) -> bool:
+        return self._claim_pending(f"transaction:{transaction_id}")
+
+    def release_pending_transaction(self, *, transaction: PendingIncomingPaymentTransaction) -> None:
+        self._release_pending(f"transaction:{transaction.id}")
+
+    def delete_pending_transaction(self, *, transaction_id: str) -> None:
+        self._delete_pending(f"transaction:{transaction_id}")
+
+    def save_pending_split_payment(self, *, payment: PendingSplitPayment) -> None:
+        self._save_pending(f"split:{payment.id}", payment)
+
+    def get_pending_split_payment(self, *, payment_id: str) -> Optional[PendingSplitPayment]:
+        return self._get_pending(f"split:{payment_id}")
+
+    def claim_pending_split_payment(self, *, payment_id: str) -> bool:
+        return self._claim_pending(f"split:{payment_id}")
+
+    def release_pending_split_payment(self, *, payment: PendingSplitPayment) -> None:
+        self._release_pending(f"split:{payment.id}")
+
+    def delete_pending_split_payment(self, *, payment_id: str) -> None:
+        self._delete_pending(f"split:{payment_id}")
+
+    def save_pending_recurring_grant(self, *, grant: PendingRecurringPaymentGrant) -> None:
+        self._save_pending(f"recurring:{grant.grant_id}", grant)
+
+    def get_pending_recurring_grant(self, *, grant_id: str) -> Optional[PendingRecurringPaymentGrant]:
+        return self._get_pending(f"recurring:{grant_id}")
+
+    def claim_pending_recurring_grant(self, *, grant_id: str) -> bool:
+        return self._claim_pending(f"recurring:{grant_id}")
+
+    def release_pending_recurring_grant(self, *, grant: PendingRecurringPaymentGrant) -> None:
+        self._release_pending(f"recurring:{grant.grant_id}")
+
+    def delete_pending_recurring_grant(self, *, grant_id: str) -> None:
+        self._delete_pending(f"recurring:{grant_id}")
+
+    def save_active_recurring_grant(self, *, grant: RecurringPaymentGrant) -> None:
+        with self._lock:
+            self.active[str(grant.id)] = grant.model_copy(deep=True)
+
+    def get_active_recurring_grant(self, *, grant_id: str) -> Optional[RecurringPaymentGrant]:
+        with self._lock:
+            grant = self.active.get(grant_id)
+            return grant.model_copy(deep=True) if grant else None
+
+    def get_active_recurring_grants(self) -> list[RecurringPaymentGrant]:
+        with self._lock:
+            return [grant.model_copy(deep=True) for grant in self.active.values()]
+
+    def record_recurring_payment(self, *, grant_id: str, paid_at: datetime = None) -> int:
+        with self._lock:
+            grant = self.active[grant_id]
+            grant.payments_made += 1
+            grant.last_payment_at = paid_at or datetime.now(timezone.utc)
+            return grant.payments_made
+
+    def claim_recurring_interval(self, *, grant_id: str, interval: int, ttl: int) -> bool:
+        with self._lock:
+            if self.interval_claims.get((grant_id, interval), 0) > time.time():
+                return False
+            self.interval_claims[(grant_id, interval)] = time.time() + ttl
+            return True
+
+    def release_recurring_interval(self, *, grant_id: str, interval: int) -> None:
+        with self._lock:
+            self.interval_claims.pop((grant_id, interval), None)
+
+    def queue_unsettled_payments(self, *, payments: list[UnsettledPayment]) -> None:
+        with self._lock:
+            for payment in payments:
+                self.unsettled[str(payment.id)] = payment.model_copy(deep=True)
+
+    def get_due_unsettled_payments(self, *, now: datetime, limit: int) -> list[UnsettledPayment]:
+        with self._lock:
+            due = sorted(
+                (payment for payment in self.unsettled.values() if payment.next_check_at <= now),
+                key=lambda payment: payment.next_check_at,
+            )
+            return [payment.model_copy(deep=True) for payment in due[:limit]]
+
+    def remove_unsettled_payments(self, *, payment_ids: list[str]) -> None:
+        with self._lock:
+            for payment_id in payment_ids:
+                self.unsettled.pop(payment_id, None)
+
+    async def asave_pending_transaction(self, *, transaction: PendingIncomingPaymentTransaction) -> None:
+        self.save_pending_transaction(transaction=transaction)
+
+    async def aget_pending_transaction(self, *, transaction_id: str) -> Optional[PendingIncomingPaymentTransaction]:
+        return self.get_pending_transaction(transaction_id=transaction_id)
+
+    async def aclaim_pending_transaction(self, *, transaction_id: str) -> bool:
+        return self.claim_pending_transaction(transaction_id=transaction_id)
+
+    async def arelease_pending_transaction(self, *, transaction: PendingIncomingPaymentTransaction) -> None:
+        self.release_pending_transaction(transaction=transaction)
+
+    async def adelete_pending_transaction(self, *, transaction_id: str) -> None:
+        self.delete_pending_transaction(transaction_id=transaction_id)
+
+    async def asave_pending_split_payment(self, *, payment: PendingSplitPayment) -> None:
+        self.save_pending_split_payment(payment=payment)
+
+    async def aget_pending_split_payment(self, *, payment_id: str) -> Optional[PendingSplitPayment]:
+        return self.get_pending_split_payment(payment_id=payment_id)
+
+    async def aclaim_pending_split_payment(self, *, payment_id: str) -> bool:
+        return self.claim_pending_split_payment(payment_id=payment_id)
+
+    async def arelease_pending_split_payment(self, *, payment: PendingSplitPayment) -> None:
+        self.release_pending_split_payment(payment=payment)
+
+    async def adelete_pending_split_payment(self, *, payment_id: str) -> None:
+        self.delete_pending_split_payment(payment_id=payment_id)
+
+    async def asave_pending_recurring_grant(self, *, grant: PendingRecurringPaymentGrant) -> None:
+        self.save_pending_recurring_grant(grant=grant)
+
+    async def aget_pending_recurring_grant(self, *, grant_id: str) -> Optional[PendingRecurringPaymentGrant]:
+        return self.get_pending_recurring_grant(grant_id=grant_id)
+
+    async def aclaim_pending_recurring_grant(self, *, grant_id: str) -> bool:
+        return self.claim_pending_recurring_grant(grant_id=grant_id)
+
+    async def arelease_pending_recurring_grant(self, *, grant: PendingRecurringPaymentGrant) -> None:
+        self.release_pending_recurring_grant(grant=grant)
+
+    async def adelete_pending_recurring_grant(self, *, grant_id: str) -> None:
+        self.delete_pending_recurring_grant(grant_id=grant_id)
+
+    async def asave_active_recurring_grant(self, *, grant: RecurringPaymentGrant) -> None:
+        self.save_active_recurring_grant(grant=grant)
+
+    async def aget_active_recurring_grant(self, *, grant_id: str) -> Optional[RecurringPaymentGrant]:
+        return self.get_active_recurring_grant(grant_id=grant_id)
+
+    async def aget_active_recurring_grants(self) -> list[RecurringPaymentGrant]:
+        return self.get_active_recurring_grants()
+
+    async def arecord_recurring_payment(self, *, grant_id: str, paid_at: datetime = None) -> int:
+        return self.record_recurring_payment(grant_id=grant_id, paid_at=paid_at)
+
+    async def aclaim_recurring_interval(self, *, grant_id: str, interval: int, ttl: int) -> bool:
+        return self.claim_recurring_interval(grant_id=grant_id, interval=interval, ttl=ttl)
+
+    async def arelease_recurring_interval(self, *, grant_id: str, interval: int) -> None:
+        self.release_recurring_interval(grant_id=grant_id, interval=interval)
+
+    async def aqueue_unsettled_payments(self, *, payments: list[UnsettledPayment]) -> None:
+        self.queue_unsettled_payments(payments=payments)
+
+    async def aget_due_unsettled_payments(self, *, now: datetime, limit: int) -> list[UnsettledPayment]:
+        return self.get_due_unsettled_payments(now=now, limit=limit)
+
+    async def aremove_unsettled_payments(self, *, payment_ids: list[str]) -> None:
+        self.remove_unsettled_payments(payment_ids=payment_ids)
+
+
+_payment_store: PaymentStore | None = None
+
+
+def get_payment_store() -> PaymentStore:
+    """Get the process-wide payment store selected by `OPEN_PAYMENTS_STATE_STORE`, creating it on first use."""
+    global _payment_store
+    if _payment_store is None:
+        if settings.OPEN_PAYMENTS_STATE_STORE == "memory":
+            _payment_store = MemoryPaymentStore()
+        else:
+            _payment_store = RedisPaymentStore()
+    return _payment_store
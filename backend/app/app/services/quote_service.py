@@ -0,0 +1,238 @@
+"""Constructoken - Interledger Hackathon Prototype
+
+Indicative FX quotes for payment corridors, e.g. MIGRANTE (USD) -> FINSUS (MXN).
+
+A quote is bound to the incoming payment it was requested for, so it can only be used to pay that payment. To show
+a rate before the user commits, the service quotes a probe incoming payment for an amount bucket instead, and caches
+the result by (sender wallet, receiver wallet, amount bucket) until shortly before the quote's `expiresAt`. Amounts
+in the same bucket share one quote, scaled to the requested amount.
+
+For hot corridors the configured bucket amounts (`FX_QUOTE_REFRESH_AMOUNTS`) are requoted in the background before
+they expire, so the start endpoint serves a rate from the cache. The binding quote is only taken when the user
+confirms the payment; see `OpenPaymentsService.acomplete_payment`.
+"""
+
+import asyncio
+import logging
+import math
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal
+from typing import Optional
+
+from pydantic import BaseModel
+
+from app.core.config import settings
+from app.db.cache import get_async_redis
+from app.open_payments_sdk.models.resource import Amount, Quote
+from app.open_payments_sdk.utils.cache import KeyedLocks, MemoryCacheBackend, RedisCacheBackend
+from app.open_payments_sdk.utils.metrics import flow_step
+from app.schemas.payments import IndicativeRate
+from app.services.open_payments_service import OpenPaymentsService, acreate_migrante_payment_service
+
+logger = logging.getLogger(__name__)
+
+
+def get_amount_bucket(amount: int) -> int:
+    """
+    Round an amount up to two significant digits, e.g. 1234 -> 1300, so that nearby amounts share a quote.
+    """
+    if amount <= 100:
+        return max(amount, 1)
+    step = 10 ** (len(str(amount)) - 2)
+    return math.ceil(amount / step) * step
+
+
+def parse_expires_at(quote: Quote) -> Optional[datetime]:
+    if not quote.expiresAt:
+        return None
+    expires_at = datetime.fromisoformat(quote.expiresAt.replace("Z", "+00:00"))
+    return expires_at if expires_at.tzinfo else expires_at.replace(tzinfo=timezone.utc)
+
+
+class IndicativeQuote(BaseModel):
+    """
+    A quote for an amount bucket, used to estimate the debit for any amount in the bucket.
+    """
+
+    sender_wallet: str
+    receiver_wallet: str
+    bucket: int
+    quote: Quote
+    expires_at: datetime
+
+    @property
+    def rate(self) -> Decimal:
+        """
+        Units of the receiver's asset per unit of the sender's asset.
+        """
+        receive, debit = self.quote.receiveAmount, self.quote.debitAmount
+        return (Decimal(receive.value) / 10 ** receive.assetScale.root) / (
+            Decimal(debit.value) / 10 ** debit.assetScale.root
+        )
+
+    def get_debit_amount(self, amount: int | str, slippage: float = 0.0) -> Amount:
+        """
+        Estimated debit, in the sender's asset, for receiving `amount`, plus `slippage` as a fraction.
+        """
+        debit = self.quote.debitAmount
+        value = Decimal(int(amount)) * Decimal(debit.value) / Decimal(self.quote.receiveAmount.value)
+        value = math.ceil(value * (1 + Decimal(str(slippage))))
+        return Amount(value=str(value), assetCode=debit.assetCode, assetScale=debit.assetScale)
+
+    def get_rate(self, amount: int | str, slippage: float) -> IndicativeRate:
+        return IndicativeRate(
+            rate=str(round(self.rate, 6)),
+            receive_amount=str(amount),
+            receive_asset_code=self.quote.receiveAmount.assetCode.root,
+            debit_amount=self.get_debit_amount(amount).value,
+            max_debit_amount=self.get_debit_amount(amount, slippage).value,
+            debit_asset_code=self.quote.debitAmount.assetCode.root,
+            expires_at=self.expires_at,
+        )
+
+
+# Shared by every `QuoteService` in this process, since the endpoints build one per request
+_locks = KeyedLocks()
+
+
+class QuoteService:
+    """
+    Cached indicative quotes for the corridor of an `OpenPaymentsService`, from its buyer (sender) to its seller
+    (receiver) wallet.
+
+    Entries are shared by every worker through Redis, or kept in process with `OPEN_PAYMENTS_STATE_STORE=memory`.
+    Concurrent misses for the same bucket within a process wait on a single quote.
+    """
+
+    def __init__(
+        self,
+        service: OpenPaymentsService,
+        *,
+        backend=None,
+        expiry_margin: int = None,
+        default_ttl: int = None,
+        slippage: float = None,
+    ):
+        self.service = service
+        if backend is None:
+            if settings.OPEN_PAYMENTS_STATE_STORE == "memory":
+                backend = get_memory_backend()
+            else:
+                backend = RedisCacheBackend(async_redis=get_async_redis(), prefix="fx-quote")
+        self.backend = backend
+        self.expiry_margin = settings.FX_QUOTE_EXPIRY_MARGIN if expiry_margin is None else expiry_margin
+        self.default_ttl = default_ttl or settings.FX_QUOTE_DEFAULT_TTL
+        self.slippage = settings.FX_QUOTE_SLIPPAGE if slippage is None else slippage
+
+    @property
+    def sender_wallet(self) -> str:
+        return str(self.service.buyer_wallet.id)
+
+    @property
+    def receiver_wallet(self) -> str:
+        return str(self.service.seller_wallet.id)
+
+    def get_key(self, bucket: int) -> str:
+        return f"{self.sender_wallet}|{self.receiver_wallet}|{bucket}"
+
+    def _is_usable(self, cached: Optional[IndicativeQuote], margin: float) -> bool:
+        return cached is not None and cached.expires_at - timedelta(seconds=margin) > datetime.now(timezone.utc)
+
+    async def aget_cached(self, bucket: int) -> Optional[IndicativeQuote]:
+        data = await self.backend.aget(self.get_key(bucket))
+        return IndicativeQuote.model_validate_json(data) if data else None
+
+    async def arequest(self, bucket: int) -> IndicativeQuote:
+        """
+        Quote a probe incoming payment for `bucket` and cache the result. The probe expires with the quote, so it
+        is never paid.
+        """
+        expires_at = datetime.now(timezone.utc) + timedelta(seconds=self.default_ttl)
+        with flow_step("indicative_quote"):
+            incoming_payment = await self.service.arequest_incoming_payment(amount=bucket, expires_at=expires_at)
+            quote = await self.service.arequest_quote(incoming_payment_id=incoming_payment.id)
+        indicative = IndicativeQuote(
+            sender_wallet=self.sender_wallet,
+            receiver_wallet=self.receiver_wallet,
+            bucket=bucket,
+            quote=quote,
+            expires_at=parse_expires_at(quote) or expires_at,
+        )
+        ttl = int((indicative.expires_at - datetime.now(timezone.utc)).total_seconds()) - self.expiry_margin
+        if ttl > 0:
+            await self.backend.aset(self.get_key(bucket), indicative.model_dump_json(), ttl)
+        return indicative
+
+    async def aget_indicative_quote(self, *, amount: int | str) -> IndicativeQuote:
+        """
+        A quote for the amount's bucket, from the cache while it has more than `expiry_margin` seconds left.
+        """
+        bucket = get_amount_bucket(int(amount))
+        cached = await self.aget_cached(bucket)
+        if self._is_usable(cached, self.expiry_margin):
+            return cached
+        async with _locks.alock(self.get_key(bucket)):
+            cached = await self.aget_cached(bucket)
+            if self._is_usable(cached, self.expiry_margin):
+                return cached
+            return await self.arequest(bucket)
+
+    async def aget_rate(self, *, amount: int | str) -> IndicativeRate:
+        indicative = await self.aget_indicative_quote(amount=amount)
+        return indicative.get_rate(amount, self.slippage)
+
+    async def arefresh(self, amounts: list[int] = None, *, within: float = None) -> int:
+        """
+        Requote every bucket of `amounts` that is missing or expires within `within` seconds. Returns how many were
+        requoted.
+        """
+        amounts = settings.FX_QUOTE_REFRESH_AMOUNTS if amounts is None else amounts
+        within = 2 * settings.FX_QUOTE_REFRESH_SCHEDULE if within is None else within
+        buckets = sorted({get_amount_bucket(amount) for amount in amounts})
+        stale = [
+            bucket
+            for bucket in buckets
+            if not self._is_usable(await self.aget_cached(bucket), within + self.expiry_margin)
+        ]
+        results = await asyncio.gather(*(self.arequest(bucket) for bucket in stale), return_exceptions=True)
+        for bucket, result in zip(stale, results):
+            if isinstance(result, Exception):
+                logger.warning(f"Refreshing the indicative quote for {bucket} failed: {result}")
+        return sum(1 for result in results if not isinstance(result, Exception))
+
+    async def arefresh_forever(self, schedule: float = None) -> None:
+        """
+        Refresh the hot buckets on a fixed schedule, without Celery beat.
+        """
+        schedule = schedule or settings.FX_QUOTE_REFRESH_SCHEDULE
+        while True:
+            try:
+                await self.arefresh(within=2 * schedule)
+            except Exception as e:
+                logger.error(f"Indicative quote refresh failed: {e}")
+            await asyncio.sleep(schedule)
+
+
+_memory_backend: MemoryCacheBackend | None = None
+
+
+def get_memory_backend() -> MemoryCacheBackend:
+    """Process-local quote cache, for development."""
+    global _memory_backend
+    if _memory_backend is None:
+        _memory_backend = MemoryCacheBackend()
+    return _memory_backend
+
+
+async def acreate_migrante_quote_service() -> QuoteService:
+    """Quote service for the MIGRANTE (USD) -> FINSUS (MXN) corridor."""
+    return QuoteService(await acreate_migrante_payment_service())
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+
+    async def main() -> None:
+        await (await acreate_migrante_quote_service()).arefresh_forever()
+
+    asyncio.run(main())
@@ -0,0 +1,302 @@
+"""Constructoken - Interledger Hackathon Prototype
+
+Settlement reconciliation of outgoing payments.
+
+Creating an outgoing payment only starts it: the buyer's wallet then sends it, and `sentAmount` counts up until the
+whole `debitAmount` is sent, or the payment is marked `failed`. Every outgoing payment a flow creates is queued in the
+payment store, with the access token of its grant, and this worker checks the due ones in batches:
+
+- Due payments are grouped by the resource server they live on, with at most `RECONCILIATION_PER_RESOURCE_SERVER`
+  requests in flight against any one server. A server whose circuit is open is skipped until it closes.
+- When a wallet has at least `RECONCILIATION_LIST_THRESHOLD` due payments, its outgoing payments are listed, newest
+  first, instead of read one by one. The listing stops once every due payment has been seen.
+- The interval between checks of a payment doubles, from `RECONCILIATION_MIN_INTERVAL` up to
+  `RECONCILIATION_MAX_INTERVAL`, while its `sentAmount` does not move, and drops back to the minimum when it does.
+- A payment still unsettled after `RECONCILIATION_MAX_AGE` seconds, or that can no longer be read, is given up as
+  `Unknown`.
+
+The final state and `sentAmount` of each payment are written to its OpenReceipt, in one commit per run, before the
+payment leaves the queue. Checks only read, so a payment checked twice by overlapping runs is harmless.
+"""
+
+import asyncio
+import logging
+import random
+from collections import defaultdict
+from contextlib import aclosing
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+from urllib.parse import urlparse
+
+from httpx import HTTPStatusError
+
+from app import crud
+from app.core.config import settings
+from app.db.session import SessionLocal
+from app.open_payments_sdk.client.client import AsyncOpenPaymentsClient
+from app.open_payments_sdk.models.resource import OutgoingPayment
+from app.schema_types import PaymentSettlementType
+from app.schemas.payments import UnsettledPayment
+from app.services.payment_store import PaymentStore, get_payment_store
+from app.utils.open_payments_client import get_async_op_client, get_circuit_breaker, get_configured_account
+
+logger = logging.getLogger(__name__)
+
+
+def get_settlement(payment: OutgoingPayment) -> PaymentSettlementType:
+    if payment.failed:
+        return PaymentSettlementType.Failed
+    if int(payment.sentAmount.value) >= int(payment.debitAmount.value):
+        return PaymentSettlementType.Completed
+    return PaymentSettlementType.Pending
+
+
+def get_resource_server(payment: UnsettledPayment) -> str:
+    return str(payment.id).rpartition("/outgoing-payments/")[0]
+
+
+@dataclass
+class ReconciliationRun:
+    """
+    Outcome of one reconciliation run, by payment id.
+    """
+
+    settled: dict[str, PaymentSettlementType] = field(default_factory=dict)
+    latest: dict[str, OutgoingPayment] = field(default_factory=dict)
+    pending: list[UnsettledPayment] = field(default_factory=list)
+
+    def __str__(self) -> str:
+        counts = defaultdict(int)
+        for settlement in self.settled.values():
+            counts[settlement.value] += 1
+        settled = ", ".join(f"{count} {settlement.lower()}" for settlement, count in sorted(counts.items()))
+        return f"{settled or '0 settled'}, {len(self.pending)} pending"
+
+
+class SettlementReconciler:
+    """
+    Checks due unsettled outgoing payments and records the settled ones on their receipts.
+    """
+
+    def __init__(
+        self,
+        *,
+        store: PaymentStore = None,
+        batch_size: int = None,
+        per_resource_server: int = None,
+        list_threshold: int = None,
+        min_interval: float = None,
+        max_interval: float = None,
+        max_age: int = None,
+    ):
+        self.store = store or get_payment_store()
+        self.batch_size = batch_size or settings.RECONCILIATION_BATCH_SIZE
+        self.per_resource_server = per_resource_server or settings.RECONCILIATION_PER_RESOURCE_SERVER
+        self.list_threshold = list_threshold or settings.RECONCILIATION_LIST_THRESHOLD
+        self.min_interval = min_interval or settings.RECONCILIATION_MIN_INTERVAL
+        self.max_interval = max_interval or settings.RECONCILIATION_MAX_INTERVAL
+        self.max_age = max_age or settings.RECONCILIATION_MAX_AGE
+
+    def get_next_check(self, payment: UnsettledPayment, now: datetime) -> datetime:
+        """
+        Exponential backoff on the checks since `sentAmount` last moved, with 20% jitter so that payments queued
+        together drift apart.
+        """
+        interval = min(self.min_interval * 2**payment.checks, self.max_interval)
+        return now + timedelta(seconds=interval * random.uniform(0.8, 1.2))
+
+    def _client(self, payment: UnsettledPayment) -> AsyncOpenPaymentsClient:
+        account = get_configured_account(payment.client)
+        if account is None:
+            raise ValueError(f"No credentials for the client {payment.client}")
+        return get_async_op_client(
+            wallet_address=account.walletAddressUrl, key_id=account.keyId, private_key=account.privateKey
+        )
+
+    async def _arotate_token(self, *, client: AsyncOpenPaymentsClient, payment: UnsettledPayment) -> bool:
+        if payment.manage_url is None:
+            return False
+        auth_server_endpoint, _, token_id = str(payment.manage_url).rpartition("/token/")
+        try:
+            token = await client.access_tokens.post_rotate_access_token(
+                token_id=token_id, auth_server_endpoint=auth_server_endpoint, access_token=payment.access_token
+            )
+        except HTTPStatusError as e:
+            logger.info(f"Rotating the token of outgoing payment {payment.id} failed ({e.response.status_code})")
+            return False
+        payment.access_token, payment.manage_url = token.value, token.manage
+        return True
+
+    async def aget_payment(self, payment: UnsettledPayment) -> OutgoingPayment:
+        """
+        Read the payment, rotating its access token once if the resource server rejects it.
+        """
+        client = self._client(payment)
+        resource_server, _, payment_id = str(payment.id).rpartition("/outgoing-payments/")
+        try:
+            return await client.outgoing_payments.get_outgoing_payment(
+                payment_id=payment_id, resource_server_endpoint=resource_server, access_token=payment.access_token
+            )
+        except HTTPStatusError as e:
+            if e.response.status_code != 401 or not await self._arotate_token(client=client, payment=payment):
+                raise
+        return await client.outgoing_payments.get_outgoing_payment(
+            payment_id=payment_id, resource_server_endpoint=resource_server, access_token=payment.access_token
+        )
+
+    async def alist_payments(self, payments: list[UnsettledPayment]) -> dict[str, OutgoingPayment]:
+        """
+        Find the payments, all from one wallet, in its listing of outgoing payments, by id. Payments the listing
+        does not reach are left out.
+        """
+        newest = max(payments, key=lambda payment: payment.created_at)
+        remaining = {str(payment.id) for payment in payments}
+        # The payment is created before it is queued, allow for clock skew with the resource server
+        since = min(payment.created_at for payment in payments) - timedelta(minutes=5)
+        found = {}
+        listing = self._client(newest).outgoing_payments.iter_outgoing_payments(
+            wallet_address=str(newest.wallet_address),
+            resource_server_endpoint=get_resource_server(newest),
+            access_token=newest.access_token,
+            since=since,
+        )
+        async with aclosing(listing) as outgoing_payments:
+            async for outgoing_payment in outgoing_payments:
+                if str(outgoing_payment.id) in remaining:
+                    found[str(outgoing_payment.id)] = outgoing_payment
+                    remaining.discard(str(outgoing_payment.id))
+                    if not remaining:
+                        break
+        return found
+
+    def _update(
+        self, *, payment: UnsettledPayment, outgoing_payment: OutgoingPayment, now: datetime, run: ReconciliationRun
+    ) -> None:
+        settlement = get_settlement(outgoing_payment)
+        run.latest[str(payment.id)] = outgoing_payment
+        if settlement != PaymentSettlementType.Pending:
+            run.settled[str(payment.id)] = settlement
+            return
+        if outgoing_payment.sentAmount.value != payment.sent_amount:
+            payment.sent_amount, payment.checks = outgoing_payment.sentAmount.value, 0
+        else:
+            payment.checks += 1
+        self._reschedule(payment=payment, now=now, run=run)
+
+    def _reschedule(self, *, payment: UnsettledPayment, now: datetime, run: ReconciliationRun) -> None:
+        if now - payment.created_at > timedelta(seconds=self.max_age):
+            logger.warning(f"Outgoing payment {payment.id} is still unsettled after {self.max_age}s, giving up")
+            run.settled[str(payment.id)] = PaymentSettlementType.Unknown
+            return
+        payment.next_check_at = self.get_next_check(payment, now)
+        run.pending.append(payment)
+
+    async def _acheck(
+        self, *, payment: UnsettledPayment, limit: asyncio.Semaphore, now: datetime, run: ReconciliationRun
+    ) -> None:
+        try:
+            async with limit:
+                outgoing_payment = await self.aget_payment(payment)
+        except HTTPStatusError as e:
+            if e.response.status_code in (401, 403, 404):
+                # The payment can no longer be read with this grant
+                logger.warning(f"Outgoing payment {payment.id} cannot be read ({e.response.status_code}), giving up")
+                run.settled[str(payment.id)] = PaymentSettlementType.Unknown
+                return
+            logger.info(f"Checking outgoing payment {payment.id} failed: {e}")
+        except Exception as e:
+            logger.info(f"Checking outgoing payment {payment.id} failed: {e}")
+        else:
+            self._update(payment=payment, outgoing_payment=outgoing_payment, now=now, run=run)
+            return
+        payment.checks += 1
+        self._reschedule(payment=payment, now=now, run=run)
+
+    async def _acheck_resource_server(
+        self, *, resource_server: str, payments: list[UnsettledPayment], now: datetime, run: ReconciliationRun
+    ) -> None:
+        if get_circuit_breaker().is_open(urlparse(resource_server).hostname):
+            for payment in payments:
+                self._reschedule(payment=payment, now=now, run=run)
+            return
+        limit = asyncio.Semaphore(self.per_resource_server)
+        by_wallet = defaultdict(list)
+        for payment in payments:
+            by_wallet[str(payment.wallet_address)].append(payment)
+        single = []
+        for wallet_payments in by_wallet.values():
+            if len(wallet_payments) < self.list_threshold:
+                single.extend(wallet_payments)
+                continue
+            try:
+                async with limit:
+                    found = await self.alist_payments(wallet_payments)
+            except Exception as e:
+                logger.info(f"Listing the outgoing payments of {wallet_payments[0].wallet_address} failed: {e}")
+                found = {}
+            for payment in wallet_payments:
+                if str(payment.id) in found:
+                    self._update(payment=payment, outgoing_payment=found[str(payment.id)], now=now, run=run)
+                else:
+                    single.append(payment)
+        await asyncio.gather(*(self._acheck(payment=payment, limit=limit, now=now, run=run) for payment in single))
+
+    def record(self, *, run: ReconciliationRun) -> None:
+        with SessionLocal() as db:
+            crud.openreceipt.settle_payments(
+                db,
+                settlements=run.settled,
+                outgoing_payments=[run.latest[payment_id] for payment_id in run.settled if payment_id in run.latest],
+            )
+
+    async def arun(self, now: datetime = None) -> ReconciliationRun:
+        """
+        Check every due payment once, up to `batch_size`.
+        """
+        now = now or datetime.now(timezone.utc)
+        run = ReconciliationRun()
+        due = await self.store.aget_due_unsettled_payments(now=now, limit=self.batch_size)
+        if not due:
+            return run
+        by_resource_server = defaultdict(list)
+        for payment in due:
+            by_resource_server[get_resource_server(payment)].append(payment)
+        await asyncio.gather(
+            *(
+                self._acheck_resource_server(resource_server=resource_server, payments=payments, now=now, run=run)
+                for resource_server, payments in by_resource_server.items()
+            )
+        )
+        if run.settled:
+            try:
+                await asyncio.to_thread(self.record, run=run)
+            except Exception as e:
+                # Kept queued, and recorded by a later run
+                logger.error(f"Recording {len(run.settled)} settled outgoing payments failed: {e}")
+                for payment in due:
+                    if str(payment.id) in run.settled:
+                        payment.next_check_at = self.get_next_check(payment, now)
+                        run.pending.append(payment)
+                run.settled = {}
+            else:
+                await self.store.aremove_unsettled_payments(payment_ids=list(run.settled))
+        await self.store.aqueue_unsettled_payments(payments=run.pending)
+        logger.info(f"Reconciliation run: {run}")
+        return run
+
+    async def arun_forever(self, schedule: float = None) -> None:
+        """
+        Run the reconciliation on a fixed schedule, without Celery beat.
+        """
+        schedule = schedule or settings.RECONCILIATION_SCHEDULE
+        while True:
+            try:
+                await self.arun()
+            except Exception as e:
+                logger.error(f"Reconciliation run failed: {e}")
+            await asyncio.sleep(schedule)
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(SettlementReconciler().arun_forever())
@@ -0,0 +1,276 @@
+"""Constructoken - Interledger Hackathon Prototype
+
+Scheduled execution of recurring payments.
+
+Each active grant carries an ISO 8601 repeating interval (`R12/2025-01-01T00:00:00Z/P1M`). A grant is due once per
+interval: when the current interval has started, the grant has payments left, and it has not been paid since the
+interval started. Missed intervals are not caught up.
+
+Due grants run concurrently, at most `RECURRING_PAYMENTS_CONCURRENCY` at a time and at most
+`RECURRING_PAYMENTS_PER_AUTH_SERVER` against any one auth server, each after a random delay so that a batch does
+not hit the wallets in a single burst. Every grant interval is claimed in the payment store first, so overlapping
+runs or workers never pay the same interval twice. The claim is released when a payment fails before it is sent, or
+is rejected; once it may have been made, the claim is held until the interval ends.
+"""
+
+import asyncio
+import calendar
+import logging
+import math
+import random
+import re
+from collections import defaultdict
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+
+from app.core.config import settings
+from app.schemas.payments import RecurringPaymentGrant
+from app.services.open_payments_service import (
+    OpenPaymentsService,
+    PaymentOutcomeUnknown,
+    acreate_recurring_payment_service,
+)
+from app.services.payment_store import PaymentStore, get_payment_store
+
+logger = logging.getLogger(__name__)
+
+DURATION_PATTERN = re.compile(
+    r"^P(?!$)(?:(?P<years>\d+)Y)?(?:(?P<months>\d+)M)?(?:(?P<weeks>\d+)W)?(?:(?P<days>\d+)D)?"
+    r"(?:T(?=\d)(?:(?P<hours>\d+)H)?(?:(?P<minutes>\d+)M)?(?:(?P<seconds>\d+(?:\.\d+)?)S)?)?$"
+)
+
+
+def add_months(value: datetime, months: int) -> datetime:
+    """
+    Calendar month arithmetic, clamping the day to the end of shorter months.
+    """
+    month = value.month - 1 + months
+    year = value.year + month // 12
+    month = month % 12 + 1
+    return value.replace(year=year, month=month, day=min(value.day, calendar.monthrange(year, month)[1]))
+
+
+def parse_datetime(value: str) -> datetime:
+    parsed = datetime.fromisoformat(value)
+    return parsed if parsed.tzinfo else parsed.replace(tzinfo=timezone.utc)
+
+
+@dataclass
+class RepeatingInterval:
+    """
+    An ISO 8601 repeating interval. Calendar parts of the duration (years, months) are kept apart from the exact
+    ones, so `P1M` from January 31st lands on the last day of February.
+    """
+
+    start: datetime
+    months: int = 0
+    delta: timedelta = field(default_factory=timedelta)
+    repetitions: Optional[int] = None  # None repeats forever
+
+    @classmethod
+    def parse(cls, value: str) -> "RepeatingInterval":
+        """
+        Parse `R[n]/<start>/<duration>` or `R[n]/<start>/<end>`.
+        """
+        parts = value.strip().split("/")
+        if len(parts) != 3 or not parts[0].startswith("R"):
+            raise ValueError(f"Unsupported repeating interval: {value}")
+        repeat, start, end = parts
+        repetitions = int(repeat[1:]) if repeat[1:] else None
+        start = parse_datetime(start)
+        if end.startswith("P"):
+            match = DURATION_PATTERN.match(end)
+            if not match:
+                raise ValueError(f"Invalid duration: {end}")
+            amounts = {name: float(amount) for name, amount in match.groupdict().items() if amount}
+            interval = cls(
+                start=start,
+                months=int(amounts.get("years", 0)) * 12 + int(amounts.get("months", 0)),
+                delta=timedelta(
+                    weeks=amounts.get("weeks", 0),
+                    days=amounts.get("days", 0),
+                    hours=amounts.get("hours", 0),
+                    minutes=amounts.get("minutes", 0),
+                    seconds=amounts.get("seconds", 0),
+                ),
+                repetitions=repetitions,
+            )
+        else:
+            interval = cls(start=start, delta=parse_datetime(end) - start, repetitions=repetitions)
+        if interval.boundary(1) <= start:
+            raise ValueError(f"Repeating interval must have a positive duration: {value}")
+        return interval
+
+    def boundary(self, index: int) -> datetime:
+        """
+        Start of the interval at `index`, counting from 0.
+        """
+        return add_months(self.start, index * self.months) + index * self.delta
+
+    def current_index(self, now: datetime) -> Optional[int]:
+        """
+        Index of the interval `now` falls in, or None before the first or after the last one.
+        """
+        if now < self.start:
+            return None
+        # Estimate from an average month length, then step to the exact boundary
+        average = timedelta(days=self.months * 30.436875) + self.delta
+        index = int((now - self.start) / average)
+        while self.boundary(index) > now:
+            index -= 1
+        while self.boundary(index + 1) <= now:
+            index += 1
+        if self.repetitions is not None and index >= self.repetitions:
+            return None
+        return index
+
+
+def get_due_interval(grant: RecurringPaymentGrant, now: datetime) -> Optional[int]:
+    """
+    The interval the grant should be paid for now, or None if it is not due.
+    """
+    if grant.payments_made >= grant.max_payments:
+        return None
+    interval = RepeatingInterval.parse(grant.interval)
+    index = interval.current_index(now)
+    if index is None:
+        return None
+    if grant.last_payment_at and grant.last_payment_at >= interval.boundary(index):
+        return None
+    return index
+
+
+@dataclass
+class SchedulerRun:
+    """
+    Outcome of one scheduler run, by grant id.
+    """
+
+    succeeded: list[str] = field(default_factory=list)
+    failed: dict[str, str] = field(default_factory=dict)
+    skipped: list[str] = field(default_factory=list)
+
+    def __str__(self) -> str:
+        return f"{len(self.succeeded)} paid, {len(self.failed)} failed, {len(self.skipped)} skipped"
+
+
+class RecurringPaymentScheduler:
+    """
+    Finds due recurring grants and executes their payments in concurrent batches.
+    """
+
+    def __init__(
+        self,
+        *,
+        store: PaymentStore = None,
+        concurrency: int = None,
+        per_auth_server: int = None,
+        jitter: float = None,
+        claim_ttl: int = None,
+    ):
+        self.store = store or get_payment_store()
+        self.concurrency = concurrency or settings.RECURRING_PAYMENTS_CONCURRENCY
+        self.per_auth_server = per_auth_server or settings.RECURRING_PAYMENTS_PER_AUTH_SERVER
+        self.jitter = settings.RECURRING_PAYMENTS_JITTER if jitter is None else jitter
+        self.claim_ttl = claim_ttl or settings.RECURRING_PAYMENTS_CLAIM_TTL
+
+    async def aget_due_grants(self, now: datetime) -> list[tuple[RecurringPaymentGrant, int]]:
+        due = []
+        for grant in await self.store.aget_active_recurring_grants():
+            try:
+                index = get_due_interval(grant, now)
+            except ValueError as e:
+                logger.warning(f"Recurring grant {grant.id} has an invalid interval: {e}")
+                continue
+            if index is not None:
+                due.append((grant, index))
+        return due
+
+    def get_claim_ttl(self, grant: RecurringPaymentGrant, index: int, now: datetime) -> int:
+        """
+        Seconds to claim an interval for: until it ends, so that a payment which may have been made is never retried
+        in it, and at least `claim_ttl`.
+        """
+        end = RepeatingInterval.parse(grant.interval).boundary(index + 1)
+        return max(self.claim_ttl, math.ceil((end - now).total_seconds()))
+
+    async def _execute(
+        self,
+        *,
+        service: OpenPaymentsService,
+        grant: RecurringPaymentGrant,
+        index: int,
+        now: datetime,
+        limit: asyncio.Semaphore,
+        auth_server_limits: dict[str, asyncio.Semaphore],
+        run: SchedulerRun,
+    ) -> None:
+        grant_id = str(grant.id)
+        await asyncio.sleep(random.uniform(0, self.jitter))
+        async with limit:
+            ttl = self.get_claim_ttl(grant, index, now)
+            if not await self.store.aclaim_recurring_interval(grant_id=grant_id, interval=index, ttl=ttl):
+                run.skipped.append(grant_id)
+                return
+            try:
+                auth_server = await service.aget_sender_auth_server(wallet_address=grant.sender_wallet)
+                async with auth_server_limits[auth_server]:
+                    await service.aexecute_recurring_payment(grant_id=grant.id)
+            except PaymentOutcomeUnknown as e:
+                # The payment may have been made, so the interval stays claimed and is never paid again
+                logger.error(f"Recurring payment for grant {grant_id} failed: {e}")
+                run.failed[grant_id] = str(e)
+            except Exception as e:
+                # Nothing was paid: release the interval, so the next run retries it
+                await self.store.arelease_recurring_interval(grant_id=grant_id, interval=index)
+                logger.error(f"Recurring payment for grant {grant_id} failed: {e}")
+                run.failed[grant_id] = str(e)
+            else:
+                run.succeeded.append(grant_id)
+
+    async def arun(self, now: datetime = None) -> SchedulerRun:
+        """
+        Execute every due recurring payment once.
+        """
+        now = now or datetime.now(timezone.utc)
+        run = SchedulerRun()
+        due = await self.aget_due_grants(now)
+        if not due:
+            return run
+        service = await acreate_recurring_payment_service()
+        limit = asyncio.Semaphore(self.concurrency)
+        auth_server_limits = defaultdict(lambda: asyncio.Semaphore(self.per_auth_server))
+        # Failures are collected per grant, so one failing payment never cancels the rest of the batch
+        async with asyncio.TaskGroup() as group:
+            for grant, index in due:
+                group.create_task(
+                    self._execute(
+                        service=service,
+                        grant=grant,
+                        index=index,
+                        now=now,
+                        limit=limit,
+                        auth_server_limits=auth_server_limits,
+                        run=run,
+                    )
+                )
+        logger.info(f"Recurring payments run: {run}")
+        return run
+
+    async def arun_forever(self, schedule: float = None) -> None:
+        """
+        Run the scheduler on a fixed schedule, without Celery beat.
+        """
+        schedule = schedule or settings.RECURRING_PAYMENTS_SCHEDULE
+        while True:
+            try:
+                await self.arun()
+            except Exception as e:
+                logger.error(f"Recurring payments run failed: {e}")
+            await asyncio.sleep(schedule)
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(RecurringPaymentScheduler().arun_forever())
@@ -0,0 +1,432 @@
+"""Constructoken - Interledger Hackathon Prototype
+
+Split payments: one buyer authorization pays every contributor of a product in a single pass.
+
+Following https://openpayments.dev/guides/split-payments/, the service creates an incoming payment on each
+recipient's wallet and quotes each one on the buyer's wallet, all concurrently. The buyer is then asked for a single
+interactive outgoing payment grant, limited to the sum of the quoted debits. Once the buyer confirms, the outgoing
+payments are created in parallel with the one access token.
+
+Outgoing payments cannot be reversed, so a split that fails part way is compensated rather than rolled back:
+
+- A leg rejected by the buyer's resource server (e.g. its quote expired while the buyer was authorizing) is
+  requoted once, and paid if the new quote still fits what is left of the grant.
+- A leg that still cannot be paid has its incoming payment completed, so no funds can land on it later, and is
+  reported as `failed`.
+- A leg whose outcome is unknown (a transport error or 5xx) is left open and reported as `unknown`, since the
+  payment may have been created. It is never retried here, so the buyer cannot be debited twice.
+
+If starting the split fails, the incoming payments already created are completed before the error is raised.
+If the buyer's grant cannot be continued, no leg has been paid: the split is kept, its incoming payments still open,
+so that the callback can be retried.
+"""
+
+import asyncio
+import logging
+import time
+from decimal import Decimal
+from typing import Iterable, Optional
+
+from httpx import HTTPStatusError
+from ulid import ULID
+
+from app import crud
+from app.core.config import settings
+from app.db.session import SessionLocal
+from app.open_payments_sdk.api.auth import InteractRef
+from app.open_payments_sdk.models.resource import Amount
+from app.open_payments_sdk.models.wallet import WalletAddress
+from app.open_payments_sdk.utils.metrics import flow_step
+from app.schemas.openpayments.order import OpenOrderCreate
+from app.schemas.payments import PendingSplitPayment, SplitPaymentLeg, SplitRecipient
+from app.services.open_payments_service import OpenPaymentsService, PaymentConflict
+from app.services.payment_executor import get_payment_executor
+from app.utils.open_payments_client import get_merchant_wallet
+from app.utilities.openpayments import paymentsparser
+
+logger = logging.getLogger(__name__)
+
+INCOMING_PAYMENT_ACTIONS = ["create", "read", "read-all", "complete", "list"]
+
+
+def split_amount(amount: int | str, ratios: list[float]) -> list[str]:
+    """
+    Split `amount` by `ratios`, in whole units of the smallest currency unit, so that the shares sum to `amount`.
+
+    Units lost to rounding go to the shares with the largest remainders.
+    """
+    amount = int(amount)
+    total = sum(Decimal(str(ratio)) for ratio in ratios)
+    if amount <= 0 or total <= 0:
+        raise ValueError("A split needs a positive amount and at least one positive ratio")
+    exact = [amount * Decimal(str(ratio)) / total for ratio in ratios]
+    shares = [int(share) for share in exact]
+    by_remainder = sorted(range(len(ratios)), key=lambda index: exact[index] - shares[index], reverse=True)
+    for index in by_remainder[: amount - sum(shares)]:
+        shares[index] += 1
+    return [str(share) for share in shares]
+
+
+def get_contributor_recipients(contributors: Iterable, *, amount: int | str, asset_code: str) -> list[SplitRecipient]:
+    """
+    Recipients for a product's `contributors`, sharing `amount` by their `ratio`.
+
+    Each contributor is paid into the first wallet of its Actor's Creator in `asset_code`, the price's currency.
+    Contributors without a ratio are skipped; a contributor with a ratio but no such wallet raises `ValueError`.
+    """
+    recipients = []
+    for contributor in contributors:
+        if not contributor.ratio:
+            continue
+        creator = contributor.actor.creator if contributor.actor else None
+        wallet = None
+        if creator:
+            wallet = next((wallet for wallet in creator.op_wallets if str(wallet.assetCode) == asset_code), None)
+        if not wallet:
+            raise ValueError(f"Contributor {contributor.id} has no {asset_code} wallet to be paid into")
+        recipients.append((contributor.ratio, wallet.address, wallet.creator_id))
+    if not recipients:
+        raise ValueError("The product has no contributors to split the payment between")
+    shares = split_amount(amount, [ratio for ratio, _, _ in recipients])
+    return [
+        SplitRecipient(wallet_address=address, amount=share, creator_id=creator_id)
+        for (_, address, creator_id), share in zip(recipients, shares)
+        if int(share)
+    ]
+
+
+class SplitPaymentService:
+    """
+    Split payments from the buyer of an `OpenPaymentsService` to any number of recipient wallets.
+
+    The service's seller wallet is the client for every call: it requests the incoming payment grant on each
+    recipient's authorization server, and the quote and outgoing payment grants on the buyer's.
+    """
+
+    def __init__(self, service: OpenPaymentsService):
+        self.service = service
+        # Per-step durations of the last split run by this service, in seconds
+        self.flow_timings: dict[str, float] = {}
+
+    @property
+    def store(self):
+        return self.service.store
+
+    def get_product_recipients(self, *, order: OpenOrderCreate) -> list[SplitRecipient]:
+        """
+        Recipients for an order of a Product: its contributors, sharing the order's Price by their ratio.
+        """
+        with SessionLocal() as db:
+            price = crud.price.get(db, id=order.price_id)
+            if not price or price.product_id != str(order.product_id):
+                raise ValueError(f"Price {order.price_id} not found for Product {order.product_id}")
+            return get_contributor_recipients(
+                price.product.contributors, amount=price.amount, asset_code=price.currency.code
+            )
+
+    async def aget_product_recipients(self, **kwargs) -> list[SplitRecipient]:
+        return await get_payment_executor().arun(self.get_product_recipients, **kwargs)
+
+    ###################################################################################################
+    # RECIPIENT LEGS
+    ###################################################################################################
+
+    async def _acall_with_recipient_token(self, *, wallet: WalletAddress, call):
+        return await self.service._acall_with_grant_token(
+            client=self.service.async_client,
+            client_id=str(self.service.seller_wallet.id),
+            grant="incoming-payment",
+            actions=INCOMING_PAYMENT_ACTIONS,
+            endpoint=wallet.authServer,
+            call=call,
+        )
+
+    async def aget_recipient_wallet(self, *, wallet_address: str) -> WalletAddress:
+        wallet_address = paymentsparser.normalise_wallet_address(wallet_address=wallet_address)
+        return await self.service.async_client.wallet.get_wallet_address(wallet_address)
+
+    async def arequest_leg(self, *, leg: SplitPaymentLeg) -> SplitPaymentLeg:
+        """
+        Create the leg's incoming payment on the recipient's wallet and quote it on the buyer's wallet.
+
+        The incoming payment id is set on the leg as soon as it exists, so that a failed quote can be compensated.
+        """
+        wallet = await self.aget_recipient_wallet(wallet_address=leg.wallet_address)
+        payment = self.service._incoming_payment_request(amount=leg.amount, wallet=wallet)
+        with flow_step("split_incoming_payment"):
+            incoming_payment = await self._acall_with_recipient_token(
+                wallet=wallet,
+                call=lambda access_token: self.service.async_client.incoming_payments.post_create_payment(
+                    payment=payment,
+                    resource_server_endpoint=str(wallet.resourceServer),
+                    access_token=access_token,
+                ),
+            )
+        leg.incoming_payment = incoming_payment
+        leg.incoming_payment_id = incoming_payment.id
+        return await self.arequote_leg(leg=leg)
+
+    async def arequote_leg(self, *, leg: SplitPaymentLeg) -> SplitPaymentLeg:
+        with flow_step("split_quote"):
+            quote = await self.service.arequest_quote(incoming_payment_id=leg.incoming_payment_id)
+        leg.quote = quote
+        leg.quote_id = quote.id
+        leg.debit_amount = quote.debitAmount
+        return leg
+
+    async def aclose_leg(self, *, leg: SplitPaymentLeg) -> bool:
+        """
+        Complete the leg's incoming payment so that nothing more can be paid into it. Returns False if that failed.
+        """
+        if leg.incoming_payment_id is None:
+            return True
+        resource_server, _, payment_id = str(leg.incoming_payment_id).rpartition("/incoming-payments/")
+        try:
+            wallet = await self.aget_recipient_wallet(wallet_address=leg.wallet_address)
+            with flow_step("split_compensation"):
+                await self._acall_with_recipient_token(
+                    wallet=wallet,
+                    call=lambda access_token: self.service.async_client.incoming_payments.post_complete_incoming_payment(
+                        payment_id=payment_id, resource_server_endpoint=resource_server, access_token=access_token
+                    ),
+                )
+            return True
+        except Exception as e:
+            logger.error(f"Closing the incoming payment {leg.incoming_payment_id} of a failed split leg failed: {e}")
+            return False
+
+    def _total_debit(self, legs: list[SplitPaymentLeg]) -> Amount:
+        asset_codes = {(leg.debit_amount.assetCode.root, leg.debit_amount.assetScale.root) for leg in legs}
+        if len(asset_codes) != 1:
+            raise ValueError(f"Split quotes are debited in more than one asset: {sorted(asset_codes)}")
+        first = legs[0].debit_amount
+        return Amount(
+            value=str(sum(int(leg.debit_amount.value) for leg in legs)),
+            assetCode=first.assetCode,
+            assetScale=first.assetScale,
+        )
+
+    ###################################################################################################
+    # START
+    ###################################################################################################
+
+    async def astart(
+        self, *, recipients: list[SplitRecipient], debit_limit: Amount = None, order: OpenOrderCreate = None
+    ) -> tuple[str, PendingSplitPayment]:
+        """
+        Start a split payment: quote every recipient's share and ask the buyer for one grant covering them all.
+
+        With `debit_limit`, the split fails before the buyer is asked if the quoted debits sum to more than it. With
+        an `order`, the split is recorded as an OpenOrder, its incoming payments and quotes written in one commit.
+
+        Returns:
+            Tuple of (redirect_url, pending_split_payment)
+        """
+        if not recipients:
+            raise ValueError("A split payment needs at least one recipient")
+        started = time.perf_counter()
+        legs = [SplitPaymentLeg(**recipient.model_dump()) for recipient in recipients]
+        results = await asyncio.gather(*(self.arequest_leg(leg=leg) for leg in legs), return_exceptions=True)
+        self.flow_timings = {"legs": time.perf_counter() - started}
+        try:
+            errors = [result for result in results if isinstance(result, BaseException)]
+            if errors:
+                raise errors[0]
+            total = self._total_debit(legs)
+            if debit_limit is not None and int(total.value) > int(debit_limit.value):
+                raise ValueError(
+                    f"The split costs {total.value} {total.assetCode.root}, more than the limit of "
+                    f"{debit_limit.value} {debit_limit.assetCode.root}"
+                )
+            pending_split = PendingSplitPayment(
+                id=ULID(), buyer=self.service.buyer_wallet, legs=legs, debit_limit=total
+            )
+            step_started = time.perf_counter()
+            with flow_step("interactive_grant"):
+                interactive_response = await self.service.async_client.grants.post_grant_request(
+                    grant_request=self.service._interactive_grant_request(
+                        debit_amount=total,
+                        pending_payment=pending_split,
+                        redirect_uri=f"{self.service.redirect_uri}{pending_split.id}",
+                    ),
+                    auth_server_endpoint=str(self.service.buyer_wallet.authServer),
+                )
+            self.flow_timings["interactive_grant"] = time.perf_counter() - step_started
+        except Exception:
+            # Close every incoming payment that was created, including those of legs whose quote failed
+            await asyncio.gather(*(self.aclose_leg(leg=leg) for leg in legs))
+            raise
+        pending_split.finish_id = interactive_response.root.interact.finish
+        pending_split.continue_id = interactive_response.root.cont.access_token.value
+        pending_split.continue_url = interactive_response.root.cont.uri
+        if order is not None:
+            with flow_step("record_order"):
+                await self.service.arecord_order(
+                    transaction_id=pending_split.id,
+                    order=order,
+                    incoming_payments=[leg.incoming_payment for leg in legs],
+                    quotes=[leg.quote for leg in legs],
+                    interactive_grant=interactive_response,
+                )
+            pending_split.order_id = pending_split.id
+        await self.store.asave_pending_split_payment(payment=pending_split)
+        self.flow_timings["total"] = time.perf_counter() - started
+        return interactive_response.root.interact.redirect, pending_split
+
+    ###################################################################################################
+    # COMPLETE
+    ###################################################################################################
+
+    def _verify_split(
+        self, *, pending_split: Optional[PendingSplitPayment], payment_id: ULID, interact_ref: str, received_hash: str
+    ) -> PendingSplitPayment:
+        if not pending_split:
+            raise ValueError(f"Split payment {payment_id} not found in pending split payments")
+        if not paymentsparser.verify_response_hash(
+            incoming_payment_id=str(pending_split.id),
+            finish_id=pending_split.finish_id,
+            interact_ref=interact_ref,
+            auth_server_url=str(pending_split.buyer.authServer),
+            received_hash=received_hash,
+        ):
+            raise ValueError(f"Hash invalid for split payment `{payment_id}`")
+        return pending_split
+
+    async def _apay_leg(self, *, leg: SplitPaymentLeg, access_token: str) -> None:
+        with flow_step("split_outgoing_payment"):
+            outgoing_payment = await self.service.async_client.outgoing_payments.post_create_payment(
+                payment=self.service._outgoing_payment_request(
+                    wallet_id=self.service.buyer_wallet.id, quote_id=leg.quote_id
+                ),
+                resource_server_endpoint=str(self.service.buyer_wallet.resourceServer),
+                access_token=access_token,
+            )
+        leg.outgoing_payment = outgoing_payment
+        leg.outgoing_payment_id = outgoing_payment.id
+        leg.status = "paid"
+        leg.error = None
+
+    def _set_failure(self, *, leg: SplitPaymentLeg, error: BaseException) -> None:
+        leg.error = str(error) or type(error).__name__
+        # Only a rejection proves that the payment was not created
+        rejected = isinstance(error, HTTPStatusError) and error.response.status_code < 500
+        leg.status = "failed" if rejected else "unknown"
+
+    async def _apay_legs(self, *, legs: list[SplitPaymentLeg], access_token: str) -> None:
+        """
+        Pay `legs` in parallel, setting each leg's status.
+        """
+        results = await asyncio.gather(
+            *(self._apay_leg(leg=leg, access_token=access_token) for leg in legs), return_exceptions=True
+        )
+        for leg, result in zip(legs, results):
+            if isinstance(result, BaseException):
+                self._set_failure(leg=leg, error=result)
+
+    async def _aretry_rejected_legs(self, *, pending_split: PendingSplitPayment, access_token: str) -> None:
+        """
+        Requote the rejected legs and pay those that fit what is left of the grant.
+        """
+        rejected = [leg for leg in pending_split.legs if leg.status == "failed"]
+        if not rejected:
+            return
+        spent = sum(int(leg.debit_amount.value) for leg in pending_split.legs if leg.status in ("paid", "unknown"))
+        remaining = int(pending_split.debit_limit.value) - spent
+        results = await asyncio.gather(*(self.arequote_leg(leg=leg) for leg in rejected), return_exceptions=True)
+        retry = []
+        for leg, result in zip(rejected, results):
+            if isinstance(result, BaseException):
+                self._set_failure(leg=leg, error=result)
+                leg.status = "failed"
+            elif int(leg.debit_amount.value) > remaining:
+                leg.error = f"Requoted debit {leg.debit_amount.value} exceeds the {remaining} left of the grant"
+            else:
+                remaining -= int(leg.debit_amount.value)
+                retry.append(leg)
+        await self._apay_legs(legs=retry, access_token=access_token)
+
+    async def acomplete(
+        self, *, payment_id: ULID, interact_ref: str, received_hash: str
+    ) -> PendingSplitPayment:
+        """
+        Complete a split payment after the buyer's authorization, paying every leg in parallel.
+
+        Returns the split with the outcome of each leg: `paid`, `failed` (compensated) or `unknown`.
+        """
+        # Claim the split before reading it: once paid it is gone, and its claim is left to expire
+        if not await self.store.aclaim_pending_split_payment(payment_id=str(payment_id)):
+            raise PaymentConflict(f"Split payment {payment_id} is already being completed")
+        pending_split = await self.store.aget_pending_split_payment(payment_id=str(payment_id))
+
+        try:
+            self._verify_split(
+                pending_split=pending_split,
+                payment_id=payment_id,
+                interact_ref=interact_ref,
+                received_hash=received_hash,
+            )
+            with flow_step("continuation"):
+                grant = await self.service.async_client.grants.post_grant_continuation_request(
+                    interact_ref=InteractRef(**dict(interact_ref=interact_ref)),
+                    continue_uri=str(pending_split.continue_url),
+                    access_token=pending_split.continue_id,
+                )
+        except BaseException:
+            # No leg was paid: unlock the split, its incoming payments still open, so that the callback can be retried
+            if pending_split is not None:
+                await self.store.arelease_pending_split_payment(payment=pending_split)
+            raise
+        access_token = grant.access_token.value
+
+        legs = pending_split.legs
+        await self._apay_legs(legs=legs, access_token=access_token)
+        await self.store.adelete_pending_split_payment(payment_id=str(payment_id))
+        await self._aretry_rejected_legs(pending_split=pending_split, access_token=access_token)
+
+        closed = await asyncio.gather(*(self.aclose_leg(leg=leg) for leg in legs if leg.status == "failed"))
+        if not all(closed):
+            logger.error(f"Split {payment_id} has failed legs whose incoming payments are still open")
+        unpaid = [leg for leg in legs if leg.status != "paid"]
+        if unpaid:
+            logger.warning(
+                f"Split {payment_id} paid {len(legs) - len(unpaid)} of {len(legs)} recipients: "
+                + ", ".join(f"{leg.wallet_address}={leg.status}" for leg in unpaid)
+            )
+        paid = [leg for leg in legs if leg.status == "paid"]
+        await self.service.aqueue_unsettled_payments(
+            outgoing_payments=[leg.outgoing_payment for leg in paid], access_token=grant.access_token
+        )
+        if pending_split.order_id is not None and paid:
+            with flow_step("record_receipt"):
+                await self.service.arecord_receipt(
+                    order_id=pending_split.order_id,
+                    outgoing_payments=[leg.outgoing_payment for leg in paid],
+                    # Quotes taken for legs requoted in this request
+                    quotes=[leg.quote for leg in paid if leg.quote is not None],
+                    creators={
+                        str(leg.outgoing_payment.receiver.root): str(leg.creator_id)
+                        for leg in paid
+                        if leg.creator_id is not None
+                    },
+                )
+        return pending_split
+
+
+###################################################################################################
+# HELPER FUNCTIONS FOR CREATING SERVICE INSTANCES
+###################################################################################################
+
+
+async def acreate_split_payment_service() -> SplitPaymentService:
+    """
+    Create service for split purchases (FINSUS -> product contributors).
+
+    The Merchant wallet is the platform's client; Buyer = FINSUS (sender)
+    """
+    return SplitPaymentService(
+        await OpenPaymentsService.acreate(
+            seller=get_merchant_wallet(),
+            buyer=settings.FINSUS_WALLET_ADDRESS,
+            redirect_uri=f"{settings.DEFAULT_REDIRECT_AFTER_AUTH}split/",
+        )
+    )
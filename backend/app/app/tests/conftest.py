@@ -7,7 +7,7 @@ from sqlalchemy.orm import Session
 from app.core.config import settings
 from app.db.session import SessionLocal
 from app.main import app
-from app.tests.utils.creator import authentication_token_from_email
+from app.tests.utils.user import authentication_token_from_email
 from app.tests.utils.utils import get__token_headers
 
 
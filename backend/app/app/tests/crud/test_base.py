@@ -0,0 +1,192 @@
+import pytest
+from sqlalchemy.orm import Session
+
+from app import crud
+from app.models import Status, Tag
+from app.schemas.creator import CreatorCreate
+from app.tests.utils.utils import random_email, random_lower_string
+
+
+def random_uri() -> str:
+    return f"https://remote.example/statuses/{random_lower_string()}"
+
+
+def get_content(db_obj: Status) -> dict[str, str]:
+    return {str(lang): term.content for lang, term in db_obj.content.items()}
+
+
+def test_create_tags_keeps_input_order(db: Session) -> None:
+    existing, first, second = (random_lower_string() for _ in range(3))
+    [db_existing] = crud.status.create_tags(db, objs_in=[{"name": existing}])
+    db_objs = crud.status.create_tags(
+        db, objs_in=[{"name": first}, {"name": f"#{existing}"}, {"name": second}, {"name": first}, {"name": ""}]
+    )
+    db.commit()
+    assert [db_obj.name for db_obj in db_objs] == [first, existing, second]
+    # Existing names are reused, not duplicated
+    assert db_objs[1].id == db_existing.id
+    assert db.query(Tag).filter(Tag.name.in_([first, existing, second])).count() == 3
+
+
+def test_create_tags_empty(db: Session) -> None:
+    assert crud.status.create_tags(db, objs_in=[{"name": ""}, {}]) == []
+
+
+def test_paginate_pages_once_in_order(db: Session) -> None:
+    actor_uri = random_uri()
+    ids = crud.status.create_many(db, objs_in=[{"URI": random_uri(), "actorURI": actor_uri} for _ in range(7)])
+    query = db.query(Status).filter(Status.actorURI == actor_uri)
+    pages, after = [], None
+    while True:
+        page = crud.status.paginate(query, after=after, limit=3)
+        pages.append([db_obj.id for db_obj in page])
+        after = crud.status.get_next_cursor(page, limit=3)
+        if after is None:
+            break
+    assert [len(page) for page in pages] == [3, 3, 1]
+    assert [id for page in pages for id in page] == sorted(ids)
+
+
+def test_paginate_full_last_page(db: Session) -> None:
+    actor_uri = random_uri()
+    ids = crud.status.create_many(db, objs_in=[{"URI": random_uri(), "actorURI": actor_uri} for _ in range(4)])
+    query = db.query(Status).filter(Status.actorURI == actor_uri)
+    page = crud.status.paginate(query, limit=2)
+    after = crud.status.get_next_cursor(page, limit=2)
+    page = crud.status.paginate(query, after=after, limit=2)
+    after = crud.status.get_next_cursor(page, limit=2)
+    assert [db_obj.id for db_obj in page] == sorted(ids)[2:]
+    # A full last page still gives a cursor, and the page after it is empty
+    assert after == sorted(ids)[-1]
+    page = crud.status.paginate(query, after=after, limit=2)
+    assert page == []
+    assert crud.status.get_next_cursor(page, limit=2) is None
+
+
+def test_paginate_rows_added_between_pages(db: Session) -> None:
+    actor_uri = random_uri()
+    ids = crud.status.create_many(db, objs_in=[{"URI": random_uri(), "actorURI": actor_uri} for _ in range(4)])
+    query = db.query(Status).filter(Status.actorURI == actor_uri)
+    first = crud.status.paginate(query, limit=2)
+    # Rows created after the first page are newer, so they come after the cursor
+    ids += crud.status.create_many(db, objs_in=[{"URI": random_uri(), "actorURI": actor_uri}])
+    rest = crud.status.paginate(query, after=crud.status.get_next_cursor(first, limit=2), page_break=True)
+    assert [db_obj.id for db_obj in first + rest] == sorted(ids)
+
+
+def test_token_cursor_is_not_the_token(db: Session) -> None:
+    creator = crud.creator.create(db, obj_in=CreatorCreate(email=random_email(), password=random_lower_string()))
+    secrets = [random_lower_string() for _ in range(3)]
+    for secret in secrets:
+        crud.token.create(db, obj_in=secret, creator_obj=creator)
+    page = crud.token.get_multi(creator=creator, limit=2)
+    after = crud.token.get_next_cursor(page, limit=2)
+    assert after == page[-1].id
+    assert after not in secrets
+    rest = crud.token.get_multi(creator=creator, after=after, limit=2)
+    assert sorted(db_obj.token for db_obj in page + rest) == sorted(secrets)
+
+
+def test_create_many(db: Session) -> None:
+    tag = random_lower_string()
+    objs_in = [
+        {"URI": random_uri(), "language": "en", "content": {"en": "First"}, "tag": [{"name": tag}]},
+        {"URI": random_uri(), "content": {"en": "Second", "es": "Segundo"}, "sensitive": True},
+    ]
+    ids = crud.status.create_many(db, objs_in=objs_in)
+    first, second = (crud.status.get(db, id) for id in ids)
+    assert first.URI == objs_in[0]["URI"]
+    assert get_content(first) == {"en": "First"}
+    assert first.tag == [tag]
+    assert second.URI == objs_in[1]["URI"]
+    assert get_content(second) == {"en": "Second", "es": "Segundo"}
+    assert second.sensitive
+    assert second.tag == []
+
+
+def test_create_many_empty(db: Session) -> None:
+    assert crud.status.create_many(db, objs_in=[]) == []
+
+
+def test_upsert_many_by_uri(db: Session) -> None:
+    existing_uri, new_uri = random_uri(), random_uri()
+    old_tag, new_tag = random_lower_string(), random_lower_string()
+    [existing_id] = crud.status.create_many(
+        db,
+        objs_in=[
+            {
+                "URI": existing_uri,
+                "sensitive": True,
+                "likesURI": "https://remote.example/likes",
+                "content": {"en": "Old", "es": "Viejo"},
+                "tag": [{"name": old_tag}],
+            }
+        ],
+    )
+    ids = crud.status.upsert_many_by_uri(
+        db,
+        objs_in=[
+            {"URI": new_uri, "sensitive": True, "content": {"en": "New"}},
+            {"URI": existing_uri, "content": {"en": "Edited"}, "tag": [{"name": new_tag}]},
+        ],
+    )
+    assert ids[1] == existing_id
+    db.expire_all()
+    new, existing = (crud.status.get(db, id) for id in ids)
+    assert new.URI == new_uri
+    assert new.sensitive
+    assert get_content(new) == {"en": "New"}
+    # Fields not given are kept, terms are replaced by language, and tags given replace the old ones
+    assert existing.sensitive
+    assert existing.likesURI == "https://remote.example/likes"
+    assert get_content(existing) == {"en": "Edited", "es": "Viejo"}
+    assert existing.tag == [new_tag]
+
+
+def test_upsert_many_by_uri_groups_by_fields(db: Session) -> None:
+    first_uri, second_uri = random_uri(), random_uri()
+    crud.status.create_many(
+        db,
+        objs_in=[
+            {"URI": first_uri, "sensitive": True, "likesURI": "https://remote.example/likes/1"},
+            {"URI": second_uri, "sensitive": True, "likesURI": "https://remote.example/likes/2"},
+        ],
+    )
+    # One row updates `sensitive` only, the other `likesURI` only
+    ids = crud.status.upsert_many_by_uri(
+        db,
+        objs_in=[
+            {"URI": first_uri, "sensitive": False},
+            {"URI": second_uri, "likesURI": "https://remote.example/likes/3"},
+        ],
+    )
+    db.expire_all()
+    first, second = (crud.status.get(db, id) for id in ids)
+    assert not first.sensitive
+    assert first.likesURI == "https://remote.example/likes/1"
+    assert second.sensitive
+    assert second.likesURI == "https://remote.example/likes/3"
+
+
+def test_upsert_many_by_uri_keeps_tags_not_given(db: Session) -> None:
+    uri, tag = random_uri(), random_lower_string()
+    [id] = crud.status.create_many(db, objs_in=[{"URI": uri, "tag": [{"name": tag}]}])
+    crud.status.upsert_many_by_uri(db, objs_in=[{"URI": uri, "sensitive": True}])
+    db.expire_all()
+    assert crud.status.get(db, id).tag == [tag]
+
+
+def test_upsert_many_by_uri_last_wins(db: Session) -> None:
+    uri = random_uri()
+    ids = crud.status.upsert_many_by_uri(
+        db, objs_in=[{"URI": uri, "content": {"en": "First"}}, {"URI": uri, "content": {"en": "Last"}}]
+    )
+    assert len(ids) == 1
+    db.expire_all()
+    assert get_content(crud.status.get(db, ids[0])) == {"en": "Last"}
+
+
+def test_upsert_many_by_uri_needs_uri(db: Session) -> None:
+    with pytest.raises(ValueError):
+        crud.status.upsert_many_by_uri(db, objs_in=[{"URI": random_uri()}, {"content": {"en": "No URI"}}])
+    assert crud.status.upsert_many_by_uri(db, objs_in=[]) == []
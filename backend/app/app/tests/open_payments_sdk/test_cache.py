@@ -0,0 +1,63 @@
+import asyncio
+
+import httpx
+
+from app.open_payments_sdk.api.wallet import AsyncWallet, Wallet
+from app.open_payments_sdk.http import AsyncHttpClient, HttpClient
+from app.open_payments_sdk.utils.cache import KeyedLocks, WalletCache
+
+URL = "https://wallet.example/alice"
+DOCUMENT = {"id": URL, "assetCode": "USD", "assetScale": 2}
+
+
+def test_lock_dropped_once_released() -> None:
+    locks = KeyedLocks()
+    with locks.lock("a"):
+        with locks.lock("b"):
+            assert set(locks._locks) == {"a", "b"}
+    assert not locks._locks
+
+
+def test_async_lock_kept_while_waited_on() -> None:
+    locks = KeyedLocks()
+    order = []
+
+    async def hold(name: str) -> None:
+        async with locks.alock("key"):
+            order.append(f"{name} in")
+            await asyncio.sleep(0.01)
+            order.append(f"{name} out")
+
+    async def run() -> None:
+        await asyncio.gather(hold("first"), hold("second"))
+
+    asyncio.run(run())
+    # The second caller waited on the same lock, and the lock was dropped after both
+    assert order == ["first in", "first out", "second in", "second out"]
+    assert not locks._async_locks
+
+
+def revalidated(request: httpx.Request) -> httpx.Response:
+    """Serve the document once, stale, then confirm it with a 304 that must not be stored."""
+    if request.headers.get("if-none-match") == '"v1"':
+        return httpx.Response(304, headers={"ETag": '"v1"', "Cache-Control": "no-store"})
+    return httpx.Response(200, json=DOCUMENT, headers={"ETag": '"v1"', "Cache-Control": "no-cache"})
+
+
+def test_not_modified_without_store() -> None:
+    client = HttpClient(http_timeout=5)
+    client.client = httpx.Client(transport=httpx.MockTransport(revalidated))
+    wallet = Wallet(client, cache=WalletCache())
+    assert wallet._get_cached("wallet", URL, wallet._wallet_address_request) == DOCUMENT
+    assert wallet._get_cached("wallet", URL, wallet._wallet_address_request) == DOCUMENT
+
+
+def test_async_not_modified_without_store() -> None:
+    client = AsyncHttpClient(http_timeout=5)
+    client.client = httpx.AsyncClient(transport=httpx.MockTransport(revalidated))
+    wallet = AsyncWallet(client, cache=WalletCache())
+
+    async def get_twice() -> list[dict]:
+        return [await wallet._get_cached("wallet", URL, wallet._wallet_address_request) for _ in range(2)]
+
+    assert asyncio.run(get_twice()) == [DOCUMENT, DOCUMENT]
@@ -0,0 +1,139 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+
+import pytest
+
+from app.open_payments_sdk.models.resource import Pagination, PaymentListQuery
+from app.open_payments_sdk.utils.pagination import iterate_pages, iterate_payments
+
+WALLET_ADDRESS = "https://wallet.example/alice"
+NOW = datetime(2025, 3, 15, tzinfo=timezone.utc)
+
+
+def make_page(payments: list, cursor: str = None) -> SimpleNamespace:
+    """A page of `payments`, with a next page at `cursor` if it is set."""
+    pagination = Pagination(
+        startCursor="start", endCursor=cursor or "end", hasNextPage=cursor is not None, hasPrevPage=False
+    )
+    return SimpleNamespace(pagination=pagination, result=payments)
+
+
+def make_payments(start: int, count: int) -> list:
+    """Payments `start` to `start + count`, each an hour older than the last."""
+    return [
+        SimpleNamespace(id=f"payment-{index}", createdAt=NOW - timedelta(hours=index))
+        for index in range(start, start + count)
+    ]
+
+
+class Listing:
+    """Stub `fetch_page` serving `pages` by cursor, recording every request and whether it was cancelled."""
+
+    def __init__(self, pages: dict, delay: float = 0):
+        self.pages = pages
+        self.delay = delay
+        self.requested = []
+        self.cancelled = []
+
+    async def __call__(self, query: PaymentListQuery) -> SimpleNamespace:
+        self.requested.append(query.cursor)
+        try:
+            await asyncio.sleep(self.delay)
+        except asyncio.CancelledError:
+            self.cancelled.append(query.cursor)
+            raise
+        return self.pages[query.cursor]
+
+
+def three_pages() -> dict:
+    return {
+        None: make_page(make_payments(0, 3), cursor="c1"),
+        "c1": make_page(make_payments(3, 3), cursor="c2"),
+        "c2": make_page(make_payments(6, 2)),
+    }
+
+
+async def collect(iterator) -> list:
+    return [item async for item in iterator]
+
+
+@pytest.mark.parametrize("prefetch", [True, False])
+def test_follows_cursors(prefetch: bool) -> None:
+    listing = Listing(three_pages())
+    pages = asyncio.run(collect(iterate_pages(listing, wallet_address=WALLET_ADDRESS, page_size=3, prefetch=prefetch)))
+    assert [len(page.result) for page in pages] == [3, 3, 2]
+    assert listing.requested == [None, "c1", "c2"]
+
+
+def test_prefetch_requests_next_page_early() -> None:
+    async def first_page(prefetch: bool) -> list:
+        listing = Listing(three_pages())
+        pages = iterate_pages(listing, wallet_address=WALLET_ADDRESS, prefetch=prefetch)
+        await anext(pages)
+        # Let a prefetch start while the caller holds the first page
+        await asyncio.sleep(0)
+        await pages.aclose()
+        return listing.requested
+
+    assert asyncio.run(first_page(prefetch=True)) == [None, "c1"]
+    assert asyncio.run(first_page(prefetch=False)) == [None]
+
+
+def test_aclose_cancels_prefetch() -> None:
+    listing = Listing(three_pages())
+
+    async def close_early() -> None:
+        pages = iterate_pages(listing, wallet_address=WALLET_ADDRESS)
+        await anext(pages)
+        listing.delay = 60
+        await asyncio.sleep(0)
+        await pages.aclose()
+        # Give the cancelled request a turn to unwind
+        await asyncio.sleep(0)
+
+    asyncio.run(close_early())
+    assert listing.requested == [None, "c1"]
+    assert listing.cancelled == ["c1"]
+
+
+def test_empty_page_without_cursor() -> None:
+    # An empty page carries no cursors, even if it claims a next page
+    empty = SimpleNamespace(pagination=Pagination(hasNextPage=True, hasPrevPage=False), result=[])
+    listing = Listing({None: empty})
+    pages = asyncio.run(collect(iterate_pages(listing, wallet_address=WALLET_ADDRESS)))
+    assert [page.result for page in pages] == [[]]
+    assert listing.requested == [None]
+
+
+def test_page_without_cursor_is_last() -> None:
+    page = SimpleNamespace(pagination=Pagination(hasNextPage=True, hasPrevPage=False), result=make_payments(0, 2))
+    listing = Listing({None: page})
+    payments = asyncio.run(collect(iterate_payments(iterate_pages(listing, wallet_address=WALLET_ADDRESS))))
+    assert len(payments) == 2
+    assert listing.requested == [None]
+
+
+def test_iterate_payments_newest_first() -> None:
+    listing = Listing(three_pages())
+    payments = asyncio.run(collect(iterate_payments(iterate_pages(listing, wallet_address=WALLET_ADDRESS))))
+    assert [payment.id for payment in payments] == [f"payment-{index}" for index in range(8)]
+
+
+@pytest.mark.parametrize("prefetch", [True, False])
+def test_since_stops_early(prefetch: bool) -> None:
+    listing = Listing(three_pages())
+    pages = iterate_pages(listing, wallet_address=WALLET_ADDRESS, prefetch=prefetch)
+    since = NOW - timedelta(hours=4, minutes=30)
+    payments = asyncio.run(collect(iterate_payments(pages, since=since)))
+    assert [payment.id for payment in payments] == [f"payment-{index}" for index in range(5)]
+    # Payment 5 on the second page is older, so the third page is never requested
+    assert listing.requested == [None, "c1"]
+
+
+def test_stop_at_stops_early() -> None:
+    listing = Listing(three_pages())
+    pages = iterate_pages(listing, wallet_address=WALLET_ADDRESS, prefetch=False)
+    payments = asyncio.run(collect(iterate_payments(pages, stop_at=lambda payment: payment.id == "payment-2")))
+    assert [payment.id for payment in payments] == ["payment-0", "payment-1"]
+    assert listing.requested == [None]
@@ -0,0 +1,180 @@
+import asyncio
+import time
+
+import httpx
+import pytest
+
+from app.open_payments_sdk import http
+from app.open_payments_sdk.http import AsyncHttpClient, HttpClient
+from app.open_payments_sdk.utils.resilience import CircuitBreaker, CircuitOpenError, RetryPolicy
+
+URL = "https://wallet.example/alice/outgoing-payments"
+
+
+class Upstream:
+    """MockTransport handler that answers with the next of `responses`, repeating the last one."""
+
+    def __init__(self, *responses):
+        self.responses = list(responses)
+        self.calls = 0
+
+    def __call__(self, request: httpx.Request) -> httpx.Response:
+        response = self.responses[min(self.calls, len(self.responses) - 1)]
+        self.calls += 1
+        if isinstance(response, Exception):
+            raise response
+        return response
+
+
+@pytest.fixture
+def sleeps(monkeypatch: pytest.MonkeyPatch) -> list:
+    """Record retry delays instead of sleeping."""
+    delays = []
+    monkeypatch.setattr(http.time, "sleep", delays.append)
+    return delays
+
+
+def make_client(upstream: Upstream, **kwargs) -> HttpClient:
+    client = HttpClient(http_timeout=5, **kwargs)
+    client.client = httpx.Client(transport=httpx.MockTransport(upstream))
+    return client
+
+
+def send(client: HttpClient, method: str = "GET", headers: dict = None) -> httpx.Response:
+    return client.send(client.build_request(method, URL, headers=headers))
+
+
+def test_retries_idempotent_method(sleeps: list) -> None:
+    upstream = Upstream(httpx.Response(503), httpx.Response(200))
+    client = make_client(upstream, retry=RetryPolicy(attempts=3))
+    assert send(client).status_code == 200
+    assert upstream.calls == 2
+    assert len(sleeps) == 1
+
+
+def test_gives_up_after_attempts(sleeps: list) -> None:
+    upstream = Upstream(httpx.Response(502))
+    client = make_client(upstream, retry=RetryPolicy(attempts=3))
+    with pytest.raises(httpx.HTTPStatusError):
+        send(client)
+    assert upstream.calls == 3
+
+
+def test_does_not_retry_post(sleeps: list) -> None:
+    upstream = Upstream(httpx.Response(503), httpx.Response(200))
+    client = make_client(upstream, retry=RetryPolicy(attempts=3))
+    with pytest.raises(httpx.HTTPStatusError):
+        send(client, "POST")
+    assert upstream.calls == 1
+
+
+def test_does_not_retry_post_transport_error(sleeps: list) -> None:
+    upstream = Upstream(httpx.ConnectError("refused"), httpx.Response(200))
+    client = make_client(upstream, retry=RetryPolicy(attempts=3))
+    with pytest.raises(httpx.ConnectError):
+        send(client, "POST")
+    assert upstream.calls == 1
+
+
+def test_retries_post_with_idempotency_key(sleeps: list) -> None:
+    upstream = Upstream(httpx.ConnectError("refused"), httpx.Response(201))
+    client = make_client(upstream, retry=RetryPolicy(attempts=3))
+    assert send(client, "POST", headers={"Idempotency-Key": "abc"}).status_code == 201
+    assert upstream.calls == 2
+
+
+def test_does_not_retry_client_error(sleeps: list) -> None:
+    upstream = Upstream(httpx.Response(404), httpx.Response(200))
+    client = make_client(upstream, retry=RetryPolicy(attempts=3))
+    with pytest.raises(httpx.HTTPStatusError):
+        send(client)
+    assert upstream.calls == 1
+
+
+def test_honours_retry_after(sleeps: list) -> None:
+    upstream = Upstream(httpx.Response(429, headers={"Retry-After": "1.5"}), httpx.Response(200))
+    client = make_client(upstream, retry=RetryPolicy(attempts=3, max_backoff=2.0))
+    assert send(client).status_code == 200
+    assert sleeps == [1.5]
+
+
+def test_caps_retry_after() -> None:
+    policy = RetryPolicy(attempts=3, max_backoff=2.0)
+    assert policy.get_delay(1, httpx.Response(503, headers={"Retry-After": "120"})) == 2.0
+    assert policy.get_delay(1, httpx.Response(503, headers={"Retry-After": "Wed, 21 Oct 2015 07:28:00 GMT"})) == 0.0
+
+
+def test_backoff_bounds() -> None:
+    policy = RetryPolicy(attempts=5, backoff=0.2, max_backoff=0.5)
+    for attempt, bound in [(1, 0.2), (2, 0.4), (3, 0.5), (4, 0.5)]:
+        assert 0 <= policy.get_delay(attempt) <= bound
+    assert policy.get_delay(5) is None
+
+
+def test_circuit_opens_probes_and_closes() -> None:
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=0.05)
+    upstream = Upstream(httpx.Response(500), httpx.Response(500), httpx.Response(200))
+    client = make_client(upstream, circuit_breaker=breaker)
+    for _ in range(2):
+        with pytest.raises(httpx.HTTPStatusError):
+            send(client)
+    assert breaker.is_open("wallet.example")
+
+    # Open: fail fast without sending
+    with pytest.raises(CircuitOpenError):
+        send(client)
+    assert upstream.calls == 2
+
+    # After reset_timeout a single probe goes through, and its success closes the circuit
+    time.sleep(0.06)
+    assert send(client).status_code == 200
+    assert upstream.calls == 3
+    assert not breaker.is_open("wallet.example")
+    assert send(client).status_code == 200
+
+
+def test_failed_probe_reopens_circuit() -> None:
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0.05)
+    upstream = Upstream(httpx.ConnectError("refused"))
+    client = make_client(upstream, circuit_breaker=breaker)
+    with pytest.raises(httpx.ConnectError):
+        send(client)
+    time.sleep(0.06)
+    with pytest.raises(httpx.ConnectError):
+        send(client)
+    assert upstream.calls == 2
+    with pytest.raises(CircuitOpenError):
+        send(client)
+    assert upstream.calls == 2
+
+
+def test_single_probe_at_a_time() -> None:
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0.05)
+    breaker.record_failure("wallet.example")
+    time.sleep(0.06)
+    assert breaker.allow("wallet.example")
+    assert not breaker.allow("wallet.example")
+    # Other hosts are unaffected
+    assert breaker.allow("other.example")
+
+
+def test_open_circuit_stops_retries(sleeps: list) -> None:
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=30)
+    upstream = Upstream(httpx.Response(503))
+    client = make_client(upstream, retry=RetryPolicy(attempts=5), circuit_breaker=breaker)
+    with pytest.raises(httpx.HTTPStatusError):
+        send(client)
+    assert upstream.calls == 2
+
+
+def test_async_client_retries(monkeypatch: pytest.MonkeyPatch) -> None:
+    async def no_sleep(delay: float) -> None:
+        pass
+
+    monkeypatch.setattr(http.asyncio, "sleep", no_sleep)
+    upstream = Upstream(httpx.ReadTimeout("slow"), httpx.Response(200))
+    client = AsyncHttpClient(http_timeout=5, retry=RetryPolicy(attempts=3))
+    client.client = httpx.AsyncClient(transport=httpx.MockTransport(upstream))
+    response = asyncio.run(client.send(client.build_request("GET", URL)))
+    assert response.status_code == 200
+    assert upstream.calls == 2
@@ -0,0 +1,20 @@
+import pytest
+
+from app.benchmarks.mock_open_payments import MockOpenPaymentsServer
+from app.benchmarks.payment_flows import create_mock_server, use_mock_server
+from app.core.config import settings
+from app.services import payment_store
+from app.utils import open_payments_client
+
+
+@pytest.fixture
+def server(monkeypatch: pytest.MonkeyPatch) -> MockOpenPaymentsServer:
+    """Route Open Payments calls to a stand-in server, restoring the shared clients and store afterwards."""
+    monkeypatch.setattr(settings, "OPEN_PAYMENTS_STATE_STORE", "memory")
+    monkeypatch.setattr(payment_store, "_payment_store", None)
+    for name in ("_http_client", "_async_http_client", "_wallet_cache"):
+        monkeypatch.setattr(open_payments_client, name, getattr(open_payments_client, name))
+    mock_server = create_mock_server(verify_signatures=False)
+    use_mock_server(mock_server)
+    yield mock_server
+    open_payments_client.clear_op_clients()
@@ -0,0 +1,121 @@
+import asyncio
+
+import pytest
+from fastapi import HTTPException
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+
+from app.services.idempotency import REPLAYED_HEADER, MemoryIdempotencyStore
+
+
+class Receipt(BaseModel):
+    id: str
+
+
+def make_call(*responses):
+    """Return a call that gives (or raises) the next of `responses`, and the list of its calls."""
+    calls = []
+
+    async def call():
+        response = responses[len(calls)]
+        calls.append(response)
+        if isinstance(response, Exception):
+            raise response
+        return response
+
+    return call, calls
+
+
+def run(store: MemoryIdempotencyStore, call, *, key: str = "key", params: dict = None):
+    return asyncio.run(store.arun(scope="test", key=key, params=params or {"amount": 10}, call=call))
+
+
+def test_replay() -> None:
+    store = MemoryIdempotencyStore()
+    call, calls = make_call(Receipt(id="first"), Receipt(id="second"))
+    assert run(store, call) == Receipt(id="first")
+    response = run(store, call)
+    assert isinstance(response, JSONResponse)
+    assert response.status_code == 200
+    assert response.body == b'{"id":"first"}'
+    assert response.headers[REPLAYED_HEADER] == "true"
+    assert len(calls) == 1
+
+
+def test_without_key_always_runs() -> None:
+    store = MemoryIdempotencyStore()
+    call, calls = make_call(Receipt(id="first"), Receipt(id="second"))
+    assert run(store, call, key=None) == Receipt(id="first")
+    assert run(store, call, key=None) == Receipt(id="second")
+    assert len(calls) == 2
+
+
+def test_fingerprint_mismatch() -> None:
+    store = MemoryIdempotencyStore()
+    call, calls = make_call(Receipt(id="first"), Receipt(id="second"))
+    run(store, call, params={"amount": 10})
+    with pytest.raises(HTTPException) as e:
+        run(store, call, params={"amount": 20})
+    assert e.value.status_code == 422
+    assert len(calls) == 1
+
+
+def test_client_error_stored() -> None:
+    store = MemoryIdempotencyStore()
+    call, calls = make_call(HTTPException(status_code=400, detail="Bad wallet"), Receipt(id="second"))
+    with pytest.raises(HTTPException):
+        run(store, call)
+    response = run(store, call)
+    assert response.status_code == 400
+    assert response.body == b'{"detail":"Bad wallet"}'
+    assert len(calls) == 1
+
+
+def test_conflict_released() -> None:
+    store = MemoryIdempotencyStore()
+    call, calls = make_call(HTTPException(status_code=409, detail="Being completed"), Receipt(id="second"))
+    with pytest.raises(HTTPException):
+        run(store, call)
+    assert run(store, call) == Receipt(id="second")
+    assert len(calls) == 2
+
+
+@pytest.mark.parametrize("error", [HTTPException(status_code=502, detail="Upstream down"), RuntimeError("boom")])
+def test_server_error_released(error: Exception) -> None:
+    store = MemoryIdempotencyStore()
+    call, calls = make_call(error, Receipt(id="second"))
+    with pytest.raises(type(error)):
+        run(store, call)
+    assert run(store, call) == Receipt(id="second")
+    assert len(calls) == 2
+
+
+def test_in_flight_conflict() -> None:
+    store = MemoryIdempotencyStore(wait=0.1)
+    call, calls = make_call(Receipt(id="second"))
+    asyncio.run(store.aacquire("test:key"))
+    with pytest.raises(HTTPException) as e:
+        run(store, call)
+    assert e.value.status_code == 409
+    assert not calls
+
+
+def test_in_flight_waits_for_response() -> None:
+    store = MemoryIdempotencyStore(wait=2)
+    call, calls = make_call(Receipt(id="first"), Receipt(id="second"))
+
+    async def first_then_repeat():
+        async def slow_call():
+            await asyncio.sleep(0.2)
+            return await call()
+
+        first = asyncio.create_task(store.arun(scope="test", key="key", params={"amount": 10}, call=slow_call))
+        await asyncio.sleep(0)
+        repeat = await store.arun(scope="test", key="key", params={"amount": 10}, call=call)
+        return await first, repeat
+
+    first, repeat = asyncio.run(first_then_repeat())
+    assert first == Receipt(id="first")
+    assert repeat.headers[REPLAYED_HEADER] == "true"
+    assert repeat.body == b'{"id":"first"}'
+    assert len(calls) == 1
@@ -0,0 +1,63 @@
+import asyncio
+from urllib.parse import urlsplit
+
+import pytest
+
+from app.benchmarks.mock_open_payments import MockOpenPaymentsServer
+from app.services.open_payments_service import PaymentConflict, acreate_purchase_service
+from app.services.payment_store import get_payment_store
+
+
+def start_purchase(server: MockOpenPaymentsServer):
+    """Start a purchase and approve it, returning the service, the pending transaction and the interaction."""
+
+    async def start():
+        service = await acreate_purchase_service()
+        redirect, transaction = await service.aget_purchase_endpoint(amount="100000")
+        return service, transaction, server.approve(redirect)
+
+    return asyncio.run(start())
+
+
+def complete(service, transaction, interaction, received_hash: str = None):
+    return asyncio.run(
+        service.acomplete_payment(
+            transaction_id=transaction.id,
+            interact_ref=interaction.interact_ref,
+            received_hash=received_hash or interaction.hash,
+        )
+    )
+
+
+def test_repeated_callback_never_restores_payment(server: MockOpenPaymentsServer) -> None:
+    service, transaction, interaction = start_purchase(server)
+    complete(service, transaction, interaction)
+    store = get_payment_store()
+    # The claim outlives the paid transaction, so a repeated callback cannot take it
+    with pytest.raises(PaymentConflict):
+        complete(service, transaction, interaction)
+    # Once the claim has expired, the transaction is gone and is not written back
+    store.claims.clear()
+    with pytest.raises(ValueError, match="not found"):
+        complete(service, transaction, interaction)
+    assert store.get_pending_transaction(transaction_id=str(transaction.id)) is None
+    assert len(server.resources["outgoing-payments"]) == 1
+
+
+def test_invalid_hash_unlocks(server: MockOpenPaymentsServer) -> None:
+    service, transaction, interaction = start_purchase(server)
+    with pytest.raises(ValueError, match="Hash invalid"):
+        complete(service, transaction, interaction, received_hash="forged")
+    complete(service, transaction, interaction)
+    assert len(server.resources["outgoing-payments"]) == 1
+
+
+def test_failed_continuation_unlocks(server: MockOpenPaymentsServer) -> None:
+    service, transaction, interaction = start_purchase(server)
+    server.unhealthy[urlsplit(str(transaction.buyer.authServer)).hostname] = 503
+    with pytest.raises(Exception):
+        complete(service, transaction, interaction)
+    assert not server.resources["outgoing-payments"]
+    server.unhealthy.clear()
+    complete(service, transaction, interaction)
+    assert len(server.resources["outgoing-payments"]) == 1
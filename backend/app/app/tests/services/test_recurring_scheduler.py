@@ -0,0 +1,253 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+
+import httpx
+import pytest
+
+from app.benchmarks.mock_open_payments import MockOpenPaymentsServer
+from app.open_payments_sdk.api.resource import AsyncOutgoingPayments
+from app.schemas.payments import RecurringPaymentGrant
+from app.services import recurring_scheduler
+from app.services.open_payments_service import acreate_recurring_payment_service
+from app.services.payment_store import MemoryPaymentStore, get_payment_store
+from app.services.recurring_scheduler import RecurringPaymentScheduler, RepeatingInterval, get_due_interval
+
+
+def utc(*args) -> datetime:
+    return datetime(*args, tzinfo=timezone.utc)
+
+
+def make_grant(interval: str = "R12/2025-01-01T00:00:00Z/P1M", **kwargs) -> RecurringPaymentGrant:
+    return RecurringPaymentGrant(
+        sender_wallet="https://wallet.example/migrante",
+        receiver_wallet="https://wallet.example/finsus",
+        access_token="token",
+        continue_uri="https://auth.example/continue/1",
+        debit_amount_value="1000",
+        debit_amount_asset_code="USD",
+        debit_amount_asset_scale=2,
+        total_amount_cap="12000",
+        interval=interval,
+        max_payments=kwargs.pop("max_payments", 12),
+        **kwargs,
+    )
+
+
+def test_parse_duration() -> None:
+    interval = RepeatingInterval.parse("R12/2025-01-01T00:00:00Z/P1Y2M1W3DT4H")
+    assert interval.start == utc(2025, 1, 1)
+    assert interval.months == 14
+    assert interval.delta == timedelta(weeks=1, days=3, hours=4)
+    assert interval.repetitions == 12
+
+
+def test_parse_without_repetitions_or_timezone() -> None:
+    interval = RepeatingInterval.parse("R/2025-01-01T00:00:00/P1W")
+    assert interval.start == utc(2025, 1, 1)
+    assert interval.repetitions is None
+
+
+def test_parse_start_end() -> None:
+    interval = RepeatingInterval.parse("R3/2025-01-01T00:00:00Z/2025-01-01T06:00:00Z")
+    assert interval.months == 0
+    assert interval.delta == timedelta(hours=6)
+    assert interval.current_index(utc(2025, 1, 1, 13)) == 2
+    assert interval.current_index(utc(2025, 1, 1, 18)) is None
+
+
+@pytest.mark.parametrize(
+    "value",
+    [
+        "2025-01-01T00:00:00Z/P1M",
+        "R/2025-01-01T00:00:00Z",
+        "R/2025-01-01T00:00:00Z/P",
+        "R/2025-01-01T00:00:00Z/P1X",
+        "R/2025-01-01T00:00:00Z/PT0S",
+        "R/2025-01-01T00:00:00Z/2024-12-31T00:00:00Z",
+    ],
+)
+def test_parse_invalid(value: str) -> None:
+    with pytest.raises(ValueError):
+        RepeatingInterval.parse(value)
+
+
+def test_month_end_clamping() -> None:
+    interval = RepeatingInterval.parse("R/2025-01-31T00:00:00Z/P1M")
+    assert interval.boundary(1) == utc(2025, 2, 28)
+    assert interval.boundary(2) == utc(2025, 3, 31)
+    assert interval.boundary(13) == utc(2026, 2, 28)
+    leap = RepeatingInterval.parse("R/2024-01-31T00:00:00Z/P1M")
+    assert leap.boundary(1) == utc(2024, 2, 29)
+
+
+def test_current_index() -> None:
+    interval = RepeatingInterval.parse("R/2025-01-31T00:00:00Z/P1M")
+    assert interval.current_index(utc(2025, 1, 30)) is None
+    assert interval.current_index(utc(2025, 1, 31)) == 0
+    assert interval.current_index(utc(2025, 2, 27, 23, 59)) == 0
+    assert interval.current_index(utc(2025, 2, 28)) == 1
+    assert interval.current_index(utc(2025, 3, 30)) == 1
+    assert interval.current_index(utc(2025, 3, 31)) == 2
+    assert interval.current_index(utc(2035, 1, 31)) == 120
+
+
+def test_repetitions_limit() -> None:
+    interval = RepeatingInterval.parse("R3/2025-01-01T00:00:00Z/P1W")
+    assert interval.current_index(utc(2025, 1, 21, 23)) == 2
+    assert interval.current_index(utc(2025, 1, 22)) is None
+
+
+def test_due_interval() -> None:
+    now = utc(2025, 3, 15)
+    assert get_due_interval(make_grant(), now) == 2
+    # Paid before the current interval started
+    assert get_due_interval(make_grant(last_payment_at=utc(2025, 2, 20)), now) == 2
+    # Already paid in the current interval
+    assert get_due_interval(make_grant(last_payment_at=utc(2025, 3, 1)), now) is None
+    # Out of payments, or not started yet
+    assert get_due_interval(make_grant(payments_made=12), now) is None
+    assert get_due_interval(make_grant(), utc(2024, 12, 31)) is None
+    # Past the last repetition
+    assert get_due_interval(make_grant(interval="R2/2025-01-01T00:00:00Z/P1M"), now) is None
+
+
+def test_due_interval_invalid() -> None:
+    with pytest.raises(ValueError):
+        get_due_interval(make_grant(interval="every month"), utc(2025, 3, 15))
+
+
+class FakeService:
+    """Stands in for the recurring payment service, failing the first `failures` payments."""
+
+    def __init__(self, failures: int = 0, delay: float = 0):
+        self.failures = failures
+        self.delay = delay
+        self.payments = []
+
+    async def aget_sender_auth_server(self, *, wallet_address: str) -> str:
+        return "https://auth.example"
+
+    async def aexecute_recurring_payment(self, *, grant_id) -> None:
+        await asyncio.sleep(self.delay)
+        if self.failures:
+            self.failures -= 1
+            raise RuntimeError("Upstream unavailable")
+        self.payments.append(str(grant_id))
+
+
+@pytest.fixture
+def service(monkeypatch: pytest.MonkeyPatch) -> FakeService:
+    fake = FakeService()
+
+    async def acreate_recurring_payment_service():
+        return fake
+
+    monkeypatch.setattr(recurring_scheduler, "acreate_recurring_payment_service", acreate_recurring_payment_service)
+    return fake
+
+
+def make_scheduler(store: MemoryPaymentStore) -> RecurringPaymentScheduler:
+    return RecurringPaymentScheduler(store=store, jitter=0, claim_ttl=60)
+
+
+def test_scheduler_claims_interval_once(service: FakeService) -> None:
+    store = MemoryPaymentStore()
+    grant = make_grant()
+    store.save_active_recurring_grant(grant=grant)
+    now = utc(2025, 3, 15)
+
+    run = asyncio.run(make_scheduler(store).arun(now))
+    assert run.succeeded == [str(grant.id)]
+    # The grant is still due (the fake does not record the payment), but its interval is claimed
+    run = asyncio.run(make_scheduler(store).arun(now))
+    assert run.skipped == [str(grant.id)]
+    assert service.payments == [str(grant.id)]
+
+    # The next interval is claimed separately
+    run = asyncio.run(make_scheduler(store).arun(utc(2025, 4, 2)))
+    assert run.succeeded == [str(grant.id)]
+
+
+def test_overlapping_runs_pay_once(service: FakeService) -> None:
+    store = MemoryPaymentStore()
+    grants = [make_grant() for _ in range(3)]
+    for grant in grants:
+        store.save_active_recurring_grant(grant=grant)
+    service.delay = 0.05
+
+    async def overlapping_runs():
+        now = utc(2025, 3, 15)
+        return await asyncio.gather(make_scheduler(store).arun(now), make_scheduler(store).arun(now))
+
+    runs = asyncio.run(overlapping_runs())
+    assert sorted(service.payments) == sorted(str(grant.id) for grant in grants)
+    assert sum(len(run.succeeded) for run in runs) == 3
+    assert sum(len(run.skipped) for run in runs) == 3
+
+
+def test_failed_interval_released(service: FakeService) -> None:
+    store = MemoryPaymentStore()
+    grant = make_grant()
+    store.save_active_recurring_grant(grant=grant)
+    service.failures = 1
+    now = utc(2025, 3, 15)
+
+    run = asyncio.run(make_scheduler(store).arun(now))
+    assert run.failed == {str(grant.id): "Upstream unavailable"}
+    assert not service.payments
+    run = asyncio.run(make_scheduler(store).arun(now))
+    assert run.succeeded == [str(grant.id)]
+    assert service.payments == [str(grant.id)]
+
+
+def test_claim_ttl_covers_interval() -> None:
+    scheduler = make_scheduler(MemoryPaymentStore())
+    grant = make_grant(interval="R10/2025-01-01T00:00:00Z/P1W")
+    assert scheduler.get_claim_ttl(grant, 0, utc(2025, 1, 7)) == 24 * 3600
+    # At least `claim_ttl`, even at the very end of the interval
+    assert scheduler.get_claim_ttl(grant, 0, utc(2025, 1, 8)) == 60
+
+
+def test_unknown_outcome_keeps_interval(server: MockOpenPaymentsServer, monkeypatch: pytest.MonkeyPatch) -> None:
+    create = AsyncOutgoingPayments.post_create_payment
+
+    async def post_create_payment(self, **kwargs):
+        # The resource server creates the payment, but its response never arrives
+        await create(self, **kwargs)
+        raise httpx.ReadTimeout("No response")
+
+    monkeypatch.setattr(AsyncOutgoingPayments, "post_create_payment", post_create_payment)
+
+    async def start_grant() -> str:
+        service = await acreate_recurring_payment_service()
+        redirect, grant_id = await service.astart_recurring_grant_flow(
+            debit_amount="1000",
+            total_cap="10000",
+            interval="R10/2025-01-01T00:00:00Z/P1W",
+            max_payments=10,
+            redirect_uri_base=service.redirect_uri,
+        )
+        interaction = server.approve(redirect)
+        await service.acomplete_recurring_grant_flow(
+            grant_id=grant_id, interact_ref=interaction.interact_ref, received_hash=interaction.hash
+        )
+        return str(grant_id)
+
+    grant_id = asyncio.run(start_grant())
+    scheduler = make_scheduler(get_payment_store())
+    run = asyncio.run(scheduler.arun(utc(2025, 1, 3)))
+    assert "may have been made" in run.failed[grant_id]
+    # The grant was not marked paid, but its interval stays claimed past `claim_ttl`
+    run = asyncio.run(scheduler.arun(utc(2025, 1, 3, 0, 2)))
+    assert run.skipped == [grant_id]
+    assert len(server.resources["outgoing-payments"]) == 1
+
+
+def test_invalid_interval_skipped(service: FakeService) -> None:
+    store = MemoryPaymentStore()
+    valid = make_grant()
+    store.save_active_recurring_grant(grant=valid)
+    store.save_active_recurring_grant(grant=make_grant(interval="every month"))
+    run = asyncio.run(make_scheduler(store).arun(utc(2025, 3, 15)))
+    assert run.succeeded == [str(valid.id)]
+    assert not run.failed
@@ -0,0 +1,223 @@
+import asyncio
+from types import SimpleNamespace
+from urllib.parse import urlsplit
+
+import httpx
+import pytest
+from pydantic import ValidationError
+from ulid import ULID
+
+from app.benchmarks.mock_open_payments import MockOpenPaymentsServer
+from app.benchmarks.payment_flows import SPLIT_RECIPIENTS
+from app.schemas.payments import PendingSplitPayment, SplitPaymentStartRequest, SplitRecipient
+from app.services.split_payment_service import (
+    SplitPaymentService,
+    acreate_split_payment_service,
+    get_contributor_recipients,
+    split_amount,
+)
+
+AUTHOR, ILLUSTRATOR, TRANSLATOR = (urlsplit(wallet_address).hostname for wallet_address, _, _ in SPLIT_RECIPIENTS)
+
+
+@pytest.mark.parametrize(
+    "amount, ratios, shares",
+    [
+        (100, [1, 1, 1], ["34", "33", "33"]),
+        (7, [1, 2], ["2", "5"]),
+        ("10", [0.55, 0.45], ["6", "4"]),
+        (5, [0, 1], ["0", "5"]),
+        (1, [0.2, 0.3, 0.5], ["0", "0", "1"]),
+        (1000, [0.1, 0.2, 0.7], ["100", "200", "700"]),
+    ],
+)
+def test_split_amount(amount, ratios: list[float], shares: list[str]) -> None:
+    assert split_amount(amount, ratios) == shares
+    assert sum(int(share) for share in shares) == int(amount)
+
+
+@pytest.mark.parametrize("amount, ratios", [(0, [1]), (-5, [1]), (10, [0, 0]), (10, [])])
+def test_split_amount_invalid(amount: int, ratios: list[float]) -> None:
+    with pytest.raises(ValueError):
+        split_amount(amount, ratios)
+
+
+def make_contributor(name: str, ratio: float, asset_codes: tuple[str, ...] = ("MXN",)) -> SimpleNamespace:
+    wallets = [
+        SimpleNamespace(assetCode=asset_code, address=f"https://{name}.example/{asset_code}", creator_id=name)
+        for asset_code in asset_codes
+    ]
+    return SimpleNamespace(id=name, ratio=ratio, actor=SimpleNamespace(creator=SimpleNamespace(op_wallets=wallets)))
+
+
+def test_contributor_recipients_by_ratio() -> None:
+    contributors = [
+        make_contributor("author", 0.5, ("USD", "MXN")),
+        make_contributor("illustrator", 0.3),
+        make_contributor("translator", 0.2),
+        make_contributor("editor", None),
+    ]
+    recipients = get_contributor_recipients(contributors, amount="1001", asset_code="MXN")
+    assert [(recipient.wallet_address, recipient.amount, recipient.creator_id) for recipient in recipients] == [
+        ("https://author.example/MXN", "501", "author"),
+        ("https://illustrator.example/MXN", "300", "illustrator"),
+        ("https://translator.example/MXN", "200", "translator"),
+    ]
+
+
+def test_contributor_recipients_without_share_dropped() -> None:
+    contributors = [make_contributor("author", 0.9), make_contributor("translator", 0.1)]
+    recipients = get_contributor_recipients(contributors, amount=1, asset_code="MXN")
+    assert [recipient.creator_id for recipient in recipients] == ["author"]
+
+
+@pytest.mark.parametrize(
+    "contributor",
+    [
+        make_contributor("translator", 0.5, asset_codes=()),
+        make_contributor("translator", 0.5, asset_codes=("USD",)),
+        SimpleNamespace(id="translator", ratio=0.5, actor=None),
+        SimpleNamespace(id="translator", ratio=0.5, actor=SimpleNamespace(creator=None)),
+    ],
+)
+def test_contributor_without_wallet(contributor: SimpleNamespace) -> None:
+    with pytest.raises(ValueError, match="translator"):
+        get_contributor_recipients([make_contributor("author", 0.5), contributor], amount=100, asset_code="MXN")
+
+
+def test_no_contributors() -> None:
+    with pytest.raises(ValueError):
+        get_contributor_recipients([make_contributor("editor", None)], amount=100, asset_code="MXN")
+
+
+def test_start_request_recipients() -> None:
+    product = {"product_id": str(ULID()), "price_id": str(ULID()), "country": "MX"}
+    recipient = {"wallet_address": "https://author.example/MXN", "amount": "100"}
+    assert SplitPaymentStartRequest(recipients=[recipient]).recipients
+    assert SplitPaymentStartRequest(**product).recipients == []
+    # A Product's contributors are paid, never recipients posted by the client
+    with pytest.raises(ValidationError):
+        SplitPaymentStartRequest(**product, recipients=[recipient])
+    with pytest.raises(ValidationError):
+        SplitPaymentStartRequest()
+
+
+def fail_outgoing_payments(
+    service: SplitPaymentService, server: MockOpenPaymentsServer, failures: dict[str, list[Exception]]
+) -> dict[str, int]:
+    """
+    Make the buyer's resource server raise the next of `failures[host]` for payments to a recipient host.
+
+    Returns the number of outgoing payments attempted per recipient host.
+    """
+    outgoing_payments = service.service.async_client.outgoing_payments
+    create = outgoing_payments.post_create_payment
+    attempts = {}
+
+    async def post_create_payment(payment, resource_server_endpoint: str, access_token: str):
+        host = urlsplit(server.resources["quotes"][str(payment.root.quoteId)]["receiver"]).hostname
+        attempts[host] = attempts.get(host, 0) + 1
+        if failures.get(host):
+            raise failures[host].pop(0)
+        return await create(
+            payment=payment, resource_server_endpoint=resource_server_endpoint, access_token=access_token
+        )
+
+    outgoing_payments.post_create_payment = post_create_payment
+    return attempts
+
+
+def status_error(status_code: int) -> httpx.HTTPStatusError:
+    request = httpx.Request("POST", "https://buyer.example/outgoing-payments")
+    return httpx.HTTPStatusError(
+        f"{status_code}", request=request, response=httpx.Response(status_code, request=request)
+    )
+
+
+def run_split(server: MockOpenPaymentsServer, failures: dict[str, list[Exception]], rate: float = None):
+    """
+    Start a split to every contributor, then complete it with `failures`, optionally at a new USD to MXN rate.
+
+    Returns the completed split and the outgoing payments attempted per recipient host.
+    """
+
+    async def start_and_complete() -> tuple[PendingSplitPayment, dict[str, int]]:
+        service = await acreate_split_payment_service()
+        recipients = [
+            SplitRecipient(wallet_address=wallet_address, amount=amount)
+            for wallet_address, _, amount in SPLIT_RECIPIENTS
+        ]
+        redirect, pending_split = await service.astart(recipients=recipients)
+        interaction = server.approve(redirect)
+        attempts = fail_outgoing_payments(service, server, failures)
+        if rate is not None:
+            server.rates[("USD", "MXN")] = rate
+        split = await service.acomplete(
+            payment_id=pending_split.id, interact_ref=interaction.interact_ref, received_hash=interaction.hash
+        )
+        return split, attempts
+
+    return asyncio.run(start_and_complete())
+
+
+def get_legs(split: PendingSplitPayment) -> dict:
+    return {urlsplit(leg.wallet_address).hostname: leg for leg in split.legs}
+
+
+def is_closed(server: MockOpenPaymentsServer, leg) -> bool:
+    return server.resources["incoming-payments"][str(leg.incoming_payment_id)]["completed"]
+
+
+def test_all_legs_paid(server: MockOpenPaymentsServer) -> None:
+    split, attempts = run_split(server, {})
+    assert [leg.status for leg in split.legs] == ["paid"] * 3
+    assert attempts == {AUTHOR: 1, ILLUSTRATOR: 1, TRANSLATOR: 1}
+
+
+def test_rejected_leg_requoted_and_paid(server: MockOpenPaymentsServer) -> None:
+    split, attempts = run_split(server, {TRANSLATOR: [status_error(403)]})
+    legs = get_legs(split)
+    assert [leg.status for leg in split.legs] == ["paid"] * 3
+    assert legs[TRANSLATOR].error is None
+    assert attempts[TRANSLATOR] == 2
+
+
+def test_rejected_again_leg_failed_and_closed(server: MockOpenPaymentsServer) -> None:
+    split, attempts = run_split(server, {TRANSLATOR: [status_error(400), status_error(400)]})
+    legs = get_legs(split)
+    assert legs[TRANSLATOR].status == "failed"
+    assert attempts[TRANSLATOR] == 2
+    assert is_closed(server, legs[TRANSLATOR])
+    assert legs[AUTHOR].status == legs[ILLUSTRATOR].status == "paid"
+
+
+@pytest.mark.parametrize("error", [status_error(502), httpx.ReadTimeout("No response")])
+def test_unknown_leg_never_retried(server: MockOpenPaymentsServer, error: Exception) -> None:
+    split, attempts = run_split(server, {AUTHOR: [error]})
+    legs = get_legs(split)
+    assert legs[AUTHOR].status == "unknown"
+    assert legs[AUTHOR].error
+    assert attempts[AUTHOR] == 1
+    # The payment may have been created, so its incoming payment stays open
+    assert not is_closed(server, legs[AUTHOR])
+    assert legs[ILLUSTRATOR].status == legs[TRANSLATOR].status == "paid"
+
+
+def test_requote_over_remaining_grant_failed(server: MockOpenPaymentsServer) -> None:
+    # The dollar rises while the buyer authorizes: the translator's requote no longer fits the grant
+    split, attempts = run_split(server, {TRANSLATOR: [status_error(403)]}, rate=21.0)
+    legs = get_legs(split)
+    assert legs[TRANSLATOR].status == "failed"
+    assert "exceeds" in legs[TRANSLATOR].error
+    assert attempts[TRANSLATOR] == 1
+    assert is_closed(server, legs[TRANSLATOR])
+    assert legs[AUTHOR].status == legs[ILLUSTRATOR].status == "paid"
+
+
+def test_unknown_leg_counts_against_remaining_grant(server: MockOpenPaymentsServer) -> None:
+    # The author's debit may have been spent, so only the translator's own share is left for its requote
+    split, attempts = run_split(server, {AUTHOR: [status_error(503)], TRANSLATOR: [status_error(403)]}, rate=20.5)
+    legs = get_legs(split)
+    assert legs[AUTHOR].status == "unknown"
+    assert legs[TRANSLATOR].status == "failed"
+    assert attempts == {AUTHOR: 1, ILLUSTRATOR: 1, TRANSLATOR: 1}
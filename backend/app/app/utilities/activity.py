@@ -20,7 +20,7 @@ along with this program.  If not, see <http:#www.gnu.org/licenses/>.
 
 from typing import Any
 from fastapi import Request, Response, HTTPException
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 
 import orjson
 from functools import wraps
@@ -102,7 +102,7 @@ def verify_request_signature(endpoint):
     # WAS: https://codeberg.org/bovine/cattle_grid/src/commit/336feea0079ba559a1482d956ee0cc4b81a612d1/cattle_grid/signature.py
     # NOW: https://codeberg.org/bovine/bovine/src/branch/main/bovine/bovine/crypto/signature.py
     @wraps(endpoint)
-    async def wrapper(*, db: Session, request: Request, **kwargs):
+    async def wrapper(*, db: AsyncSession, request: Request, **kwargs):
         # Returns an error message, or the original data
         # 1. Reject large requests
         body = await request.json()
@@ -126,13 +126,13 @@ def verify_request_signature(endpoint):
                 status_code=400,
                 detail="Unspecified actor.",
             )
-        target_actor = crud_actor.get_by_uri(db=db, URI=target_url)
+        target_actor = await crud_actor.aget_by_uri(db=db, URI=target_url)
         if not target_actor:
             raise HTTPException(
                 status_code=400,
                 detail="Unspecified actor.",
             )
-        service_actor = crud_actor.get_site_actor(db=db)
+        service_actor = await crud_actor.aget_site_actor(db=db)
         await service_actor.init()
         # 4. Validate the poster http signature
         verify = build_validate_http_signature_raw(fetch_public_key(service_actor))
@@ -0,0 +1,94 @@
+"""Hop Sauna
+
+SPDX-FileCopyrightText: Copyright (C) Whythawk and Hop Sauna Authors ask@whythawk.com
+SPDX-License-Identifier: AGPL-3.0-or-later
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU Affero General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU Affero General Public License for more details.
+
+You should have received a copy of the GNU Affero General Public License
+along with this program.  If not, see <http:#www.gnu.org/licenses/>.
+
+"""
+
+import csv
+import io
+from datetime import datetime
+from enum import Enum
+from itertools import batched
+from typing import Any, Iterator
+
+import orjson
+from sqlalchemy.engine import MappingResult
+from sqlalchemy_utils import Country, Currency
+
+from app.core.config import settings
+from app.db.session import SessionLocal
+from app.schema_types import ExportFormatType
+
+EXPORT_MEDIA_TYPES = {
+    ExportFormatType.Ndjson: "application/x-ndjson",
+    ExportFormatType.Csv: "text/csv",
+}
+
+
+def _default(value: Any) -> str:
+    # Currencies and countries are exported as their ISO codes, not their display names
+    if isinstance(value, (Currency, Country)):
+        return value.code
+    return str(value)
+
+
+def _csv_value(value: Any) -> str:
+    if value is None:
+        return ""
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, Enum):
+        return value.value
+    return _default(value)
+
+
+def encode_ndjson(rows: MappingResult, *, batch_size: int = settings.EXPORT_BATCH_SIZE) -> Iterator[bytes]:
+    """One JSON object per line, yielded `batch_size` lines at a time."""
+    for batch in batched(rows, batch_size):
+        yield b"".join(orjson.dumps(dict(row), default=_default, option=orjson.OPT_APPEND_NEWLINE) for row in batch)
+
+
+def encode_csv(rows: MappingResult, *, batch_size: int = settings.EXPORT_BATCH_SIZE) -> Iterator[bytes]:
+    """A header of the column names, then one line per row, yielded `batch_size` lines at a time."""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(rows.keys())
+    for batch in batched(rows, batch_size):
+        writer.writerows([_csv_value(value) for value in row.values()] for row in batch)
+        yield buffer.getvalue().encode()
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        # No rows, so only the header
+        yield buffer.getvalue().encode()
+
+
+def stream_export(
+    crud_obj: Any,
+    *,
+    export_format: ExportFormatType = ExportFormatType.Ndjson,
+    batch_size: int = settings.EXPORT_BATCH_SIZE,
+    **filters,
+) -> Iterator[bytes]:
+    """
+    Encode the `get_export` rows of `crud_obj` as they are read from the database.
+
+    The export holds its own session, since the request's session is closed before a streamed response is sent.
+    """
+    encode = encode_csv if export_format == ExportFormatType.Csv else encode_ndjson
+    with SessionLocal() as db:
+        yield from encode(crud_obj.get_export(db, batch_size=batch_size, **filters), batch_size=batch_size)
@@ -3,16 +3,165 @@
 Utility module for Open Payments SDK configuration.
 """
 
-from app.open_payments_sdk.http import HttpClient
-from app.open_payments_sdk.client.client import OpenPaymentsClient
+import hashlib
+import threading
+from functools import lru_cache
+
+from app.open_payments_sdk.http import AsyncHttpClient, HttpClient
+from app.open_payments_sdk.gnap_utils.security import clear_signers
+from app.open_payments_sdk.client.client import AsyncOpenPaymentsClient, OpenPaymentsClient
+from app.open_payments_sdk.utils.cache import AccessTokenCache, RedisCacheBackend, WalletCache
+from app.open_payments_sdk.utils.metrics import OpenPaymentsMetrics
+from app.open_payments_sdk.utils.resilience import CircuitBreaker, RetryPolicy
+from app.db.cache import get_async_redis, get_redis
 from app.utilities.openpayments import paymentsparser
 from app.schemas.openpayments.open_payments import SellerOpenPaymentAccount
 from app.core.config import settings
 
 
-def create_http_client(timeout: float = 10.0) -> HttpClient:
-    """Create an HTTP client for Open Payments SDK."""
-    return HttpClient(http_timeout=timeout)
+# Process-wide connection pool, shared by every client and service in this worker
+_http_client: HttpClient | None = None
+_async_http_client: AsyncHttpClient | None = None
+_wallet_cache: WalletCache | None = None
+_access_token_cache: AccessTokenCache | None = None
+_metrics: OpenPaymentsMetrics | None = None
+_circuit_breaker: CircuitBreaker | None = None
+
+# Process-wide registry of ready clients, keyed by (wallet address, key id). Each entry also records a fingerprint
+# of the private key it was built with, so a rotated key replaces the client on next use.
+_op_clients: dict[tuple[str, str], tuple[str, OpenPaymentsClient]] = {}
+_async_op_clients: dict[tuple[str, str], tuple[str, AsyncOpenPaymentsClient]] = {}
+_op_clients_lock = threading.Lock()
+
+
+def get_metrics() -> OpenPaymentsMetrics | None:
+    """Get the process-wide Open Payments call metrics, or None when `OPEN_PAYMENTS_METRICS` is off."""
+    global _metrics
+    if _metrics is None and settings.OPEN_PAYMENTS_METRICS:
+        _metrics = OpenPaymentsMetrics(log_requests=settings.OPEN_PAYMENTS_METRICS_LOG)
+    return _metrics
+
+
+def get_retry_policy() -> RetryPolicy:
+    """Retry policy for idempotent Open Payments calls."""
+    return RetryPolicy(
+        attempts=settings.OPEN_PAYMENTS_RETRY_ATTEMPTS,
+        backoff=settings.OPEN_PAYMENTS_RETRY_BACKOFF,
+        max_backoff=settings.OPEN_PAYMENTS_RETRY_MAX_BACKOFF,
+    )
+
+
+def get_circuit_breaker() -> CircuitBreaker:
+    """
+    Get the process-wide per-host circuit breaker, shared by the sync and async clients so that a failing wallet
+    provider is cut off for both.
+    """
+    global _circuit_breaker
+    if _circuit_breaker is None:
+        _circuit_breaker = CircuitBreaker(
+            failure_threshold=settings.OPEN_PAYMENTS_CIRCUIT_FAILURE_THRESHOLD,
+            reset_timeout=settings.OPEN_PAYMENTS_CIRCUIT_RESET_TIMEOUT,
+        )
+    return _circuit_breaker
+
+
+def create_http_client(timeout: float = settings.OPEN_PAYMENTS_HTTP_TIMEOUT) -> HttpClient:
+    """Create a new pooled HTTP client for Open Payments SDK."""
+    return HttpClient(
+        http_timeout=timeout,
+        max_connections=settings.OPEN_PAYMENTS_MAX_CONNECTIONS,
+        max_keepalive_connections=settings.OPEN_PAYMENTS_MAX_KEEPALIVE_CONNECTIONS,
+        keepalive_expiry=settings.OPEN_PAYMENTS_KEEPALIVE_EXPIRY,
+        http2=settings.OPEN_PAYMENTS_HTTP2,
+        metrics=get_metrics(),
+        connect_timeout=settings.OPEN_PAYMENTS_CONNECT_TIMEOUT,
+        retry=get_retry_policy(),
+        circuit_breaker=get_circuit_breaker(),
+    )
+
+
+def get_http_client() -> HttpClient:
+    """
+    Get the shared HTTP client, creating it on first use.
+
+    All Open Payments calls in this process reuse its keep-alive connections.
+    """
+    global _http_client
+    if _http_client is None or _http_client.is_closed:
+        _http_client = create_http_client()
+    return _http_client
+
+
+def close_http_client() -> None:
+    """Close the shared HTTP client. Called on application shutdown."""
+    global _http_client
+    if _http_client is not None:
+        _http_client.close()
+        _http_client = None
+
+
+def create_async_http_client(timeout: float = settings.OPEN_PAYMENTS_HTTP_TIMEOUT) -> AsyncHttpClient:
+    """Create a new pooled async HTTP client for Open Payments SDK."""
+    return AsyncHttpClient(
+        http_timeout=timeout,
+        max_connections=settings.OPEN_PAYMENTS_MAX_CONNECTIONS,
+        max_keepalive_connections=settings.OPEN_PAYMENTS_MAX_KEEPALIVE_CONNECTIONS,
+        keepalive_expiry=settings.OPEN_PAYMENTS_KEEPALIVE_EXPIRY,
+        http2=settings.OPEN_PAYMENTS_HTTP2,
+        metrics=get_metrics(),
+        connect_timeout=settings.OPEN_PAYMENTS_CONNECT_TIMEOUT,
+        retry=get_retry_policy(),
+        circuit_breaker=get_circuit_breaker(),
+    )
+
+
+def get_async_http_client() -> AsyncHttpClient:
+    """Get the shared async HTTP client, creating it on first use."""
+    global _async_http_client
+    if _async_http_client is None or _async_http_client.is_closed:
+        _async_http_client = create_async_http_client()
+    return _async_http_client
+
+
+async def close_async_http_client() -> None:
+    """Close the shared async HTTP client. Called on application shutdown."""
+    global _async_http_client
+    if _async_http_client is not None:
+        await _async_http_client.aclose()
+        _async_http_client = None
+
+
+def use_http_clients(
+    *, http_client: HttpClient = None, async_http_client: AsyncHttpClient = None, wallet_cache: WalletCache = None
+) -> None:
+    """
+    Replace the shared HTTP clients and, optionally, the wallet cache, e.g. to route every Open Payments call to a
+    local stand-in server. Clients already in the registry are dropped, so the next lookup uses the new ones.
+    """
+    global _http_client, _async_http_client, _wallet_cache
+    if http_client:
+        _http_client = http_client
+    if async_http_client:
+        _async_http_client = async_http_client
+    if wallet_cache:
+        _wallet_cache = wallet_cache
+    clear_op_clients()
+
+
+def get_wallet_cache() -> WalletCache:
+    """
+    Get the shared wallet address and JWKS cache, creating it on first use.
+
+    Entries live in Redis, so a wallet resolved by one worker is a hit for every other worker.
+    """
+    global _wallet_cache
+    if _wallet_cache is None:
+        _wallet_cache = WalletCache(
+            backend=RedisCacheBackend(redis=get_redis(), async_redis=get_async_redis()),
+            default_ttl=settings.OPEN_PAYMENTS_WALLET_CACHE_TTL,
+            stale_ttl=settings.OPEN_PAYMENTS_WALLET_CACHE_STALE_TTL,
+        )
+    return _wallet_cache
 
 
 def create_op_client(
@@ -28,13 +177,13 @@ def create_op_client(
         wallet_address: Wallet address URL
         key_id: Key ID for authentication
         private_key: Private key (will be converted to PEM format)
-        http_client: Optional HTTP client (creates one if not provided)
+        http_client: Optional HTTP client (uses the shared client if not provided)
 
     Returns:
         Configured OpenPaymentsClient instance
     """
     if not http_client:
-        http_client = create_http_client()
+        http_client = get_http_client()
 
     # Normalize wallet address and private key
     normalized_wallet = paymentsparser.normalise_wallet_address(wallet_address=wallet_address)
@@ -45,9 +194,94 @@ def create_op_client(
         private_key=pem_key,
         client_wallet_address=normalized_wallet,
         http_client=http_client,
+        wallet_cache=get_wallet_cache(),
+    )
+
+
+def create_async_op_client(
+    wallet_address: str,
+    key_id: str,
+    private_key: str,
+    http_client: AsyncHttpClient = None
+) -> AsyncOpenPaymentsClient:
+    """
+    Create an AsyncOpenPaymentsClient instance. Same arguments as `create_op_client`.
+    """
+    if not http_client:
+        http_client = get_async_http_client()
+
+    normalized_wallet = paymentsparser.normalise_wallet_address(wallet_address=wallet_address)
+    pem_key = paymentsparser.convert_private_key_to_PEM(private_key=private_key)
+
+    return AsyncOpenPaymentsClient(
+        keyid=key_id,
+        private_key=pem_key,
+        client_wallet_address=normalized_wallet,
+        http_client=http_client,
+        wallet_cache=get_wallet_cache(),
     )
 
 
+def _get_key_fingerprint(private_key: str) -> str:
+    return hashlib.sha256(private_key.encode("utf-8")).hexdigest()
+
+
+def _get_registered_client(registry: dict, wallet_address: str, key_id: str, private_key: str, create_client):
+    key = (wallet_address, key_id)
+    fingerprint = _get_key_fingerprint(private_key)
+    entry = registry.get(key)
+    if entry and entry[0] == fingerprint and not entry[1].http_client.is_closed:
+        return entry[1]
+    with _op_clients_lock:
+        entry = registry.get(key)
+        if entry and entry[0] == fingerprint and not entry[1].http_client.is_closed:
+            return entry[1]
+        client = create_client(wallet_address=wallet_address, key_id=key_id, private_key=private_key)
+        registry[key] = (fingerprint, client)
+        return client
+
+
+def get_access_token_cache() -> AccessTokenCache:
+    """Get the shared cache of non-interactive grant access tokens, creating it on first use."""
+    global _access_token_cache
+    if _access_token_cache is None:
+        _access_token_cache = AccessTokenCache(rotation_margin=settings.OPEN_PAYMENTS_TOKEN_ROTATION_MARGIN)
+    return _access_token_cache
+
+
+def get_op_client(wallet_address: str, key_id: str, private_key: str) -> OpenPaymentsClient:
+    """
+    Get a ready OpenPaymentsClient from the process-wide registry, building it on first use.
+
+    Clients are rebuilt if the private key for a wallet and key id changes, or the shared HTTP client was closed.
+    """
+    return _get_registered_client(_op_clients, wallet_address, key_id, private_key, create_op_client)
+
+
+def get_async_op_client(wallet_address: str, key_id: str, private_key: str) -> AsyncOpenPaymentsClient:
+    """Get a ready AsyncOpenPaymentsClient from the process-wide registry. Same rules as `get_op_client`."""
+    return _get_registered_client(_async_op_clients, wallet_address, key_id, private_key, create_async_op_client)
+
+
+def clear_op_clients() -> None:
+    """
+    Empty the client registry, the seller account cache and the shared signers.
+
+    Call after settings are reloaded or keys are rotated.
+    """
+    with _op_clients_lock:
+        _op_clients.clear()
+        _async_op_clients.clear()
+    get_seller_account.cache_clear()
+    clear_signers()
+
+
+@lru_cache(maxsize=32)
+def get_seller_account(wallet_address: str, key_id: str, private_key: str) -> SellerOpenPaymentAccount:
+    """Cached `create_seller_account`, so the key is converted to PEM once per set of credentials."""
+    return create_seller_account(wallet_address=wallet_address, key_id=key_id, private_key=private_key)
+
+
 def create_seller_account(wallet_address: str, key_id: str, private_key: str) -> SellerOpenPaymentAccount:
     """
     Create a SellerOpenPaymentAccount from credentials.
@@ -70,7 +304,7 @@ def create_seller_account(wallet_address: str, key_id: str, private_key: str) ->
 # Pre-configured wallet accounts for the hackathon
 def get_migrante_wallet() -> SellerOpenPaymentAccount:
     """Get Migrante (Pancho) wallet configuration - USD wallet."""
-    return create_seller_account(
+    return get_seller_account(
         wallet_address=settings.MIGRANTE_WALLET_ADDRESS,
         key_id=settings.MIGRANTE_KEY_ID,
         private_key=settings.MIGRANTE_PRIVATE_KEY,
@@ -79,7 +313,7 @@ def get_migrante_wallet() -> SellerOpenPaymentAccount:
 
 def get_finsus_wallet() -> SellerOpenPaymentAccount:
     """Get FINSUS (Destinatario) wallet configuration - MXN wallet."""
-    return create_seller_account(
+    return get_seller_account(
         wallet_address=settings.FINSUS_WALLET_ADDRESS,
         key_id=settings.FINSUS_KEY_ID,
         private_key=settings.FINSUS_PRIVATE_KEY,
@@ -88,8 +322,17 @@ def get_finsus_wallet() -> SellerOpenPaymentAccount:
 
 def get_merchant_wallet() -> SellerOpenPaymentAccount:
     """Get Merchant wallet configuration - MXN wallet."""
-    return create_seller_account(
+    return get_seller_account(
         wallet_address=settings.MERCHANT_WALLET_ADDRESS,
         key_id=settings.MERCHANT_KEY_ID,
         private_key=settings.MERCHANT_PRIVATE_KEY,
     )
+
+
+def get_configured_account(wallet_address: str) -> SellerOpenPaymentAccount | None:
+    """Get the configured account (Migrante, FINSUS or Merchant) for a wallet address, if any."""
+    wallet_address = paymentsparser.normalise_wallet_address(wallet_address=wallet_address)
+    for account in (get_migrante_wallet(), get_finsus_wallet(), get_merchant_wallet()):
+        if paymentsparser.normalise_wallet_address(wallet_address=account.walletAddressUrl) == wallet_address:
+            return account
+    return None
@@ -20,4 +20,7 @@ along with this program.  If not, see <http:#www.gnu.org/licenses/>.
 
 from app.core.celery_app import celery_app  # noqa: F401
 
+from .fx_quotes import refresh_fx_quotes  # noqa: F401
+from .reconciliation import reconcile_outgoing_payments  # noqa: F401
+from .recurring import run_recurring_payments  # noqa: F401
 from .tests import test_celery  # noqa: F401
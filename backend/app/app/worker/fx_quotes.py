@@ -0,0 +1,33 @@
+"""Hop Sauna
+
+SPDX-FileCopyrightText: Copyright (C) Whythawk and Hop Sauna Authors ask@whythawk.com
+SPDX-License-Identifier: AGPL-3.0-or-later
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU Affero General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU Affero General Public License for more details.
+
+You should have received a copy of the GNU Affero General Public License
+along with this program.  If not, see <http:#www.gnu.org/licenses/>.
+
+"""
+
+
+from app.core.celery_app import celery_app
+from app.services.quote_service import acreate_migrante_quote_service
+from app.worker.loop import get_event_loop
+
+
+async def arefresh_migrante_quotes() -> int:
+    return await (await acreate_migrante_quote_service()).arefresh()
+
+
+@celery_app.task(acks_late=True, ignore_result=True)
+def refresh_fx_quotes() -> int:
+    return get_event_loop().run_until_complete(arefresh_migrante_quotes())